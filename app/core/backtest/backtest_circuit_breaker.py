@@ -65,6 +65,21 @@ class BacktestCircuitBreaker:
                 self._reason = "max_consecutive_losses"
                 self._last_trip_bar = bar_index
 
+    @property
+    def tripped(self) -> bool:
+        return self._tripped
+
+    def would_trip(self, equity: float, peak_equity: float, consecutive_losses: int) -> bool:
+        """
+        この状態で update() したらトリップするか（状態は変えない。イベント駆動コアが
+        何も起きないバーの update() を省けるかの判定に使う）。
+        """
+        peak = max(self._peak_equity, equity, peak_equity)
+        dd = (equity / peak - 1.0) if peak > 0 else 0.0
+        if self.max_drawdown > 0 and dd <= -self.max_drawdown:
+            return True
+        return self.max_consecutive_losses > 0 and consecutive_losses >= self.max_consecutive_losses
+
     def can_enter(self, bar_index: int) -> bool:
         """
         新規エントリーしてよいか。tripped かつ cooldown 中でなければ True。
@@ -44,15 +44,18 @@ def _enrich_active_model_meta(meta: dict, model_obj=None) -> dict:
 
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 import csv
+import shutil
 
 import numpy as np
 import pandas as pd
 
 from app.core.backtest.simulated_execution import SimulatedExecution
+from app.core.decision_log_writer import DecisionLogWriter
+from app.core.backtest.event_core import SIDE_BUY, SIDE_SELL, signal_sides, simulate_events
 from app.core.trade.decision_logic import decide_signal
-from app.core.filter.strategy_filter_engine import StrategyFilterEngine
+from app.core.filter.strategy_filter_engine import REASON_LOSING_STREAK, StrategyFilterEngine
 from app.services.filter_service import evaluate_entry
 from app.services.profile_stats_service import get_profile_stats_service
 from app.strategies.ai_strategy import (
@@ -64,10 +67,12 @@ from app.strategies.ai_strategy import (
     _load_model_generic,
     _load_scaler_if_any,
     _ensure_feature_order,
+    PROJECT_ROOT,
 )
 
 # region agent log
 # Debug mode NDJSON logger (no secrets)
+import os as _os
 import time as _time
 
 _DEBUG_LOG_PATH = r"d:\fxbot\.cursor\debug.log"
@@ -76,6 +81,9 @@ _DEBUG_RUN_ID = "obs1"
 
 
 def _dbg(hypothesisId: str, location: str, message: str, data: dict) -> None:
+    # 出力先のフォルダが無い環境（Windows 以外・CI・テスト）では何もしない（相対パスのファイルを作らない）
+    if not _os.path.isdir(_os.path.dirname(_DEBUG_LOG_PATH)):
+        return
     try:
         payload = {
             "sessionId": _DEBUG_SESSION_ID,
@@ -124,6 +132,14 @@ class BacktestEngine:
         breaker: Optional[Any] = None,
         threshold_override: Optional[float] = None,
         threshold_source: Optional[str] = None,
+        batch_inference: bool = True,
+        proba_cache: bool = True,
+        feature_store: bool = False,
+        event_core: bool = False,
+        proba_cache_store: Optional[Any] = None,
+        feature_builder: Optional[Callable[[pd.DataFrame, str, str], pd.DataFrame]] = None,
+        model_registry: Optional[Any] = None,
+        update_aggregate_decisions: bool = True,
     ):
         """
         Parameters
@@ -141,8 +157,45 @@ class BacktestEngine:
             - min_holding_bars: int = 0 (最低保有バー数)
             - tp_sl_eval_from_next_bar: bool = False (TP/SLを次バー以降で評価)
             - exit_on_reverse_signal_only: bool = False (逆シグナル時のみexit)
+        batch_inference : bool
+            True の場合、バーループ前に全特徴量行列を1回で推論する（既定）。
+            False の場合は従来通りバーごとに _predict を呼ぶ。
+        proba_cache : bool
+            True の場合、バッチ推論の結果を proba_cache_store に保存し、
+            同じモデル・特徴量の行は再推論しない（threshold / filter_level 違いの再実行は推論ゼロ）。
+        feature_store : bool
+            True の場合、特徴量を feature_builder（特徴量ストアの計算済み行列）から作る（新しいバーだけ計算）。
+            df が symbol の data/<SYM>/ohlcv の CSV から読んだものである前提。値は全履歴から計算した
+            特徴量になる（期間の先頭でも warm-up 分の行が落ちない）。
+        event_core : bool
+            True の場合、run() のポジションシミュレーションを app.core.backtest.event_core の
+            イベント駆動コアで行う（シグナル・決済候補のバーだけを辿る）。trades.csv / equity_curve.csv は
+            バーループと同じ。decisions.jsonl はエントリー・決済が起きたバーだけを書く。
+            バッチ推論できない場合はバーループにフォールバックする。
+        proba_cache_store : module, optional
+            推論確率キャッシュの実装（cache_key / get_proba_cache / feature_row_hashes を持つもの。
+            通常は app.services.backtest_deps.backtest_engine_deps() で app.services.proba_cache を渡す）。
+            core はサービス層を import しないため、None の場合は proba_cache=True でもキャッシュしない。
+        feature_builder : callable, optional
+            feature_store=True のときの特徴量ビルダー (df, symbol, timeframe) -> DataFrame
+            （通常は app.services.feature_store.build_features_cached）。None なら毎回 build_features で計算する。
+        model_registry : optional
+            load(model_payload, model_params) でモデル・スケーラー・class_index_map を返すレジストリ
+            （通常は app.services.model_registry.get_model_registry()。プロセス内で1回だけロードする）。
+            None ならこのエンジンで直接ロードする。
+        update_aggregate_decisions : bool
+            True の場合、run() の最後に out_dir の decisions.jsonl を out_dir.parent/decisions.jsonl へコピーする（既定）。
+            同じ親ディレクトリの下で複数の試行を並列に走らせる場合（パラメータスイープ）は False にする。
         """
         self.profile = profile
+        self.batch_inference = bool(batch_inference)
+        self.use_proba_cache = bool(proba_cache)
+        self.proba_cache_store = proba_cache_store
+        self.feature_builder = feature_builder
+        self.model_registry = model_registry
+        self.update_aggregate_decisions = bool(update_aggregate_decisions)
+        self.use_feature_store = bool(feature_store)
+        self.use_event_core = bool(event_core)
         self.initial_capital = initial_capital
         self.contract_size = contract_size
         self.filter_level = filter_level
@@ -186,8 +239,11 @@ class BacktestEngine:
         # 連敗カウンタ（バックテスト中に動的に更新）
         self.consecutive_losses = 0
 
-        # decisions.jsonl の記録用
-        self.decisions: List[Dict[str, Any]] = []
+        # decisions.jsonl の記録用（run() 中にストリーミング追記し、メモリには溜めない）
+        self._decision_writer: Optional[DecisionLogWriter] = None
+        self._decisions_path: Optional[Path] = None
+        self._first_decision: Optional[Dict[str, Any]] = None
+        self._n_decisions = 0
 
         # ExitPolicy適用ログ（常に出力、source 付き）
         print(
@@ -435,14 +491,22 @@ class BacktestEngine:
                     # builtinモデルは予測時に処理
                     pass
                 else:
-                    # 外部モデルをロード
-                    self.model = _load_model_generic(self.model_payload)
-                    # スケーラーをロード
-                    self.scaler = _load_scaler_if_any(self.model_params)
+                    if self.model_registry is not None:
+                        # 外部モデル・スケーラー（プロセス内で1回だけロード。class_index_map もロード時に確定済み）
+                        loaded = self.model_registry.load(self.model_payload, self.model_params)
+                        self.model = loaded.model
+                        self.scaler = loaded.scaler
+                        class_index_map = loaded.class_index_map
+                    else:
+                        self.model = _load_model_generic(self.model_payload)
+                        self.scaler = _load_scaler_if_any(self.model_params)
+                        class_index_map = (
+                            self._determine_class_index_map(self.model) if self.model is not None else None
+                        )
 
                     # model.classes_ を観測して BUY/SELL の index を確定（初回のみログ出力）
                     if self.model is not None:
-                        self._class_index_map = self._determine_class_index_map(self.model)
+                        self._class_index_map = class_index_map
                         if self._class_index_map:
                             print(
                                 f"[ai_model] classes_={list(self._class_index_map.get('classes', []))} "
@@ -482,6 +546,89 @@ class BacktestEngine:
                     },
                 )
 
+    def _apply_scaler(self, Xv: np.ndarray) -> np.ndarray:
+        """
+        self.scaler を 2D ndarray に適用する（_predict / _predict_batch 共通）
+        """
+        try:
+            # 標準のsklearn系（StandardScaler など）
+            return self.scaler.transform(Xv)
+        except AttributeError:
+            # dict / (mean, scale) / ndarray を許容
+            if isinstance(self.scaler, dict) and ("mean" in self.scaler or "scale" in self.scaler):
+                mean = np.asarray(self.scaler.get("mean", np.zeros(Xv.shape[1])))
+                scale = np.asarray(self.scaler.get("scale", np.ones(Xv.shape[1])))
+                return (Xv - mean) / (scale + 1e-12)
+            elif isinstance(self.scaler, (tuple, list)) and len(self.scaler) >= 2:
+                mean = np.asarray(self.scaler[0])
+                scale = np.asarray(self.scaler[1])
+                return (Xv - mean) / (scale + 1e-12)
+            elif isinstance(self.scaler, np.ndarray):
+                mean = self.scaler
+                return (Xv - mean)
+        return Xv
+
+    def _predict_batch(self, df_features: pd.DataFrame) -> Optional[np.ndarray]:
+        """
+        特徴量行列全体を1回で推論し、(n, 2) の [p_buy, p_sell] 配列を返す。
+
+        _predict と同じ前処理（feature_order / scaler / class_index_map / 0〜1 クリップ）を
+        ndarray に一括適用する。バッチ推論できない場合は None（呼び出し側で _predict にフォールバック）。
+        class_index_map が未確定の場合は _predict と同様に安全停止（全行 p_buy=p_sell=0）。
+        """
+        n = len(df_features)
+        try:
+            self._ensure_model_loaded()
+            if self.model_kind == "builtin" or self.model is None or n == 0:
+                return None
+
+            feat_cols = [c for c in df_features.columns if c not in ["time", "close"]]
+            X = _ensure_feature_order(df_features.loc[:, feat_cols].astype(float), self.model_params)
+            Xvals = np.asarray(X.values, dtype=float)
+            if self.scaler is not None:
+                Xvals = np.asarray(self._apply_scaler(Xvals), dtype=float)
+            X = pd.DataFrame(Xvals, index=X.index, columns=X.columns)
+
+            proba = np.asarray(_predict_proba_generic(self.model, X))
+
+            # 出力: proba を (n, 2) に正規化（_predict と同じ規約）
+            if proba.ndim == 1 and len(proba) == n:
+                p = proba.astype(float)
+                proba = np.column_stack([1.0 - p, p])
+            if proba.ndim != 2 or proba.shape[0] != n:
+                print(
+                    f"[BacktestEngine._predict_batch] proba.shape={proba.shape} は未対応。バー単位推論にフォールバック。",
+                    flush=True,
+                )
+                return None
+            print(f"[BT-OBS] _predict_batch X.shape={Xvals.shape} proba.shape={proba.shape}", flush=True)
+
+            out = np.zeros((n, 2), dtype=float)
+            buy_idx = (self._class_index_map or {}).get("buy_index")
+            sell_idx = (self._class_index_map or {}).get("sell_index")
+            if proba.shape[1] >= 2 and buy_idx is not None and sell_idx is not None:
+                out[:, 0] = proba[:, buy_idx]
+                out[:, 1] = proba[:, sell_idx]
+            elif not self._warned_classmap_undetermined:
+                self._warned_classmap_undetermined = True
+                print(
+                    "[BacktestEngine._predict_batch] class_index_map が未確定。安全停止（p_buy=p_sell=0）。",
+                    flush=True,
+                )
+            return np.clip(out, 0.0, 1.0)
+        except Exception as e:
+            print(f"[BacktestEngine] Batch prediction failed: {e} -> fallback to per-bar _predict", flush=True)
+            _dbg(
+                "A",
+                "app/core/backtest/backtest_engine.py:_predict_batch",
+                "exception -> fallback per-bar",
+                {
+                    "exc_type": type(e).__name__,
+                    "exc_msg": str(e)[:300],
+                },
+            )
+            return None
+
     def _predict(self, features_dict: Dict[str, float]) -> ProbOut:
         """
         特徴量辞書から予測確率を取得する（ai_service 依存を避けるため）
@@ -558,23 +705,7 @@ class BacktestEngine:
 
             # スケーラーを適用
             if self.scaler is not None:
-                Xv = X.values
-                try:
-                    # 標準のsklearn系（StandardScaler など）
-                    Xv = self.scaler.transform(Xv)
-                except AttributeError:
-                    # dict / (mean, scale) / ndarray を許容
-                    if isinstance(self.scaler, dict) and ("mean" in self.scaler or "scale" in self.scaler):
-                        mean = np.asarray(self.scaler.get("mean", np.zeros(Xv.shape[1])))
-                        scale = np.asarray(self.scaler.get("scale", np.ones(Xv.shape[1])))
-                        Xv = (Xv - mean) / (scale + 1e-12)
-                    elif isinstance(self.scaler, (tuple, list)) and len(self.scaler) >= 2:
-                        mean = np.asarray(self.scaler[0])
-                        scale = np.asarray(self.scaler[1])
-                        Xv = (Xv - mean) / (scale + 1e-12)
-                    elif isinstance(self.scaler, np.ndarray):
-                        mean = self.scaler
-                        Xv = (Xv - mean)
+                Xv = self._apply_scaler(X.values)
                 # DataFrameに戻す
                 X = pd.DataFrame(Xv, index=X.index, columns=X.columns)
 
@@ -752,47 +883,25 @@ class BacktestEngine:
         filters_ctx["filter_reasons"] = reasons_list
         return filters_ctx
 
-    def run(
-        self,
-        df: pd.DataFrame,
-        out_dir: Path,
-        symbol: str = "USDJPY-",
-    ) -> Dict[str, Any]:
+    def prepare_features(self, df: pd.DataFrame, symbol: Optional[str] = None, timeframe: str = "M5") -> pd.DataFrame:
         """
-        バックテストを実行する
+        OHLCV から特徴量を構築し、active_model.json の feature_order で整形する（run の前処理）。
+        feature_store=True かつ symbol 指定時は feature_builder（特徴量ストアの計算済み行列）を使う。
 
-        Parameters
-        ----------
-        df : pd.DataFrame
-            OHLCVデータ（time, open, high, low, close, volume を含む）
-        out_dir : Path
-            出力ディレクトリ
-        symbol : str
-            シンボル名
-
-        Returns
-        -------
-        dict
-            バックテスト結果（equity_curve, trades, decisions のパスなど）
+        戻り値は time, close + feature_order の列を持つ DataFrame。
+        threshold / filter_level に依存しないので、スイープでは1回だけ作って使い回せる。
         """
-        # --- Step2-18: background band timeline (HOLD/BLOCKED) ---
-        timeline_rows = []  # list[dict]: {time, kind, reason}
-        _tl_last_kind = None
-        _tl_last_reason = None
-
         # データの準備
         df = df.copy()
         df["time"] = pd.to_datetime(df["time"])
         df = df.sort_values("time").reset_index(drop=True)
 
-        # ExitPolicy用：エントリー時のバーインデックスを記録（SimulatedTradeに追加）
-        # entry_bar_index を保持するための辞書（trade_id -> bar_index）
-        self._entry_bar_indices: Dict[int, int] = {}
-        self._next_trade_id = 0
-
         # 特徴量を構築
         print(f"[BacktestEngine] Building features...", flush=True)
-        df_features = build_features(df, params={})
+        if self.use_feature_store and symbol and self.feature_builder is not None:
+            df_features = self.feature_builder(df, symbol, timeframe)
+        else:
+            df_features = build_features(df, params={})
 
         # 必須列の補完
         if "time" not in df_features.columns:
@@ -825,6 +934,154 @@ class BacktestEngine:
         keep_cols.extend(feature_order)
         df_features = df_features[keep_cols]
 
+        return df_features
+
+    def predict_probs(self, df_features: pd.DataFrame, symbol: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        prepare_features() の結果を一括推論した (n, 2) の [p_buy, p_sell]。
+        batch_inference=False またはバッチ推論できない場合は None（run はバー単位推論になる）。
+
+        symbol を渡し、proba_cache が有効なら推論確率キャッシュを引き、足りない行だけ推論する。
+        """
+        if not self.batch_inference:
+            return None
+        if self.use_proba_cache and symbol and self.proba_cache_store is not None:
+            try:
+                probs = self._predict_batch_cached(df_features, symbol)
+                if probs is not None:
+                    return probs
+            except Exception as e:
+                print(f"[BacktestEngine] proba cache unavailable: {e} -> plain batch inference", flush=True)
+        print(f"[BacktestEngine] Batch inference over {len(df_features)} bars...", flush=True)
+        return self._predict_batch(df_features)
+
+    def _proba_cache_for(self, df_features: pd.DataFrame, symbol: str):
+        """active_model のモデル・スケーラー・特徴量順に対応する ProbaCache（外部モデル以外は None）。"""
+        if self.model_kind != "pickle" or not self.model_payload:
+            return None
+        scaler_name = (self.model_params or {}).get("scaler_name")
+        scaler_path = PROJECT_ROOT / "models" / "scalers" / f"{scaler_name}.pkl" if scaler_name else None
+        feat_cols = [c for c in df_features.columns if c not in ["time", "close"]]
+        key = self.proba_cache_store.cache_key(self.model_payload, feat_cols, scaler_path)
+        return self.proba_cache_store.get_proba_cache(symbol, key)
+
+    def _predict_batch_cached(self, df_features: pd.DataFrame, symbol: str) -> Optional[np.ndarray]:
+        """
+        推論確率キャッシュを引き、未キャッシュ（または特徴量が変わった）行だけ _predict_batch する。
+        キャッシュを使えない場合は None（呼び出し側で通常のバッチ推論）。
+        """
+        cache = self._proba_cache_for(df_features, symbol)
+        if cache is None:
+            return None
+        feat_cols = [c for c in df_features.columns if c not in ["time", "close"]]
+        fhash = self.proba_cache_store.feature_row_hashes(df_features.loc[:, feat_cols])
+        probs, missing = cache.lookup(df_features["time"], fhash)
+        n = len(df_features)
+        print(
+            f"[BacktestEngine] proba cache hit {n - missing.size}/{n} bars, inferring {missing.size} ({cache.path.name})",
+            flush=True,
+        )
+        if missing.size == 0:
+            return probs
+
+        sub = self._predict_batch(df_features.iloc[missing])
+        if sub is None:
+            return None
+        probs[missing] = sub
+        # class_index_map 未確定（安全停止の 0 埋め）はキャッシュしない
+        cmap = self._class_index_map or {}
+        if cmap.get("buy_index") is not None and cmap.get("sell_index") is not None:
+            try:
+                cache.store(df_features["time"].iloc[missing], fhash[missing], sub)
+            except Exception as e:
+                print(f"[BacktestEngine] proba cache store failed: {e}", flush=True)
+        return probs
+
+    def run(
+        self,
+        df: Optional[pd.DataFrame],
+        out_dir: Path,
+        symbol: str = "USDJPY-",
+        *,
+        features: Optional[pd.DataFrame] = None,
+        probs: Optional[np.ndarray] = None,
+    ) -> Dict[str, Any]:
+        """
+        バックテストを実行する
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            OHLCVデータ（time, open, high, low, close, volume を含む）
+        out_dir : Path
+            出力ディレクトリ
+        symbol : str
+            シンボル名
+        features : pd.DataFrame, optional
+            prepare_features() の結果。指定時は df からの特徴量構築を省く（df は None 可）
+        probs : np.ndarray, optional
+            features に対応する (n, 2) の [p_buy, p_sell]。指定時はバッチ推論を省く
+            （パラメータスイープで特徴量・推論を1回だけ行い、条件ごとに使い回すため）
+
+        Returns
+        -------
+        dict
+            バックテスト結果（equity_curve, trades, decisions のパスなど）
+        """
+        try:
+            return self._run_backtest(df, out_dir, symbol, features=features, probs=probs)
+        finally:
+            # 途中で例外になっても decisions.jsonl の書き込みスレッドを残さない（正常終了時は _generate_outputs で閉じ済み）
+            self._close_decision_writer()
+
+    def _close_decision_writer(self) -> None:
+        """decisions.jsonl の書き込みスレッドを、溜まっている分を書き出してから止める。"""
+        if self._decision_writer is not None:
+            self._decision_writer.close(timeout=None)
+            self._decision_writer = None
+
+    def _run_backtest(
+        self,
+        df: Optional[pd.DataFrame],
+        out_dir: Path,
+        symbol: str,
+        *,
+        features: Optional[pd.DataFrame],
+        probs: Optional[np.ndarray],
+    ) -> Dict[str, Any]:
+        """run() の本体（引数は run() と同じ）。"""
+        # --- Step2-18: background band timeline (HOLD/BLOCKED) ---
+        timeline_rows = []  # list[dict]: {time, kind, reason}
+        _tl_last_kind = None
+        _tl_last_reason = None
+
+        # ExitPolicy用：エントリー時のバーインデックスを記録（SimulatedTradeに追加）
+        # entry_bar_index を保持するための辞書（trade_id -> bar_index）
+        self._entry_bar_indices: Dict[int, int] = {}
+        self._next_trade_id = 0
+
+        if features is None:
+            df_features = self.prepare_features(df, symbol=symbol)
+        else:
+            df_features = features
+        if probs is not None and np.shape(probs) != (len(df_features), 2):
+            raise ValueError(
+                f"[BacktestEngine] probs shape {np.shape(probs)} does not match features ({len(df_features)}, 2)"
+            )
+
+        # イベント駆動コア（特徴量・推論確率が揃っていれば、バーループを回さない）
+        if self.use_event_core:
+            event_probs = probs if probs is not None else self.predict_probs(df_features, symbol=symbol)
+            idx = df_features.index
+            if (
+                event_probs is not None
+                and isinstance(idx, pd.RangeIndex) and idx.start == 0 and idx.step == 1
+                and "time" in df_features.columns and "close" in df_features.columns
+            ):
+                return self._run_event_core(df_features, np.asarray(event_probs, dtype=np.float64), out_dir, symbol)
+            print("[BacktestEngine][warn] event_core: no batch probs / non-RangeIndex -> bar loop", flush=True)
+            probs = event_probs
+
         # 各バーを処理
         print(f"[BacktestEngine] Processing {len(df_features)} bars...", flush=True)
 
@@ -871,11 +1128,30 @@ class BacktestEngine:
         # live_stats.json のパス（実行中リアルタイム更新用）
         live_stats_path = out_dir / "live_stats.json"
 
+        # decisions.jsonl のストリーミング追記用（バックグラウンドでまとめて書く）
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self._decisions_path = out_dir / "decisions.jsonl"
+        self._decisions_path.write_text("", encoding="utf-8")
+        self._decision_writer = DecisionLogWriter(
+            fsync="none", flush_bytes=1024 * 1024, name="backtest-decision-log"
+        )
+        self._first_decision = None
+        self._n_decisions = 0
+
         from tools.backtest_run import iter_with_progress
         self._obs_unsafe_stop_log_count = 0
         self._obs_skip_log_count = 0
         self._obs_shape_log_count = 0
-        for idx, row in iter_with_progress(df_features, step=5, use_iterrows=True):
+
+        # バッチ推論：バーループ前に全行を1回で推論（ループ内はフィルタ/ポジション/決済のみ）
+        batch_probs = probs if probs is not None else self.predict_probs(df_features, symbol=symbol)
+
+        # フィルタも全バーを配列演算でまとめて評価（ループ内では連敗回避だけをバーごとに足す）
+        filter_frame = self.filter_engine.evaluate_frame(
+            df_features, self.filter_level, profile_stats=self._current_profile_stats()
+        )
+
+        for pos, (idx, row) in enumerate(iter_with_progress(df_features, step=5, use_iterrows=True)):
             timestamp = pd.Timestamp(row["time"])
             price = float(row["close"])
             self._obs_bar_index = idx
@@ -892,19 +1168,24 @@ class BacktestEngine:
             except Exception:
                 pass
 
-            # 特徴量を辞書形式に変換
-            features_dict = {col: float(row[col]) for col in df_features.columns if col not in ["time", "close"]}
+            if batch_probs is not None:
+                ai_out = ProbOut(batch_probs[pos, 0], batch_probs[pos, 1], 0.0)
+            else:
+                # 特徴量を辞書形式に変換
+                features_dict = {col: float(row[col]) for col in df_features.columns if col not in ["time", "close"]}
 
-            # 予測を実行（ai_service 依存を避けるため）（_predict 内で bar_index/ts 観測用に self._obs_* を参照）
-            ai_out = self._predict(features_dict)
+                # 予測を実行（ai_service 依存を避けるため）（_predict 内で bar_index/ts 観測用に self._obs_* を参照）
+                ai_out = self._predict(features_dict)
 
             # EntryContext を作成
             entry_context = self._build_entry_context(row, timestamp)
 
-            # FilterEngine.evaluate を呼ぶ
+            # フィルタ判定（evaluate_frame の結果 + 連敗回避。FilterEngine.evaluate と同じ結果）
             # filter_level を entry_context に追加
             entry_context["filter_level"] = self.filter_level
-            filter_pass, filter_reasons = self.filter_engine.evaluate(entry_context, filter_level=self.filter_level)
+            filter_pass, filter_reasons = self.filter_engine.evaluate_at(
+                filter_frame, pos, consecutive_losses=self.consecutive_losses
+            )
 
             # --- Step2-18: add timeline point when kind changes ---
             try:
@@ -991,7 +1272,7 @@ class BacktestEngine:
                 decision=decision,
                 entry_context=entry_context,
             )
-            self.decisions.append(decision_trace)
+            self._append_decision(decision_trace, symbol)
 
             # filter_pass = False の場合は見送り
             if not filter_pass:
@@ -1448,6 +1729,207 @@ class BacktestEngine:
 
         return result
 
+    def _run_event_core(
+        self,
+        df_features: pd.DataFrame,
+        probs: np.ndarray,
+        out_dir: Path,
+        symbol: str,
+    ) -> Dict[str, Any]:
+        """
+        run() のイベント駆動版（event_core=True 時）
+
+        フィルタは evaluate_frame、シグナルは signal_sides で全バーまとめて求め、
+        ポジションシミュレーションは event_core.simulate_events に任せる。
+        trades.csv / equity_curve.csv / next_action_timeline.csv / monthly_returns.csv はバーループと同じ内容。
+        decisions.jsonl はエントリー・決済が起きたバーの分だけ書く（集約 decisions.jsonl は更新しない）。
+        """
+        n = len(df_features)
+        print(f"[BacktestEngine] Processing {n} bars (event core)...", flush=True)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        times = df_features["time"]
+        close = df_features["close"].to_numpy(dtype=np.float64)
+
+        # flat: start以前は取引を抑止（バーループと同じ条件。比較できなければ抑止しない）
+        tradeable = np.ones(n, dtype=bool)
+        if self.init_position == "flat" and self.trade_start_ts is not None:
+            try:
+                tradeable = ~np.asarray(pd.to_datetime(times) < self.trade_start_ts, dtype=bool)
+            except Exception:
+                pass
+
+        frame = self.filter_engine.evaluate_frame(
+            df_features, self.filter_level, profile_stats=self._current_profile_stats()
+        )
+        sides = signal_sides(probs[:, 0], probs[:, 1], self.best_threshold)
+        level = frame.filter_level
+
+        res = simulate_events(
+            close,
+            sides,
+            tradeable & frame.passed,
+            initial_capital=self.executor.initial_capital,
+            contract_size=self.executor.contract_size,
+            min_holding_bars=self.exit_policy["min_holding_bars"],
+            exit_on_reverse_signal_only=self.exit_policy["exit_on_reverse_signal_only"],
+            consecutive_losses=self.consecutive_losses,
+            streak_blocks=lambda losses: level >= 3 and self.filter_engine.losing_streak_hit(losses),
+            breaker=self.breaker,
+        )
+
+        # --- 約定を SimulatedExecution に取り込む（_generate_outputs / live_stats は従来どおり executor を読む）---
+        def ts_at(i: int) -> pd.Timestamp:
+            return pd.Timestamp(times.iloc[int(i)])
+
+        has_atr = "atr" in df_features.columns
+        self.executor.record_closed_trades(
+            entry_times=[ts_at(i) for i in res.entry_pos],
+            entry_prices=res.entry_price,
+            exit_times=[ts_at(i) for i in res.exit_pos],
+            exit_prices=res.exit_price,
+            sides=["BUY" if v == SIDE_BUY else "SELL" for v in res.side],
+            lots=res.lot,
+            pnls=res.pnl,
+            atrs=[float(df_features["atr"].iloc[int(i)]) for i in res.entry_pos] if has_atr else None,
+        )
+
+        # --- equity_curve.csv（バーループと同じく、エントリーしたバーの equity を書く）---
+        if res.equity_pos.size:
+            equity_csv_path = out_dir / "equity_curve.csv"
+            try:
+                with open(equity_csv_path, "w", encoding="utf-8", newline="") as f:
+                    f.write("time,equity,signal\n")
+                    for i, eq in zip(res.equity_pos.tolist(), res.equity_value.tolist()):
+                        f.write(f"{ts_at(i)},{eq:.2f},HOLD\n")
+            except Exception as e:
+                print(f"[BacktestEngine][warn] Failed to write equity_curve.csv: {e!r}", flush=True)
+
+        # --- バーごとの最終フィルタ結果（連敗回避で止まった後は losing_streak 付きで NG）---
+        final_bits = frame.reason_bits.copy()
+        if res.filter_block_from < n:
+            final_bits[res.filter_block_from:] |= REASON_LOSING_STREAK
+        passed_final = tradeable & (final_bits == 0)
+
+        # --- next_action_timeline.csv 用（HOLD/BLOCKED と理由が変わったバーだけ）---
+        trade_pos = np.flatnonzero(tradeable)
+        tb = final_bits[trade_pos]
+        change = np.ones(tb.size, dtype=bool)
+        change[1:] = tb[1:] != tb[:-1]
+        timeline_rows = []
+        for i in trade_pos[change].tolist():
+            bits = int(final_bits[i])
+            timeline_rows.append({
+                "time": str(ts_at(i)),
+                "kind": "HOLD" if bits == 0 else "BLOCKED",
+                "reason": ";".join(frame.reasons_from_bits(bits)),
+            })
+        self._timeline_rows = timeline_rows
+
+        # --- decisions.jsonl（エントリー・決済のバーだけ。中身はバーループと同じ形式）---
+        self._decisions_path = out_dir / "decisions.jsonl"
+        self._decisions_path.write_text("", encoding="utf-8")
+        self._decision_writer = DecisionLogWriter(
+            fsync="none", flush_bytes=1024 * 1024, name="backtest-decision-log"
+        )
+        self._first_decision = None
+        self._n_decisions = 0
+        for i, streak in zip(res.event_pos.tolist(), res.event_streak.tolist()):
+            row = df_features.iloc[i]
+            timestamp = pd.Timestamp(row["time"])
+            self.consecutive_losses = streak
+            entry_context = self._build_entry_context(row, timestamp)
+            entry_context["filter_level"] = self.filter_level
+            filter_pass, filter_reasons = self.filter_engine.evaluate_at(frame, i, consecutive_losses=streak)
+            ai_out = ProbOut(probs[i, 0], probs[i, 1], 0.0)
+            decision = self._build_decision(
+                ai_out=ai_out, filter_pass=filter_pass, filter_reasons=filter_reasons, entry_context=entry_context
+            )
+            self._append_decision(
+                self._build_decision_trace(
+                    timestamp=timestamp, symbol=symbol, ai_out=ai_out, decision=decision, entry_context=entry_context
+                ),
+                symbol,
+            )
+        self.consecutive_losses = res.consecutive_losses
+
+        # --- デバッグカウンタ（配列から集計）---
+        n_trades = res.n_trades
+        cb = np.zeros(n, dtype=bool)
+        cb[res.cb_blocked_pos] = True
+        # 各バーの判定時点でポジション保有中か（エントリーの次バー〜決済バーの前。強制決済は最終バーまで）
+        open_diff = np.zeros(n + 1, dtype=np.int64)
+        for k, (e, x) in enumerate(zip(res.entry_pos.tolist(), res.exit_pos.tolist())):
+            stop = n if (res.forced_close and k == n_trades - 1) else x
+            if stop > e + 1:
+                open_diff[e + 1] += 1
+                open_diff[stop] -= 1
+        open_at_check = np.cumsum(open_diff[:n]) > 0
+        gate = passed_final & ~cb
+        blocked = gate & (sides != 0) & open_at_check
+        skipped = gate & (sides == 0) & ~open_at_check
+        # 最初にエントリーを見送ったバーの理由（バーループの entry_block_reason と同じ）
+        block_events = []
+        if blocked.any():
+            block_events.append((int(np.argmax(blocked)), "already_in_position"))
+        if skipped.any():
+            block_events.append((int(np.argmax(skipped)), "action_not_entry:SKIP"))
+
+        failed_pos = np.flatnonzero(tradeable & ~passed_final)
+        if failed_pos.size:
+            reasons0 = frame.reasons_from_bits(int(final_bits[failed_pos[0]]))
+            filter_fail_reason = str(reasons0[0]) if reasons0 else "unknown"
+        else:
+            filter_fail_reason = None
+
+        entry_sides = res.side
+        n_signal_buy = int((tradeable & (sides == SIDE_BUY)).sum())
+        n_signal_sell = int((tradeable & (sides == SIDE_SELL)).sum())
+        n_skips = int(skipped.sum())
+        debug_counters = {
+            "n_signal_buy": n_signal_buy,
+            "n_signal_sell": n_signal_sell,
+            "n_filter_pass": int(passed_final.sum()),
+            "n_filter_fail": int(failed_pos.size),
+            "n_entries": n_trades,
+            "n_exits": n_trades,
+            "n_entry_attempts": int(passed_final.sum()),
+            "filter_fail_reason": filter_fail_reason,
+            "filter_fail_reason_count": 0,
+            "entry_block_reason": min(block_events)[1] if block_events else None,
+            "sum_holding_bars_closed": int((res.exit_pos - res.entry_pos).sum()),
+            "n_closed_trades": n_trades,
+            "peak_equity": res.peak_equity,
+            "max_drawdown": res.max_drawdown,
+            "entry_bar_indices": res.entry_pos.tolist(),
+            "signal_buy_count": n_signal_buy,
+            "signal_sell_count": n_signal_sell,
+            "entry_buy_count": int((entry_sides == SIDE_BUY).sum()),
+            "entry_sell_count": int((entry_sides == SIDE_SELL).sum()),
+            "blocked_buy_count": int((blocked & (sides == SIDE_BUY)).sum()),
+            "blocked_sell_count": int((blocked & (sides == SIDE_SELL)).sum()),
+            "bt_cb_blocked": int(res.cb_blocked_pos.size),
+            "n_skips": n_skips,
+            "skip_reason_count": {"other:SKIP": n_skips} if n_skips else {},
+            "used_threshold": float(getattr(self, "best_threshold", 0.52)),
+            "threshold_source": str(getattr(self, "_threshold_source", "default")),
+            "n_bars": n,
+            "core": "event",
+            "n_bars_visited": res.n_visited,
+        }
+        try:
+            self._write_live_stats(out_dir / "live_stats.json", debug_counters, df_features, n)
+        except Exception as e:
+            print(f"[BacktestEngine][warn] Failed to write final live_stats.json: {e!r}", flush=True)
+
+        print(f"[BacktestEngine] Generating output files...", flush=True)
+        result = self._generate_outputs(df_features, out_dir, symbol, event_core=True)
+        debug_counters["n_trades"] = n_trades
+        debug_counters["n_signals"] = n_signal_buy + n_signal_sell
+        result["debug_counters"] = debug_counters
+        # バーループなら decisions.jsonl に書かれる行数（スイープの N_intent 用）
+        result["n_bars_evaluated"] = int(tradeable.sum())
+        return result
+
     def _build_entry_context(self, row: pd.Series, timestamp: pd.Timestamp) -> Dict[str, Any]:
         """
         EntryContext を作成する
@@ -1464,24 +1946,26 @@ class BacktestEngine:
         dict
             EntryContext
         """
-        # プロファイル統計を取得
-        profile_stats = {}
-        try:
-            stats = self.profile_stats_service.get_profile_stats([self.profile])
-            if self.profile in stats:
-                profile_stats = stats[self.profile].to_dict()
-        except Exception:
-            pass
-
         return {
             "timestamp": timestamp,
             "atr": float(row.get("atr", 0.0)) if "atr" in row else None,
             "volatility": float(row.get("volatility", 0.0)) if "volatility" in row else None,
             "trend_strength": float(row.get("trend_strength", 0.0)) if "trend_strength" in row else None,
             "consecutive_losses": self.consecutive_losses,
-            "profile_stats": profile_stats,
+            "profile_stats": self._current_profile_stats(),
         }
 
+    def _current_profile_stats(self) -> Dict[str, Any]:
+        """EntryContext / evaluate_frame に渡すプロファイル統計（取れなければ空）"""
+        profile_stats = {}
+        try:
+            stats = self.profile_stats_service.get_profile_stats([self.profile])
+            if self.profile in stats:
+                profile_stats = stats[self.profile].to_dict()
+        except Exception:
+            pass
+        return profile_stats
+
     def _build_decision(
         self,
         ai_out: Any,
@@ -1651,6 +2135,35 @@ class BacktestEngine:
             "runtime": runtime,  # 新規追加：環境状態のみ
         }
 
+    def _append_decision(self, decision_trace: Dict[str, Any], symbol: str) -> None:
+        """
+        decisions.jsonl へ1レコード追記する（書き込みは DecisionLogWriter がまとめて行う）
+
+        Parameters
+        ----------
+        decision_trace : dict
+            _build_decision_trace の戻り値
+        symbol : str
+            run() 引数のシンボル（運用ログと整合させるため絶対優先）
+        """
+        if isinstance(decision_trace, dict):
+            decision_trace["symbol"] = symbol
+        normalized = self._normalize_for_json_recursive(decision_trace)
+        # --- ensure action field for condition mining ---
+        if isinstance(normalized, dict) and ('action' not in normalized):
+            fp = normalized.get('filter_pass', None)
+            if fp is True:
+                normalized['action'] = 'ENTRY'
+            elif fp is False:
+                normalized['action'] = 'BLOCKED'
+            else:
+                normalized['action'] = 'HOLD'
+        # --- end action ---
+        if self._first_decision is None:
+            self._first_decision = normalized
+        self._decision_writer.write(self._decisions_path, normalized)
+        self._n_decisions += 1
+
     def _normalize_for_json(self, obj: Any) -> Any:
         """
         JSON シリアライズ可能な形式に変換する
@@ -1700,7 +2213,7 @@ class BacktestEngine:
             return tuple(self._normalize_for_json_recursive(v) for v in obj)
         return self._normalize_for_json(obj)
 
-    def _validate_outputs(self, outputs: Dict[str, Any]) -> Dict[str, Any]:
+    def _validate_outputs(self, outputs: Dict[str, Any], allow_empty_decisions: bool = False) -> Dict[str, Any]:
         """
         出力ファイルの検証を行う。
 
@@ -1708,6 +2221,8 @@ class BacktestEngine:
         ----------
         outputs : dict
             出力ファイルのパスを含む辞書
+        allow_empty_decisions : bool
+            decisions.jsonl が空でもよい（イベント駆動コアでエントリーが1件も無い場合）
 
         Returns
         -------
@@ -1781,7 +2296,7 @@ class BacktestEngine:
                             if isinstance(obj, dict):
                                 ok_any = True
                                 break
-                    if not ok_any:
+                    if not ok_any and not (allow_empty_decisions and dj.stat().st_size == 0):
                         errors.append("decisions.jsonl has no readable JSON dict line")
                 except Exception as e:
                     errors.append(f"failed to read decisions.jsonl: {e!r}")
@@ -1796,6 +2311,7 @@ class BacktestEngine:
         df_features: pd.DataFrame,
         out_dir: Path,
         symbol: str,
+        event_core: bool = False,
     ) -> Dict[str, Any]:
         """
         出力ファイルを生成する
@@ -1808,6 +2324,8 @@ class BacktestEngine:
             出力ディレクトリ
         symbol : str
             シンボル名
+        event_core : bool
+            イベント駆動コアの出力（decisions.jsonl はイベントのバーだけなので集約へはコピーせず、空も許す）
 
         Returns
         -------
@@ -1827,25 +2345,18 @@ class BacktestEngine:
 
             # バーインデックスを取得（df_features の time 列と照合）
             timestamps = pd.to_datetime(df_features["time"])
-            holding_bars_list = []
-            holding_days_list = []
 
-            for i, (entry_ts, exit_ts) in enumerate(zip(entry_times, exit_times)):
-                # entry と exit のバーインデックスを取得
-                entry_idx = timestamps.searchsorted(entry_ts, side="right") - 1
-                exit_idx = timestamps.searchsorted(exit_ts, side="right") - 1
+            # entry と exit のバーインデックスを取得 → holding_bars = exit_idx - entry_idx（0以上）
+            entry_idx = timestamps.searchsorted(entry_times, side="right") - 1
+            exit_idx = timestamps.searchsorted(exit_times, side="right") - 1
+            holding_bars = np.maximum(0, exit_idx - entry_idx)
 
-                # holding_bars = exit_idx - entry_idx（0以上）
-                holding_bars = max(0, exit_idx - entry_idx)
-                holding_bars_list.append(holding_bars)
-
-                # holding_days = (exit_time - entry_time).days
-                holding_days = (exit_ts - entry_ts).days
-                holding_days_list.append(holding_days)
+            # holding_days = (exit_time - entry_time).days
+            holding_days = (exit_times - entry_times).dt.days
 
             trades_df = trades_df.copy()
-            trades_df["holding_bars"] = holding_bars_list
-            trades_df["holding_days"] = holding_days_list
+            trades_df["holding_bars"] = holding_bars
+            trades_df["holding_days"] = holding_days.to_numpy()
 
         # エクイティ曲線を生成
         timestamps = pd.to_datetime(df_features["time"])
@@ -1892,45 +2403,26 @@ class BacktestEngine:
         compute_monthly_returns(equity_csv, monthly_csv)
         print(f"[BacktestEngine] Wrote {monthly_csv}", flush=True)
 
-        # decisions.jsonl を出力
+        # decisions.jsonl を出力（run() 中にストリーミング追記済み → 残りを書き出して閉じる）
+        # symbol は run() 引数を絶対優先（_append_decision で上書き済み。運用ログと整合させる）
         decisions_jsonl = out_dir / "decisions.jsonl"
+        self._close_decision_writer()
+        if not decisions_jsonl.exists():
+            decisions_jsonl.write_text("", encoding="utf-8")
         print(f"[BacktestEngine] _generate_outputs symbol(arg)={symbol!r}")
-        if self.decisions:
-            print(f"[BacktestEngine] decisions[0] type={type(self.decisions[0])} keys={list(self.decisions[0].keys())[:5] if isinstance(self.decisions[0], dict) else 'N/A'}")
-        # decisions.jsonl の最終整形：symbol は run() 引数を絶対優先（運用ログと整合させる）
-        # （生成側が USDJPY を入れても成果物は USDJPY- に統一される）
-        for rec in self.decisions:
-            if isinstance(rec, dict):
-                rec["symbol"] = symbol
-        if self.decisions and isinstance(self.decisions[0], dict):
-            print(f"[BacktestEngine] decisions[0].symbol(after)={self.decisions[0].get('symbol')!r}")
-        with open(decisions_jsonl, "w", encoding="utf-8") as f:
-            for decision in self.decisions:
-                normalized = self._normalize_for_json_recursive(decision)
-                # --- ensure action field for condition mining ---
-                if isinstance(normalized, dict) and ('action' not in normalized):
-                    fp = normalized.get('filter_pass', None)
-                    if fp is True:
-                        normalized['action'] = 'ENTRY'
-                    elif fp is False:
-                        normalized['action'] = 'BLOCKED'
-                    else:
-                        normalized['action'] = 'HOLD'
-                # --- end action ---
-                f.write(json.dumps(normalized, ensure_ascii=False) + "\n")
-        print(f"[BacktestEngine] Wrote {decisions_jsonl}", flush=True)
+        if isinstance(self._first_decision, dict):
+            print(f"[BacktestEngine] decisions[0] keys={list(self._first_decision.keys())[:5]} symbol={self._first_decision.get('symbol')!r}")
+        print(f"[BacktestEngine] Wrote {decisions_jsonl} rows={self._n_decisions}", flush=True)
 
         # --- 集約 decisions.jsonl を更新（M5直下） ---
         # 期間dir配下の decisions.jsonl が正なので、それを M5直下へ上書きして整合性を保つ
         agg_decisions_jsonl = out_dir.parent / "decisions.jsonl"
-        try:
-            with open(agg_decisions_jsonl, "w", encoding="utf-8") as f:
-                for decision in self.decisions:
-                    normalized = self._normalize_for_json_recursive(decision)
-                    f.write(json.dumps(normalized, ensure_ascii=False) + "\n")
-            print(f"[BacktestEngine] Wrote {agg_decisions_jsonl}", flush=True)
-        except Exception as e:
-            print(f"[BacktestEngine][warn] could not update aggregate decisions.jsonl: {e!r}", flush=True)
+        if not event_core and self.update_aggregate_decisions:
+            try:
+                shutil.copyfile(decisions_jsonl, agg_decisions_jsonl)
+                print(f"[BacktestEngine] Wrote {agg_decisions_jsonl}", flush=True)
+            except Exception as e:
+                print(f"[BacktestEngine][warn] could not update aggregate decisions.jsonl: {e!r}", flush=True)
 
         result = {
             "equity_curve": equity_csv,
@@ -1940,7 +2432,7 @@ class BacktestEngine:
         }
 
         # 出力ファイルの検証
-        validation_result = self._validate_outputs(result)
+        validation_result = self._validate_outputs(result, allow_empty_decisions=event_core)
         result["output_ok"] = validation_result["ok"]
         result["output_errors"] = validation_result["errors"]
 
@@ -0,0 +1,280 @@
+# app/core/backtest/event_core.py
+"""
+イベント駆動のバックテストコア（BacktestEngine(event_core=True) 用）
+
+特徴量・推論確率・フィルタ結果（StrategyFilterEngine.evaluate_frame）が揃った後の
+ポジションシミュレーションを、何かが起こり得るバーだけを辿って行う。
+
+- 辿るのは「フィルタ通過 かつ シグナルあり」のバー（ノーポジ時）と、決済候補のバー（保有時：
+  min_holding_bars 経過後の最初の通過バー／exit_on_reverse_signal_only なら最初の逆シグナルバー）だけ。
+  次の候補は通過バーの位置配列に対する searchsorted で求める
+- ポジション状態・約定はスカラー／事前確保した NumPy 配列に持ち、最後に配列で返す
+- 判定は BacktestEngine.run のバーループと同じ（同じバー・同じ価格・同じ順の損益加算）
+- 連敗回避（filter_level 3）で以降のバーが全て NG になったら、その時点で打ち切る
+- サーキットブレーカーがトリップ中／トリップし得る間だけは、通過バーを1本ずつ辿る
+  （クールダウン解除がバー位置に依存するため）
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+SIDE_BUY = 1
+SIDE_SELL = -1
+
+
+def signal_sides(p_buy: np.ndarray, p_sell: np.ndarray, threshold: float) -> np.ndarray:
+    """decide_signal の配列版。+1 = BUY, -1 = SELL, 0 = シグナルなし（未達・引き分け・NaN）"""
+    pb = np.asarray(p_buy, dtype=np.float64)
+    ps = np.asarray(p_sell, dtype=np.float64)
+    th = float(threshold)
+    sides = np.zeros(pb.shape, dtype=np.int8)
+    with np.errstate(invalid="ignore"):
+        sides[(pb > ps) & (pb >= th)] = SIDE_BUY
+        sides[(ps > pb) & (ps >= th)] = SIDE_SELL
+    return sides
+
+
+def _next_at_or_after(positions: np.ndarray, p: int) -> int:
+    """昇順の位置配列で p 以上の最初の位置（無ければ -1）"""
+    k = int(np.searchsorted(positions, p, side="left"))
+    return int(positions[k]) if k < positions.size else -1
+
+
+@dataclass
+class EventCoreResult:
+    """simulate_events の結果（約定は決済順、エクイティはエントリーしたバーの値）"""
+
+    entry_pos: np.ndarray
+    exit_pos: np.ndarray
+    side: np.ndarray
+    entry_price: np.ndarray
+    exit_price: np.ndarray
+    lot: np.ndarray
+    pnl: np.ndarray
+    equity_pos: np.ndarray
+    equity_value: np.ndarray
+    final_equity: float
+    consecutive_losses: int
+    peak_equity: float
+    max_drawdown: float
+    # 連敗回避で NG になり始めるバー位置（無ければ n_bars）
+    filter_block_from: int
+    # 決済・エントリーが起きたバー（decisions.jsonl 用）と、そのバー開始時点の連敗数
+    event_pos: np.ndarray
+    event_streak: np.ndarray
+    # サーキットブレーカーでエントリーが止められたバー
+    cb_blocked_pos: np.ndarray
+    n_visited: int = 0
+    forced_close: bool = False
+    exit_reason: List[str] = field(default_factory=list)
+
+    @property
+    def n_trades(self) -> int:
+        return int(self.pnl.size)
+
+
+def _breaker_may_act(breaker: Any, equity: float, peak: float, streak: int) -> bool:
+    """ブレーカーがトリップ中、または今の状態でトリップし得るなら True（1本ずつ辿る必要あり）"""
+    if breaker is None:
+        return False
+    would_trip = getattr(breaker, "would_trip", None)
+    if would_trip is None or not hasattr(breaker, "tripped"):
+        # 中身の分からないブレーカーは常に1本ずつ
+        return True
+    return bool(breaker.tripped) or bool(would_trip(equity, peak, streak))
+
+
+def simulate_events(
+    close: np.ndarray,
+    sides: np.ndarray,
+    eligible: np.ndarray,
+    *,
+    initial_capital: float,
+    contract_size: float,
+    lot: float = 0.1,
+    min_holding_bars: int = 0,
+    exit_on_reverse_signal_only: bool = False,
+    consecutive_losses: int = 0,
+    streak_blocks: Optional[Callable[[int], bool]] = None,
+    breaker: Any = None,
+) -> EventCoreResult:
+    """
+    ポジションシミュレーション本体
+
+    Parameters
+    ----------
+    close : np.ndarray
+        終値（バー位置 = 配列位置）
+    sides : np.ndarray
+        signal_sides の結果
+    eligible : np.ndarray
+        取引可能（trade_start_ts 以降）かつ連敗回避以外のフィルタを通過したバーで True
+    consecutive_losses : int
+        開始時の連敗数
+    streak_blocks : callable, optional
+        連敗数 → 連敗回避で NG になるか（StrategyFilterEngine.evaluate_at と同じ判定）
+    breaker : BacktestCircuitBreaker, optional
+        BacktestEngine.breaker（update / can_enter をバーループと同じバーで呼ぶ）
+    """
+    close = np.asarray(close, dtype=np.float64)
+    sides = np.asarray(sides, dtype=np.int8)
+    n = int(close.size)
+    last = n - 1
+
+    pos_all = np.flatnonzero(eligible)
+    pos_signal = np.flatnonzero(eligible & (sides != 0))
+    pos_buy = np.flatnonzero(eligible & (sides == SIDE_BUY))
+    pos_sell = np.flatnonzero(eligible & (sides == SIDE_SELL))
+    min_hold = int(min_holding_bars)
+    reverse_only = bool(exit_on_reverse_signal_only)
+
+    # 約定は最大でエントリー回数（= シグナルバー数）＋強制決済
+    cap = int(pos_signal.size) + 1
+    entry_pos = np.empty(cap, dtype=np.int64)
+    exit_pos = np.empty(cap, dtype=np.int64)
+    side_arr = np.empty(cap, dtype=np.int8)
+    entry_price = np.empty(cap, dtype=np.float64)
+    exit_price = np.empty(cap, dtype=np.float64)
+    pnl_arr = np.empty(cap, dtype=np.float64)
+    eq_pos = np.empty(cap, dtype=np.int64)
+    eq_val = np.empty(cap, dtype=np.float64)
+    exit_reason: List[str] = []
+    event_pos: List[int] = []
+    event_streak: List[int] = []
+    cb_blocked: List[int] = []
+
+    equity = float(initial_capital)
+    peak_equity = float(initial_capital)
+    max_dd = 0.0
+    streak = int(consecutive_losses)
+    n_closed = 0
+    n_eq = 0
+    n_visited = 0
+
+    is_open = False
+    cur_side = 0
+    cur_entry = -1
+    cur_price = 0.0
+    block_from = n
+
+    p = 0
+    while p < n:
+        if streak_blocks is not None and streak_blocks(streak):
+            block_from = p
+            break
+        # --- 次に処理するバーを決める ---
+        if _breaker_may_act(breaker, equity, peak_equity, streak):
+            q = _next_at_or_after(pos_all, p)
+        elif is_open:
+            lo = max(p, cur_entry + min_hold)
+            if reverse_only:
+                q = _next_at_or_after(pos_sell if cur_side == SIDE_BUY else pos_buy, lo)
+            else:
+                q = _next_at_or_after(pos_all, lo)
+        else:
+            q = _next_at_or_after(pos_signal, p)
+        if q < 0:
+            break
+        n_visited += 1
+        streak_at_start = streak
+        event = False
+
+        # --- 保有ポジションの決済判定（BacktestEngine.run と同じ順）---
+        if is_open and (q - cur_entry) >= min_hold:
+            sig = int(sides[q])
+            px: Optional[float] = None
+            if sig != 0 and sig != cur_side:
+                px, reason = float(close[q]), "reverse_signal"
+            elif not reverse_only and q < last:
+                px, reason = float(close[q + 1]), "next_bar"
+            if px is not None:
+                price_diff = px - cur_price if cur_side == SIDE_BUY else cur_price - px
+                pnl = price_diff * lot * contract_size
+                equity += pnl
+                entry_pos[n_closed] = cur_entry
+                exit_pos[n_closed] = q
+                side_arr[n_closed] = cur_side
+                entry_price[n_closed] = cur_price
+                exit_price[n_closed] = px
+                pnl_arr[n_closed] = pnl
+                exit_reason.append(reason)
+                n_closed += 1
+                streak = streak + 1 if pnl < 0 else 0
+                is_open = False
+                event = True
+
+        # --- サーキットブレーカー ---
+        entered = False
+        if breaker is not None:
+            breaker.update(equity, peak_equity, streak, q)
+            if not breaker.can_enter(q):
+                cb_blocked.append(q)
+                if event:
+                    event_pos.append(q)
+                    event_streak.append(streak_at_start)
+                p = q + 1
+                continue
+
+        # --- エントリー ---
+        if not is_open and sides[q] != 0:
+            is_open = True
+            cur_side = int(sides[q])
+            cur_entry = q
+            cur_price = float(close[q])
+            entered = True
+            if equity > peak_equity:
+                peak_equity = equity
+            dd = (equity / peak_equity - 1.0) if peak_equity > 0 else 0.0
+            if dd < max_dd:
+                max_dd = dd
+            eq_pos[n_eq] = q
+            eq_val[n_eq] = equity
+            n_eq += 1
+
+        if event or entered:
+            event_pos.append(q)
+            event_streak.append(streak_at_start)
+        p = q + 1
+
+    # 最終バーで強制決済
+    forced = False
+    if is_open and n > 0:
+        px = float(close[last])
+        price_diff = px - cur_price if cur_side == SIDE_BUY else cur_price - px
+        pnl = price_diff * lot * contract_size
+        equity += pnl
+        entry_pos[n_closed] = cur_entry
+        exit_pos[n_closed] = last
+        side_arr[n_closed] = cur_side
+        entry_price[n_closed] = cur_price
+        exit_price[n_closed] = px
+        pnl_arr[n_closed] = pnl
+        exit_reason.append("force_close")
+        n_closed += 1
+        forced = True
+
+    return EventCoreResult(
+        entry_pos=entry_pos[:n_closed],
+        exit_pos=exit_pos[:n_closed],
+        side=side_arr[:n_closed],
+        entry_price=entry_price[:n_closed],
+        exit_price=exit_price[:n_closed],
+        lot=np.full(n_closed, float(lot)),
+        pnl=pnl_arr[:n_closed],
+        equity_pos=eq_pos[:n_eq],
+        equity_value=eq_val[:n_eq],
+        final_equity=equity,
+        consecutive_losses=streak,
+        peak_equity=peak_equity,
+        max_drawdown=max_dd,
+        filter_block_from=block_from,
+        event_pos=np.asarray(event_pos, dtype=np.int64),
+        event_streak=np.asarray(event_streak, dtype=np.int64),
+        cb_blocked_pos=np.asarray(cb_blocked, dtype=np.int64),
+        n_visited=n_visited,
+        forced_close=forced,
+        exit_reason=exit_reason,
+    )
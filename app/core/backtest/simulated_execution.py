@@ -3,10 +3,28 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
 
+_NAT_NS = np.iinfo(np.int64).min
+_OPEN_EXIT_NS = np.iinfo(np.int64).max
+
+# 決済済みトレードの列（時刻は ns の int64、side は +1 = BUY / -1 = SELL）
+_TRADE_COLUMNS: Tuple[Tuple[str, Any], ...] = (
+    ("entry_ns", np.int64),
+    ("entry_price", np.float64),
+    ("exit_ns", np.int64),
+    ("exit_price", np.float64),
+    ("side", np.int8),
+    ("lot", np.float64),
+    ("pnl", np.float64),
+    ("atr", np.float64),
+    ("sl", np.float64),
+    ("tp", np.float64),
+)
+
 
 @dataclass
 class SimulatedTrade:
@@ -23,12 +41,26 @@ class SimulatedTrade:
     tp: Optional[float] = None
 
 
+def _opt_float(value: Any) -> float:
+    """None / 変換できない値は NaN"""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _side_code(side: Any) -> int:
+    return 1 if str(side).upper() == "BUY" else -1
+
+
 class SimulatedExecution:
     """
     バックテスト用のシミュレート実行エンジン
 
     - ポジションを開いて、終了条件に達したらクローズする
-    - トレード履歴を記録する
+    - トレード履歴を列ごとの NumPy 配列に記録する（get_trades_df / get_equity_curve は配列から作る）
     """
 
     def __init__(self, initial_capital: float = 100000.0, contract_size: int = 100000):
@@ -43,8 +75,91 @@ class SimulatedExecution:
         self.initial_capital = initial_capital
         self.contract_size = contract_size
         self.equity = initial_capital
-        self.trades: List[SimulatedTrade] = []
         self._open_position: Optional[SimulatedTrade] = None
+        self._n_trades = 0
+        self._cols: Dict[str, np.ndarray] = {name: np.empty(0, dtype=dt) for name, dt in _TRADE_COLUMNS}
+        # 時刻のタイムゾーン（最初に記録した時刻に合わせる。naive なら None）
+        self._tz: Any = None
+
+    # ------------------------------------------------------------------
+    # 時刻 <-> ns
+    # ------------------------------------------------------------------
+    def _time_ns(self, timestamp: Any) -> int:
+        ts = pd.Timestamp(timestamp) if timestamp is not None else pd.NaT
+        if ts is pd.NaT:
+            return int(_NAT_NS)
+        if self._n_trades == 0:
+            self._tz = ts.tz
+        return int(ts.value)
+
+    def _times_ns(self, values: Any) -> np.ndarray:
+        idx = pd.DatetimeIndex(pd.to_datetime(values))
+        if len(idx) and self._n_trades == 0:
+            self._tz = idx.tz
+        return idx.as_unit("ns").asi8.astype(np.int64, copy=False)
+
+    def _ns_to_times(self, ns: np.ndarray) -> pd.DatetimeIndex:
+        idx = pd.DatetimeIndex(pd.to_datetime(np.asarray(ns, dtype=np.int64), unit="ns"))
+        if self._tz is not None:
+            idx = idx.tz_localize("UTC").tz_convert(self._tz)
+        return idx
+
+    @staticmethod
+    def _bar_ns(timestamps: Any) -> np.ndarray:
+        """バー時刻列を ns の int64 に（NaT は int64 の最小値）"""
+        idx = pd.DatetimeIndex(pd.to_datetime(timestamps))
+        return idx.as_unit("ns").asi8.astype(np.int64, copy=False)
+
+    # ------------------------------------------------------------------
+    # 列ストレージ
+    # ------------------------------------------------------------------
+    def _reserve(self, extra: int) -> None:
+        need = self._n_trades + int(extra)
+        cap = self._cols["pnl"].size
+        if need <= cap:
+            return
+        new_cap = max(need, cap * 2, 64)
+        for name, dt in _TRADE_COLUMNS:
+            arr = np.empty(new_cap, dtype=dt)
+            arr[: self._n_trades] = self._cols[name][: self._n_trades]
+            self._cols[name] = arr
+
+    def _column(self, name: str) -> np.ndarray:
+        return self._cols[name][: self._n_trades]
+
+    @property
+    def n_trades(self) -> int:
+        """決済済みトレード数"""
+        return self._n_trades
+
+    @property
+    def trades(self) -> List[SimulatedTrade]:
+        """決済済みトレード（列ストレージから組み立てたコピー。決済順）"""
+        n = self._n_trades
+        if n == 0:
+            return []
+        entry_times = self._ns_to_times(self._column("entry_ns"))
+        exit_times = self._ns_to_times(self._column("exit_ns"))
+        c = {name: self._column(name) for name, _ in _TRADE_COLUMNS}
+
+        def opt(v: float) -> Optional[float]:
+            return None if np.isnan(v) else float(v)
+
+        return [
+            SimulatedTrade(
+                entry_time=entry_times[i],
+                entry_price=float(c["entry_price"][i]),
+                exit_time=exit_times[i],
+                exit_price=float(c["exit_price"][i]),
+                side="BUY" if c["side"][i] > 0 else "SELL",
+                lot=float(c["lot"][i]),
+                pnl=float(c["pnl"][i]),
+                atr=opt(c["atr"][i]),
+                sl=opt(c["sl"][i]),
+                tp=opt(c["tp"][i]),
+            )
+            for i in range(n)
+        ]
 
     def open_position(
         self,
@@ -125,7 +240,20 @@ class SimulatedExecution:
         trade.pnl = price_diff * trade.lot * self.contract_size
         self.equity += trade.pnl
 
-        self.trades.append(trade)
+        self._reserve(1)
+        i = self._n_trades
+        c = self._cols
+        c["entry_ns"][i] = self._time_ns(trade.entry_time)
+        c["entry_price"][i] = trade.entry_price
+        c["exit_ns"][i] = self._time_ns(trade.exit_time)
+        c["exit_price"][i] = trade.exit_price
+        c["side"][i] = _side_code(trade.side)
+        c["lot"][i] = trade.lot
+        c["pnl"][i] = trade.pnl
+        c["atr"][i] = _opt_float(trade.atr)
+        c["sl"][i] = _opt_float(trade.sl)
+        c["tp"][i] = _opt_float(trade.tp)
+        self._n_trades = i + 1
         self._open_position = None
 
         return trade
@@ -137,6 +265,43 @@ class SimulatedExecution:
         if self._open_position is not None:
             self.close_position(price, timestamp)
 
+    def record_closed_trades(
+        self,
+        entry_times: Sequence[pd.Timestamp],
+        entry_prices: Sequence[float],
+        exit_times: Sequence[pd.Timestamp],
+        exit_prices: Sequence[float],
+        sides: Sequence[str],
+        lots: Sequence[float],
+        pnls: Sequence[float],
+        atrs: Optional[Sequence[Optional[float]]] = None,
+    ) -> None:
+        """
+        決済済みトレードをまとめて記録する（イベント駆動コアが配列で出した約定を取り込む）
+
+        equity には close_position() と同じく決済順に pnl を加算する。
+        """
+        k = len(pnls)
+        if k == 0:
+            return
+        pnl = np.asarray(pnls, dtype=np.float64)
+        self._reserve(k)
+        i, j = self._n_trades, self._n_trades + k
+        c = self._cols
+        c["entry_ns"][i:j] = self._times_ns(entry_times)
+        c["entry_price"][i:j] = np.asarray(entry_prices, dtype=np.float64)
+        c["exit_ns"][i:j] = self._times_ns(exit_times)
+        c["exit_price"][i:j] = np.asarray(exit_prices, dtype=np.float64)
+        c["side"][i:j] = [_side_code(s) for s in sides]
+        c["lot"][i:j] = np.asarray(lots, dtype=np.float64)
+        c["pnl"][i:j] = pnl
+        c["atr"][i:j] = [_opt_float(a) for a in atrs] if atrs is not None else np.nan
+        c["sl"][i:j] = np.nan
+        c["tp"][i:j] = np.nan
+        self._n_trades = j
+        # 決済順の逐次加算（cumsum は先頭から順に足すので close_position の積み上げと同じ値）
+        self.equity = float(np.cumsum(np.concatenate(([self.equity], pnl)))[-1])
+
     def get_trades_df(self) -> pd.DataFrame:
         """
         トレード履歴をDataFrame形式で返す
@@ -145,31 +310,99 @@ class SimulatedExecution:
         -------
         pd.DataFrame
             カラム: entry_time, entry_price, exit_time, exit_price, side, lot, pnl, atr, sl, tp
+            （atr / sl / tp の欠損は NaN）
         """
-        if not self.trades:
+        if self._n_trades == 0:
             return pd.DataFrame(columns=[
                 "entry_time", "entry_price", "exit_time", "exit_price",
                 "side", "lot", "pnl", "atr", "sl", "tp"
             ])
 
-        rows = []
-        for trade in self.trades:
-            rows.append({
-                "entry_time": trade.entry_time,
-                "entry_price": trade.entry_price,
-                "exit_time": trade.exit_time,
-                "exit_price": trade.exit_price,
-                "side": trade.side,
-                "lot": trade.lot,
-                "pnl": trade.pnl,
-                "atr": trade.atr,
-                "sl": trade.sl,
-                "tp": trade.tp,
-            })
-
-        return pd.DataFrame(rows)
-
-    def get_equity_curve(self, timestamps: pd.Series, prices: pd.Series) -> pd.Series:
+        side = self._column("side")
+        return pd.DataFrame({
+            "entry_time": self._ns_to_times(self._column("entry_ns")),
+            "entry_price": self._column("entry_price").copy(),
+            "exit_time": self._ns_to_times(self._column("exit_ns")),
+            "exit_price": self._column("exit_price").copy(),
+            "side": np.where(side > 0, "BUY", "SELL").astype(object),
+            "lot": self._column("lot").copy(),
+            "pnl": self._column("pnl").copy(),
+            "atr": self._column("atr").copy(),
+            "sl": self._column("sl").copy(),
+            "tp": self._column("tp").copy(),
+        })
+
+    # ------------------------------------------------------------------
+    # エクイティ曲線
+    # ------------------------------------------------------------------
+    def _realized_equity(self, ts_ns: np.ndarray) -> np.ndarray:
+        """各バー時点までに決済されたトレードの損益を積んだ確定エクイティ"""
+        exit_ns = self._column("exit_ns")
+        order = np.argsort(exit_ns, kind="stable")
+        cum = np.cumsum(np.concatenate(([float(self.initial_capital)], self._column("pnl")[order])))
+        counts = np.zeros(ts_ns.size, dtype=np.int64)
+        valid = ts_ns != _NAT_NS
+        counts[valid] = np.searchsorted(exit_ns[order], ts_ns[valid], side="right")
+        # 時刻が戻っても決済済み件数は減らさない（NaT のバーは直前の値）
+        return cum[np.maximum.accumulate(counts)]
+
+    def _positions(self) -> Dict[str, np.ndarray]:
+        """決済済み＋保有中（exit は無限遠、pnl は 0）のトレードをエントリー時刻順に"""
+        entry_ns = self._column("entry_ns")
+        exit_ns = self._column("exit_ns")
+        side = self._column("side").astype(np.int64)
+        entry_price = self._column("entry_price")
+        lot = self._column("lot")
+        pnl = self._column("pnl")
+        pos = self._open_position
+        if pos is not None:
+            entry_ns = np.append(entry_ns, self._time_ns(pos.entry_time))
+            exit_ns = np.append(exit_ns, _OPEN_EXIT_NS)
+            side = np.append(side, _side_code(pos.side))
+            entry_price = np.append(entry_price, float(pos.entry_price))
+            lot = np.append(lot, float(pos.lot))
+            pnl = np.append(pnl, 0.0)
+        order = np.argsort(entry_ns, kind="stable")
+        return {
+            "entry_ns": entry_ns[order],
+            "exit_ns": exit_ns[order],
+            "side": side[order],
+            "entry_price": entry_price[order],
+            "lot": lot[order],
+            "pnl": pnl[order],
+        }
+
+    def _held(self, ts_ns: np.ndarray, positions: Dict[str, np.ndarray], intrabar: bool) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        各バーで保有中のトレード番号と保有フラグ（ポジションは同時に1つだけの前提）
+
+        intrabar=False: entry <= t < exit（バー終値の時点で保有）
+        intrabar=True : entry < t <= exit（バー内の値動きを保有していた）
+        """
+        entry_ns = positions["entry_ns"]
+        exit_ns = positions["exit_ns"]
+        if entry_ns.size == 0 or ts_ns.size == 0:
+            return np.zeros(ts_ns.size, dtype=np.int64), np.zeros(ts_ns.size, dtype=bool)
+        k = np.searchsorted(entry_ns, ts_ns, side="left" if intrabar else "right") - 1
+        kk = np.clip(k, 0, None)
+        held = (k >= 0) & (ts_ns != _NAT_NS)
+        held &= (ts_ns <= exit_ns[kk]) if intrabar else (ts_ns < exit_ns[kk])
+        return kk, held
+
+    def _unrealized(self, prices: np.ndarray, k: np.ndarray, held: np.ndarray, positions: Dict[str, np.ndarray]) -> np.ndarray:
+        """close_position と同じ式での含み損益（保有していないバーは 0）"""
+        if not held.any():
+            return np.zeros(prices.size, dtype=np.float64)
+        entry_price = positions["entry_price"][k]
+        price_diff = np.where(positions["side"][k] > 0, prices - entry_price, entry_price - prices)
+        return np.where(held, price_diff * positions["lot"][k] * self.contract_size, 0.0)
+
+    def get_equity_curve(
+        self,
+        timestamps: pd.Series,
+        prices: pd.Series,
+        mark_to_market: bool = False,
+    ) -> pd.Series:
         """
         エクイティ曲線を生成する
 
@@ -179,26 +412,68 @@ class SimulatedExecution:
             時系列のタイムスタンプ
         prices : pd.Series
             時系列の価格
+        mark_to_market : bool
+            True なら保有中ポジションの含み損益（各バーの価格で評価）を加える。
+            False（既定）は決済済みトレードだけの確定エクイティ
 
         Returns
         -------
         pd.Series
             エクイティ曲線（インデックスはtimestamps）
         """
-        equity_series = pd.Series(self.initial_capital, index=timestamps)
-        cum_equity = self.initial_capital
-
-        # トレードを時系列順にソート
-        sorted_trades = sorted(self.trades, key=lambda t: t.exit_time)
-
-        trade_idx = 0
-        for i, ts in enumerate(timestamps):
-            # この時点までに決済されたトレードの損益を加算
-            while trade_idx < len(sorted_trades) and sorted_trades[trade_idx].exit_time <= ts:
-                cum_equity += sorted_trades[trade_idx].pnl
-                trade_idx += 1
-
-            equity_series.iloc[i] = cum_equity
+        ts_ns = self._bar_ns(timestamps)
+        equity = self._realized_equity(ts_ns)
+        if mark_to_market:
+            positions = self._positions()
+            k, held = self._held(ts_ns, positions, intrabar=False)
+            px = np.asarray(prices, dtype=np.float64)
+            equity = equity + self._unrealized(px, k, held, positions)
+        return pd.Series(equity, index=timestamps)
+
+    def get_intrabar_drawdown(
+        self,
+        timestamps: pd.Series,
+        prices: pd.Series,
+        high: pd.Series,
+        low: pd.Series,
+    ) -> pd.Series:
+        """
+        バー内の値動きまで含めたドローダウン（各バーの値は 0 以下の比率。min() が最大ドローダウン）
 
-        return equity_series
+        保有していたバー（entry < t <= exit）はポジションに不利な側の高値・安値
+        （BUY は low、SELL は high）で評価したエクイティを、終値評価エクイティのピークと比べる。
+        決済バーは、そのトレードの確定損益の代わりにバー内の最悪値を使う。
 
+        Parameters
+        ----------
+        timestamps : pd.Series
+            時系列のタイムスタンプ
+        prices : pd.Series
+            時系列の終値
+        high, low : pd.Series
+            時系列の高値・安値
+        """
+        ts_ns = self._bar_ns(timestamps)
+        realized = self._realized_equity(ts_ns)
+        positions = self._positions()
+
+        k, held = self._held(ts_ns, positions, intrabar=False)
+        mtm = realized + self._unrealized(np.asarray(prices, dtype=np.float64), k, held, positions)
+        peak = np.maximum.accumulate(np.maximum(mtm, float(self.initial_capital)))
+
+        worst = mtm
+        if positions["entry_ns"].size:
+            k2, held2 = self._held(ts_ns, positions, intrabar=True)
+            adverse = np.where(
+                positions["side"][k2] > 0,
+                np.asarray(low, dtype=np.float64),
+                np.asarray(high, dtype=np.float64),
+            )
+            closed_here = held2 & (positions["exit_ns"][k2] <= ts_ns)
+            worst = realized - np.where(closed_here, positions["pnl"][k2], 0.0)
+            worst = worst + self._unrealized(adverse, k2, held2, positions)
+            worst = np.where(held2, np.minimum(worst, mtm), mtm)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dd = np.where(peak > 0, worst / peak - 1.0, 0.0)
+        return pd.Series(dd, index=timestamps)
@@ -1,8 +1,5 @@
-from pathlib import Path
 from typing import Any, Dict
 
-import yaml
-
 
 def _deep_merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
     for k, v in (b or {}).items():
@@ -14,12 +11,12 @@ def _deep_merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
 
 
 def load_config() -> Dict[str, Any]:
-    base: Dict[str, Any] = {}
-    base_path = Path("configs/config.yaml")
-    if base_path.exists():
-        base = yaml.safe_load(base_path.read_text(encoding="utf-8")) or {}
-    local_path = Path("configs/config.local.yaml")
-    if local_path.exists():
-        local: Dict[str, Any] = yaml.safe_load(local_path.read_text(encoding="utf-8")) or {}
-        base = _deep_merge(base, local)
-    return base
+    """
+    configs/config.yaml に configs/config.local.yaml を deep merge した設定（呼び出し側で書き換えてよい可変コピー）。
+
+    解析はプロセス内で1回だけ行い、ファイルの (size, mtime) が変わったときだけ読み直す
+    （app.core.config_snapshot）。読むだけの経路は get_config_snapshot() の読み取り専用ビューを使うとコピーも省ける。
+    """
+    from app.core.config_snapshot import get_config_snapshot, thaw
+
+    return thaw(get_config_snapshot().config)
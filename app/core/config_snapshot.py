@@ -0,0 +1,374 @@
+# app/core/config_snapshot.py
+"""
+設定・モデルメタのスナップショット（プロセス内で1回だけ解析して使い回す）
+
+- configs/config.yaml + configs/config.local.yaml（load_config と同じ deep merge）と
+  models/active_model.json を1回だけ読み、読み取り専用の ConfigSnapshot として返す
+- get(): 3ファイルの (size, mtime) を確認し、変わったファイルだけ読み直して参照を差し替える
+  （変わっていなければ stat だけ。読み込み失敗時は前のスナップショットのまま）
+- reload(): stat に関係なく読み直す
+- subscribe(): 変更時に呼ばれるフック。start_watcher() と組み合わせると、常駐サービスは
+  ティックごとにファイルを見に行かずに設定変更・モデル昇格に追従できる
+- 利用側: app.core.config_loader.load_config（可変コピーを返す）、per-bar / 推論の読み取り経路
+  （get_config_snapshot(refresh=False) で stat しない。その代わり初回の呼び出しで監視スレッドを起動し、
+    変更は監視スレッドが取り込む）
+
+スナップショットの dict / list は書き換え不可（FrozenDict / FrozenList。isinstance(x, dict) は通る）。
+書き換えたい場合は thaw() で可変コピーを作ること。
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from loguru import logger
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# load_config と同じく作業ディレクトリ基準
+CONFIG_PATH = Path("configs/config.yaml")
+LOCAL_CONFIG_PATH = Path("configs/config.local.yaml")
+ACTIVE_MODEL_PATH = PROJECT_ROOT / "models" / "active_model.json"
+
+# start_watcher の既定の確認間隔（秒）
+WATCH_INTERVAL_SEC = 2.0
+
+# subscribe に渡る変更種別
+CHANGED_CONFIG = "config"
+CHANGED_ACTIVE_MODEL = "active_model"
+
+
+# =====================================================
+# 読み取り専用コンテナ
+# =====================================================
+def _readonly(self, *args, **kwargs):
+    raise TypeError(f"{type(self).__name__} is read-only (use config_snapshot.thaw() for a mutable copy)")
+
+
+class FrozenDict(dict):
+    """書き換え不可の dict（json.dumps / isinstance(x, dict) / deepcopy はそのまま使える）"""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+
+class FrozenList(list):
+    """書き換え不可の list"""
+
+    __slots__ = ()
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (type(self), (list(self),))
+
+
+_EMPTY = FrozenDict()
+
+
+def freeze(obj: Any) -> Any:
+    """dict / list を再帰的に FrozenDict / FrozenList にする"""
+    if isinstance(obj, FrozenDict) or isinstance(obj, FrozenList):
+        return obj
+    if isinstance(obj, dict):
+        return FrozenDict({k: freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list):
+        return FrozenList(freeze(v) for v in obj)
+    return obj
+
+
+def thaw(obj: Any) -> Any:
+    """freeze の逆（可変な dict / list の深いコピー）"""
+    if isinstance(obj, dict):
+        return {k: thaw(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(v) for v in obj]
+    return obj
+
+
+# =====================================================
+# スナップショット
+# =====================================================
+def _section(cfg: Dict[str, Any], name: str) -> Dict[str, Any]:
+    v = cfg.get(name)
+    return v if isinstance(v, dict) else _EMPTY
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    ある時点の設定とモデルメタ（読み取り専用）
+
+    config はマージ済みの設定全体、runtime / ai / filters / entry はその節
+    （無い・dict でない場合は空）。active_model は active_model.json の中身（無ければ空）。
+    version は内容が変わるたびに増える。
+    """
+
+    version: int
+    config: Dict[str, Any]
+    active_model: Dict[str, Any]
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def runtime(self) -> Dict[str, Any]:
+        return _section(self.config, "runtime")
+
+    @property
+    def ai(self) -> Dict[str, Any]:
+        return _section(self.config, "ai")
+
+    @property
+    def filters(self) -> Dict[str, Any]:
+        return _section(self.config, "filters")
+
+    @property
+    def entry(self) -> Dict[str, Any]:
+        return _section(self.config, "entry")
+
+    @property
+    def symbol(self) -> str:
+        """runtime.symbol（未設定なら "USDJPY-"）"""
+        return str(self.runtime.get("symbol") or "USDJPY-")
+
+    @property
+    def best_threshold(self) -> Optional[float]:
+        """active_model.json の best_threshold（数値でなければ None）"""
+        v = self.active_model.get("best_threshold")
+        return float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else None
+
+
+Listener = Callable[[ConfigSnapshot, FrozenSet[str]], None]
+
+
+def _stat(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+        return int(st.st_size), int(st.st_mtime_ns)
+    except OSError:
+        return None
+
+
+def _read_config(base_path: Path, local_path: Path) -> Dict[str, Any]:
+    """load_config と同じ読み方（config.yaml に config.local.yaml を deep merge）"""
+    import yaml
+
+    from app.core.config_loader import _deep_merge
+
+    base: Dict[str, Any] = {}
+    if base_path.exists():
+        base = yaml.safe_load(base_path.read_text(encoding="utf-8")) or {}
+    if local_path.exists():
+        local: Dict[str, Any] = yaml.safe_load(local_path.read_text(encoding="utf-8")) or {}
+        base = _deep_merge(base, local)
+    return base
+
+
+def _read_active_model(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(meta, dict):
+        raise ValueError(f"{path} is not a JSON object")
+    return meta
+
+
+class ConfigSnapshotService:
+    """設定ファイル / active_model.json の stat を見て、変わったときだけ読み直すスナップショットの置き場"""
+
+    def __init__(
+        self,
+        config_path: Path = CONFIG_PATH,
+        local_config_path: Path = LOCAL_CONFIG_PATH,
+        active_model_path: Path = ACTIVE_MODEL_PATH,
+    ) -> None:
+        self.config_path = Path(config_path)
+        self.local_config_path = Path(local_config_path)
+        self.active_model_path = Path(active_model_path)
+        self._lock = threading.RLock()
+        self._snapshot: Optional[ConfigSnapshot] = None
+        # (config.yaml, config.local.yaml) / active_model.json の stat
+        self._config_stat: Optional[Tuple[Any, Any]] = None
+        self._active_stat: Any = None
+        self._listeners: List[Listener] = []
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+
+    # ------------------------------------------------------------------
+    def _stat_key(self) -> Tuple[Tuple[Any, Any], Any]:
+        return (_stat(self.config_path), _stat(self.local_config_path)), _stat(self.active_model_path)
+
+    def get(self, *, refresh: bool = True) -> ConfigSnapshot:
+        """
+        現在のスナップショット。refresh=True ならファイルの変更を確認してから返す
+        （変わっていなければ stat 3回）。初回の設定読み込みに失敗した場合は例外を送出する。
+        """
+        snap = self._snapshot
+        if snap is None or (refresh and self._stat_key() != (self._config_stat, self._active_stat)):
+            return self._refresh(force=False)
+        return snap
+
+    def reload(self) -> ConfigSnapshot:
+        """stat に関係なく全ファイルを読み直す"""
+        return self._refresh(force=True)
+
+    def _refresh(self, *, force: bool) -> ConfigSnapshot:
+        with self._lock:
+            prev = self._snapshot
+            config_stat, active_stat = self._stat_key()
+            if prev is not None and not force and (config_stat, active_stat) == (self._config_stat, self._active_stat):
+                # 待っている間に別スレッドが読み直し済み
+                return prev
+
+            changed = set()
+            config = prev.config if prev is not None else None
+            active = prev.active_model if prev is not None else _EMPTY
+            if force or prev is None or config_stat != self._config_stat:
+                try:
+                    new_config = freeze(_read_config(self.config_path, self.local_config_path))
+                except Exception as e:
+                    if prev is None:
+                        raise
+                    # 書き込み途中などは次の確認で読み直す
+                    logger.warning("[config_snapshot] config reload failed (keep current): {}", e)
+                    new_config = config
+                else:
+                    self._config_stat = config_stat
+                if new_config != config:
+                    changed.add(CHANGED_CONFIG)
+                config = new_config
+            if force or prev is None or active_stat != self._active_stat:
+                try:
+                    new_active = freeze(_read_active_model(self.active_model_path))
+                except Exception as e:
+                    logger.warning("[config_snapshot] active_model.json reload failed (keep current): {}", e)
+                    new_active = active
+                else:
+                    self._active_stat = active_stat
+                if new_active != active:
+                    changed.add(CHANGED_ACTIVE_MODEL)
+                active = new_active
+
+            if prev is not None and not changed:
+                return prev
+            assert config is not None
+            snap = ConfigSnapshot(
+                version=(prev.version + 1) if prev is not None else 1,
+                config=config,
+                active_model=active,
+            )
+            # 参照の差し替えだけ（読み手は古いスナップショットをそのまま使い切れる）
+            self._snapshot = snap
+            listeners = list(self._listeners) if prev is not None else []
+        if prev is not None:
+            logger.info("[config_snapshot] v{} changed={}", snap.version, sorted(changed))
+        self._notify(listeners, snap, frozenset(changed))
+        return snap
+
+    # ------------------------------------------------------------------
+    # 変更通知
+    # ------------------------------------------------------------------
+    def subscribe(self, listener: Listener) -> Callable[[], None]:
+        """
+        変更時に listener(snapshot, changed) を呼ぶ（changed は "config" / "active_model" の集合）。
+        呼ばれるのは変更を検知したスレッド（get / reload の呼び出し元、または監視スレッド）。
+        戻り値を呼ぶと購読を解除する。
+        """
+        with self._lock:
+            self._listeners.append(listener)
+
+        def _unsubscribe() -> None:
+            with self._lock:
+                try:
+                    self._listeners.remove(listener)
+                except ValueError:
+                    pass
+
+        return _unsubscribe
+
+    @staticmethod
+    def _notify(listeners: List[Listener], snap: ConfigSnapshot, changed: FrozenSet[str]) -> None:
+        for fn in listeners:
+            try:
+                fn(snap, changed)
+            except Exception as e:
+                logger.warning("[config_snapshot] listener failed: {}", e)
+
+    # ------------------------------------------------------------------
+    # 監視スレッド
+    # ------------------------------------------------------------------
+    def start_watcher(self, interval_sec: float = WATCH_INTERVAL_SEC) -> None:
+        """ファイルの変更をバックグラウンドで確認して通知する（多重起動しない）"""
+        with self._lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watch_stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch, args=(float(interval_sec),), name="config-snapshot-watch", daemon=True
+            )
+            self._watcher.start()
+
+    @property
+    def watching(self) -> bool:
+        """監視スレッドが動いているか"""
+        thread = self._watcher
+        return thread is not None and thread.is_alive()
+
+    def stop_watcher(self, timeout: Optional[float] = 5.0) -> None:
+        self._watch_stop.set()
+        thread = self._watcher
+        if thread is not None:
+            thread.join(timeout)
+        self._watcher = None
+
+    def _watch(self, interval_sec: float) -> None:
+        while not self._watch_stop.is_set():
+            try:
+                self.get()
+            except Exception as e:
+                logger.warning("[config_snapshot] watch failed: {}", e)
+            self._watch_stop.wait(interval_sec)
+
+
+_service: Optional[ConfigSnapshotService] = None
+_service_lock = threading.Lock()
+
+
+def get_config_snapshot_service() -> ConfigSnapshotService:
+    """プロセス共通の ConfigSnapshotService"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ConfigSnapshotService()
+        return _service
+
+
+def get_config_snapshot(*, refresh: bool = True) -> ConfigSnapshot:
+    """
+    プロセス共通の現在のスナップショット
+
+    refresh=False（ティックごとの読み取り経路）はファイルを stat しない。変更を取りこぼさないよう、
+    監視スレッドが動いていなければここで起動する（以降の変更は監視スレッドが取り込む）。
+    """
+    svc = get_config_snapshot_service()
+    if not refresh and not svc.watching:
+        svc.start_watcher()
+    return svc.get(refresh=refresh)
+
+
+def reset_config_snapshot_service() -> None:
+    """スナップショットと購読を破棄する（テスト用）"""
+    global _service
+    with _service_lock:
+        if _service is not None:
+            _service.stop_watcher()
+        _service = None
@@ -0,0 +1,189 @@
+# app/core/decision_log_writer.py
+"""
+decisions.jsonl 用のバッファ付きライター（Live / バックテスト共通）
+
+- 呼び出し側はレコードを JSON 1行にエンコードしてキューへ積むだけ（ファイル I/O はしない）
+- 書き込みはバックグラウンドスレッドが担当し、
+    * 溜まったバイト数が flush_bytes を超えた
+    * 最初の未書き込み行から flush_interval_sec 経過した
+    * flush() / close() が呼ばれた
+  のいずれかで、パスごとにまとめて open → write → flush（fsync 方針に応じて fsync）
+- キューは上限付き（max_queue）。書き込みが追いつかないときは呼び出し側が待つ（取りこぼさない・メモリを増やさない）
+- エンコードは呼び出しスレッドで行う（キュー投入後に record を書き換えられても影響しない）
+
+Live 用の共有インスタンスは app.services.decision_log_writer.get_decision_log_writer。
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# fsync 方針: "none"=OS に任せる / "batch"=バッチ書き込みごとに fsync
+FSYNC_POLICIES = ("none", "batch")
+
+_FLUSH = object()
+_STOP = object()
+
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# json.dumps(record, ensure_ascii=False) と同じ出力。毎回 JSONEncoder を組み立てない分だけ速い
+_ENCODER = json.JSONEncoder(ensure_ascii=False, check_circular=False, default=_json_default)
+
+
+def encode_record(record: Dict[str, Any]) -> str:
+    """レコードを JSONL の1行（末尾改行付き）にする。"""
+    return _ENCODER.encode(record) + "\n"
+
+
+class DecisionLogWriter:
+    """
+    JSONL 追記をバッチ化するライター。
+
+    Parameters
+    ----------
+    max_queue : int
+        キューに積める行数の上限（超えると write() が空くまで待つ）
+    flush_bytes : int
+        未書き込みがこのバイト数に達したら書き出す
+    flush_interval_sec : float
+        最初の未書き込み行からこの秒数で書き出す
+    fsync : str
+        "none" または "batch"
+    """
+
+    def __init__(
+        self,
+        *,
+        max_queue: int = 10000,
+        flush_bytes: int = 64 * 1024,
+        flush_interval_sec: float = 0.5,
+        fsync: str = "batch",
+        name: str = "decision-log-writer",
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.flush_bytes = int(flush_bytes)
+        self.flush_interval_sec = float(flush_interval_sec)
+        self.fsync = fsync
+        self.name = name
+        self._q: "queue.Queue[tuple]" = queue.Queue(maxsize=int(max_queue))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.lines_written = 0
+        self.batches_written = 0
+
+    # ------------------------------------------------------------------
+    # 呼び出し側 API
+    # ------------------------------------------------------------------
+    def write(self, path: Union[str, Path], record: Dict[str, Any]) -> bool:
+        """record を path に追記する（非同期）。エンコードできなければ False。"""
+        try:
+            line = encode_record(record)
+        except (TypeError, ValueError, RecursionError) as e:
+            logger.warning("[decision_log] encode failed path={} err={}", path, e)
+            return False
+        self.write_line(path, line)
+        return True
+
+    def write_line(self, path: Union[str, Path], line: str) -> None:
+        """エンコード済みの1行（末尾改行付き）を path に追記する（非同期）。"""
+        if self._closed:
+            # close 後（プロセス終了処理中など）は同期で書く
+            self._write_batch({str(path): [line]})
+            return
+        self._ensure_started()
+        self._q.put((str(path), line))
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """ここまでに積んだ行が書き終わるまで待つ。タイムアウトしたら False。"""
+        if self._closed or self._thread is None:
+            return True
+        done = threading.Event()
+        self._q.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """残りを書き出してスレッドを止める。以降の write は同期書き込みになる。"""
+        with self._start_lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._q.put((_STOP, None))
+            thread.join(timeout)
+
+    # ------------------------------------------------------------------
+    # 書き込みスレッド
+    # ------------------------------------------------------------------
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        pending: Dict[str, List[str]] = {}
+        pending_bytes = 0
+        first_at: Optional[float] = None
+        while True:
+            timeout = None if first_at is None else max(0.0, first_at + self.flush_interval_sec - time.monotonic())
+            try:
+                key, payload = self._q.get(timeout=timeout)
+            except queue.Empty:
+                key, payload = None, None
+
+            if key is None or key is _FLUSH or key is _STOP:
+                if pending:
+                    self._write_batch(pending)
+                    pending, pending_bytes, first_at = {}, 0, None
+                if key is _FLUSH:
+                    payload.set()
+                elif key is _STOP:
+                    return
+                continue
+
+            pending.setdefault(key, []).append(payload)
+            pending_bytes += len(payload)
+            if first_at is None:
+                first_at = time.monotonic()
+            if pending_bytes >= self.flush_bytes:
+                self._write_batch(pending)
+                pending, pending_bytes, first_at = {}, 0, None
+
+    def _write_batch(self, pending: Dict[str, List[str]]) -> None:
+        for path, lines in pending.items():
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("".join(lines))
+                    f.flush()
+                    if self.fsync == "batch":
+                        os.fsync(f.fileno())
+                self.lines_written += len(lines)
+                self.batches_written += 1
+            except Exception as e:
+                # ログ失敗で売買・探索を止めない
+                logger.warning("[decision_log] write failed path={} lines={} err={}", path, len(lines), e)
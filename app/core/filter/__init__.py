@@ -1,9 +1,10 @@
 # app/core/filter/__init__.py
 
-from .strategy_filter_engine import StrategyFilterEngine, FilterConfig
+from .strategy_filter_engine import StrategyFilterEngine, FilterConfig, FilterFrameResult
 
 __all__ = [
     "StrategyFilterEngine",
     "FilterConfig",
+    "FilterFrameResult",
 ]
 
@@ -4,7 +4,19 @@ from __future__ import annotations
 import os
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# evaluate_frame の理由ビット（ビット順 = evaluate の理由の並び順）
+REASON_TIME_WINDOW = 1 << 0
+REASON_ATR = 1 << 1
+REASON_VOLATILITY = 1 << 2
+REASON_TREND = 1 << 3
+REASON_LOSING_STREAK = 1 << 4
+REASON_PROFILE_SWITCH = 1 << 5
+REASON_NAMES: Tuple[str, ...] = ("time_window", "atr", "volatility", "trend", "losing_streak")
 
 
 @dataclass
@@ -23,6 +35,35 @@ class FilterConfig:
     profile_switch_min_winrate: float = 0.50
 
 
+@dataclass
+class FilterFrameResult:
+    """evaluate_frame の結果（1バー = 1要素）
+
+    passed : 連敗回避以外のフィルタをすべて通過したバーで True
+    reason_bits : NG 理由のビットマスク（REASON_* の OR）
+    profile_switch : プロファイル自動切替の推奨（"profile_switch:from->to"）。無ければ None
+    連敗回避（状態を持つ）は含まない。バーごとに evaluate_at で足す。
+    """
+
+    passed: np.ndarray
+    reason_bits: np.ndarray
+    filter_level: int
+    profile_switch: Optional[str] = None
+
+    def __len__(self) -> int:
+        return int(self.reason_bits.size)
+
+    def reasons_from_bits(self, bits: int) -> List[str]:
+        """ビットマスク → evaluate と同じ並びの理由リスト"""
+        reasons = [name for i, name in enumerate(REASON_NAMES) if bits & (1 << i)]
+        if bits & REASON_PROFILE_SWITCH and self.profile_switch:
+            reasons.append(self.profile_switch)
+        return reasons
+
+    def reasons_at(self, i: int) -> List[str]:
+        return self.reasons_from_bits(int(self.reason_bits[i]))
+
+
 class StrategyFilterEngine:
     """ミチビキ v5.1 フィルタエンジン（コア層）
 
@@ -127,6 +168,157 @@ class StrategyFilterEngine:
         ok = len(reasons) == 0
         return ok, reasons
 
+    # ============================================================
+    # 系列まとめて評価（バックテスト・スイープ用）
+    # ============================================================
+
+    def evaluate_frame(
+        self,
+        df: pd.DataFrame,
+        filter_level: int,
+        *,
+        time_col: str = "time",
+        time_window: Optional[Dict[str, Any]] = None,
+        atr_band: Optional[Dict[str, Any]] = None,
+        vol_band: Optional[Dict[str, Any]] = None,
+        trend_band: Optional[Dict[str, Any]] = None,
+        profile_stats: Optional[Dict[str, Any]] = None,
+    ) -> FilterFrameResult:
+        """特徴量 DataFrame の全バーを配列演算でまとめて評価する
+
+        時間帯・ATR・ボラティリティ・トレンド強度は evaluate と同じ判定を列ごとに行う
+        （列 "atr" / "volatility" / "trend_strength" が無い・NaN のバーは evaluate と同じく通過）。
+        プロファイル自動切替は profile_stats から1回だけ評価し、level >= 3 なら全バーに付ける。
+        連敗回避は直前までの約定結果に依存するので含めない（evaluate_at でバーごとに足す）。
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            特徴量（time_col と各フィルタ列を含む）
+        filter_level : int
+            0〜3
+        time_window, atr_band, vol_band, trend_band : dict, optional
+            evaluate の ctx に渡すものと同じ形式の設定
+        profile_stats : dict, optional
+            evaluate の ctx["profile_stats"] と同じもの
+
+        Returns
+        -------
+        FilterFrameResult
+        """
+        n = len(df)
+        bits = np.zeros(n, dtype=np.uint8)
+        level = int(filter_level)
+        if level <= 0:
+            return FilterFrameResult(passed=np.ones(n, dtype=bool), reason_bits=bits, filter_level=level)
+
+        # ① 取引時間帯（level >= 1）
+        if os.getenv("CM_DEBUG_BYPASS_TIME_WINDOW") != "1":
+            bits[~self._time_window_mask(df, time_col, time_window)] |= REASON_TIME_WINDOW
+
+        # ② ATR（level >= 2）
+        if level >= 2:
+            band = atr_band or {}
+            bits[~self._band_mask(
+                self._column(df, "atr"), float(band.get("min", 0.02)), float(band.get("max", 5.0)), positive=True
+            )] |= REASON_ATR
+
+        if level >= 3:
+            # ③ ボラティリティ
+            if not self._debug_relax_filters_enabled():
+                band = vol_band or {}
+                bits[~self._band_mask(
+                    self._column(df, "volatility"), band.get("min", 0.3), band.get("max"), positive=True
+                )] |= REASON_VOLATILITY
+            # ④ トレンド強度
+            band = trend_band or {}
+            bits[~self._band_mask(
+                self._column(df, "trend_strength"), band.get("min", -0.8), band.get("max", 0.8), positive=False
+            )] |= REASON_TREND
+
+        # ⑥ プロファイル自動切替（バーに依らないので1回だけ）
+        profile_switch: Optional[str] = None
+        if level >= 3:
+            found: List[str] = []
+            self._check_profile_autoswitch({"filter_level": level, "profile_stats": profile_stats or {}}, found)
+            if found:
+                profile_switch = found[0]
+                bits |= REASON_PROFILE_SWITCH
+
+        return FilterFrameResult(
+            passed=bits == 0, reason_bits=bits, filter_level=level, profile_switch=profile_switch
+        )
+
+    def evaluate_at(
+        self, frame: FilterFrameResult, i: int, consecutive_losses: Any = None
+    ) -> Tuple[bool, List[str]]:
+        """evaluate_frame の i 本目に連敗回避を足して、evaluate と同じ (ok, reasons) を返す"""
+        bits = int(frame.reason_bits[i])
+        if frame.filter_level >= 3 and self.losing_streak_hit(consecutive_losses):
+            bits |= REASON_LOSING_STREAK
+        if not bits:
+            return True, []
+        return False, frame.reasons_from_bits(bits)
+
+    def apply_losing_streak(self, frame: FilterFrameResult, consecutive_losses: Sequence[Any]) -> FilterFrameResult:
+        """記録済みの連敗数の系列（decisions.jsonl など）で連敗回避をまとめて足した結果を返す"""
+        limit = getattr(self.config, "losing_streak_limit", 0)
+        if frame.filter_level < 3 or not limit or limit <= 0:
+            return frame
+        losses = pd.to_numeric(pd.Series(consecutive_losses, dtype=object), errors="coerce").to_numpy(dtype=float)
+        with np.errstate(invalid="ignore"):
+            hit = np.trunc(losses) >= limit  # NaN（未記録）は通過
+        bits = frame.reason_bits | np.where(hit, REASON_LOSING_STREAK, 0).astype(np.uint8)
+        return FilterFrameResult(
+            passed=bits == 0, reason_bits=bits, filter_level=frame.filter_level, profile_switch=frame.profile_switch
+        )
+
+    @staticmethod
+    def _column(df: pd.DataFrame, name: str) -> np.ndarray:
+        """数値列（変換できない値・列なしは NaN = 未設定扱い）"""
+        if name not in df.columns:
+            return np.full(len(df), np.nan)
+        return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+
+    def _time_window_mask(
+        self, df: pd.DataFrame, time_col: str, window: Optional[Dict[str, Any]]
+    ) -> np.ndarray:
+        """_check_time_window の配列版（True = 通過）"""
+        n = len(df)
+        if self._debug_relax_filters_enabled():
+            return np.ones(n, dtype=bool)
+        if time_col not in df.columns:
+            # 時刻不明 → NG
+            return np.zeros(n, dtype=bool)
+        ts = pd.to_datetime(df[time_col], errors="coerce")
+        has_ts = ts.notna().to_numpy()
+
+        hours = None
+        if window and isinstance(window, dict):
+            start_raw, end_raw = window.get("start"), window.get("end")
+            if start_raw is not None and end_raw is not None:
+                try:
+                    start_hour, end_hour = int(start_raw), int(end_raw)
+                except (TypeError, ValueError):
+                    start_hour = end_hour = 0
+                if start_hour != end_hour:
+                    hours = ts.dt.hour.to_numpy(dtype=float, na_value=np.nan)
+        if hours is None:
+            return has_ts
+        return has_ts & (hours >= start_hour) & (hours <= end_hour)
+
+    @staticmethod
+    def _band_mask(values: np.ndarray, lo: Any, hi: Any, *, positive: bool) -> np.ndarray:
+        """帯フィルタの配列版（True = 通過）。NaN は未設定扱いで通過、positive なら 0 以下は NG"""
+        nan = np.isnan(values)
+        with np.errstate(invalid="ignore"):
+            ok = values >= lo
+            if hi is not None:
+                ok &= values <= hi
+            if positive:
+                ok &= values > 0
+        return ok | nan
+
     # ============================================================
     # 個別フィルタ（ここは v0 ロジック。閾値は後で profile/config に逃がせる設計）
     # ============================================================
@@ -303,31 +495,32 @@ class StrategyFilterEngine:
             True: フィルタ通過（エントリー許可）
             False: フィルタNG（エントリー不可、reasons に "losing_streak" が追加済み）
         """
+        if self.losing_streak_hit(ctx.get("consecutive_losses")):
+            reasons.append("losing_streak")
+            return False
+        return True
+
+    def losing_streak_hit(self, raw_value: Any) -> bool:
+        """連敗数 raw_value が config.losing_streak_limit 以上なら True（_check_losing_streak / evaluate_at 共通）"""
         # 1. config.losing_streak_limit が 0 以下ならフィルタ無効
         limit = getattr(self.config, "losing_streak_limit", 0)
         if not limit or limit <= 0:
             # 0 以下なら機能自体を無効として扱う（常に通過）
-            return True
+            return False
 
-        # 2. consecutive_losses >= limit なら NG & 理由 "losing_streak"
-        raw_value = ctx.get("consecutive_losses")
+        # 2. consecutive_losses >= limit なら NG
         if raw_value is None:
             # 情報が来ていない場合はブロックしない（安全側：他フィルタに任せる）
-            return True
+            return False
 
         try:
             losses = int(raw_value)
         except (TypeError, ValueError):
             # 変換できない値が来た場合もブロックはしない（安全側：他フィルタに任せる）
-            return True
-
-        # 連敗数が limit 以上なら NG
-        if losses >= limit:
-            reasons.append("losing_streak")
             return False
 
-        # 連敗数が limit 未満なら通過
-        return True
+        # 連敗数が limit 以上なら NG
+        return losses >= limit
 
     def _check_profile_autoswitch(self, ctx: dict, reasons: list[str]) -> None:
         """
@@ -344,9 +537,8 @@ class StrategyFilterEngine:
 
         # 設定を読み込む
         try:
-            from app.core.config_loader import load_config
-            config = load_config()
-            filters_cfg = config.get("filters", {})
+            from app.core.config_snapshot import get_config_snapshot
+            filters_cfg = get_config_snapshot(refresh=False).filters
             switch_cfg = filters_cfg.get("profile_auto_switch", {})
             enabled = switch_cfg.get("enabled", False)
             if not enabled:
@@ -25,13 +25,11 @@ from matplotlib.patches import Rectangle
 
 from loguru import logger
 
+from app.services.visualization_feed import VizCache, VizDelta, VizFeed, get_viz_feed
 from app.services.visualization_service import (
     get_default_symbol_timeframe,
-    get_recent_lgbm_series,
-    get_recent_ohlcv,
     log_viz_info,
 )
-from app.services.ohlcv_update_service import ensure_lgbm_proba_uptodate
 
 
 def _obs_dump_series(
@@ -189,13 +187,142 @@ def _obs_dump_series(
         logger.warning("[viz][prob_obs] failed: {}", e)
 
 
+def _log_viz_inputs(ohlc: dict, lgbm: dict) -> None:
+    """
+    観測ログ：入力ソース（proba）/OHLC/突合（表示直前）
+    ※挙動は変えない。重い処理を避けるため末尾n=1000程度に制限する（ワーカースレッドで呼ぶ）。
+    """
+    try:
+        import pandas as pd
+
+        # OHLC 観測（time粒度）
+        if isinstance(ohlc, dict) and bool(ohlc.get("ok")):
+            df_ohlc_obs = pd.DataFrame({"time": list(ohlc.get("time") or [])})
+            _obs_dump_series(
+                "ohlc_input",
+                df_ohlc_obs,
+                source_name=str(ohlc.get("source") or "unknown"),
+                source_path=str(ohlc.get("csv_path") or ""),
+                time_col="time",
+                prob_col=None,
+                n=1000,
+                join_meta="source=get_recent_ohlcv (time only)",
+            )
+    except Exception:
+        pass
+
+    try:
+        import pandas as pd
+
+        # proba 観測（Visualizeが参照している入力）
+        lgbm_ok = isinstance(lgbm, dict) and bool(lgbm.get("ok"))
+        lgbm_path = str(lgbm.get("path") or "") if isinstance(lgbm, dict) else ""
+        lgbm_series = lgbm.get("series") if lgbm_ok else None
+        prob_buy_list = None
+        if isinstance(lgbm_series, dict):
+            prob_buy_list = lgbm_series.get("prob_buy")
+        df_prob_obs = pd.DataFrame(
+            {
+                "time": list(lgbm.get("time") or []) if lgbm_ok else [],
+                "prob_buy": list(prob_buy_list or []) if isinstance(prob_buy_list, list) else [],
+            }
+        )
+        _obs_dump_series(
+            "proba_input",
+            df_prob_obs,
+            source_name="proba_csv",
+            source_path=lgbm_path,
+            time_col="time",
+            prob_col="prob_buy",
+            n=1000,
+            join_meta="source=visualization_service.get_recent_lgbm_series (no join in GUI plot)",
+        )
+
+        # 観測用の突合（OHLC time を基準に merge_asof して段階化要因を切り分け）
+        # - Visualize本体の描画ロジックは変更しない（このDFはログ用途のみ）
+        if (
+            isinstance(ohlc, dict)
+            and bool(ohlc.get("ok"))
+            and isinstance(ohlc.get("time"), list)
+            and lgbm_ok
+            and len(df_prob_obs) > 0
+        ):
+            df_ohlc_t = pd.DataFrame({"time": list(ohlc.get("time") or [])})
+            df_ohlc_t["time"] = pd.to_datetime(df_ohlc_t["time"], errors="coerce")
+            df_ohlc_t = df_ohlc_t.dropna(subset=["time"]).sort_values("time", kind="mergesort")
+
+            df_prob_t = df_prob_obs.copy()
+            df_prob_t["time"] = pd.to_datetime(df_prob_t["time"], errors="coerce")
+            df_prob_t["prob_buy"] = pd.to_numeric(df_prob_t["prob_buy"], errors="coerce")
+            df_prob_t = df_prob_t.dropna(subset=["time"]).sort_values("time", kind="mergesort")
+
+            joined = pd.merge_asof(
+                df_ohlc_t,
+                df_prob_t[["time", "prob_buy"]],
+                on="time",
+                direction="backward",
+            )
+            _obs_dump_series(
+                "proba_joined_on_ohlc",
+                joined,
+                source_name="proba_csv",
+                source_path=lgbm_path,
+                time_col="time",
+                prob_col="prob_buy",
+                n=1000,
+                join_meta="merge_asof(on=time, direction=backward, tolerance=None) (OBS ONLY)",
+            )
+    except Exception:
+        pass
+
+    # 観測用（1回/更新 程度に抑える）
+    try:
+        keys = list(lgbm.get("keys") or []) if isinstance(lgbm, dict) else []
+        series = lgbm.get("series") if isinstance(lgbm, dict) else None
+        prob = series.get("prob_buy") if isinstance(series, dict) else None
+        len_prob = int(len(prob)) if isinstance(prob, list) else 0
+        logger.info("[viz] lgbm keys={} len_prob={}", keys, len_prob)
+    except Exception:
+        pass
+
+
+class _VizFeedWorker(QtCore.QObject):
+    """VizFeed の I/O（OHLC / proba の読み込み・未推論分の推論）を専用スレッドで行い、差分だけを返す"""
+
+    delta_ready = QtCore.pyqtSignal(object)  # VizDelta or None
+    failed = QtCore.pyqtSignal(str)
+
+    def __init__(self, feed: VizFeed):
+        super().__init__()
+        self._feed = feed
+
+    @QtCore.pyqtSlot(object)
+    def fetch(self, req: object) -> None:
+        try:
+            r = req if isinstance(req, dict) else {}
+            if r.get("mode") == "prepend":
+                delta = self._feed.prepend(str(r.get("symbol")), str(r.get("tf")), int(r.get("bars") or 0))
+            else:
+                delta = self._feed.poll(
+                    str(r.get("symbol")), str(r.get("tf")), int(r.get("n") or 0), reload=bool(r.get("reload"))
+                )
+            if delta is not None and delta.changed:
+                _log_viz_inputs(*self._feed.snapshot())
+            self.delta_ready.emit(delta)
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
 class VisualizeTab(QWidget):
     """
     可視化タブ（将来シミュレーターの土台）
     - 上段: ローソク足（OHLC）
     - 下段: LightGBM 出力（prob_buy 等）+ threshold + crossing marker
+    - データ取得は _VizFeedWorker（QThread）で行い、タブは差分を受けて末尾だけ描き直す
     """
 
+    feed_requested = QtCore.pyqtSignal(object)  # ワーカーへの依頼（dict）
+
     def __init__(self, parent=None) -> None:
         super().__init__(parent)
 
@@ -254,11 +381,11 @@ class VisualizeTab(QWidget):
         # デバッグ切替：prob_buy/prob_sell を2本表示
         self.chk_debug_both = QtWidgets.QCheckBox("Debug: show buy/sell")
         self.chk_debug_both.setChecked(False)
-        self.chk_debug_both.stateChanged.connect(self.refresh)
+        self.chk_debug_both.stateChanged.connect(lambda *_: self._render_cached(full=True))
         lay.addWidget(self.chk_debug_both)
 
         self.btn_refresh = QPushButton("Refresh")
-        self.btn_refresh.clicked.connect(self.refresh)
+        self.btn_refresh.clicked.connect(lambda *_: self.refresh(force=True))
         lay.addWidget(self.btn_refresh)
 
         lay.addStretch(1)
@@ -275,21 +402,23 @@ class VisualizeTab(QWidget):
         self.canvas.mpl_connect("motion_notify_event", self._on_mpl_motion)
         self.canvas.mpl_connect("button_release_event", self._on_mpl_release)
 
-        # drag-pan state (refresh() で axes が作り直される前提のため、参照は都度更新する)
+        # drag-pan state (フル描画で axes が作り直される前提のため、参照は都度更新する)
         self._ax_price = None
         self._ax_prob = None
         self._drag_pan_active: bool = False
         self._drag_pan_x0: float | None = None
         self._drag_pan_xlim0: tuple[float, float] | None = None
         self._user_xlim: tuple[float, float] | None = None
-        # 軽量描画モード用
-        self._candle_bodies: list = []
-        self._candle_wicks: list = []
+        # 軽量描画モード・末尾だけの描き直し用（バーごとの (wick, body) と下段の artist）
+        self._candle_artists: list = []
+        self._candle_width: float = 0.0
+        self._prob_artists: dict = {}
+        self._prob_mode: str | None = None
+        self._cross_markers: list = []
         self._drag_light_mode: bool = False
-        # OHLC cache (infinite scroll: prepend older bars on pan-left)
-        self._ohlc_cache: dict | None = None
-        self._ohlc_cache_key: tuple[str, str] | None = None
-        self._ohlc_cache_n: int | None = None
+        self._render_dirty: bool = False
+        # OHLC / proba cache（ワーカーから届く差分を積む。pan-left 時は過去分を prepend）
+        self._viz_cache = VizCache()
         # throttle state for smooth pan
         self._drag_pan_last_x: float | None = None
         self._pan_tick_pending: bool = False
@@ -301,7 +430,25 @@ class VisualizeTab(QWidget):
         self.lbl_status.setWordWrap(True)
         root.addWidget(self.lbl_status)
 
-        # timer: simple, no threads
+        # ---- data feed worker（CSV 読み込み・推論は専用スレッドで。GUI には差分だけ届く）----
+        self._feed_inflight: bool = False
+        self._feed_pending: dict | None = None
+        self._feed_thread = QtCore.QThread(self)
+        self._feed_worker = _VizFeedWorker(get_viz_feed())
+        self._feed_worker.moveToThread(self._feed_thread)
+        self.feed_requested.connect(self._feed_worker.fetch)
+        self._feed_worker.delta_ready.connect(self._on_feed_delta)
+        self._feed_worker.failed.connect(self._on_feed_failed)
+        self._feed_thread.finished.connect(self._feed_worker.deleteLater)
+        self._feed_thread.start()
+        try:
+            app = QtWidgets.QApplication.instance()
+            if app is not None:
+                app.aboutToQuit.connect(self._stop_feed_thread)
+        except Exception:
+            pass
+
+        # timer: 5秒ごとにワーカーへ差分取得を依頼
         self._timer = QtCore.QTimer(self)
         self._timer.setInterval(5000)
         self._timer.timeout.connect(self.refresh)
@@ -312,7 +459,7 @@ class VisualizeTab(QWidget):
     def _on_mpl_scroll(self, event: object) -> None:
         """
         Ctrl+ホイールのみ、表示本数 N を増減する（ズーム等とは混ぜない）。
-        - spn_n を唯一の正とし、setValue() → refresh() で再描画。
+        - spn_n を唯一の正とし、setValue() → 保持データで再描画（足りなければ refresh() で取り直す）。
         """
         try:
             mods = QtWidgets.QApplication.keyboardModifiers()
@@ -374,24 +521,29 @@ class VisualizeTab(QWidget):
                 self._user_xlim = None
 
             # cache が十分にあるなら維持（N変更で過去表示が飛ぶのを避ける）
+            cache_kept = False
             try:
                 sym = (self.ed_symbol.text() or "USDJPY-").strip()
                 tf = (self.cmb_tf.currentText() or "M5").strip()
                 key = (str(sym), str(tf))
-                cache = getattr(self, "_ohlc_cache", None)
+                cache = self._viz_cache.ohlc
                 if (
                     isinstance(cache, dict)
                     and bool(cache.get("ok"))
-                    and getattr(self, "_ohlc_cache_key", None) == key
+                    and self._viz_cache.key == key
                     and int(cache.get("rows") or 0) >= int(new_n)
                 ):
-                    self._ohlc_cache_n = int(new_n)
+                    self._viz_cache.count = int(new_n)
+                    cache_kept = True
                 else:
                     # 不足する場合は refresh() 側で取り直す
-                    self._ohlc_cache = None
+                    self._viz_cache.ohlc = None
             except Exception:
                 pass
-            self.refresh()
+            if cache_kept:
+                self._render_cached(full=True)
+            else:
+                self.refresh()
         except Exception as e:
             logger.error(f"[viz] scroll handler failed: {e}")
 
@@ -407,8 +559,8 @@ class VisualizeTab(QWidget):
             self.lbl_thr.setText(f"{thr:.2f}")
         except Exception:
             pass
-        # UI操作で即反映（軽量なので全再描画でOK）
-        self.refresh()
+        # UI操作で即反映（保持データで全再描画。I/O はしない）
+        self._render_cached(full=True)
 
     def _get_inputs(self) -> tuple[str, str, int]:
         sym = (self.ed_symbol.text() or "USDJPY-").strip()
@@ -416,306 +568,164 @@ class VisualizeTab(QWidget):
         n = int(self.spn_n.value())
         return sym, tf, n
 
-    def refresh(self) -> None:
+    def refresh(self, *_: object, force: bool = False) -> None:
+        """
+        データ更新をワーカーへ依頼する（I/O は GUI スレッドで行わない）。
+        結果は _on_feed_delta で受け取り、変化した末尾だけ描き直す。
+        force=True（Refresh ボタン）は表示範囲全体を取り直す。
+        """
         # ドラッグ中に timer refresh が走ると xlim が巻き戻って「パンが効かない」に見えるため抑止する
         if bool(getattr(self, "_drag_pan_active", False)):
             return
         sym, tf, n = self._get_inputs()
-        thr = self._threshold()
 
-        # services: get data (GUI does not import core)
-        # ohlc: cache を優先（pan-left 時は prepend して伸ばす）
+        # ohlc: cache を優先（pan-left 時は prepend して伸ばす）。cache が使えない場合だけ全体を取り直す
         key = (str(sym), str(tf))
+        cache = self._viz_cache
         need_fetch = (
-            self._ohlc_cache is None
-            or self._ohlc_cache_key != key
-            or int(self._ohlc_cache_n or 0) != int(n)
-            or (not bool(self._ohlc_cache.get("ok")) if isinstance(self._ohlc_cache, dict) else True)
+            bool(force)
+            or cache.resync
+            or cache.ohlc is None
+            or cache.key != key
+            or int(cache.count or 0) != int(n)
+            or (not bool(cache.ohlc.get("ok")) if isinstance(cache.ohlc, dict) else True)
         )
-        if need_fetch:
-            ohlc = get_recent_ohlcv(symbol=sym, timeframe=tf, count=n)
-            self._ohlc_cache = ohlc if isinstance(ohlc, dict) else None
-            self._ohlc_cache_key = key
-            self._ohlc_cache_n = int(n)
-        else:
-            ohlc = self._ohlc_cache or {"ok": False, "reason": "ohlc_cache_missing"}
-
-        # OHLCの時間範囲を確定してからprobaを埋める
-        t_min: datetime | None = None
-        t_max: datetime | None = None
-        if isinstance(ohlc, dict) and ohlc.get("ok") and isinstance(ohlc.get("time"), list):
-            times = ohlc["time"]
-            if times:
-                t_min = min(times)
-                t_max = max(times)
-
-        # proba CSVの自動更新（M5のみ、表示範囲を埋める）
-        if tf == "M5" and t_min is not None and t_max is not None:
-            try:
-                ensure_lgbm_proba_uptodate(symbol=sym, timeframe=tf, start_time=t_min, end_time=t_max)
-            except Exception as e:
-                logger.warning(f"[viz] ensure_lgbm_proba_uptodate failed: {e}")
-
-        # 同じ範囲でprobaを取得（prob_sellも取得可能にする）
-        lgbm = get_recent_lgbm_series(
-            symbol=sym, count=n, keys=("prob_buy", "prob_sell"), start_time=t_min, end_time=t_max
-        )
-
-        # --- 観測ログ：入力ソース（proba）/OHLC/突合（表示直前） ---
-        # ※挙動は変えない。重い処理を避けるため末尾n=1000程度に制限する。
-        try:
-            import pandas as pd
-
-            # OHLC 観測（time粒度）
-            if isinstance(ohlc, dict) and bool(ohlc.get("ok")):
-                df_ohlc_obs = pd.DataFrame({"time": list(ohlc.get("time") or [])})
-                _obs_dump_series(
-                    "ohlc_input",
-                    df_ohlc_obs,
-                    source_name=str(ohlc.get("source") or "unknown"),
-                    source_path=str(ohlc.get("csv_path") or ""),
-                    time_col="time",
-                    prob_col=None,
-                    n=1000,
-                    join_meta="source=get_recent_ohlcv (time only)",
-                )
-        except Exception:
-            pass
+        self._request_feed({"mode": "poll", "symbol": sym, "tf": tf, "n": int(n), "reload": need_fetch})
+
+    def _request_feed(self, req: dict) -> None:
+        """ワーカーへ依頼を送る。処理中なら最新の依頼だけを保留する（reload は保留中も引き継ぐ）"""
+        if self._feed_inflight:
+            prev = self._feed_pending
+            if isinstance(prev, dict) and bool(prev.get("reload")) and req.get("mode") == "poll":
+                req = dict(req, reload=True)
+            self._feed_pending = req
+            return
+        self._feed_inflight = True
+        self._viz_cache.resync = False
+        self.feed_requested.emit(req)
 
+    def _on_feed_delta(self, delta_obj: object) -> None:
+        self._feed_inflight = False
         try:
-            import pandas as pd
-
-            # proba 観測（Visualizeが参照している入力）
-            lgbm_ok = isinstance(lgbm, dict) and bool(lgbm.get("ok"))
-            lgbm_path = str(lgbm.get("path") or "") if isinstance(lgbm, dict) else ""
-            lgbm_series = lgbm.get("series") if lgbm_ok else None
-            prob_buy_list = None
-            if isinstance(lgbm_series, dict):
-                prob_buy_list = lgbm_series.get("prob_buy")
-            df_prob_obs = pd.DataFrame(
-                {
-                    "time": list(lgbm.get("time") or []) if lgbm_ok else [],
-                    "prob_buy": list(prob_buy_list or []) if isinstance(prob_buy_list, list) else [],
-                }
-            )
-            _obs_dump_series(
-                "proba_input",
-                df_prob_obs,
-                source_name="proba_csv",
-                source_path=lgbm_path,
-                time_col="time",
-                prob_col="prob_buy",
-                n=1000,
-                join_meta="source=visualization_service.get_recent_lgbm_series (no join in GUI plot)",
+            self._apply_feed_delta(delta_obj)
+        except Exception as e:
+            logger.error(f"[viz] apply delta failed: {e}")
+            self.lbl_status.setText(f"render failed: {e}")
+        pending = self._feed_pending
+        self._feed_pending = None
+        if isinstance(pending, dict):
+            self._request_feed(pending)
+
+    def _on_feed_failed(self, msg: str) -> None:
+        self._feed_inflight = False
+        logger.error(f"[viz] feed fetch failed: {msg}")
+        self.lbl_status.setText(f"fetch failed: {msg}")
+        pending = self._feed_pending
+        self._feed_pending = None
+        if isinstance(pending, dict):
+            self._request_feed(pending)
+
+    def _apply_feed_delta(self, delta_obj: object) -> None:
+        if not isinstance(delta_obj, VizDelta):
+            return
+        delta = delta_obj
+        sym, tf, _n = self._get_inputs()
+        if delta.key != (str(sym), str(tf)):
+            # 入力が変わった後に届いた古い結果（次の依頼で取り直す）
+            return
+        # 差分を取りこぼした場合は積まずに resync（次回は全体を取り直す）
+        mode = self._viz_cache.apply(delta)
+        if mode == "full":
+            self._render_cached(full=True)
+        elif mode == "tail":
+            self._render_cached(
+                full=False,
+                ohlc_start=delta.ohlc_start,
+                lgbm_start=delta.lgbm_start,
+                ohlc_drop=delta.ohlc_drop,
+                lgbm_drop=delta.lgbm_drop,
             )
 
-            # 観測用の突合（OHLC time を基準に merge_asof して段階化要因を切り分け）
-            # - Visualize本体の描画ロジックは変更しない（このDFはログ用途のみ）
-            if (
-                isinstance(ohlc, dict)
-                and bool(ohlc.get("ok"))
-                and isinstance(ohlc.get("time"), list)
-                and lgbm_ok
-                and len(df_prob_obs) > 0
-            ):
-                df_ohlc_t = pd.DataFrame({"time": list(ohlc.get("time") or [])})
-                df_ohlc_t["time"] = pd.to_datetime(df_ohlc_t["time"], errors="coerce")
-                df_ohlc_t = df_ohlc_t.dropna(subset=["time"]).sort_values("time", kind="mergesort")
-
-                df_prob_t = df_prob_obs.copy()
-                df_prob_t["time"] = pd.to_datetime(df_prob_t["time"], errors="coerce")
-                df_prob_t["prob_buy"] = pd.to_numeric(df_prob_t["prob_buy"], errors="coerce")
-                df_prob_t = df_prob_t.dropna(subset=["time"]).sort_values("time", kind="mergesort")
-
-                joined = pd.merge_asof(
-                    df_ohlc_t,
-                    df_prob_t[["time", "prob_buy"]],
-                    on="time",
-                    direction="backward",
-                )
-                _obs_dump_series(
-                    "proba_joined_on_ohlc",
-                    joined,
-                    source_name="proba_csv",
-                    source_path=lgbm_path,
-                    time_col="time",
-                    prob_col="prob_buy",
-                    n=1000,
-                    join_meta="merge_asof(on=time, direction=backward, tolerance=None) (OBS ONLY)",
-                )
-        except Exception:
-            pass
-
-        # 観測用（1回/refresh 程度に抑える）
-        try:
-            keys = list(lgbm.get("keys") or []) if isinstance(lgbm, dict) else []
-            series = lgbm.get("series") if isinstance(lgbm, dict) else None
-            prob = (series.get("prob_buy") if isinstance(series, dict) else None) if isinstance(lgbm, dict) else None
-            len_prob = int(len(prob)) if isinstance(prob, list) else 0
-            logger.info("[viz] lgbm keys={} len_prob={}", keys, len_prob)
-        except Exception:
-            pass
-
+    def _render_cached(
+        self,
+        *,
+        full: bool = True,
+        ohlc_start: int = 0,
+        lgbm_start: int = 0,
+        ohlc_drop: int = 0,
+        lgbm_drop: int = 0,
+    ) -> None:
+        """保持しているデータで描画する（I/O なし）。full=False は末尾だけ描き直す"""
+        if bool(getattr(self, "_drag_pan_active", False)):
+            # ドラッグ中は描かない（release 時にフル描画）
+            self._render_dirty = True
+            return
+        ohlc = self._viz_cache.ohlc or {"ok": False, "reason": "ohlc_cache_missing"}
+        lgbm = self._viz_cache.lgbm or {"ok": False, "reason": "lgbm_cache_missing"}
+        thr = self._threshold()
         try:
-            self._render(ohlc=ohlc, lgbm=lgbm, threshold=thr)
+            if full or not self._render_tail(
+                ohlc=ohlc,
+                lgbm=lgbm,
+                threshold=thr,
+                ohlc_start=ohlc_start,
+                lgbm_start=lgbm_start,
+                ohlc_drop=ohlc_drop,
+                lgbm_drop=lgbm_drop,
+            ):
+                self._render(ohlc=ohlc, lgbm=lgbm, threshold=thr)
+            self._render_dirty = False
         except Exception as e:
             logger.error(f"[viz] render failed: {e}")
             self.lbl_status.setText(f"render failed: {e}")
 
-    def _prepend_older_ohlc_if_needed(self) -> None:
+    def _prepend_older_ohlc_if_needed(self) -> bool:
         """
-        user_xlim の左端が、保持OHLCの最古より左に出た場合のみ、過去分を services から取得して prepend する。
+        user_xlim の左端が、保持OHLCの最古より左に出た場合のみ、過去分の取得をワーカーへ依頼する。
         - release 時だけ呼ぶ（motion中は取得しない）
+        - 依頼した場合は True（結果は reset の差分として届き、フル描画される）
         """
         try:
             if not (isinstance(getattr(self, "_user_xlim", None), tuple) and len(self._user_xlim) == 2):
-                return
+                return False
             left_xlim = float(self._user_xlim[0])  # float(date2num)
 
-            cache = getattr(self, "_ohlc_cache", None)
+            cache = self._viz_cache.ohlc
             if not (isinstance(cache, dict) and bool(cache.get("ok"))):
-                return
+                return False
             times = cache.get("time")
             if not (isinstance(times, list) and len(times) >= 2 and isinstance(times[0], datetime)):
-                return
+                return False
 
-            xs = date2num(times)
+            xs = date2num(times[:2])
             try:
                 min_x = float(xs[0])
                 bar_w = float(xs[1] - xs[0])
             except Exception:
-                return
+                return False
             if not (bar_w > 0):
-                return
+                return False
 
             if left_xlim >= min_x:
-                return
+                return False
 
             sym, tf, _n = self._get_inputs()
-            min_time = times[0]
             # どれだけ左に出たかから必要本数を見積もる（取りすぎ防止）
             margin = 20
             bars_needed = int((min_x - left_xlim) / bar_w) + margin
             bars_needed = max(10, min(int(bars_needed), 2000))
-
-            older = get_recent_ohlcv(symbol=sym, timeframe=tf, count=bars_needed, until=min_time)
-            if not (isinstance(older, dict) and bool(older.get("ok"))):
-                return
-
-            ot = older.get("time")
-            if not (isinstance(ot, list) and ot):
-                return
-
-            # 重複（境界）を避けて strictly older のみ prepend
-            keep_idx = [i for i, t in enumerate(ot) if isinstance(t, datetime) and t < min_time]
-            if not keep_idx:
-                return
-
-            def pick(col: str) -> list[float]:
-                arr = older.get(col)
-                if not isinstance(arr, list):
-                    return []
-                out: list[float] = []
-                for i in keep_idx:
-                    try:
-                        out.append(float(arr[i]))
-                    except Exception:
-                        out.append(0.0)
-                return out
-
-            older_times = [ot[i] for i in keep_idx]
-            new_cache = dict(cache)
-            new_cache["time"] = older_times + list(times)
-            for col in ["open", "high", "low", "close"]:
-                base = cache.get(col)
-                base_list = list(base) if isinstance(base, list) else []
-                new_cache[col] = pick(col) + base_list
-            try:
-                new_cache["rows"] = int(len(new_cache["time"]))
-            except Exception:
-                pass
-
-            self._ohlc_cache = new_cache
-            logger.info(
-                "[viz] ohlc prepend: added={} total_rows={} until={}",
-                len(older_times),
-                int(new_cache.get("rows") or 0),
-                str(min_time),
-            )
+            self._request_feed({"mode": "prepend", "symbol": sym, "tf": tf, "bars": bars_needed})
+            return True
         except Exception as e:
             logger.error(f"[viz] ohlc prepend failed: {e}")
+            return False
 
-    def _render(self, *, ohlc: dict, lgbm: dict, threshold: float) -> None:
-        self.fig.clear()
-        self._candle_bodies = []  # 軽量モード用にクリア
-        self._candle_wicks = []
-        gs = self.fig.add_gridspec(2, 1, height_ratios=[2.2, 1.0], hspace=0.05)
-        ax_price = self.fig.add_subplot(gs[0, 0])
-        ax_prob = self.fig.add_subplot(gs[1, 0], sharex=ax_price)
-        # refresh() 毎に axes が作り直されるため、最新参照を保持
-        self._ax_price = ax_price
-        self._ax_prob = ax_prob
-
-        # --- upper: candlestick (best-effort) ---
-        ohlc_ok = bool(ohlc.get("ok"))
-        t = ohlc.get("time") if ohlc_ok else None
-        opens = ohlc.get("open") if ohlc_ok else None
-        highs = ohlc.get("high") if ohlc_ok else None
-        lows = ohlc.get("low") if ohlc_ok else None
-        closes = ohlc.get("close") if ohlc_ok else None
-
-        xs_ohlc: list[float] = []
-        if ohlc_ok and isinstance(t, list) and len(t) >= 2 and isinstance(opens, list) and isinstance(closes, list):
-            xs_ohlc = list(date2num(t))
-            try:
-                width = float(xs_ohlc[1] - xs_ohlc[0]) * 0.6
-            except Exception:
-                width = 0.0005
-
-            for i in range(min(len(xs_ohlc), len(opens), len(closes), len(highs or []), len(lows or []))):
-                x = xs_ohlc[i]
-                o = float(opens[i])
-                c = float(closes[i])
-                h = float(highs[i])
-                l = float(lows[i])
-                up = c >= o
-                col = "#26a69a" if up else "#ef5350"
-                # wick
-                lc = ax_price.vlines(x, l, h, color=col, linewidth=1.0, alpha=0.9)
-                self._candle_wicks.append(lc)
-                # body
-                y0 = min(o, c)
-                hh = abs(c - o)
-                if hh <= 0:
-                    ax_price.hlines(o, x - width / 2, x + width / 2, color=col, linewidth=1.2)
-                else:
-                    rect = Rectangle(
-                        (x - width / 2, y0),
-                        width,
-                        hh,
-                        facecolor=col,
-                        edgecolor=col,
-                        alpha=0.85,
-                    )
-                    ax_price.add_patch(rect)
-                    self._candle_bodies.append(rect)
-
-            ax_price.set_ylabel("Price")
-            ax_price.grid(True, alpha=0.25)
-        else:
-            reason = ohlc.get("reason") if isinstance(ohlc, dict) else "unknown"
-            ax_price.text(
-                0.02,
-                0.9,
-                f"OHLC unavailable: {reason}",
-                transform=ax_price.transAxes,
-                fontsize=9,
-                color="#888",
-            )
-            ax_price.set_ylabel("Price")
-            ax_price.grid(True, alpha=0.15)
-
-        # --- lower: prob + threshold + crossing ---
+    # ------------------------------------------------------------------
+    # 描画
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _prob_arrays(lgbm: dict) -> tuple[list[float], list[float], list[float], list[float]]:
+        """lgbm から (xs, prob_buy, prob_sell, diff) を作る（diff は buy/sell が揃った場合のみ）"""
         lgbm_ok = bool(lgbm.get("ok"))
         series = lgbm.get("series") if lgbm_ok else None
         prob_buy_raw = None
@@ -724,18 +734,6 @@ class VisualizeTab(QWidget):
             prob_buy_raw = series.get("prob_buy")
             prob_sell_raw = series.get("prob_sell")
 
-        # デバッグ切替フラグ
-        show_both = bool(getattr(self, "chk_debug_both", None) and self.chk_debug_both.isChecked())
-
-        # threshold 線は diffモードでは非表示（混乱防止）
-        if not show_both:
-            # diffモードでは threshold 線を出さない
-            pass
-        else:
-            # デバッグモード（both表示）では threshold 線を表示
-            ax_prob.axhline(float(threshold), color="#ff9800", linewidth=1.2, linestyle="--", label="threshold")
-
-        markers = 0
         # lgbmのtimeを使用（OHLCのxsと同長である必要はない）
         lgbm_times = lgbm.get("time") if lgbm_ok and isinstance(lgbm.get("time"), list) else None
         xs_lgbm: list[float] = []
@@ -743,7 +741,7 @@ class VisualizeTab(QWidget):
         prob_sell: list[float] = []
         if lgbm_ok and lgbm_times:
             try:
-                xs_lgbm = [date2num(ts) for ts in lgbm_times]
+                xs_lgbm = [float(v) for v in date2num(lgbm_times)]
                 if isinstance(prob_buy_raw, list):
                     prob_buy = [float(v) for v in prob_buy_raw]
                 if isinstance(prob_sell_raw, list):
@@ -772,6 +770,13 @@ class VisualizeTab(QWidget):
         except Exception as e:
             logger.warning("[VIS][CHECK] prob_buy stats failed: {}", e)
 
+        diff: list[float] = []
+        if prob_buy and prob_sell and len(prob_buy) == len(prob_sell) and len(prob_buy) > 0:
+            diff = [float(prob_buy[i] - prob_sell[i]) for i in range(len(prob_buy))]
+        return xs_lgbm, prob_buy, prob_sell, diff
+
+    @staticmethod
+    def _stats_text(prob_buy: list[float], prob_sell: list[float], diff: list[float]) -> str:
         # 統計計算（prob_buy/prob_sell/diffが確定した後）
         mean_buy = None
         mean_sell = None
@@ -779,48 +784,299 @@ class VisualizeTab(QWidget):
         mean_abs_diff = None
         pct_pos = None
         pct_neg = None
-        
+
         if prob_buy and len(prob_buy) > 0:
             mean_buy = sum(prob_buy) / len(prob_buy)
         if prob_sell and len(prob_sell) > 0:
             mean_sell = sum(prob_sell) / len(prob_sell)
-        
+
         # diff が計算できる場合（両方が揃っている場合）
-        diff: list[float] = []
-        if prob_buy and prob_sell and len(prob_buy) == len(prob_sell) and len(prob_buy) > 0:
-            diff = [float(prob_buy[i] - prob_sell[i]) for i in range(len(prob_buy))]
-            if len(diff) > 0:
-                mean_diff = sum(diff) / len(diff)
-                mean_abs_diff = sum(abs(d) for d in diff) / len(diff)
-                pos_count = sum(1 for d in diff if d > 0)
-                neg_count = sum(1 for d in diff if d < 0)
-                pct_pos = pos_count / len(diff)
-                pct_neg = neg_count / len(diff)
-        
+        if len(diff) > 0:
+            mean_diff = sum(diff) / len(diff)
+            mean_abs_diff = sum(abs(d) for d in diff) / len(diff)
+            pos_count = sum(1 for d in diff if d > 0)
+            neg_count = sum(1 for d in diff if d < 0)
+            pct_pos = pos_count / len(diff)
+            pct_neg = neg_count / len(diff)
+
         # 統計表示文字列を生成（短縮版）
         def fmt_val(v: float | None) -> str:
             if v is None:
                 return "NA"
             return f"{v:.3f}"
-        
-        stats_text = (
+
+        return (
             f"buy={fmt_val(mean_buy)}  sell={fmt_val(mean_sell)}  "
             f"diff={fmt_val(mean_diff)}  |diff|={fmt_val(mean_abs_diff)}  "
             f"+={fmt_val(pct_pos)}  -={fmt_val(pct_neg)}"
         )
-        
+
+    def _draw_candles(self, ax_price, ohlc: dict, start: int) -> None:
+        """start 以降のローソク足を描き、バーごとの artist を _candle_artists に積む"""
+        t = ohlc.get("time")
+        opens = ohlc.get("open")
+        highs = ohlc.get("high")
+        lows = ohlc.get("low")
+        closes = ohlc.get("close")
+        width = float(self._candle_width)
+        n = min(len(t), len(opens), len(closes), len(highs or []), len(lows or []))
+        if start >= n:
+            return
+        xs_ohlc = date2num(t[start:n])
+        for j, i in enumerate(range(start, n)):
+            x = float(xs_ohlc[j])
+            o = float(opens[i])
+            c = float(closes[i])
+            h = float(highs[i])
+            l = float(lows[i])
+            up = c >= o
+            col = "#26a69a" if up else "#ef5350"
+            # wick
+            lc = ax_price.vlines(x, l, h, color=col, linewidth=1.0, alpha=0.9)
+            # body
+            y0 = min(o, c)
+            hh = abs(c - o)
+            if hh <= 0:
+                body = ax_price.hlines(o, x - width / 2, x + width / 2, color=col, linewidth=1.2)
+            else:
+                body = Rectangle(
+                    (x - width / 2, y0),
+                    width,
+                    hh,
+                    facecolor=col,
+                    edgecolor=col,
+                    alpha=0.85,
+                )
+                ax_price.add_patch(body)
+            self._candle_artists.append((lc, body))
+
+    def _draw_cross_markers(self, ax_prob, xs_lgbm: list[float], diff: list[float], start: int) -> None:
+        # crossing: below -> above（diffで判定、threshold=0.0を基準）
+        for i in range(max(1, int(start)), len(diff)):
+            if diff[i - 1] < 0.0 and diff[i] >= 0.0:
+                (m,) = ax_prob.plot(
+                    xs_lgbm[i],
+                    0.0,
+                    marker="^",
+                    markersize=8,
+                    color="#4caf50",
+                    label="cross_up" if i == 1 else "",
+                )
+                self._cross_markers.append((i, m))
+            elif diff[i - 1] > 0.0 and diff[i] <= 0.0:
+                (m,) = ax_prob.plot(
+                    xs_lgbm[i],
+                    0.0,
+                    marker="v",
+                    markersize=8,
+                    color="#f44336",
+                    label="cross_down" if i == 1 else "",
+                )
+                self._cross_markers.append((i, m))
+
+    @staticmethod
+    def _apply_diff_span(ax_prob, diff: list[float]) -> None:
+        # diff の振幅に応じて動的に表示レンジを決める（表示のみ）
+        # - 微小変動でも「直線に見えない」ように span 下限を設ける
+        # - NaN/空などで max_abs が決められない場合は固定レンジへフォールバック
+        try:
+            import math
+
+            finite_abs = [abs(float(d)) for d in diff if d is not None and math.isfinite(float(d))]
+            if finite_abs:
+                max_abs = float(max(finite_abs))
+                span = float(max(max_abs * 1.2, 0.02))
+                ax_prob.set_ylim(-span, +span)
+                # 視認性補助（表示のみ、ログは増やさない）
+                ax_prob.set_title(f"Diff span=±{span:.3f}", fontsize=9, loc="left", pad=2)
+            else:
+                ax_prob.set_ylim(-1.0, 1.0)
+        except Exception:
+            ax_prob.set_ylim(-1.0, 1.0)
+
+    def _update_status(self, *, ohlc: dict, lgbm: dict, threshold: float) -> None:
+        # status + log
+        markers = len(self._cross_markers)
+        ohlc_n = int(ohlc.get("rows") or 0) if isinstance(ohlc, dict) else 0
+        lgbm_keys = list(lgbm.get("keys") or []) if isinstance(lgbm, dict) else []
+        src_ohlc = ohlc.get("source") if isinstance(ohlc, dict) else None
+        src_lgbm = "decisions_log" if bool(lgbm.get("ok")) else None
+
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.lbl_status.setText(
+            f"updated={now} | ohlc={ohlc_n} ({src_ohlc}) | lgbm={int(lgbm.get('rows') or 0) if isinstance(lgbm, dict) else 0} ({src_lgbm}) | threshold={threshold:.2f} | markers={markers}"
+        )
+        log_viz_info(ohlc_n=ohlc_n, lgbm_keys=lgbm_keys, threshold=float(threshold), markers=int(markers))
+
+    def _render_tail(
+        self,
+        *,
+        ohlc: dict,
+        lgbm: dict,
+        threshold: float,
+        ohlc_start: int,
+        lgbm_start: int,
+        ohlc_drop: int = 0,
+        lgbm_drop: int = 0,
+    ) -> bool:
+        """
+        既存の artist を残したまま、先頭から落とした行（*_drop）を消し、ohlc_start / lgbm_start 以降だけ描き直す。
+        start は落とした後の index。
+        表示の形（OHLC の有無・diff/buy-sell の表示状態）が変わる場合は False（フル描画に任せる）。
+        """
+        ax_price = self._ax_price
+        ax_prob = self._ax_prob
+        if ax_price is None or ax_prob is None or self._prob_mode is None:
+            return False
+        show_both = bool(getattr(self, "chk_debug_both", None) and self.chk_debug_both.isChecked())
+        if (self._prob_mode == "both") != show_both:
+            return False
+
+        # --- 上段: 変化したバー以降のローソク足だけ作り直す ---
+        t = ohlc.get("time") if bool(ohlc.get("ok")) else None
+        if not (
+            self._candle_width > 0
+            and isinstance(t, list)
+            and len(t) >= 2
+            and isinstance(ohlc.get("open"), list)
+            and isinstance(ohlc.get("close"), list)
+        ):
+            return False
+        ohlc_drop = max(0, int(ohlc_drop))
+        if ohlc_drop > len(self._candle_artists):
+            return False
+        for wick, body in self._candle_artists[:ohlc_drop]:
+            wick.remove()
+            body.remove()
+        del self._candle_artists[:ohlc_drop]
+        ohlc_start = max(0, min(int(ohlc_start), len(self._candle_artists)))
+        for wick, body in self._candle_artists[ohlc_start:]:
+            wick.remove()
+            body.remove()
+        del self._candle_artists[ohlc_start:]
+        self._draw_candles(ax_price, ohlc, ohlc_start)
+
+        # --- 下段: 線は set_data、クロスマーカーは変化位置以降だけ作り直す ---
+        xs_lgbm, prob_buy, prob_sell, diff = self._prob_arrays(lgbm)
+        if self._prob_mode == "diff":
+            line = self._prob_artists.get("diff")
+            if line is None or not (xs_lgbm and diff and len(xs_lgbm) == len(diff)):
+                return False
+            line.set_data(xs_lgbm, diff)
+            # 落とした行の分だけ index をずらす（新しい先頭の行は直前の値が無いのでマーカーを持たない）
+            lgbm_drop = max(0, int(lgbm_drop))
+            keep = []
+            for i, m in self._cross_markers:
+                j = i - lgbm_drop
+                if 1 <= j < lgbm_start:
+                    keep.append((j, m))
+                else:
+                    m.remove()
+            self._cross_markers = keep
+            self._draw_cross_markers(ax_prob, xs_lgbm, diff, lgbm_start)
+            self._apply_diff_span(ax_prob, diff)
+        else:
+            for key, values in (("prob_buy", prob_buy), ("prob_sell", prob_sell)):
+                usable = bool(xs_lgbm and values and len(xs_lgbm) == len(values))
+                line = self._prob_artists.get(key)
+                if usable != (line is not None):
+                    return False
+                if line is not None:
+                    line.set_data(xs_lgbm, values)
+
+        try:
+            ax_price.set_title(self._stats_text(prob_buy, prob_sell, diff), loc="left", fontsize=9, pad=8)
+        except Exception:
+            pass
+
+        # x 範囲: ユーザーがパンしていなければ新しいバーまで自動で広げる
+        if not (isinstance(getattr(self, "_user_xlim", None), tuple) and len(self._user_xlim) == 2):
+            ax_price.relim()
+            ax_price.autoscale_view()
+            ax_prob.relim()
+            ax_prob.autoscale_view(scaley=False)
+
+        self._update_status(ohlc=ohlc, lgbm=lgbm, threshold=threshold)
+        self.canvas.draw_idle()
+        return True
+
+    def _render(self, *, ohlc: dict, lgbm: dict, threshold: float) -> None:
+        self.fig.clear()
+        self._candle_artists = []  # 軽量モード・末尾描き直し用にクリア
+        self._candle_width = 0.0
+        self._prob_artists = {}
+        self._prob_mode = None
+        self._cross_markers = []
+        gs = self.fig.add_gridspec(2, 1, height_ratios=[2.2, 1.0], hspace=0.05)
+        ax_price = self.fig.add_subplot(gs[0, 0])
+        ax_prob = self.fig.add_subplot(gs[1, 0], sharex=ax_price)
+        # フル描画の度に axes が作り直されるため、最新参照を保持
+        self._ax_price = ax_price
+        self._ax_prob = ax_prob
+
+        # --- upper: candlestick (best-effort) ---
+        ohlc_ok = bool(ohlc.get("ok"))
+        t = ohlc.get("time") if ohlc_ok else None
+        opens = ohlc.get("open") if ohlc_ok else None
+        closes = ohlc.get("close") if ohlc_ok else None
+
+        if ohlc_ok and isinstance(t, list) and len(t) >= 2 and isinstance(opens, list) and isinstance(closes, list):
+            xs_head = date2num(t[:2])
+            try:
+                width = float(xs_head[1] - xs_head[0]) * 0.6
+            except Exception:
+                width = 0.0005
+            self._candle_width = width
+            self._draw_candles(ax_price, ohlc, 0)
+
+            ax_price.set_ylabel("Price")
+            ax_price.grid(True, alpha=0.25)
+        else:
+            reason = ohlc.get("reason") if isinstance(ohlc, dict) else "unknown"
+            ax_price.text(
+                0.02,
+                0.9,
+                f"OHLC unavailable: {reason}",
+                transform=ax_price.transAxes,
+                fontsize=9,
+                color="#888",
+            )
+            ax_price.set_ylabel("Price")
+            ax_price.grid(True, alpha=0.15)
+
+        # --- lower: prob + threshold + crossing ---
+        lgbm_ok = bool(lgbm.get("ok"))
+
+        # デバッグ切替フラグ
+        show_both = bool(getattr(self, "chk_debug_both", None) and self.chk_debug_both.isChecked())
+
+        # threshold 線は diffモードでは非表示（混乱防止）
+        if not show_both:
+            # diffモードでは threshold 線を出さない
+            pass
+        else:
+            # デバッグモード（both表示）では threshold 線を表示
+            ax_prob.axhline(float(threshold), color="#ff9800", linewidth=1.2, linestyle="--", label="threshold")
+
+        xs_lgbm, prob_buy, prob_sell, diff = self._prob_arrays(lgbm)
+
         # 統計表示（上段のタイトル領域へ移動：上下グラフの干渉を避ける）
         try:
-            ax_price.set_title(stats_text, loc="left", fontsize=9, pad=8)
+            ax_price.set_title(self._stats_text(prob_buy, prob_sell, diff), loc="left", fontsize=9, pad=8)
         except Exception:
             pass
 
         if show_both:
             # デバッグモード：prob_buy と prob_sell を2本表示
+            self._prob_mode = "both"
             if xs_lgbm and prob_buy and len(xs_lgbm) == len(prob_buy):
-                ax_prob.plot(xs_lgbm, prob_buy, color="#2196f3", linewidth=1.5, label="prob_buy", alpha=0.8)
+                (self._prob_artists["prob_buy"],) = ax_prob.plot(
+                    xs_lgbm, prob_buy, color="#2196f3", linewidth=1.5, label="prob_buy", alpha=0.8
+                )
             if xs_lgbm and prob_sell and len(xs_lgbm) == len(prob_sell):
-                ax_prob.plot(xs_lgbm, prob_sell, color="#f44336", linewidth=1.5, label="prob_sell", alpha=0.8)
+                (self._prob_artists["prob_sell"],) = ax_prob.plot(
+                    xs_lgbm, prob_sell, color="#f44336", linewidth=1.5, label="prob_sell", alpha=0.8
+                )
             ax_prob.set_ylabel("Prob")
             ax_prob.set_ylim(0.0, 1.0)
             ax_prob.grid(True, alpha=0.25)
@@ -836,48 +1092,14 @@ class VisualizeTab(QWidget):
         else:
             # デフォルトモード：diff = prob_buy - prob_sell を1本表示
             if xs_lgbm and diff and len(xs_lgbm) == len(diff):
-                # crossing: below -> above（diffで判定、threshold=0.0を基準）
-                for i in range(1, len(diff)):
-                    if diff[i - 1] < 0.0 and diff[i] >= 0.0:
-                        ax_prob.plot(
-                            xs_lgbm[i],
-                            0.0,
-                            marker="^",
-                            markersize=8,
-                            color="#4caf50",
-                            label="cross_up" if i == 1 else "",
-                        )
-                        markers += 1
-                    elif diff[i - 1] > 0.0 and diff[i] <= 0.0:
-                        ax_prob.plot(
-                            xs_lgbm[i],
-                            0.0,
-                            marker="v",
-                            markersize=8,
-                            color="#f44336",
-                            label="cross_down" if i == 1 else "",
-                        )
-                        markers += 1
-                ax_prob.plot(xs_lgbm, diff, color="#2196f3", linewidth=1.5, label="diff (buy-sell)", alpha=0.8)
+                self._prob_mode = "diff"
+                self._draw_cross_markers(ax_prob, xs_lgbm, diff, 1)
+                (self._prob_artists["diff"],) = ax_prob.plot(
+                    xs_lgbm, diff, color="#2196f3", linewidth=1.5, label="diff (buy-sell)", alpha=0.8
+                )
                 ax_prob.axhline(0.0, color="#888", linewidth=0.8, linestyle=":", alpha=0.5)
                 ax_prob.set_ylabel("Diff (buy-sell)")
-                # diff の振幅に応じて動的に表示レンジを決める（表示のみ）
-                # - 微小変動でも「直線に見えない」ように span 下限を設ける
-                # - NaN/空などで max_abs が決められない場合は固定レンジへフォールバック
-                try:
-                    import math
-
-                    finite_abs = [abs(float(d)) for d in diff if d is not None and math.isfinite(float(d))]
-                    if finite_abs:
-                        max_abs = float(max(finite_abs))
-                        span = float(max(max_abs * 1.2, 0.02))
-                        ax_prob.set_ylim(-span, +span)
-                        # 視認性補助（表示のみ、ログは増やさない）
-                        ax_prob.set_title(f"Diff span=±{span:.3f}", fontsize=9, loc="left", pad=2)
-                    else:
-                        ax_prob.set_ylim(-1.0, 1.0)
-                except Exception:
-                    ax_prob.set_ylim(-1.0, 1.0)
+                self._apply_diff_span(ax_prob, diff)
                 ax_prob.grid(True, alpha=0.25)
             elif xs_lgbm and prob_buy and len(xs_lgbm) == len(prob_buy):
                 # prob_sell が無い場合は注記のみ
@@ -937,17 +1159,7 @@ class VisualizeTab(QWidget):
         except Exception:
             pass
 
-        # status + log
-        ohlc_n = int(ohlc.get("rows") or 0) if isinstance(ohlc, dict) else 0
-        lgbm_keys = list(lgbm.get("keys") or []) if isinstance(lgbm, dict) else []
-        src_ohlc = ohlc.get("source") if isinstance(ohlc, dict) else None
-        src_lgbm = "decisions_log" if lgbm_ok else None
-
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.lbl_status.setText(
-            f"updated={now} | ohlc={ohlc_n} ({src_ohlc}) | lgbm={int(lgbm.get('rows') or 0) if isinstance(lgbm, dict) else 0} ({src_lgbm}) | threshold={threshold:.2f} | markers={markers}"
-        )
-        log_viz_info(ohlc_n=ohlc_n, lgbm_keys=lgbm_keys, threshold=float(threshold), markers=int(markers))
+        self._update_status(ohlc=ohlc, lgbm=lgbm, threshold=threshold)
 
         try:
             # tight_layout は Canvas/Toolbar 組み合わせによって警告が出ることがあるため、
@@ -1021,11 +1233,7 @@ class VisualizeTab(QWidget):
             self._drag_pan_x0 = x
             self._drag_pan_xlim0 = tuple(ax.get_xlim())
             # 軽量モードON: body+wick非表示
-            self._drag_light_mode = True
-            for r in self._candle_bodies:
-                r.set_visible(False)
-            for w in self._candle_wicks:
-                w.set_visible(False)
+            self._set_candles_visible(False)
             self.canvas.draw_idle()
         except Exception:
             self._drag_pan_active = False
@@ -1052,8 +1260,7 @@ class VisualizeTab(QWidget):
                 if ax is not None:
                     self._user_xlim = tuple(ax.get_xlim())
 
-                # 軽量モードOFF → フル描画に戻す（drag解除後に実施）
-                self._drag_light_mode = False
+                # 軽量モードOFF → 描画を戻す（drag解除後に実施）
                 do_refresh = True
         except Exception as e:
             logger.error(f"[viz] drag release failed: {e}")
@@ -1062,9 +1269,30 @@ class VisualizeTab(QWidget):
         self._drag_pan_xlim0 = None
         self._drag_pan_last_x = None
         if do_refresh:
-            # 左端が足りなければ過去OHLCを prepend（release時のみ）
-            self._prepend_older_ohlc_if_needed()
-            self.refresh()
+            # 左端が足りなければ過去OHLCを prepend（release時のみ。結果はワーカーから届きフル描画される）
+            if self._prepend_older_ohlc_if_needed():
+                return
+            if self._render_dirty:
+                # ドラッグ中に届いた差分を反映
+                self._render_cached(full=True)
+            else:
+                # axes は作り直さず、隠したローソク足を戻すだけ
+                self._set_candles_visible(True)
+                self.canvas.draw_idle()
+
+    def _set_candles_visible(self, visible: bool) -> None:
+        self._drag_light_mode = not visible
+        for wick, body in self._candle_artists:
+            wick.set_visible(visible)
+            body.set_visible(visible)
+
+    def _stop_feed_thread(self) -> None:
+        try:
+            self._timer.stop()
+            self._feed_thread.quit()
+            self._feed_thread.wait(3000)
+        except Exception:
+            pass
 
     def _schedule_pan_tick(self) -> None:
         try:
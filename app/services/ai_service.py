@@ -2,7 +2,9 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Dict, Any, Optional, TYPE_CHECKING
 import hashlib
+import threading
 import time
+import weakref
 import json
 import logging
 
@@ -56,7 +58,6 @@ def _enrich_active_model_meta(meta: dict, model_obj=None) -> dict:
 import numpy as np
 import pandas as pd
 from loguru import logger
-import joblib
 
 # --- T-43-3 Step2-3 hotfix: avoid ImportError on missing meta loader ---
 # core.ai.loader には meta loader が存在しないため、ここで縮退実装する。
@@ -105,6 +106,8 @@ def load_active_model_meta() -> dict:
         pass
     return _fallback_load_active_meta()
 from app.services.feature_importance import compute_feature_importance
+from app.services.model_registry import LoadedModel, get_model_registry
+from core.ai.tree_inference import apply_calibrator
 from app.services.edition_guard import get_capability
 
 
@@ -249,6 +252,38 @@ def get_active_model_meta() -> dict:
         return {}
 
 
+def _inference_backend_from_config() -> str:
+    """config の ai.inference_backend（"default" / "compiled"）。読めなければ "default"。"""
+    try:
+        from app.core.config_snapshot import get_config_snapshot
+
+        ai_cfg = get_config_snapshot(refresh=False).ai
+        backend = str((ai_cfg or {}).get("inference_backend", "default") or "default").strip().lower()
+    except Exception:
+        return "default"
+    return backend if backend in ("default", "compiled") else "default"
+
+
+def _follow_active_model(svc: "AISvc") -> None:
+    """
+    設定スナップショットの active_model.json 変更通知で svc のモデルを差し替える
+    （昇格後の最初のバーで差し替えない）。svc は弱参照で持ち、破棄されたら購読を解除する。
+    """
+    try:
+        from app.core.config_snapshot import CHANGED_ACTIVE_MODEL, get_config_snapshot_service
+
+        ref = weakref.ref(svc)
+
+        def _on_change(snap, changed) -> None:
+            target = ref()
+            if target is not None and CHANGED_ACTIVE_MODEL in changed:
+                target._ensure_model_loaded()
+
+        weakref.finalize(svc, get_config_snapshot_service().subscribe(_on_change))
+    except Exception as e:
+        logger.warning("[AISvc] active_model.json の変更通知を購読できません: {}", e)
+
+
 class AISvc:
     """
     既存の推論サービス想定。モデル群は self.models に格納されている想定。
@@ -278,9 +313,18 @@ class AISvc:
         # 警告ログの連打抑制フラグ
         self._warned_classmap_undetermined = False
 
+        # model_registry から取得したモデル（None なら未ロード / self.models を直接セット）
+        self._loaded_entry: Optional[LoadedModel] = None
+        # モデル差し替え（バー処理 / 変更通知のスレッド）の排他
+        self._model_lock = threading.RLock()
+
+        # 推論バックエンド（config の ai.inference_backend）: "default" / "compiled"（core.ai.tree_inference）
+        self.inference_backend: str = _inference_backend_from_config()
+
         # ★ここを追加：起動時に一度だけ active_model.json と同期
         self._sync_expected_features()
         # ... （既存の初期化）
+        _follow_active_model(self)
 
     def _normalize_features_for_model(self, feats: "Mapping[str, float]") -> "dict[str, float]":
         """
@@ -544,104 +588,97 @@ class AISvc:
 
     def _ensure_model_loaded(self) -> None:
         """
-        self.models に推論用モデルが未ロードなら、active_model.json を見てロードする。
-        - models/<file> を joblib.load で読み込む想定
-        - 1つ目のモデルを LightGBM と見なして使う
+        self.models を model_registry の active モデル（active_model.json が指すもの）にそろえる。
+        - ロード自体はレジストリがプロセス内で1回だけ行う（モデルファイルの sha256 単位）
+        - active_model.json / モデルファイルが変わっていれば（昇格）参照を差し替える。変わっていなければ stat 2回
+          （常駐時は設定スナップショットの変更通知でも呼ばれ、昇格はバー処理の前に差し替わる）
+        - self.models を外から直接セットした場合はそのまま使う
         """
-        if self.models:
-            # すでに何かしらモデルが入っていれば何もしない
+        if self.models and self._loaded_entry is None:
             return
 
         try:
-            meta = load_active_model_meta()
+            entry = get_model_registry().active()
         except Exception as exc:
-            logger.error("[AISvc] active model meta の読み込みに失敗: {err}", err=exc)
+            logger.error("[AISvc] active model の読み込みに失敗: {err}", err=exc)
             return
 
-        self._active_meta = meta
-
-        # 観測: GUI/可視化側で解決している active_model.json の参照キーと model_path 解決結果をログ出力
-        _referenced_keys = [k for k in ("model_path", "file", "feature_order", "features", "expected_features") if k in meta]
-        logger.info(
-            "[OBS] AISvc active_model 参照: keys_in_meta={} referenced_keys={}",
-            list(meta.keys()),
-            _referenced_keys,
-        )
-
-        # model_path を取得（フォールバック: file から models/<file> を組み立て）
-        model_path = meta.get("model_path")
-        if not model_path:
-            # model_path が None/空の場合、file から models/<file> を組み立て
-            file = meta.get("file")
-            if file:
-                p = Path("models") / file
-                if p.exists():
-                    model_path = str(p)
-
-        if model_path:
-            logger.info("[OBS] AISvc model_path 解決結果: {}", model_path)
-        if not model_path:
-            logger.error("[AISvc] active_model.json に 'model_path' または 'file' がありません")
+        if entry is None:
+            if not self.models:
+                logger.error("[AISvc] active_model.json のモデルを取得できません（builtin / 未配置 / 読み込み失敗）")
             return
-
-        # model_path を Path オブジェクトに変換
-        model_path_obj = Path(model_path)
-        if not model_path_obj.exists():
-            logger.error("[AISvc] モデルファイルが見つかりません: {path}", path=model_path_obj.as_posix())
+        if entry is self._loaded_entry:
             return
 
-        try:
-            model = joblib.load(model_path_obj)
-            logger.info("[AISvc] pickleがロードされました: path={path}", path=model_path_obj.as_posix())
-        except Exception as exc:
-            logger.error("[AISvc] モデルのロードに失敗: path={path} err={err}",
-                         path=model_path_obj.as_posix(), err=exc)
-            return
-
-        # とりあえず 'lgbm' というキーで登録（SHAP などから参照される）
-        self.models["lgbm"] = model
-        logger.info("[AISvc] model loaded: key='lgbm', type={typ}",
-                    typ=type(model).__name__)
+        # バー処理と変更通知（監視スレッド）が同時に来ても差し替えは1回だけ
+        with self._model_lock:
+            if entry is self._loaded_entry:
+                return
+            swapped = self._loaded_entry is not None
+            meta = entry.meta
+            self._active_meta = meta
 
-        # model.classes_ を観測して BUY/SELL の index を確定（初回のみログ出力）
-        self._class_index_map = self._determine_class_index_map(model)
-        if self._class_index_map:
+            # 観測: GUI/可視化側で解決している active_model.json の参照キーと model_path 解決結果をログ出力
+            _referenced_keys = [k for k in ("model_path", "file", "feature_order", "features", "expected_features") if k in meta]
             logger.info(
-                "[ai_model] classes_={classes} class_index_map BUY->{buy_idx} SELL->{sell_idx} source={source}",
-                classes=list(self._class_index_map.get("classes", [])),
-                buy_idx=self._class_index_map.get("buy_index", -1),
-                sell_idx=self._class_index_map.get("sell_index", -1),
-                source=self._class_index_map.get("source", "unknown"),
-            )
-        else:
-            logger.warning(
-                "[ai_model] classes_ を取得できませんでした。安全側に倒します（p_buy=p_sell=0）。"
+                "[OBS] AISvc active_model 参照: keys_in_meta={} referenced_keys={}",
+                list(meta.keys()),
+                _referenced_keys,
             )
-
-        # モデル側が feature_name / expected_features を持っていて、
-        # まだ expected_features がセットされていなければ同期しておく
-        if not self.expected_features:
-            exp = getattr(model, "expected_features", None)
-            if exp:
-                self.expected_features = list(exp)
+            logger.info("[OBS] AISvc model_path 解決結果: {}", entry.model_path)
+
+            model = entry.model
+            # 'lgbm' というキーで登録（SHAP などから参照される）。dict ごと差し替えるので読み手は途中状態を見ない
+            self.models = {"lgbm": model}
+            self._loaded_entry = entry
+            logger.info("[AISvc] model {verb}: key='lgbm', type={typ} sha256={h}",
+                        verb="swapped" if swapped else "loaded",
+                        typ=type(model).__name__, h=entry.model_hash[:12])
+
+            # BUY/SELL の index はレジストリでロード時に確定済み（初回 / 差し替え時のみログ出力）
+            self._class_index_map = entry.class_index_map
+            self._warned_classmap_undetermined = False
+            if self._class_index_map:
                 logger.info(
-                    "[AISvc] expected_features synced from model ({n} cols)",
-                    n=len(self.expected_features),
+                    "[ai_model] classes_={classes} class_index_map BUY->{buy_idx} SELL->{sell_idx} source={source}",
+                    classes=list(self._class_index_map.get("classes", [])),
+                    buy_idx=self._class_index_map.get("buy_index", -1),
+                    sell_idx=self._class_index_map.get("sell_index", -1),
+                    source=self._class_index_map.get("source", "unknown"),
                 )
             else:
-                # LightGBM Booster なら feature_name() で列名が取れることが多い
-                feat_names = None
-                try:
-                    feat_names = model.feature_name()
-                except Exception:
-                    feat_names = None
+                logger.warning(
+                    "[ai_model] classes_ を取得できませんでした。安全側に倒します（p_buy=p_sell=0）。"
+                )
+
+            # 差し替え時は新しいモデルの列順に合わせる
+            if entry.feature_order and (swapped or not self.expected_features):
+                self.expected_features = list(entry.feature_order)
 
-                if feat_names:
-                    self.expected_features = list(feat_names)
+            # モデル側が feature_name / expected_features を持っていて、
+            # まだ expected_features がセットされていなければ同期しておく
+            if not self.expected_features:
+                exp = getattr(model, "expected_features", None)
+                if exp:
+                    self.expected_features = list(exp)
                     logger.info(
-                        "[AISvc] expected_features synced from model.feature_name() ({n} cols)",
+                        "[AISvc] expected_features synced from model ({n} cols)",
                         n=len(self.expected_features),
                     )
+                else:
+                    # LightGBM Booster なら feature_name() で列名が取れることが多い
+                    feat_names = None
+                    try:
+                        feat_names = model.feature_name()
+                    except Exception:
+                        feat_names = None
+
+                    if feat_names:
+                        self.expected_features = list(feat_names)
+                        logger.info(
+                            "[AISvc] expected_features synced from model.feature_name() ({n} cols)",
+                            n=len(self.expected_features),
+                        )
 
     def predict(
         self,
@@ -712,7 +749,8 @@ class AISvc:
         # Ensure feature names are preserved (LGBMClassifier warning fix)
         # Convert X to DataFrame with expected feature names from active_model.json when possible
         try:
-            meta = get_active_model_meta() or {}
+            # レジストリ経由でロードした場合は active_model.json をバーごとに読み直さない
+            meta = self._active_meta if self._loaded_entry is not None else (get_active_model_meta() or {})
             cols = meta.get("expected_features") or meta.get("feature_order") or meta.get("head") or None
             if cols is not None and not isinstance(X, pd.DataFrame):
                 Xa = np.asarray(X) if not isinstance(X, np.ndarray) else X
@@ -732,8 +770,18 @@ class AISvc:
         try:
             # sklearn 互換モデルの場合
             if hasattr(model, "predict_proba"):
-                proba = model.predict_proba(X)
-                proba = np.asarray(proba)
+                entry = self._loaded_entry
+                compiled = entry.compiled() if (entry is not None and self.inference_backend == "compiled") else None
+                if compiled is not None and len(X) == 1:
+                    # 1行は木をフラット配列化した推論器（キャリブレータも同じ呼び出しで適用。値は元モデルと同じ）
+                    # 複数行は LightGBM 本体の方が速いので従来経路
+                    proba = compiled.predict_proba(X)
+                else:
+                    proba = model.predict_proba(X)
+                    proba = np.asarray(proba)
+                    if entry is not None and entry.calibrator is not None and proba.ndim == 2 and proba.shape[1] == 2:
+                        p1 = apply_calibrator(proba[:, 1].astype(float), entry.calibrator)
+                        proba = np.column_stack([1.0 - p1, p1])
 
                 # classes_ に基づいて正しく p_buy/p_sell を取得
                 if self._class_index_map and proba.ndim == 2 and proba.shape[1] >= 2:
@@ -807,62 +855,80 @@ class AISvc:
 
     def predict_latest(self, symbol: str) -> "AISvc.ProbOut":
         """
-        最新 M5 バーの OHLC を毎回再読込し、その行の特徴量で推論する。キャッシュしない。
+        最新 M5 バーの特徴量で推論する（推論結果はキャッシュしない）。
         自動売買で「毎バー最新の p_buy」を使うために使用する。
+        OHLC と特徴量は共有バー窓（app.services.bar_window）から取り、
+        窓が使えないときだけ CSV 全体を読み直す。
         """
         self._ensure_model_loaded()
         symbol_tag = (symbol or "USDJPY").rstrip("-").upper().strip()
+        df_feat = None
+        try:
+            from app.services.bar_window import get_bar_window
+            window = get_bar_window(symbol_tag, "M5")
+            if window is not None:
+                df_feat = window.features()
+        except Exception as e:
+            logger.warning("[AISvc.predict_latest] bar window failed -> fallback to CSV: {}", e)
+            df_feat = None
+        if df_feat is None:
+            df_feat = self._latest_features_from_csv(symbol_tag)
+            if df_feat is None:
+                return AISvc.ProbOut(0.0, 0.0, 1.0)
+        if df_feat.empty:
+            return AISvc.ProbOut(0.0, 0.0, 1.0)
+        last_row = df_feat.iloc[-1]
+        bar_time = last_row.get("time") or df_feat["time"].iloc[-1]
+        bar_time_str = str(bar_time)
+        feat_dict = {k: float(v) if pd.notna(v) else 0.0 for k, v in last_row.items() if k != "time"}
+        try:
+            x_vals = np.array([feat_dict[k] for k in sorted(feat_dict)], dtype=float)
+            x_hash = hashlib.sha1(x_vals.tobytes()).hexdigest()[:8]
+        except Exception:
+            x_hash = "?"
+        pred = self.predict(feat_dict)
+        logger.info(
+            "PROBA bar_time={} p_buy={:.3f} X_hash={}",
+            bar_time_str, pred.p_buy, x_hash,
+        )
+        return pred
+
+    def _latest_features_from_csv(self, symbol_tag: str) -> Optional[pd.DataFrame]:
+        """predict_latest のフォールバック: M5 CSV 全体を読んで特徴量を作る（失敗時 None）。"""
         try:
             from app.services import data_guard
             ohlc_path = data_guard.csv_path(symbol_tag=symbol_tag, timeframe="M5", layout="per-symbol")
         except Exception:
             logger.warning("[AISvc.predict_latest] data_guard path failed")
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
+            return None
         if not ohlc_path.exists():
             logger.warning("[AISvc.predict_latest] OHLC not found: {}", ohlc_path)
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
+            return None
         try:
             df_ohlc = pd.read_csv(ohlc_path, parse_dates=["time"])
         except Exception as e:
             logger.warning("[AISvc.predict_latest] OHLC read failed: {}", e)
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
+            return None
         if df_ohlc.empty or "time" not in df_ohlc.columns:
             logger.warning("[AISvc.predict_latest] OHLC empty or no time")
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
+            return None
         df_ohlc["time"] = pd.to_datetime(df_ohlc["time"], errors="coerce")
         df_ohlc = df_ohlc.dropna(subset=["time"]).sort_values("time").reset_index(drop=True)
         if df_ohlc.empty:
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
+            return None
         required_cols = ["time", "open", "high", "low", "close"]
         for opt in ["tick_volume", "real_volume"]:
             if opt in df_ohlc.columns:
                 required_cols.append(opt)
         if not all(c in df_ohlc.columns for c in required_cols):
             logger.warning("[AISvc.predict_latest] OHLC missing required columns")
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
+            return None
         try:
             from app.strategies.ai_strategy import build_features
-            df_feat = build_features(df_ohlc[required_cols], {"feature_recipe": "ohlcv_tech_v1"})
+            return build_features(df_ohlc[required_cols], {"feature_recipe": "ohlcv_tech_v1"})
         except Exception as e:
             logger.warning("[AISvc.predict_latest] build_features failed: {}", e)
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
-        if df_feat.empty:
-            return AISvc.ProbOut(0.0, 0.0, 1.0)
-        last_row = df_feat.iloc[-1]
-        bar_time = last_row.get("time") or df_feat["time"].iloc[-1]
-        bar_time_str = str(bar_time)
-        feat_dict = {k: float(v) if pd.notna(v) else 0.0 for k, v in last_row.items() if k != "time"}
-        try:
-            x_vals = np.array([feat_dict[k] for k in sorted(feat_dict)], dtype=float)
-            x_hash = hashlib.sha1(x_vals.tobytes()).hexdigest()[:8]
-        except Exception:
-            x_hash = "?"
-        pred = self.predict(feat_dict)
-        logger.info(
-            "PROBA bar_time={} p_buy={:.3f} X_hash={}",
-            bar_time_str, pred.p_buy, x_hash,
-        )
-        return pred
+            return None
 
     def get_feature_importance(
         self,
@@ -1299,7 +1365,7 @@ class AISvc:
         確率と atr_for_lot を返す簡易版。
         """
         from app.core import market
-        from app.core.config_loader import load_config
+        from app.core.config_snapshot import get_config_snapshot
         from app.services.execution_stub import _collect_features
 
         # ★ まず expected_features を active_model.json と同期しておく
@@ -1330,11 +1396,10 @@ class AISvc:
 
         # 設定から base_features を取得（execution_stub と揃える）
         try:
-            cfg = load_config()
+            ai_cfg = get_config_snapshot(refresh=False).ai
         except Exception:
-            cfg = {}
+            ai_cfg = {}
 
-        ai_cfg = cfg.get("ai", {}) if isinstance(cfg, dict) else {}
         base_features = tuple(ai_cfg.get("features", {}).get("base", []))
 
         # spread を market から取得（なければ 0.0）
@@ -1405,9 +1470,8 @@ class AISvc:
         Live 用：execution_stub の ENTRY/SKIP 判定を最小限で再現。
         ATR や threshold は設定ファイルを参照する。
         """
-        from app.core.config_loader import load_config
-        cfg = load_config()
-        thr = float(cfg.get("entry", {}).get("prob_threshold", 0.5))
+        from app.core.config_snapshot import get_config_snapshot
+        thr = float(get_config_snapshot(refresh=False).entry.get("prob_threshold", 0.5))
 
         p_buy = probs["p_buy"]
         p_sell = probs["p_sell"]
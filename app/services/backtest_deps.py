@@ -0,0 +1,24 @@
+# app/services/backtest_deps.py
+"""
+BacktestEngine（app.core.backtest）に渡すサービス層の実装
+
+core はサービス層を import しない（.importlinter.ini の "Core must not depend on Services"）ため、
+キャッシュ等のサービス層の実装は呼び出し側（tools/backtest_run.py など）がここで受け取り、
+BacktestEngine(..., **backtest_engine_deps()) の形で渡す。
+"""
+from __future__ import annotations
+
+from typing import Any, Dict
+
+
+def backtest_engine_deps() -> Dict[str, Any]:
+    """BacktestEngine のキーワード引数（サービス層の実装）"""
+    from app.services import proba_cache
+    from app.services.feature_store import build_features_cached
+    from app.services.model_registry import get_model_registry
+
+    return {
+        "proba_cache_store": proba_cache,
+        "feature_builder": build_features_cached,
+        "model_registry": get_model_registry(),
+    }
@@ -0,0 +1,258 @@
+# app/services/bar_window.py
+"""
+Live 用の共有バー窓（(symbol, timeframe) ごとのリングバッファ）
+
+- 直近 capacity 本の OHLCV を列ごとの numpy 配列（リングバッファ）で保持（プロセス内で共有）
+- 初回だけ CSV 末尾 capacity 本を読み、以降は CSV の (size, mtime) が変わったときだけ
+  末尾数十行を読んで新しいバーを追記（取りこぼし・巻き戻りは読み直し）
+- 特徴量（ohlcv_tech_v1）は窓の内容が変わったときだけ1回作って使い回す。symbol 付きの窓
+  （get_bar_window）は特徴量ストア（app.services.feature_store）の計算済み行列から作る
+- 利用側: ExecutionService._check_bar_confirmed / ensure_lgbm_proba_uptodate / AISvc.predict_latest
+  （1バーあたり CSV 全体の読み込み・全履歴の特徴量計算をしない）
+"""
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.services import data_guard
+from app.services.ohlcv_store import read_csv_tail
+from core.ai.incremental_features import DEFAULT_SEED_BARS
+
+# 特徴量の warm-up 本数（これより前に履歴がある行の特徴量だけ全履歴版と一致する）
+FEATURE_WARMUP_BARS = DEFAULT_SEED_BARS
+
+# 窓の既定本数（warm-up + 取りこぼし吸収分）
+DEFAULT_CAPACITY = FEATURE_WARMUP_BARS + 512
+
+# 更新時に読む CSV 末尾の行数（この本数より多く追加されていたら読み直す）
+SYNC_TAIL_ROWS = 64
+
+# 特徴量に渡す列（ensure_lgbm_proba_uptodate / predict_latest と同じ）
+FEATURE_BASE_COLS = ["time", "open", "high", "low", "close"]
+FEATURE_OPT_COLS = ["tick_volume", "real_volume"]
+
+
+def _file_stat(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return int(st.st_size), int(st.st_mtime_ns)
+
+
+class BarWindow:
+    """1 CSV 分の直近バー窓（time 昇順・重複なし）。"""
+
+    def __init__(
+        self,
+        path: Path,
+        capacity: int = DEFAULT_CAPACITY,
+        recipe: str = "ohlcv_tech_v1",
+        *,
+        symbol: Optional[str] = None,
+        timeframe: str = "M5",
+    ):
+        self.path = Path(path)
+        # symbol があれば特徴量ストアを使う（path は data_guard.csv_path(symbol, timeframe) の前提）
+        self.symbol = symbol
+        self.timeframe = str(timeframe)
+        self.capacity = int(capacity)
+        self.recipe = str(recipe)
+        self.lock = threading.RLock()
+        self._stat: Optional[Tuple[int, int]] = None
+        self._columns: List[str] = []  # time 以外
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._time = np.empty(0, dtype="datetime64[ns]")
+        self._head = 0  # 最古バーの位置
+        self._count = 0
+        # 窓の先頭が CSV の先頭か（True なら全行の特徴量が全履歴版と同じ）
+        self._from_file_start = False
+        self._version = 0
+        self._feat_cache: Optional[Tuple[int, pd.DataFrame]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    # ------------------------------------------------------------------
+    # 読み込み / 追記
+    # ------------------------------------------------------------------
+    def _reload(self) -> None:
+        df = read_csv_tail(self.path, self.capacity)
+        df = df.dropna(subset=["time"]).drop_duplicates("time", keep="last").reset_index(drop=True)
+        self._columns = [c for c in df.columns if c != "time"]
+        self._time = np.empty(self.capacity, dtype=df["time"].dtype)
+        self._arrays = {c: np.empty(self.capacity, dtype=df[c].dtype) for c in self._columns}
+        self._head = 0
+        self._count = 0
+        self._append_frame(df)
+        # 窓に収まった＝ファイル全体を読んだ（read_csv_tail は足りなければ全行を返す）
+        self._from_file_start = len(df) < self.capacity
+        logger.info(
+            "[bar_window] loaded path={} bars={} last_time={}",
+            self.path, self._count, self.last_time(),
+        )
+
+    def _append_frame(self, df: pd.DataFrame) -> None:
+        n = len(df)
+        if n == 0:
+            return
+        if n > self.capacity:
+            df = df.iloc[n - self.capacity:]
+            n = self.capacity
+        cap = self.capacity
+        tail = (self._head + self._count) % cap
+        idx = (tail + np.arange(n)) % cap
+        self._time[idx] = df["time"].to_numpy(dtype=self._time.dtype)
+        for c in self._columns:
+            self._arrays[c][idx] = df[c].to_numpy()
+        over = max(0, self._count + n - cap)
+        if over:
+            self._from_file_start = False
+        self._head = (self._head + over) % cap
+        self._count = min(cap, self._count + n)
+
+    def sync(self) -> bool:
+        """
+        CSV に追随する。CSV が変わっていなければ stat 1回で返る。
+        Returns: 窓の内容が変わったら True
+        """
+        with self.lock:
+            st = _file_stat(self.path)
+            if st == self._stat:
+                return False
+            if self._count == 0 or self._stat is None or st[0] < self._stat[0]:
+                # 初回 / CSV が縮んだ（作り直し）→ 読み直し
+                self._reload()
+            else:
+                tail = read_csv_tail(self.path, SYNC_TAIL_ROWS)
+                tail = tail.dropna(subset=["time"])
+                last = self.last_time()
+                new = tail[tail["time"] > last].drop_duplicates("time", keep="last")
+                same_layout = list(tail.columns) == ["time", *self._columns] and all(
+                    tail[c].dtype == self._arrays[c].dtype for c in self._columns
+                )
+                if (len(new) == len(tail) and len(tail) > 0) or not same_layout:
+                    # 取りこぼし（末尾窓より多く追加）/ 列構成・dtype の変化 → 読み直し
+                    self._reload()
+                else:
+                    # 最新バーが書き直されていれば上書き（形成中バーの更新）
+                    cur = tail[tail["time"] == last].tail(1)
+                    if len(cur):
+                        pos = np.array([(self._head + self._count - 1) % self.capacity])
+                        for c in self._columns:
+                            self._arrays[c][pos] = cur[c].to_numpy()
+                    self._append_frame(new)
+            self._stat = st
+            self._version += 1
+            self._feat_cache = None
+            return True
+
+    # ------------------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------------------
+    def _order(self) -> np.ndarray:
+        return (self._head + np.arange(self._count)) % self.capacity
+
+    def last_time(self) -> Optional[pd.Timestamp]:
+        if self._count == 0:
+            return None
+        return pd.Timestamp(self._time[(self._head + self._count - 1) % self.capacity])
+
+    def first_time(self) -> Optional[pd.Timestamp]:
+        if self._count == 0:
+            return None
+        return pd.Timestamp(self._time[self._head])
+
+    def feature_ready_time(self) -> Optional[pd.Timestamp]:
+        """この時刻以降の行は、特徴量が全履歴から計算した場合と同じになる。"""
+        with self.lock:
+            if self._count == 0:
+                return None
+            if self._from_file_start:
+                return self.first_time()
+            if self._count <= FEATURE_WARMUP_BARS:
+                return None
+            return pd.Timestamp(self._time[(self._head + FEATURE_WARMUP_BARS) % self.capacity])
+
+    def frame(self, tail: Optional[int] = None) -> pd.DataFrame:
+        """窓のバー（CSV を read_csv した場合と同じ列・dtype、time 昇順）のコピー。"""
+        with self.lock:
+            order = self._order()
+            if tail is not None:
+                order = order[max(0, len(order) - int(tail)):]
+            data = {"time": self._time[order]}
+            for c in self._columns:
+                data[c] = self._arrays[c][order]
+            return pd.DataFrame(data, columns=["time", *self._columns])
+
+    def features(self) -> pd.DataFrame:
+        """窓全体の特徴量（time 列付き）。窓が変わるまで同じ DataFrame を返す（書き換え禁止）。"""
+        with self.lock:
+            cached = self._feat_cache
+            if cached is not None and cached[0] == self._version:
+                return cached[1]
+            df = self.frame()
+            cols = FEATURE_BASE_COLS + [c for c in FEATURE_OPT_COLS if c in df.columns]
+            missing = [c for c in FEATURE_BASE_COLS if c not in df.columns]
+            if missing:
+                raise KeyError(f"bar_window: missing columns {missing}")
+            if self.symbol:
+                from app.services.feature_store import build_features_cached
+
+                feat = build_features_cached(df[cols], self.symbol, self.timeframe, self.recipe)
+            else:
+                from app.strategies.ai_strategy import build_features
+
+                feat = build_features(df[cols], {"feature_recipe": self.recipe})
+            self._feat_cache = (self._version, feat)
+            return feat
+
+
+# key = (symbol_tag, timeframe)
+_windows: Dict[Tuple[str, str], BarWindow] = {}
+_windows_lock = threading.Lock()
+
+
+def _symbol_tag(symbol: str) -> str:
+    return (symbol or "USDJPY").rstrip("-").upper().strip()
+
+
+def get_bar_window(
+    symbol: str,
+    timeframe: str = "M5",
+    *,
+    sync: bool = True,
+    capacity: int = DEFAULT_CAPACITY,
+) -> Optional[BarWindow]:
+    """
+    (symbol, timeframe) の共有バー窓。CSV が無い／読めない場合は None。
+    sync=True なら返す前に CSV に追随する（変わっていなければ stat 1回）。
+    """
+    tag = _symbol_tag(symbol)
+    tf = str(timeframe or "M5").upper().strip()
+    path = data_guard.csv_path(symbol_tag=tag, timeframe=tf, layout="per-symbol")
+    key = (tag, tf)
+    with _windows_lock:
+        win = _windows.get(key)
+        if win is None or win.path != path:
+            win = BarWindow(path, capacity=capacity, symbol=tag, timeframe=tf)
+            _windows[key] = win
+    if not path.exists():
+        return None
+    if sync:
+        try:
+            win.sync()
+        except Exception as e:
+            logger.warning("[bar_window] sync failed path={} err={}", path, e)
+            return None
+    return win if len(win) > 0 else None
+
+
+def reset_bar_windows() -> None:
+    """保持中の窓を全て破棄する（テスト・CSV 作り直し用）。"""
+    with _windows_lock:
+        _windows.clear()
@@ -0,0 +1,170 @@
+"""
+Condition Mining のビットセット評価器
+
+decisions の窓（recent / past）を1回だけ列に符号化し、条件の一致行を packed bitset
+（Python int。bit i = 行 i）として評価する。AND 条件は bitset の積、support は popcount。
+
+- reason_in      : 理由コードごとの bitset の OR
+- hour_in        : 時（0-23）ごとの bitset の OR
+- prob_margin_ge : margin 配列の比較結果（閾値ごとにキャッシュ）
+- and            : 子条件の bitset の AND（2条件以上）
+
+一致の定義は condition_mining_candidates._match と同じ（未知の type は一致なし）。
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.services.condition_mining_dsl import Condition
+
+
+def _pack(flags: np.ndarray) -> int:
+    """bool 配列 → bitset（bit i = flags[i]）"""
+    if flags.size == 0:
+        return 0
+    return int.from_bytes(np.packbits(flags, bitorder="little").tobytes(), "little")
+
+
+class BitsetEvaluator:
+    """
+    1つの decisions 窓を列指向に符号化したもの
+
+    Args:
+        reasons: 行ごとの理由コード列
+        hours: 行ごとの時（取れない行は None）
+        margins: 行ごとの prob margin（取れない行は None）
+        filter_pass: 行ごとの filter_pass is True
+    """
+
+    def __init__(
+        self,
+        reasons: Sequence[Sequence[str]],
+        hours: Sequence[Optional[int]],
+        margins: Sequence[Optional[float]],
+        filter_pass: Sequence[bool],
+    ) -> None:
+        self.n = len(filter_pass)
+        self.all = (1 << self.n) - 1
+
+        rows_by_code: Dict[str, List[int]] = defaultdict(list)
+        for i, codes in enumerate(reasons):
+            for c in set(codes):
+                rows_by_code[c].append(i)
+        self._reason: Dict[str, int] = {}
+        for c, idx in rows_by_code.items():
+            flags = np.zeros(self.n, dtype=bool)
+            flags[idx] = True
+            self._reason[c] = _pack(flags)
+
+        self.hour = np.array([-1 if h is None else int(h) for h in hours], dtype=np.int16)
+        self._hour = {h: _pack(self.hour == h) for h in np.unique(self.hour[self.hour >= 0]).tolist()}
+        self.margin = np.array([np.nan if m is None else float(m) for m in margins], dtype=np.float64)
+        self.filter_pass = _pack(np.asarray(filter_pass, dtype=bool))
+        self._margin_ge: Dict[float, int] = {}
+
+    # ------------------------------------------------------------------
+    def mask(self, cond: Condition) -> int:
+        """条件に一致する行の bitset"""
+        t = cond.get("type")
+        p = cond.get("params") or {}
+
+        if t == "reason_in":
+            out = 0
+            for k in set(p.get("keys") or []):
+                out |= self._reason.get(k, 0)
+            return out
+
+        if t == "hour_in":
+            out = 0
+            for h in set(p.get("hours") or []):
+                out |= self._hour.get(h, 0)
+            return out
+
+        if t == "prob_margin_ge":
+            mn = p.get("min")
+            if mn is None:
+                return 0
+            thr = float(mn)
+            m = self._margin_ge.get(thr)
+            if m is None:
+                with np.errstate(invalid="ignore"):
+                    m = _pack(self.margin >= thr)
+                self._margin_ge[thr] = m
+            return m
+
+        if t == "and":
+            sub = p.get("conds") or []
+            if len(sub) < 2:
+                return 0
+            out = self.all
+            for c in sub:
+                out &= self.mask(c)
+                if not out:
+                    break
+            return out
+
+        return 0
+
+    def metrics(self, mask: int) -> Dict[str, Any]:
+        """bitset の support / filter_pass_rate（_eval_condition と同じ形）"""
+        support = mask.bit_count()
+        if support == 0:
+            return {"support": 0, "filter_pass_rate": 0.0}
+        fp = (mask & self.filter_pass).bit_count()
+        return {"support": support, "filter_pass_rate": float(fp / support)}
+
+    def evaluate(self, cond: Condition) -> Dict[str, Any]:
+        return self.metrics(self.mask(cond))
+
+
+def search_conjunctions(
+    atoms: Sequence[Tuple[int, int]],
+    *,
+    min_support: int,
+    max_and: int,
+    beam_width: int,
+    score: Callable[[int, int], float],
+) -> List[Tuple[int, ...]]:
+    """
+    原子条件の AND の組み合わせを Apriori 風に枝刈りしながらビーム探索する。
+
+    Args:
+        atoms: 原子条件ごとの (recent bitset, past bitset)
+        min_support: recent + past の support の下限（AND で support は減る一方なので、下回った枝は刈る）
+        max_and: 組み合わせる条件数の上限（2 以上）
+        beam_width: 3条件以上へ広げる際に、各段で score 上位だけ残す件数
+        score: (recent bitset, past bitset) -> float
+
+    Returns:
+        2条件以上の組み合わせ（atoms の index を昇順に並べたタプル）。support 下限を満たすもののみ。
+        親と同じ行集合になる（条件を足しても絞れない）組み合わせは冗長なので含めない。
+    """
+    def _support(r: int, p: int) -> int:
+        return r.bit_count() + p.bit_count()
+
+    alive = [i for i, (r, p) in enumerate(atoms) if _support(r, p) >= min_support]
+    out: List[Tuple[int, ...]] = []
+    level: List[Tuple[Tuple[int, ...], int, int]] = [((i,), atoms[i][0], atoms[i][1]) for i in alive]
+    for _ in range(2, max(2, int(max_and)) + 1):
+        nxt: List[Tuple[Tuple[int, ...], int, int]] = []
+        for combo, r, p in level:
+            for j in alive:
+                if j <= combo[-1]:
+                    continue
+                r2 = r & atoms[j][0]
+                p2 = p & atoms[j][1]
+                if _support(r2, p2) < min_support:
+                    continue
+                # 親だけ／足した条件 j だけで同じ行集合になるなら冗長
+                if (r2 == r and p2 == p) or (r2 == atoms[j][0] and p2 == atoms[j][1]):
+                    continue
+                nxt.append((combo + (j,), r2, p2))
+        if not nxt:
+            break
+        out.extend(c for c, _, _ in nxt)
+        nxt.sort(key=lambda x: score(x[1], x[2]), reverse=True)
+        level = nxt[: max(1, int(beam_width))]
+    return out
@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from loguru import logger
 
+from app.services.condition_mining_bitset import BitsetEvaluator, search_conjunctions
 from app.services.condition_mining_data import get_decisions_recent_past_summary
 from app.services.condition_mining_dsl import (
     Condition,
     build_reason_conditions,
     build_hour_bucket_conditions,
     build_prob_margin_conditions,
-    and2,
+    and_n,
 )
 
 # ---------- extraction helpers (robust; no new deps) ----------
@@ -90,9 +91,9 @@ def _match(cond: Condition, rec: Dict[str, Any]) -> bool:
 
     if t == "and":
         sub = p.get("conds") or []
-        if len(sub) != 2:
+        if len(sub) < 2:
             return False
-        return _match(sub[0], rec) and _match(sub[1], rec)
+        return all(_match(c, rec) for c in sub)
 
     return False
 
@@ -114,6 +115,15 @@ def _eval_condition(cond: Condition, rows: List[Dict[str, Any]]) -> Dict[str, An
     }
 
 
+def _encode(rows: List[Dict[str, Any]]) -> Tuple[BitsetEvaluator, List[List[str]], List[Optional[int]], List[Optional[float]]]:
+    """rows を1回だけ走査して列に符号化する（行ごとの理由コード・時・margin も返す）"""
+    reasons = [_get_reason_codes(r) for r in rows]
+    hours = [_get_hour(r) for r in rows]
+    margins = [_get_prob_margin(r) for r in rows]
+    fp = [r.get("filter_pass") is True for r in rows]
+    return BitsetEvaluator(reasons, hours, margins, fp), reasons, hours, margins
+
+
 def _confidence(recent_s: int, past_s: int, min_support: int, degradation: bool) -> str:
     # canonical: LOW/MID/HIGH
     if recent_s >= min_support and past_s >= min_support and not degradation:
@@ -125,6 +135,29 @@ def _confidence(recent_s: int, past_s: int, min_support: int, degradation: bool)
     return "LOW"
 
 
+def _score(r: Dict[str, Any], p: Dict[str, Any], min_support: int) -> Tuple[float, str, bool, float]:
+    """(score, confidence, degradation, delta filter_pass_rate)"""
+    recent_s = int(r["support"])
+    past_s = int(p["support"])
+
+    # 劣化：recent の filter_pass_rate が past より明確に悪い（簡易）
+    delta = float(r["filter_pass_rate"]) - float(p["filter_pass_rate"])
+    degradation = bool(
+        (recent_s >= min_support) and (past_s >= min_support) and (delta <= -0.10)
+    )
+
+    conf = _confidence(recent_s, past_s, min_support=min_support, degradation=degradation)
+
+    score = (
+        (recent_s + past_s) * 0.01
+        + (float(r["filter_pass_rate"]) * 2.0)
+        + (delta * 1.5)
+        + (0.2 if conf == "HIGH" else 0.0)
+        - (0.3 if degradation else 0.0)
+    )
+    return float(score), conf, degradation, delta
+
+
 def get_condition_candidates_core(
     symbol: str,
     top_k: int = 10,
@@ -132,7 +165,12 @@ def get_condition_candidates_core(
     min_support: int = 20,
     profile: Optional[str] = None,
     summary: Optional[Dict[str, Any]] = None,
+    max_and: int = 4,
+    beam_width: int = 50,
 ) -> Dict[str, Any]:
+    # NOTE:
+    # - 条件の評価は decisions を1回だけ列に符号化し、ビットセットの積と popcount で行う
+    #   （condition_mining_bitset）。AND は max_and 条件まで、support 下限で枝刈りしたビーム探索。
     # NOTE:
     # - candidates 生成には rows(decisions) が必要（n だけでは条件評価できない）
     # - include_decisions=False 経路の summary が渡される可能性があるため、
@@ -173,8 +211,10 @@ def get_condition_candidates_core(
 
     # --- Step2-20: past-only candidates fallback ---
     # recent が 0 件でも past が十分にある場合は、縮退せず past を入力として候補生成を継続する。
+    past_only = False
     if rn == 0 and pn > 0 and (not recent_rows) and past_rows:
         recent_rows = list(past_rows)
+        past_only = True
         warnings.append("recent_empty_use_past_only")
     # --- end Step2-20 ---
 
@@ -186,18 +226,17 @@ def get_condition_candidates_core(
             "warnings": (warnings or ["no_decisions_in_recent_and_past"]),
         }
 
+    # ---- encode (rows を1回だけ走査) ----
+    ev_past, past_reasons, past_hours, past_margins = _encode(past_rows)
+    if past_only:
+        ev_recent, recent_reasons, recent_hours, recent_margins = ev_past, past_reasons, past_hours, past_margins
+    else:
+        ev_recent, recent_reasons, recent_hours, recent_margins = _encode(recent_rows)
+
     # ---- candidate generation (lightweight) ----
-    reasons: List[str] = []
-    hours: List[int] = []
-    margins: List[float] = []
-    for r in (recent_rows + past_rows):
-        reasons.extend(_get_reason_codes(r))
-        h = _get_hour(r)
-        if h is not None:
-            hours.append(h)
-        m = _get_prob_margin(r)
-        if m is not None:
-            margins.append(m)
+    reasons: List[str] = [x for rs in (recent_reasons + past_reasons) for x in rs]
+    hours: List[int] = [h for h in (recent_hours + past_hours) if h is not None]
+    margins: List[float] = [m for m in (recent_margins + past_margins) if m is not None]
 
     c1: List[Condition] = []
     c1.extend(build_reason_conditions(reasons, top_n=30))
@@ -265,40 +304,36 @@ def get_condition_candidates_core(
         pass
     # --- end Step2-20 ---
 
-    # 2条件AND（少数だけ）
-    c2: List[Condition] = []
-    for i in range(min(12, len(c1))):
-        for j in range(i + 1, min(12, len(c1))):
-            c2.append(and2(c1[i], c1[j]))
+    # ---- evaluate (bitset) ----
+    atoms: List[Tuple[int, int]] = [(ev_recent.mask(c), ev_past.mask(c)) for c in c1]
 
-    conds = (c1 + c2)[:max_conds]
+    def _bits_score(rb: int, pb: int) -> float:
+        return _score(ev_recent.metrics(rb), ev_past.metrics(pb), min_support)[0]
 
-    # ---- evaluate & rank ----
+    # AND（2..max_and 条件）：support 下限で枝刈りしつつ、3条件以上は score 上位 beam_width 件から広げる
+    combos = search_conjunctions(
+        atoms, min_support=min_support, max_and=max_and, beam_width=beam_width, score=_bits_score
+    )
+    evaluated: List[Tuple[Condition, int, int]] = [(c, rb, pb) for c, (rb, pb) in zip(c1, atoms)]
+    for combo in combos:
+        rb, pb = ev_recent.all, ev_past.all
+        for i in combo:
+            rb &= atoms[i][0]
+            pb &= atoms[i][1]
+        evaluated.append((and_n([c1[i] for i in combo]), rb, pb))
+
+    # ---- rank ----
     cards: List[Dict[str, Any]] = []
-    for c in conds:
-        r = _eval_condition(c, recent_rows)
-        p = _eval_condition(c, past_rows)
+    for c, rb, pb in evaluated:
+        r = ev_recent.metrics(rb)
+        p = ev_past.metrics(pb)
 
         recent_s = int(r["support"])
         past_s = int(p["support"])
         if recent_s + past_s < min_support:
             continue
 
-        # 劣化：recent の filter_pass_rate が past より明確に悪い（簡易）
-        delta = float(r["filter_pass_rate"]) - float(p["filter_pass_rate"])
-        degradation = bool(
-            (recent_s >= min_support) and (past_s >= min_support) and (delta <= -0.10)
-        )
-
-        conf = _confidence(recent_s, past_s, min_support=min_support, degradation=degradation)
-
-        score = (
-            (recent_s + past_s) * 0.01
-            + (float(r["filter_pass_rate"]) * 2.0)
-            + (delta * 1.5)
-            + (0.2 if conf == "HIGH" else 0.0)
-            - (0.3 if degradation else 0.0)
-        )
+        score, conf, degradation, delta = _score(r, p, min_support)
 
         cards.append(
             {
@@ -341,7 +376,8 @@ def get_condition_candidates_core(
         warnings.append("no_candidates_after_support_guard")
 
     logger.info(
-        f"[cond_mine] symbol={symbol} candidates={len(out)} (top_k={top_k}, max_conds={max_conds})"
+        f"[cond_mine] symbol={symbol} candidates={len(out)} "
+        f"(top_k={top_k}, max_conds={max_conds}, evaluated={len(evaluated)}, max_and={max_and})"
     )
     ret: Dict[str, Any] = {
         "symbol": symbol,
@@ -7,35 +7,10 @@ import csv
 import os
 from typing import Any, Dict, Iterable, Optional
 
-from app.services import decision_log
+from app.services import decision_log_index
+from app.services.decision_log_index import parse_iso_dt
 
 
-def _parse_iso_dt(s: Any) -> Optional[datetime]:
-    """Parse ISO-ish datetime and normalize to timezone-aware UTC.
-
-    - If tzinfo is missing (naive), assume UTC.
-    - If tzinfo exists, convert to UTC.
-    """
-    if not s:
-        return None
-    if isinstance(s, datetime):
-        dt = s
-    elif isinstance(s, str):
-        try:
-            dt = datetime.fromisoformat(s)
-        except Exception:
-            return None
-    else:
-        return None
-
-    # normalize to UTC-aware
-    if dt.tzinfo is None:
-        return dt.replace(tzinfo=timezone.utc)
-    try:
-        return dt.astimezone(timezone.utc)
-    except Exception:
-        return dt
-
 def _iter_decision_paths() -> "Iterable[Path]":
     """
     Yield decision log paths for Condition Mining.
@@ -167,8 +142,8 @@ def get_decisions_window_summary(symbol: str, window: str | None = None, profile
     past_offset_minutes = int(DEFAULT_OFFSET if _om is None else _om)  # type: ignore[arg-type]
     # --- end minutes resolve ---
 
-    dt_start = _parse_iso_dt(start) if start else None
-    dt_end = _parse_iso_dt(end) if end else None
+    dt_start = parse_iso_dt(start) if start else None
+    dt_end = parse_iso_dt(end) if end else None
 
     if dt_start is None and dt_end is None and window:
         # profile/override の window 設定を反映（明示指定が無い場合のデフォルトとして扱う）
@@ -226,19 +201,17 @@ def get_decisions_window_summary(symbol: str, window: str | None = None, profile
 
     for path in _iter_decision_paths():
         sources.append(str(path))
-        for j in decision_log._iter_jsonl(path):
+        # サイドカー索引で symbol / 時間窓に入る行だけ seek して読む（範囲外の行・ファイルは parse しない）
+        # ts 抽出はログの揺れに強い候補キー順（decision_log_index.extract_decision_ts）
+        for j, ts in decision_log_index.iter_decisions(path, symbol=symbol, start=dt_start, end=dt_end):
             scanned += 1
             if scanned > max_scan:
                 break
 
-            if j.get("symbol") != symbol:
-                continue
-
             if profile is not None:
                 p = j.get("profile")
                 if p is not None and p != profile:
                     continue
-            # ts 抽出（ログの揺れに強くする：既存APIの範囲で候補キーを増やす）
             # --- ensure action field for condition mining ---
             if isinstance(j, dict) and (not j.get('action')):
                 fp = j.get('filter_pass', None)
@@ -250,41 +223,6 @@ def get_decisions_window_summary(symbol: str, window: str | None = None, profile
                     j['action'] = 'HOLD'
             # --- end action ---
 
-            ts = (
-                _parse_iso_dt(j.get("ts_utc"))
-                or _parse_iso_dt(j.get("ts_jst"))
-                or _parse_iso_dt(j.get("timestamp"))
-                or _parse_iso_dt(j.get("ts"))
-                or _parse_iso_dt(j.get("time"))
-                or _parse_iso_dt(j.get("time_utc"))
-                or _parse_iso_dt(j.get("time_jst"))
-                or _parse_iso_dt(j.get("datetime"))
-                or _parse_iso_dt(j.get("dt"))
-                or _parse_iso_dt(j.get("created_at"))
-            )
-            if ts is None:
-                fts = j.get("filters") if isinstance(j.get("filters"), dict) else None
-                ts = (
-                    _parse_iso_dt((fts or {}).get("ts_utc"))
-                    or _parse_iso_dt((fts or {}).get("ts_jst"))
-                    or _parse_iso_dt((fts or {}).get("timestamp"))
-                    or _parse_iso_dt((fts or {}).get("ts"))
-                    or _parse_iso_dt((fts or {}).get("time"))
-                    or _parse_iso_dt((fts or {}).get("time_utc"))
-                    or _parse_iso_dt((fts or {}).get("time_jst"))
-                    or _parse_iso_dt((fts or {}).get("datetime"))
-                    or _parse_iso_dt((fts or {}).get("dt"))
-                    or _parse_iso_dt((fts or {}).get("created_at"))
-                )
-            if ts is None:
-                continue
-
-
-            if dt_start and ts < dt_start:
-                continue
-            if dt_end and ts > dt_end:
-                continue
-
             # --- Step2-E: bucketize rows for canonical boundary selection (opt-in) ---
             # canonical: src=="order_params" AND top-level order_params exists
             _src = j.get("src")
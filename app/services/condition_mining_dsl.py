@@ -102,3 +102,18 @@ def and2(a: Condition, b: Condition) -> Condition:
         "description": f"({a.get('description')}) AND ({b.get('description')})",
         "tags": sorted(set((a.get("tags") or []) + (b.get("tags") or []) + ["and"])),
     }
+
+
+def and_n(conds: List[Condition]) -> Condition:
+    # 3条件以上の AND（ビットセット評価器の探索用）。2条件なら and2 と同じ形になる
+    ids = [c.get("id", chr(ord("A") + i)) for i, c in enumerate(conds)]
+    tags = set(["and"])
+    for c in conds:
+        tags.update(c.get("tags") or [])
+    return {
+        "id": "and:" + "&".join(str(x) for x in ids),
+        "type": "and",
+        "params": {"conds": list(conds)},
+        "description": " AND ".join(f"({c.get('description')})" for c in conds),
+        "tags": sorted(tags),
+    }
@@ -4,6 +4,7 @@ import subprocess
 import os
 import sys
 from pathlib import Path
+from typing import Any, Optional, Sequence, Tuple
 import pandas as pd
 
 PROJECT_ROOT = Path(__file__).resolve().parents[2]  # app/services/ → app → プロジェクトルート
@@ -18,10 +19,96 @@ def csv_path(symbol_tag: str, timeframe: str, layout: str="per-symbol") -> Path:
         return DATA_DIR / symbol_tag / "ohlcv" / f"{symbol_tag}_{timeframe}.csv"
     return DATA_DIR / f"{symbol_tag}_{timeframe}.csv"
 
+def store_dir(symbol_tag: str, timeframe: str, layout: str="per-symbol") -> Path:
+    """
+    CSV と並べて置く列指向ストアのディレクトリ（app.services.ohlcv_store）
+    per-symbol: data/<SYM>/ohlcv/store_<TF>/ , flat: data/<SYM>_<TF>_store/
+    """
+    if layout == "per-symbol":
+        return DATA_DIR / symbol_tag / "ohlcv" / f"store_{timeframe}"
+    return DATA_DIR / f"{symbol_tag}_{timeframe}_store"
+
+def ohlcv_store(symbol_tag: str, timeframe: str, layout: str="per-symbol", sync: bool=True):
+    """
+    CSV に同期済みの OhlcvStore を返す（CSV が無ければ None）。
+    sync=True でも CSV が前回同期から変わっていなければ stat 1回で返る。
+    """
+    from app.services.ohlcv_store import get_store
+
+    tag = symbol_tag.rstrip("-")
+    src = csv_path(tag, timeframe, layout)
+    if not src.exists():
+        return None
+    store = get_store(store_dir(tag, timeframe, layout))
+    if sync:
+        store.sync_from_csv(src)
+    return store
+
+def ohlcv_time_bounds(symbol_tag: str, timeframe: str,
+                      layout: str="per-symbol") -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    OHLCV の (最古 time, 最新 time)。CSV が無い／空なら None。
+    ストアの manifest から O(1) で返す（失敗時のみ CSV 全体を読むフォールバック）。
+    """
+    tag = symbol_tag.rstrip("-")
+    try:
+        store = ohlcv_store(tag, timeframe, layout)
+        return store.time_bounds() if store is not None else None
+    except Exception as e:
+        from loguru import logger
+        logger.warning("[data_guard] ohlcv store unavailable -> fallback to CSV: {}", e)
+    src = csv_path(tag, timeframe, layout)
+    if not src.exists():
+        return None
+    df = pd.read_csv(src, usecols=["time"], parse_dates=["time"])
+    if df.empty:
+        return None
+    return df["time"].min(), df["time"].max()
+
+def read_ohlcv(symbol_tag: str, timeframe: str, start: Any=None, end: Any=None, *,
+               tail: Optional[int]=None, pad_before: int=0,
+               columns: Optional[Sequence[str]]=None, layout: str="per-symbol") -> pd.DataFrame:
+    """
+    OHLCV を time 範囲（start <= time <= end）または末尾 tail 本だけ読む。
+    pad_before: start より前を余分に含める本数（特徴量の warm-up 用）
+    戻り値は CSV を pd.read_csv(parse_dates=["time"]) した場合と同じ列・dtype（time 昇順）。
+    CSV が無ければ空の DataFrame。
+    """
+    tag = symbol_tag.rstrip("-")
+    try:
+        store = ohlcv_store(tag, timeframe, layout)
+        if store is None:
+            return pd.DataFrame()
+        if tail is not None:
+            return store.tail(int(tail), columns)
+        return store.read_range(start, end, columns, pad_before=pad_before)
+    except Exception as e:
+        from loguru import logger
+        logger.warning("[data_guard] ohlcv store unavailable -> fallback to CSV: {}", e)
+
+    src = csv_path(tag, timeframe, layout)
+    if not src.exists():
+        return pd.DataFrame()
+    df = pd.read_csv(src, parse_dates=["time"]).sort_values("time").reset_index(drop=True)
+    if columns is not None:
+        df = df[["time", *[c for c in columns if c != "time" and c in df.columns]]]
+    if tail is not None:
+        return df.tail(int(tail)).reset_index(drop=True)
+    i0, i1 = 0, len(df)
+    if start is not None:
+        i0 = int(df["time"].searchsorted(pd.Timestamp(start), side="left"))
+    if end is not None:
+        i1 = int(df["time"].searchsorted(pd.Timestamp(end), side="right"))
+    i0 = max(0, i0 - max(0, int(pad_before)))
+    return df.iloc[i0:i1].reset_index(drop=True)
+
 def ensure_data(symbol_tag: str, timeframe: str, start_date: str, end_date: str,
                 env: str="laptop", layout: str="per-symbol") -> Path:
     """
-    指定の [start_date, end_date] を満たすCSVが存在するか確認し、足りなければ scripts.make_csv_from_mt5 を呼んで追記する。
+    指定の [start_date, end_date] を満たすCSVが存在するか確認し、足りなければ追記する。
+    既存 CSV の末尾だけが足りない場合はプロセス内の MT5 追記（app.services.mt5_bar_appender）で
+    確定バーだけを追記し、CSV が無い／古い側が足りない／追記できなかった場合は scripts.make_csv_from_mt5 を呼ぶ。
+    M15 / H1 / H4 / D1 は M5 を最新化してから M5 を集計して作る（app.services.ohlcv_resample）。
     戻り値: CSVのフルパス
     """
     # MT5用シンボル（USDJPY-）とCSV用シンボル（USDJPY）を分離
@@ -29,19 +116,56 @@ def ensure_data(symbol_tag: str, timeframe: str, start_date: str, end_date: str,
     csv_symbol_tag = symbol_tag.rstrip("-")  # 例: USDJPY
     out_csv = csv_path(csv_symbol_tag, timeframe, layout)
     need_fetch = True
+    has_start = False
 
     if out_csv.exists():
         try:
-            df = pd.read_csv(out_csv, parse_dates=["time"])
-            if not df.empty:
-                has_start = (df["time"].min() <= pd.Timestamp(start_date))
+            # 列指向ストアの manifest から min/max を取る（CSV 全体は読まない）
+            bounds = ohlcv_time_bounds(csv_symbol_tag, timeframe, layout)
+            if bounds is not None:
+                t_min, t_max = bounds
+                has_start = (t_min <= pd.Timestamp(start_date))
                 # end_date は当日23:59:59基準で比較（日付00:00基準の誤判定を回避）
                 end_ts = pd.Timestamp(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-                has_end   = (df["time"].max() >= end_ts)
+                has_end   = (t_max >= end_ts)
                 need_fetch = not (has_start and has_end)
         except Exception:
             need_fetch = True
 
+    tf_upper = str(timeframe).upper()
+    if need_fetch and (has_start or not out_csv.exists()):
+        from app.services.ohlcv_resample import BASE_TF, DERIVED_TFS
+        if tf_upper in DERIVED_TFS:
+            # 上位足はブローカーから取らず、M5 を最新化して集計する（失敗時は従来の取得）
+            from loguru import logger
+            try:
+                from app.services.ohlcv_resample import derive_timeframe
+
+                base = ensure_data(symbol_tag, BASE_TF, start_date, end_date, env=env, layout=layout)
+                res = derive_timeframe(base, out_csv, tf_upper)
+                if res.ok:
+                    need_fetch = False
+                else:
+                    logger.warning("[data_guard] derive {} from {} not applicable ({}: {}) -> make_csv_from_mt5",
+                                   tf_upper, BASE_TF, res.status, res.message)
+            except Exception as e:
+                logger.warning("[data_guard] derive {} from {} failed -> make_csv_from_mt5: {}", tf_upper, BASE_TF, e)
+
+    if need_fetch and has_start:
+        # 末尾だけ足りない → サブプロセスを起動せず、常駐セッションで末尾以降の確定バーだけを追記
+        from loguru import logger
+        try:
+            from app.services.mt5_bar_appender import get_bar_appender
+
+            res = get_bar_appender().append_new_bars(mt5_symbol, timeframe, layout=layout)
+            if res.ok:
+                need_fetch = False
+            else:
+                logger.warning("[data_guard] in-process append not applicable ({}: {}) -> make_csv_from_mt5",
+                               res.status, res.message)
+        except Exception as e:
+            logger.warning("[data_guard] in-process append failed -> make_csv_from_mt5: {}", e)
+
     if need_fetch:
         # make_csv_from_mt5 を呼ぶ（不足分は自動追記）
         # --symbol には MT5用シンボル（元の symbol_tag）を渡す（内部で resolve_symbol される）
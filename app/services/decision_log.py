@@ -204,15 +204,33 @@ def _get_decision_log_dir() -> Path:
     """
     root = fxbot_path.get_project_root()
     return root / "logs"
-def load_recent_decisions(limit: int | None = None) -> pd.DataFrame:
+def load_recent_decisions(
+    limit: int | None = None,
+    columns: Sequence[str] | None = None,
+) -> pd.DataFrame:
     """
     decisions_*.jsonl から最新の N レコードを pandas.DataFrame で読み込む。
+
+    columns を指定すると decision_store のフラットスキーマ（"decision_detail.action" 等）で
+    その列だけを返す（コンパクション済みの日は Parquet から読む）。
+    None のときは従来どおりネストした列のままの DataFrame。
     """
     log_dir = _get_decision_log_dir()
     files = sorted(log_dir.glob("decisions_*.jsonl"))
     if not files:
         return pd.DataFrame()
 
+    if columns is not None:
+        from app.services.decision_store import read_decisions
+
+        want = list(columns)
+        need = want if "ts_jst" in want else want + ["ts_jst"]
+        df = read_decisions(files, columns=need)
+        df = df.sort_values("ts_jst", ascending=False, na_position="last", kind="stable")
+        if limit is not None and limit > 0:
+            df = df.head(limit)
+        return df[want].reset_index(drop=True)
+
     df_list: list[pd.DataFrame] = []
     for f in files:
         try:
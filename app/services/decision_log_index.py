@@ -0,0 +1,381 @@
+# app/services/decision_log_index.py
+"""
+decisions*.jsonl のサイドカー索引（Condition Mining の時間窓クエリ用）
+
+- JSONL ごとに <file>.idx.npz を隣に置く
+    offsets : 各行の先頭バイト位置（int64）
+    ts_us   : 行の時刻（UTC epoch マイクロ秒、取れない行は TS_NONE）
+    sym     : 行の symbol（symbols へのインデックス、文字列でなければ -1）
+    meta    : 索引済みバイト数 / 先頭バイトの署名 / ファイル単位の min/max time と symbols
+- ファイルが伸びたら索引済みバイト以降だけ読んで追記（先頭が変わった＝書き直しなら作り直す）
+- クエリは「ファイル単位の min/max・symbol で除外」→「範囲内の行だけ seek して json.loads」
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+INDEX_SUFFIX = ".idx.npz"
+INDEX_VERSION = 1
+
+# 時刻が取れない行
+TS_NONE = np.iinfo(np.int64).min
+
+# 書き直し検知に使う先頭バイト数
+HEAD_SIG_BYTES = 4096
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# ts の候補キー（上から順に採用。無ければ filters 配下を同じ順で探す）
+_TS_KEYS = (
+    "ts_utc",
+    "ts_jst",
+    "timestamp",
+    "ts",
+    "time",
+    "time_utc",
+    "time_jst",
+    "datetime",
+    "dt",
+    "created_at",
+)
+
+
+def parse_iso_dt(s: Any) -> Optional[datetime]:
+    """Parse ISO-ish datetime and normalize to timezone-aware UTC.
+
+    - If tzinfo is missing (naive), assume UTC.
+    - If tzinfo exists, convert to UTC.
+    """
+    if not s:
+        return None
+    if isinstance(s, datetime):
+        dt = s
+    elif isinstance(s, str):
+        try:
+            dt = datetime.fromisoformat(s)
+        except Exception:
+            return None
+    else:
+        return None
+
+    # normalize to UTC-aware
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    try:
+        return dt.astimezone(timezone.utc)
+    except Exception:
+        return dt
+
+
+def extract_decision_ts(j: Dict[str, Any]) -> Optional[datetime]:
+    """decision 行から時刻を取り出す（ログの揺れに強くする：候補キー → filters 配下の候補キー）。"""
+    for k in _TS_KEYS:
+        ts = parse_iso_dt(j.get(k))
+        if ts is not None:
+            return ts
+    fts = j.get("filters") if isinstance(j.get("filters"), dict) else None
+    if fts:
+        for k in _TS_KEYS:
+            ts = parse_iso_dt(fts.get(k))
+            if ts is not None:
+                return ts
+    return None
+
+
+def _to_us(dt: datetime) -> int:
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _parse_line(raw: bytes) -> Optional[Dict[str, Any]]:
+    """decision_log._iter_jsonl と同じ規則で1行を dict にする（壊れた行・dict 以外は None）。"""
+    line = raw.decode("utf-8", errors="replace").strip()
+    if not line:
+        return None
+    try:
+        obj = json.loads(line)
+    except (json.JSONDecodeError, ValueError):
+        return None
+    if not isinstance(obj, dict):
+        return None
+    # schema normalize (ts_jst -> timestamp)
+    if ("timestamp" not in obj) and ("ts_jst" in obj):
+        obj["timestamp"] = obj.get("ts_jst")
+    return obj
+
+
+def index_path_for(path: Path) -> Path:
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+@dataclass
+class DecisionLogIndex:
+    """1ファイル分の索引（メモリ上）。"""
+
+    path: Path
+    size: int = 0  # 索引済みバイト数
+    mtime_ns: int = 0
+    partial_last: bool = False  # 最終行が改行で終わっていない（書き込み途中の可能性）
+    head_len: int = 0
+    head_sig: str = ""
+    offsets: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    ts_us: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    sym: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    symbols: List[str] = field(default_factory=list)
+
+    # ---- ファイル単位のメタ ----
+    @property
+    def n_rows(self) -> int:
+        return int(len(self.offsets))
+
+    def time_bounds_us(self) -> Optional[Tuple[int, int]]:
+        valid = self.ts_us[self.ts_us != TS_NONE]
+        if valid.size == 0:
+            return None
+        return int(valid.min()), int(valid.max())
+
+    def time_bounds(self) -> Optional[Tuple[datetime, datetime]]:
+        b = self.time_bounds_us()
+        if b is None:
+            return None
+        return _EPOCH + timedelta(microseconds=b[0]), _EPOCH + timedelta(microseconds=b[1])
+
+    # ---- 永続化 ----
+    def save(self) -> None:
+        meta = {
+            "version": INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "partial_last": self.partial_last,
+            "head_len": self.head_len,
+            "head_sig": self.head_sig,
+            "symbols": self.symbols,
+            "time_bounds_us": self.time_bounds_us(),
+        }
+        dst = index_path_for(self.path)
+        tmp = dst.with_name(dst.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                offsets=self.offsets,
+                ts_us=self.ts_us,
+                sym=self.sym,
+                meta=np.array(json.dumps(meta, ensure_ascii=False)),
+            )
+        os.replace(tmp, dst)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["DecisionLogIndex"]:
+        p = index_path_for(path)
+        if not p.exists():
+            return None
+        try:
+            with np.load(p, allow_pickle=False) as z:
+                meta = json.loads(str(z["meta"]))
+                if int(meta.get("version", 0)) != INDEX_VERSION:
+                    return None
+                return cls(
+                    path=path,
+                    size=int(meta["size"]),
+                    mtime_ns=int(meta["mtime_ns"]),
+                    partial_last=bool(meta.get("partial_last", False)),
+                    head_len=int(meta["head_len"]),
+                    head_sig=str(meta["head_sig"]),
+                    offsets=z["offsets"].astype(np.int64),
+                    ts_us=z["ts_us"].astype(np.int64),
+                    sym=z["sym"].astype(np.int32),
+                    symbols=list(meta.get("symbols") or []),
+                )
+        except Exception as e:
+            logger.warning("[decision_index] load failed -> rebuild: {} err={}", p, e)
+            return None
+
+    # ---- 更新 ----
+    def _head_signature(self, f, n: int) -> str:
+        f.seek(0)
+        return hashlib.sha1(f.read(n)).hexdigest()
+
+    def refresh(self) -> bool:
+        """
+        ファイルの伸びた分だけ索引へ追記する。変更があれば True。
+        縮んだ／先頭が変わった（書き直された）場合は作り直す。
+        """
+        st = os.stat(self.path)
+        size, mtime_ns = int(st.st_size), int(st.st_mtime_ns)
+        if size == self.size and mtime_ns == self.mtime_ns:
+            return False
+
+        with open(self.path, "rb") as f:
+            rebuild = size < self.size or self.n_rows == 0
+            if not rebuild and self.head_len > 0:
+                rebuild = self._head_signature(f, self.head_len) != self.head_sig
+            if rebuild:
+                self.offsets = np.empty(0, dtype=np.int64)
+                self.ts_us = np.empty(0, dtype=np.int64)
+                self.sym = np.empty(0, dtype=np.int32)
+                self.symbols = []
+                self.partial_last = False
+                start = 0
+            elif self.partial_last:
+                # 書き込み途中だった最終行は読み直す
+                start = int(self.offsets[-1])
+                self.offsets, self.ts_us, self.sym = self.offsets[:-1], self.ts_us[:-1], self.sym[:-1]
+                self.partial_last = False
+            else:
+                start = self.size
+
+            sym_ids = {s: i for i, s in enumerate(self.symbols)}
+            offs: List[int] = []
+            tss: List[int] = []
+            syms: List[int] = []
+            f.seek(start)
+            pos = start
+            for raw in f:
+                line_start = pos
+                pos += len(raw)
+                obj = _parse_line(raw)
+                if obj is None:
+                    if not raw.endswith(b"\n"):
+                        # 末尾の書きかけ行（まだ JSON として読めない）は次回に回す
+                        pos = line_start
+                    continue
+                ts = extract_decision_ts(obj)
+                s = obj.get("symbol")
+                if isinstance(s, str):
+                    sid = sym_ids.get(s)
+                    if sid is None:
+                        sid = len(self.symbols)
+                        self.symbols.append(s)
+                        sym_ids[s] = sid
+                else:
+                    sid = -1
+                offs.append(line_start)
+                tss.append(_to_us(ts) if ts is not None else TS_NONE)
+                syms.append(sid)
+                self.partial_last = not raw.endswith(b"\n")
+
+            if offs:
+                self.offsets = np.concatenate([self.offsets, np.asarray(offs, dtype=np.int64)])
+                self.ts_us = np.concatenate([self.ts_us, np.asarray(tss, dtype=np.int64)])
+                self.sym = np.concatenate([self.sym, np.asarray(syms, dtype=np.int32)])
+            self.size = pos
+            self.mtime_ns = mtime_ns
+            self.head_len = min(HEAD_SIG_BYTES, pos)
+            self.head_sig = self._head_signature(f, self.head_len)
+        return True
+
+    # ---- クエリ ----
+    def select(
+        self,
+        symbol: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """start <= ts <= end かつ symbol 一致の行番号（ファイル内の並び順）。時刻の無い行は含めない。"""
+        mask = self.ts_us != TS_NONE
+        if start is not None:
+            mask &= self.ts_us >= _to_us(start)
+        if end is not None:
+            mask &= self.ts_us <= _to_us(end)
+        if symbol is not None:
+            try:
+                sid = self.symbols.index(symbol)
+            except ValueError:
+                return np.empty(0, dtype=np.int64)
+            mask &= self.sym == sid
+        return np.flatnonzero(mask)
+
+
+# path -> 索引（プロセス内キャッシュ。GUI の定期更新で毎回 npz を読み直さない）
+_cache: Dict[str, DecisionLogIndex] = {}
+# path -> その索引の読み込み・更新・保存の排他（別ファイルの更新は待たない）
+_locks: Dict[str, threading.Lock] = {}
+_cache_lock = threading.Lock()
+
+
+def get_index(path: Path) -> DecisionLogIndex:
+    """最新化済みの索引を返す（必要ならサイドカーを作成・追記して保存）。"""
+    path = Path(path)
+    key = str(path)
+    with _cache_lock:
+        lock = _locks.setdefault(key, threading.Lock())
+    with lock:
+        idx = _cache.get(key)
+        if idx is None:
+            idx = DecisionLogIndex.load(path) or DecisionLogIndex(path=path)
+            _cache[key] = idx
+        if idx.refresh():
+            try:
+                idx.save()
+            except Exception as e:
+                # 索引が保存できなくてもクエリは続行（次回また作る）
+                logger.warning("[decision_index] save failed: {} err={}", path, e)
+        return idx
+
+
+def iter_decisions(
+    path: Path,
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> Iterator[Tuple[Dict[str, Any], datetime]]:
+    """
+    path の中で symbol 一致かつ start <= ts <= end の行を (dict, ts) で返す（ファイル内の並び順）。
+    範囲外の行は読まない。索引が使えない場合は全行を読んで同じ条件で絞るフォールバック。
+    """
+    try:
+        idx = get_index(path)
+        if symbol is not None and symbol not in idx.symbols:
+            return
+        bounds = idx.time_bounds_us()
+        if bounds is None:
+            return
+        if (start is not None and bounds[1] < _to_us(start)) or (end is not None and bounds[0] > _to_us(end)):
+            return
+        rows = idx.select(symbol=symbol, start=start, end=end)
+        offsets = idx.offsets[rows]
+    except Exception as e:
+        logger.warning("[decision_index] index unavailable -> full scan: {} err={}", path, e)
+        yield from _iter_decisions_scan(path, symbol, start, end)
+        return
+
+    with open(path, "rb") as f:
+        for off in offsets:
+            f.seek(int(off))
+            obj = _parse_line(f.readline())
+            if obj is None:
+                continue
+            ts = extract_decision_ts(obj)
+            if ts is None:
+                continue
+            yield obj, ts
+
+
+def _iter_decisions_scan(
+    path: Path,
+    symbol: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+) -> Iterator[Tuple[Dict[str, Any], datetime]]:
+    with open(path, "rb") as f:
+        for raw in f:
+            obj = _parse_line(raw)
+            if obj is None:
+                continue
+            if symbol is not None and obj.get("symbol") != symbol:
+                continue
+            ts = extract_decision_ts(obj)
+            if ts is None:
+                continue
+            if (start is not None and ts < start) or (end is not None and ts > end):
+                continue
+            yield obj, ts
@@ -0,0 +1,29 @@
+# app/services/decision_log_writer.py
+"""
+decisions.jsonl 用のバッファ付きライター（Live 用の共有インスタンス）
+
+ライター本体は app.core.decision_log_writer（バックテストエンジンからも使うため core 側に置く）。
+"""
+from __future__ import annotations
+
+import atexit
+import threading
+from typing import Optional
+
+from app.core.decision_log_writer import FSYNC_POLICIES, DecisionLogWriter, encode_record
+
+__all__ = ["FSYNC_POLICIES", "DecisionLogWriter", "encode_record", "get_decision_log_writer"]
+
+# Live 用の共有インスタンス（プロセス内で1つ）
+_shared_writer: Optional[DecisionLogWriter] = None
+_shared_lock = threading.Lock()
+
+
+def get_decision_log_writer() -> DecisionLogWriter:
+    """Live（logs/decisions_<date>.jsonl）用の共有ライター。プロセス終了時に残りを書き出す。"""
+    global _shared_writer
+    with _shared_lock:
+        if _shared_writer is None:
+            _shared_writer = DecisionLogWriter()
+            atexit.register(_shared_writer.close)
+        return _shared_writer
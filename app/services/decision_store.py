@@ -0,0 +1,520 @@
+# app/services/decision_store.py
+"""
+decisions*.jsonl の列指向ストア（型付きフラットスキーマ + Parquet コンパクション + 共通リーダー）
+
+- 書き込みは従来どおり JSONL（decision_log_writer）。ここは読む側専用
+- 閉じた日次ファイル logs/decisions_YYYY-MM-DD.jsonl（UTC で当日より前）を
+  logs/decisions_parquet/decisions_YYYY-MM-DD.parquet に変換する（compact_decision_logs）
+    * 列はネストを "." で平らにした固定名（DECISION_SCHEMA）。型も固定
+    * 元の1行は raw 列（JSON 文字列）に残すので、dict 前提のツールも同じ内容を読める
+    * 変換済みかどうかは decisions_parquet/_manifest.json（元ファイルの size / mtime_ns）で判定
+- read_decisions() は変換済みで新しい Parquet があれば必要な列だけ読み、
+  なければ JSONL をその場でパースして同じスキーマの DataFrame を返す
+- Parquet エンジン（pyarrow / fastparquet）は任意依存。無い環境では常に JSONL を読む
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import os
+from datetime import datetime, timezone
+from glob import glob, has_magic
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+from loguru import logger
+
+from app.services.decision_log import _find_first_numeric_by_keys
+from app.services.decision_log_index import parse_iso_dt, extract_decision_ts
+
+COMPACT_DIRNAME = "decisions_parquet"
+MANIFEST_NAME = "_manifest.json"
+SCHEMA_VERSION = 1
+
+# (列名, JSON 上のパス, 種別)
+#   種別: str / float / bool / json（list・dict を JSON 文字列で保持）
+DECISION_SCHEMA: Tuple[Tuple[str, Tuple[str, ...], str], ...] = (
+    ("ts_jst", ("ts_jst",), "str"),
+    ("timestamp", ("timestamp",), "str"),
+    ("type", ("type",), "str"),
+    ("symbol", ("symbol",), "str"),
+    ("strategy", ("strategy",), "str"),
+    ("profile", ("profile",), "str"),
+    ("timeframe", ("timeframe",), "str"),
+    ("src", ("src",), "str"),
+    ("action", ("action",), "str"),
+    ("decision", ("decision",), "str"),
+    ("prob_buy", ("prob_buy",), "float"),
+    ("prob_sell", ("prob_sell",), "float"),
+    ("filter_pass", ("filter_pass",), "bool"),
+    ("filter_reasons", ("filter_reasons",), "json"),
+    ("features_hash", ("features_hash",), "str"),
+    ("lot", ("lot",), "float"),
+    ("decision_detail.action", ("decision_detail", "action"), "str"),
+    ("decision_detail.side", ("decision_detail", "side"), "str"),
+    ("decision_detail.reason", ("decision_detail", "reason"), "str"),
+    ("decision_detail.blocked_reason", ("decision_detail", "blocked_reason"), "str"),
+    ("decision_detail.signal.side", ("decision_detail", "signal", "side"), "str"),
+    ("decision_detail.signal.reason", ("decision_detail", "signal", "reason"), "str"),
+    ("decision_detail.signal.pass_threshold", ("decision_detail", "signal", "pass_threshold"), "bool"),
+    ("decision_detail.signal.confidence", ("decision_detail", "signal", "confidence"), "float"),
+    ("filters.blocked", ("filters", "blocked"), "str"),
+    ("filters.blocked_reason", ("filters", "blocked_reason"), "str"),
+    ("filters.spread", ("filters", "spread"), "float"),
+    ("filters.adx", ("filters", "adx"), "float"),
+    ("filters.atr_pct", ("filters", "atr_pct"), "float"),
+    ("filters.volatility", ("filters", "volatility"), "float"),
+    ("decision_context.ai.threshold", ("decision_context", "ai", "threshold"), "float"),
+    ("decision_context.filters.filter_level", ("decision_context", "filters", "filter_level"), "str"),
+    ("runtime.schema_version", ("runtime", "schema_version"), "str"),
+    ("runtime.mode", ("runtime", "mode"), "str"),
+    ("runtime.source", ("runtime", "source"), "str"),
+    ("runtime.profile", ("runtime", "profile"), "str"),
+    ("runtime.timeframe", ("runtime", "timeframe"), "str"),
+    ("runtime.symbol", ("runtime", "symbol"), "str"),
+    ("exit_plan.mode", ("exit_plan", "mode"), "str"),
+)
+
+# 派生列（フラット化のときに計算する）
+#   ts_utc : decision_log_index.extract_decision_ts と同じ規則で取り出した時刻（UTC）
+#   pnl    : top-level pnl、無ければ decision_log._ensure_pnl_column と同じ候補から探した値
+#   raw    : 元の1行（JSON 文字列）
+DERIVED_COLUMNS: Tuple[str, ...] = ("ts_utc", "pnl", "raw")
+
+_DTYPES = {"str": "string", "float": "float64", "bool": "boolean", "json": "string"}
+
+_PNL_KEYS: Tuple[str, ...] = ("pnl", "profit", "pl_jpy", "pl", "pips")
+_PNL_CONTAINERS: Tuple[str, ...] = ("exit_plan", "decision_detail", "ai", "meta")
+
+
+def decision_columns() -> List[str]:
+    """フラットスキーマの全列名（派生列込み、並び順固定）。"""
+    return [c for c, _, _ in DECISION_SCHEMA] + list(DERIVED_COLUMNS)
+
+
+def _dig(rec: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    cur: Any = rec
+    for key in path:
+        if not isinstance(cur, dict):
+            return None
+        cur = cur.get(key)
+    return cur
+
+
+def _coerce(value: Any, kind: str) -> Any:
+    if value is None:
+        return None
+    if kind == "float":
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    if kind == "bool":
+        return value if isinstance(value, bool) else None
+    if kind == "json":
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _record_pnl(rec: Dict[str, Any]) -> Optional[float]:
+    if "pnl" in rec:
+        return _coerce(rec.get("pnl"), "float")
+    for key in _PNL_CONTAINERS:
+        val = _find_first_numeric_by_keys(rec.get(key), _PNL_KEYS)
+        if val is not None:
+            return val
+    return None
+
+
+def flatten_decision(rec: Dict[str, Any], raw: Optional[str] = None) -> Dict[str, Any]:
+    """
+    decision 1行（dict）をフラットスキーマの dict にする。
+
+    decision は dict（decision.action）/ 文字列のどちらでも decision 列に action 文字列を入れる。
+    """
+    out: Dict[str, Any] = {}
+    for col, path, kind in DECISION_SCHEMA:
+        out[col] = _coerce(_dig(rec, path), kind)
+
+    dec = rec.get("decision")
+    if isinstance(dec, dict):
+        out["decision"] = _coerce(dec.get("action"), "str")
+
+    out["ts_utc"] = extract_decision_ts(rec)
+    out["pnl"] = _record_pnl(rec)
+    out["raw"] = raw if raw is not None else json.dumps(rec, ensure_ascii=False)
+    return out
+
+
+def decisions_to_frame(rows: Sequence[Dict[str, Any]]) -> pd.DataFrame:
+    """flatten_decision の結果を型付き DataFrame にする（0 行でも列と dtype は揃える）。"""
+    cols = decision_columns()
+    df = pd.DataFrame.from_records(list(rows), columns=cols)
+    for col, _, kind in DECISION_SCHEMA:
+        df[col] = df[col].astype(_DTYPES[kind])
+    df["ts_utc"] = pd.to_datetime(df["ts_utc"], utc=True).astype("datetime64[us, UTC]")
+    df["pnl"] = pd.to_numeric(df["pnl"], errors="coerce").astype("float64")
+    df["raw"] = df["raw"].astype("string")
+    return df
+
+
+def _iter_jsonl_lines(path: Path) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """decision_log._iter_jsonl と同じ規則（空行・壊れた行・dict 以外はスキップ）で (dict, 元の行) を返す。"""
+    try:
+        with path.open("r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except (json.JSONDecodeError, ValueError):
+                    continue
+                if isinstance(obj, dict):
+                    yield obj, line
+    except (FileNotFoundError, UnicodeDecodeError, IOError, OSError):
+        return
+
+
+def read_jsonl_frame(path: Union[str, Path]) -> pd.DataFrame:
+    """JSONL 1ファイルをフラットスキーマの DataFrame にする（Parquet を使わない経路）。"""
+    rows = [flatten_decision(obj, raw=line) for obj, line in _iter_jsonl_lines(Path(path))]
+    return decisions_to_frame(rows)
+
+
+# ---------------------------------------------------------------------------
+# Parquet コンパクション
+# ---------------------------------------------------------------------------
+def parquet_engine() -> Optional[str]:
+    """使える Parquet エンジン名（pyarrow 優先）。どちらも無ければ None。"""
+    for name in ("pyarrow", "fastparquet"):
+        if importlib.util.find_spec(name) is not None:
+            return name
+    return None
+
+
+def compact_path_for(path: Union[str, Path]) -> Path:
+    """<dir>/decisions_X.jsonl -> <dir>/decisions_parquet/decisions_X.parquet"""
+    p = Path(path)
+    return p.parent / COMPACT_DIRNAME / (p.stem + ".parquet")
+
+
+def _load_manifest(compact_dir: Path) -> Dict[str, Any]:
+    try:
+        with open(compact_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get("schema_version") == SCHEMA_VERSION:
+            return data
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("[decision_store] manifest read failed dir={} err={}", compact_dir, e)
+    return {"schema_version": SCHEMA_VERSION, "files": {}}
+
+
+def _save_manifest(compact_dir: Path, manifest: Dict[str, Any]) -> None:
+    tmp = compact_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, compact_dir / MANIFEST_NAME)
+
+
+def _source_stat(path: Path) -> Optional[Dict[str, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return {"size": int(st.st_size), "mtime_ns": int(st.st_mtime_ns)}
+
+
+def is_compacted(path: Union[str, Path]) -> bool:
+    """path の Parquet が存在し、元 JSONL から変わっていない（size / mtime_ns 一致）なら True。"""
+    p = Path(path)
+    cp = compact_path_for(p)
+    if not cp.exists():
+        return False
+    entry = _load_manifest(cp.parent)["files"].get(p.name)
+    stat = _source_stat(p)
+    return bool(entry and stat and entry.get("size") == stat["size"] and entry.get("mtime_ns") == stat["mtime_ns"])
+
+
+def _daily_date(path: Path) -> Optional[str]:
+    # decisions_YYYY-MM-DD.jsonl の日付部分
+    stem = path.stem
+    if not stem.startswith("decisions_"):
+        return None
+    s = stem[len("decisions_"):]
+    try:
+        datetime.strptime(s, "%Y-%m-%d")
+    except ValueError:
+        return None
+    return s
+
+
+def compact_decision_logs(
+    log_dir: Union[str, Path, None] = None,
+    *,
+    include_today: bool = False,
+    force: bool = False,
+    today: Optional[str] = None,
+) -> List[Path]:
+    """
+    閉じた日次 decisions_YYYY-MM-DD.jsonl を Parquet に変換する。
+
+    Parameters
+    ----------
+    log_dir : str | Path | None
+        decisions_*.jsonl のあるディレクトリ（None なら <project_root>/logs）
+    include_today : bool
+        True なら当日（UTC）のファイルも変換する（通常は書き込み中なので対象外）
+    force : bool
+        変換済みでも作り直す
+    today : str | None
+        当日の日付 "YYYY-MM-DD"（None なら UTC の今日）
+
+    Returns
+    -------
+    list[Path]
+        今回書いた Parquet のパス
+    """
+    engine = parquet_engine()
+    if engine is None:
+        logger.warning("[decision_store] parquet engine (pyarrow / fastparquet) not installed; compaction skipped")
+        return []
+
+    if log_dir is None:
+        from app.services.decision_log import _get_decision_log_dir
+
+        log_dir = _get_decision_log_dir()
+    log_dir = Path(log_dir)
+    today = today or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+    compact_dir = log_dir / COMPACT_DIRNAME
+    manifest = _load_manifest(compact_dir)
+    written: List[Path] = []
+    for src in sorted(log_dir.glob("decisions_*.jsonl")):
+        day = _daily_date(src)
+        if day is None or day > today or (day == today and not include_today):
+            continue
+        if not force and is_compacted(src):
+            continue
+        stat = _source_stat(src)
+        if stat is None:
+            continue
+        try:
+            df = read_jsonl_frame(src)
+            compact_dir.mkdir(parents=True, exist_ok=True)
+            dst = compact_path_for(src)
+            tmp = dst.with_name(dst.name + ".tmp")
+            df.to_parquet(tmp, engine=engine, index=False)
+            os.replace(tmp, dst)
+        except Exception as e:
+            logger.warning("[decision_store] compaction failed src={} err={}", src, e)
+            continue
+        manifest["files"][src.name] = {**stat, "rows": int(len(df))}
+        _save_manifest(compact_dir, manifest)
+        written.append(dst)
+        logger.info("[decision_store] compacted {} rows={} -> {}", src.name, len(df), dst)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# 共通リーダー
+# ---------------------------------------------------------------------------
+Sources = Union[str, Path, Iterable[Union[str, Path]]]
+
+
+def _resolve_sources(sources: Sources) -> List[Path]:
+    if isinstance(sources, (str, Path)):
+        s = str(sources)
+        if has_magic(s):
+            return [Path(p) for p in sorted(glob(s, recursive=True))]
+        return [Path(s)]
+    return [Path(p) for p in sources]
+
+
+def _read_one(path: Path, columns: Optional[List[str]]) -> pd.DataFrame:
+    engine = parquet_engine()
+    if engine is not None and is_compacted(path):
+        try:
+            return pd.read_parquet(compact_path_for(path), engine=engine, columns=columns)
+        except Exception as e:
+            logger.warning("[decision_store] parquet read failed path={} err={} (fallback to jsonl)", path, e)
+    df = read_jsonl_frame(path)
+    return df if columns is None else df[columns]
+
+
+def _row_mask(
+    df: pd.DataFrame,
+    *,
+    symbol: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    types: Optional[Sequence[str]],
+) -> pd.Series:
+    """symbol / type / ts_utc の列で [start, end) 等の条件に合う行の bool マスク"""
+    mask = pd.Series(True, index=df.index)
+    if symbol:
+        mask &= df["symbol"].eq(symbol).fillna(False).astype(bool)
+    if types:
+        mask &= df["type"].isin(list(types)).fillna(False).astype(bool)
+    if start is not None:
+        mask &= (df["ts_utc"] >= pd.Timestamp(start)).fillna(False).astype(bool)
+    if end is not None:
+        mask &= (df["ts_utc"] < pd.Timestamp(end)).fillna(False).astype(bool)
+    return mask
+
+
+def read_decisions(
+    sources: Sources,
+    *,
+    columns: Optional[Sequence[str]] = None,
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    types: Optional[Sequence[str]] = None,
+) -> pd.DataFrame:
+    """
+    decisions*.jsonl（glob / パス / パスの列）をフラットスキーマの DataFrame で読む。
+
+    Parameters
+    ----------
+    sources : str | Path | Iterable
+        glob パターン、ファイルパス、またはその列
+    columns : Sequence[str] | None
+        返す列（None なら全列）。Parquet からは必要な列だけ読む
+    symbol : str | None
+        symbol 列がこれに一致する行だけ
+    start, end : datetime | None
+        ts_utc が [start, end) の行だけ（時刻の無い行は除外）
+    types : Sequence[str] | None
+        type 列がこれらのいずれかの行だけ（例: ["decision"]）
+
+    Returns
+    -------
+    DataFrame
+        ファイル順・行順のまま連結したもの
+    """
+    all_cols = decision_columns()
+    if columns is not None:
+        unknown = [c for c in columns if c not in all_cols]
+        if unknown:
+            raise KeyError(f"unknown decision columns: {unknown}")
+    want = list(columns) if columns is not None else all_cols
+
+    need = list(want)
+    for col, active in (("symbol", symbol), ("type", types), ("ts_utc", start is not None or end is not None)):
+        if active and col not in need:
+            need.append(col)
+
+    frames: List[pd.DataFrame] = []
+    for path in _resolve_sources(sources):
+        if not path.exists():
+            continue
+        df = _read_one(path, need)
+        if df.empty:
+            continue
+        mask = _row_mask(df, symbol=symbol, start=start, end=end, types=types)
+        if not bool(mask.all()):
+            df = df.loc[mask]
+        frames.append(df[want])
+
+    if not frames:
+        return decisions_to_frame([])[want]
+    return pd.concat(frames, ignore_index=True)
+
+
+# Parquet を分割して読むときの1バッチの行数（pyarrow）
+_PARQUET_BATCH_ROWS = 8192
+
+
+def _iter_parquet_frames(path: Path, columns: List[str]) -> Iterator[pd.DataFrame]:
+    """path の Parquet を必要な列だけ、バッチ（pyarrow）／行グループ（fastparquet）単位で読む"""
+    cp = compact_path_for(path)
+    if parquet_engine() == "pyarrow":
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(cp).iter_batches(batch_size=_PARQUET_BATCH_ROWS, columns=columns):
+            yield batch.to_pandas()
+    else:
+        from fastparquet import ParquetFile
+
+        yield from ParquetFile(str(cp)).iter_row_groups(columns=columns)
+
+
+def _iter_file_records(
+    path: Path,
+    *,
+    symbol: Optional[str],
+    start: Optional[datetime],
+    end: Optional[datetime],
+    types: Optional[Sequence[str]],
+) -> Iterator[Dict[str, Any]]:
+    """1ファイル分の条件に合う行（元の dict）。変換済みで新しい Parquet があればそちらを読む"""
+    done = 0
+    if parquet_engine() is not None and is_compacted(path):
+        need = ["raw"] + [c for c, active in (("symbol", symbol), ("type", types)) if active]
+        if start is not None or end is not None:
+            need.append("ts_utc")
+        try:
+            for df in _iter_parquet_frames(path, need):
+                mask = _row_mask(df, symbol=symbol, start=start, end=end, types=types)
+                for raw in df.loc[mask, "raw"].tolist():
+                    if raw is None or raw is pd.NA:
+                        continue
+                    yield json.loads(raw)
+                    done += 1
+            return
+        except Exception as e:
+            # 途中まで返した分は JSONL 側で読み飛ばす（行順は同じ）
+            logger.warning(
+                "[decision_store] parquet read failed path={} err={} (fallback to jsonl, skip={})", path, e, done
+            )
+
+    lo = parse_iso_dt(start) if start is not None else None
+    hi = parse_iso_dt(end) if end is not None else None
+    type_set = {str(t) for t in types} if types else None
+    for rec, _ in _iter_jsonl_lines(path):
+        if symbol and _coerce(rec.get("symbol"), "str") != symbol:
+            continue
+        if type_set is not None and _coerce(rec.get("type"), "str") not in type_set:
+            continue
+        if lo is not None or hi is not None:
+            ts = extract_decision_ts(rec)
+            if ts is None or (lo is not None and ts < lo) or (hi is not None and ts >= hi):
+                continue
+        if done > 0:
+            done -= 1
+            continue
+        yield rec
+
+
+def iter_decision_records(
+    sources: Sources,
+    *,
+    symbol: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    types: Optional[Sequence[str]] = None,
+    limit: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    read_decisions と同じ条件で絞った行を、元の dict として返す。
+
+    DataFrame 全体は作らず、ファイルごとに
+    - 変換済みで新しい Parquet があれば、条件に使う列と raw 列だけをバッチ単位で読んで絞り、raw を復元
+    - なければ JSONL を1行ずつ読む（1行につき json.loads 1回）
+    limit 件に達したら読むのをやめる。
+    """
+    n = 0
+    for path in _resolve_sources(sources):
+        if not path.exists():
+            continue
+        for rec in _iter_file_records(path, symbol=symbol, start=start, end=end, types=types):
+            yield rec
+            n += 1
+            if limit and n >= int(limit):
+                return
@@ -27,10 +27,11 @@ from app.core.strategy_profile import get_profile
 from app.services.edition_guard import filter_level, EditionGuard
 from app.services import trade_state, data_guard
 from app.services.ohlcv_update_service import ensure_lgbm_proba_uptodate
+from app.services.bar_window import get_bar_window
 from app.services.inflight_service import make_key as inflight_make_key, mark as inflight_mark, finish as inflight_finish
 from core.utils.timeutil import now_jst_iso
 from app.core import market, mt5_client
-from app.core.config_loader import load_config
+from app.core.config_snapshot import get_config_snapshot
 
 # プロジェクトルート = app/services/ から 2 つ上
 _PROJECT_ROOT = Path(__file__).resolve().parents[2]
@@ -547,8 +548,7 @@ class ExecutionService:
         """
         global _last_confirmed_bar_time
         try:
-            cfg = load_config()
-            runtime = (cfg.get("runtime", {}) or {}) if isinstance(cfg, dict) else {}
+            runtime = get_config_snapshot(refresh=False).runtime
             symbol_tag = (symbol or "USDJPY").rstrip("-").upper().strip()
             delay_sec = int(runtime.get("ohlc_confirm_delay_sec", 30))
         except Exception:
@@ -581,27 +581,35 @@ class ExecutionService:
                 )
                 return (False, "ohlc_csv_not_found", None)
 
-            df = pd.read_csv(ohlc_path, parse_dates=["time"])
-            if df.empty or "time" not in df.columns:
-                loguru_logger.info(
-                    "[_check_bar_confirmed] ohlc_path={} exists=True last_mtime={} last_bar_time=n/a skip_reason=ohlc_empty",
-                    str(ohlc_path), last_mtime_str,
-                )
-                return (False, "ohlc_empty", None)
-            df["time"] = pd.to_datetime(df["time"], errors="coerce")
-            df = df.dropna(subset=["time"])
-            if df.empty:
-                loguru_logger.info(
-                    "[_check_bar_confirmed] ohlc_path={} exists=True last_mtime={} last_bar_time=n/a skip_reason=ohlc_no_valid_time",
-                    str(ohlc_path), last_mtime_str,
-                )
-                return (False, "ohlc_no_valid_time", None)
+            # 共有バー窓（CSV が変わったときだけ末尾を追記）から最新バーを取る。CSV 全体は読まない
+            window = get_bar_window(symbol_tag, "M5") if ohlc_path == preferred_path else None
+            if window is not None:
+                # 窓は time 昇順・重複なしなので末尾が max(time)
+                bar_time = window.last_time()
+                min_time = window.first_time()
+                rows = len(window)
+            else:
+                df = pd.read_csv(ohlc_path, parse_dates=["time"])
+                if df.empty or "time" not in df.columns:
+                    loguru_logger.info(
+                        "[_check_bar_confirmed] ohlc_path={} exists=True last_mtime={} last_bar_time=n/a skip_reason=ohlc_empty",
+                        str(ohlc_path), last_mtime_str,
+                    )
+                    return (False, "ohlc_empty", None)
+                df["time"] = pd.to_datetime(df["time"], errors="coerce")
+                df = df.dropna(subset=["time"])
+                if df.empty:
+                    loguru_logger.info(
+                        "[_check_bar_confirmed] ohlc_path={} exists=True last_mtime={} last_bar_time=n/a skip_reason=ohlc_no_valid_time",
+                        str(ohlc_path), last_mtime_str,
+                    )
+                    return (False, "ohlc_no_valid_time", None)
 
-            # 並び順に依存せず max(time) を最新バーとして判定
-            bar_time = pd.Timestamp(df["time"].max())
-            min_time = pd.Timestamp(df["time"].min())
-            max_time = pd.Timestamp(df["time"].max())
-            rows = len(df)
+                # 並び順に依存せず max(time) を最新バーとして判定
+                bar_time = pd.Timestamp(df["time"].max())
+                min_time = pd.Timestamp(df["time"].min())
+                rows = len(df)
+            max_time = bar_time
             last_bar_time_str = bar_time.strftime("%Y-%m-%d %H:%M:%S")
             min_time_str = min_time.strftime("%Y-%m-%d %H:%M:%S")
             max_time_str = max_time.strftime("%Y-%m-%d %H:%M:%S")
@@ -759,10 +767,7 @@ class ExecutionService:
         # シンボルの取得
         if not symbol:
             try:
-                from app.core.config_loader import load_config
-                cfg = load_config()
-                runtime_cfg = cfg.get("runtime", {}) if isinstance(cfg, dict) else {}
-                symbol = runtime_cfg.get("symbol", "USDJPY-")
+                symbol = get_config_snapshot(refresh=False).runtime.get("symbol", "USDJPY-")
             except Exception:
                 symbol = "USDJPY-"
 
@@ -1615,10 +1620,7 @@ class ExecutionService:
         # シンボルの取得
         if not symbol:
             try:
-                from app.core.config_loader import load_config
-                cfg = load_config()
-                runtime_cfg = cfg.get("runtime", {}) if isinstance(cfg, dict) else {}
-                symbol = runtime_cfg.get("symbol", "USDJPY-")
+                symbol = get_config_snapshot(refresh=False).runtime.get("symbol", "USDJPY-")
             except Exception:
                 symbol = "USDJPY-"
 
@@ -59,6 +59,7 @@ from app.core.mt5_client import MT5Client
 from app.core.strategy_profile import get_profile
 from core.risk import LotSizingResult
 from app.core.config_loader import load_config
+from app.core.config_snapshot import get_config_snapshot
 from app.services import circuit_breaker, trade_service, trade_state
 from app.services.orderbook_stub import orderbook
 from app.services.trailing import AtrTrailer, TrailConfig, TrailState
@@ -67,6 +68,7 @@ from app.services.trade_service import TradeService
 from app.services.filter_service import evaluate_entry, _get_engine
 from app.services.profile_stats_service import get_profile_stats_service
 from app.services.edition_guard import filter_level
+from app.services.decision_log_writer import get_decision_log_writer
 from app.services.loss_streak_service import get_consecutive_losses
 from core import position_guard
 from core.ai.service import AISvc, ProbOut
@@ -127,8 +129,7 @@ def _atr_gate_ok(atr_pct_now: float, runtime_cfg: Dict[str, Any]) -> bool:
 
     if not filters_cfg:
         try:
-            cfg = load_config()
-            filters_cfg = cfg.get("filters", {})
+            filters_cfg = get_config_snapshot(refresh=False).filters
         except Exception:
             filters_cfg = {}
 
@@ -394,6 +395,8 @@ def _symbol_to_filename(symbol: str) -> str:
 def _write_decision_log(symbol: str, record: Dict[str, Any]) -> None:
     """
     decisions.jsonl にログを出力する（最終出口）。
+    検証・正規化はここで同期的に行い、ファイル書き込みは decision_log_writer が
+    バックグラウンドでまとめて行う（即時に読みたい場合は get_decision_log_writer().flush()）。
 
     Parameters
     ----------
@@ -455,31 +458,26 @@ def _write_decision_log(symbol: str, record: Dict[str, Any]) -> None:
 
     try:
         # v5.2: フラットに logs_YYYY-MM-DD.jsonl
-        logs_dir = Path("logs")
-        logs_dir.mkdir(exist_ok=True)
-
         d = datetime.now(timezone.utc).date().isoformat()
-        path = logs_dir / f"decisions_{d}.jsonl"
-
-        with path.open("a", encoding="utf-8") as f:
+        path = Path("logs") / f"decisions_{d}.jsonl"
 
-            # --- ensure action field for condition mining (final exit) ---
-            if isinstance(record, dict) and ("action" not in record or not record.get("action")):
-                dd = record.get("decision_detail")
-                if isinstance(dd, dict) and dd.get("action"):
-                    record["action"] = dd.get("action")
+        # --- ensure action field for condition mining (final exit) ---
+        if isinstance(record, dict) and ("action" not in record or not record.get("action")):
+            dd = record.get("decision_detail")
+            if isinstance(dd, dict) and dd.get("action"):
+                record["action"] = dd.get("action")
+            else:
+                fp = record.get("filter_pass", None)
+                if fp is True:
+                    record["action"] = "ENTRY"
+                elif fp is False:
+                    record["action"] = "BLOCKED"
                 else:
-                    fp = record.get("filter_pass", None)
-                    if fp is True:
-                        record["action"] = "ENTRY"
-                    elif fp is False:
-                        record["action"] = "BLOCKED"
-                    else:
-                        record["action"] = "HOLD"
-            # --- end action ---
-
-            f.write(json.dumps(record, ensure_ascii=False) + "\n")
-            f.flush()
+                    record["action"] = "HOLD"
+        # --- end action ---
+
+        # エンコードだけここで行い、ファイル書き込みはバックグラウンドでまとめて行う
+        get_decision_log_writer().write(path, record)
     except Exception:
         # ログ失敗で売買・探索を止めない
         return
@@ -1101,7 +1099,8 @@ def _collect_features(
     Live 用の軽量なフィーチャ生成。
     - 学習時の 9 列（ret_1, ret_5, ema_5, ema_20, ema_ratio, rsi_14, atr_14, range, vol_chg）
       を中心に、設定された base_features だけ埋める。
-    - 本来は OHLCV の履歴から計算するべきだが、ここでは tick/spread からの簡易版。
+    - OHLCV CSV があれば live_feature_service のインクリメンタル特徴量（学習時と同じレシピ）を使う。
+    - CSV が無い／warm-up 中の列は tick/spread からの簡易値で埋める。
     """
     bid, ask = tick if tick else (None, None)
     mid = (float(bid) + float(ask)) / 2 if bid is not None and ask is not None else 0.0
@@ -1112,7 +1111,22 @@ def _collect_features(
         features["bias"] = 1.0
         return features
 
-    # 簡易な値（将来的に core.ai.features と揃えるならここを書き換える）
+    live_feats: Dict[str, float] = {}
+    try:
+        from app.services.live_feature_service import get_live_features
+
+        live_feats = get_live_features(symbol) or {}
+    except Exception as e:
+        logger.debug("[collect_features] live features unavailable: {}", e)
+
+    if live_feats:
+        for name in base_features:
+            if name in live_feats:
+                features[name] = float(live_feats[name])
+        if len(features) == len(base_features):
+            return features
+
+    # 簡易な値（live_feats に無い列のみ）
     ret_1_val = 0.0
     ret_5_val = 0.0
     ema_5_val = mid
@@ -1127,6 +1141,8 @@ def _collect_features(
     vol_chg_val = float(open_positions)
 
     for name in base_features:
+        if name in features:
+            continue
         # --- モデルの 9 列 ---
         if name == "ret_1":
             features[name] = ret_1_val
@@ -1697,8 +1713,7 @@ class ExecutionStub:
             _emit(decision_payload, filters_ctx, level="warning")
             return {"ai": ai_out, "cb": cb_status, "ts": ts, "decision": None}
 
-        config = load_config()
-        entry_cfg = config.get("entry", {}) if isinstance(config, dict) else {}
+        entry_cfg = get_config_snapshot(refresh=False).entry
         min_edge_cfg = float(entry_cfg.get("entry_min_edge", entry_cfg.get("min_edge", 0.0)))
         # min_edge_effective: 環境変数で上書き可能な閾値
         min_edge_effective = min_edge_cfg
@@ -0,0 +1,196 @@
+# app/services/feature_store.py
+"""
+特徴量ストア（(symbol, timeframe, レシピハッシュ) ごとに計算済みの特徴量行列を保存）
+
+- 配置: data/<SYM>/features/<TF>_<recipe>_<hash 先頭12桁>/（OhlcvStore と同じ列指向フォーマット）
+- 正本は OHLCV の列指向ストア（data_guard.ohlcv_store）。sync() で
+    初回       : 全履歴から特徴量を計算して保存
+    以降       : 新しいバー + レシピの lookback 本だけ読んで、新しい行の特徴量だけ追記
+    作り直し   : レシピハッシュ / OHLCV の先頭 time / 列構成が変わったとき
+- 保存するのは recipe.compute() の生の行列（NaN 行も残す）。dropna などの仕上げは読み出し側で
+  recipe.finish() を通すので、出力形式は従来の build_features と同じ
+- 値は「全履歴から計算した特徴量」。範囲を切り出して build_features した場合と違い、
+  範囲の先頭でも warm-up による NaN 落ち・EWM の立ち上がりの差が出ない
+"""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.services import data_guard
+from app.services.data_guard import DATA_DIR
+from app.services.ohlcv_store import OhlcvStore, _FileLock, get_store
+from core.ai.feature_registry import Recipe, get_recipe
+
+
+def _symbol_tag(symbol: str) -> str:
+    return str(symbol or "USDJPY").rstrip("-").upper().strip()
+
+
+def store_dir(symbol: str, timeframe: str, recipe: Recipe, root: Optional[Path] = None) -> Path:
+    base = Path(root) if root is not None else DATA_DIR / _symbol_tag(symbol) / "features"
+    return base / f"{str(timeframe).upper()}_{recipe.name}_{recipe.hash[:12]}"
+
+
+class FeatureStore:
+    """1シンボル × 1タイムフレーム × 1レシピ分の特徴量ストア。"""
+
+    def __init__(self, symbol: str, timeframe: str, recipe: Recipe, root: Optional[Path] = None):
+        self.symbol_tag = _symbol_tag(symbol)
+        self.timeframe = str(timeframe).upper()
+        self.recipe = recipe
+        self.store = get_store(store_dir(symbol, timeframe, recipe, root))
+
+    @property
+    def root(self) -> Path:
+        return self.store.root
+
+    def __len__(self) -> int:
+        return len(self.store)
+
+    # ------------------------------------------------------------------
+    # 同期
+    # ------------------------------------------------------------------
+    def sync(self, source: Optional[OhlcvStore] = None) -> int:
+        """
+        OHLCV ストアの新しいバーの特徴量を計算して追記する。戻り値: 追記した行数。
+        source 省略時は data_guard.ohlcv_store（CSV に同期済み）を使う。
+        """
+        if source is None:
+            source = data_guard.ohlcv_store(self.symbol_tag, self.timeframe)
+            if source is None:
+                return 0
+        bounds = source.time_bounds()
+        if bounds is None:
+            return 0
+        src_cols = source.columns
+        want = {
+            "recipe": self.recipe.name,
+            "hash": self.recipe.hash,
+            "origin": str(bounds[0]),
+            "ohlcv_columns": src_cols,
+        }
+        tail = self.store.tail_time()
+        meta = self.store.source
+        if tail is not None and tail >= bounds[1] and all(meta.get(k) == v for k, v in want.items()):
+            return 0
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        with _FileLock(self.root / "store.lock"):
+            tail = self.store.tail_time()
+            meta = self.store.source
+            if tail is None or any(meta.get(k) != v for k, v in want.items()):
+                return self._rebuild(source, want)
+            if tail >= bounds[1]:
+                return 0
+            bars = source.read_range(start=tail, pad_before=self.recipe.lookback)
+            feats = self.recipe.compute(bars)
+            new = bars["time"] > tail
+            frame = pd.concat([bars.loc[new, ["time"]], feats.loc[new]], axis=1)
+            appended = self.store.append(frame)
+            logger.debug(
+                "[feature_store] synced {} appended={} tail={}", self.root.name, appended, self.store.tail_time()
+            )
+            return appended
+
+    def _rebuild(self, source: OhlcvStore, meta: Dict[str, Any]) -> int:
+        t0 = time.perf_counter()
+        self.store.clear()
+        bars = source.read_range()
+        feats = self.recipe.compute(bars)
+        appended = self.store.append(pd.concat([bars[["time"]], feats], axis=1))
+        self.store.set_source(meta)
+        logger.info(
+            "[feature_store] built {} rows={} elapsed={:.2f}s",
+            self.root.name,
+            appended,
+            time.perf_counter() - t0,
+        )
+        return appended
+
+    # ------------------------------------------------------------------
+    # 読み出し
+    # ------------------------------------------------------------------
+    def read(
+        self,
+        start: Any = None,
+        end: Any = None,
+        *,
+        tail: Optional[int] = None,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """time + 特徴量（recipe.compute() の生の行列）を範囲 / 末尾 tail 本で返す。"""
+        if tail is not None:
+            return self.store.tail(int(tail), columns)
+        return self.store.read_range(start, end, columns)
+
+    def features_for(self, bars: pd.DataFrame) -> Optional[pd.DataFrame]:
+        """
+        bars（time 昇順・重複なし）の各行に対応する特徴量行列（index は bars と同じ）。
+        ストアに bars の time が全部そろっていなければ None。
+        """
+        if bars is None or bars.empty or "time" not in bars.columns:
+            return None
+        t = pd.to_datetime(bars["time"]).to_numpy(dtype="datetime64[ns]")
+        if t.size > 1 and not bool((t[1:] > t[:-1]).all()):
+            return None
+        df = self.store.read_range(pd.Timestamp(t[0]), pd.Timestamp(t[-1]))
+        if len(df) != t.size or not np.array_equal(df["time"].to_numpy(dtype="datetime64[ns]"), t):
+            return None
+        feats = df.drop(columns=["time"])
+        feats.index = bars.index
+        return feats
+
+
+# key = store root
+_stores: Dict[str, FeatureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_feature_store(
+    symbol: str,
+    timeframe: str = "M5",
+    recipe: str = "ohlcv_tech_v1",
+    root: Optional[Path] = None,
+) -> FeatureStore:
+    """(symbol, timeframe, recipe) の FeatureStore（プロセス内で使い回す）。"""
+    r = get_recipe(recipe)
+    key = str(store_dir(symbol, timeframe, r, root))
+    with _stores_lock:
+        fs = _stores.get(key)
+        if fs is None:
+            fs = FeatureStore(symbol, timeframe, r, root)
+            _stores[key] = fs
+        return fs
+
+
+def build_features_cached(
+    bars: pd.DataFrame,
+    symbol: str,
+    timeframe: str = "M5",
+    recipe: str = "ohlcv_tech_v1",
+) -> pd.DataFrame:
+    """
+    recipe.build(bars) と同じ形の出力を、特徴量ストアの計算済み行列から作る。
+    bars は symbol の OHLCV（CSV / data_guard）から読んだもの。ストアに無い行を含む・
+    ストアが使えない場合は従来どおり bars から計算する。
+    """
+    r = get_recipe(recipe)
+    feats: Optional[pd.DataFrame] = None
+    try:
+        fs = get_feature_store(symbol, timeframe, recipe)
+        fs.sync()
+        feats = fs.features_for(bars)
+    except Exception as e:
+        logger.warning("[feature_store] unavailable -> compute from bars: {}", e)
+        feats = None
+    if feats is None:
+        return r.build(bars)
+    return r.finish(bars, feats)
+
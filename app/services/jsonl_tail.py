@@ -0,0 +1,275 @@
+"""
+JSONL の末尾読み（新しい順）とファイル単位の末尾キャッシュ
+
+- iter_jsonl_reverse: ファイル末尾からブロック単位で逆向きに読み、レコードを新しい順に返す
+  （ファイル全体をメモリに載せない）
+- read_jsonl_tail: 末尾から limit 件（predicate を満たすもの）を新しい順に返す。
+  ファイルごとに (size, mtime, 解析済みの末尾) をキャッシュし、2回目以降は
+  追記されたバイトだけを解析する。縮んだ／書き換えられたファイルは読み直す。
+- read_jsonl_appended: 前回読んだ位置以降の追記分だけを古い順に返す（集計の差分更新用）
+
+行の扱いは従来の読み手（ops_history_service.load_ops_history）と同じ：
+空行・"{" で始まらない行（プレーンログ）は黙ってスキップ、壊れた JSON 行は警告してスキップ、
+dict 以外もスキップ。書き込み途中の最終行（改行なしで JSON として読めないもの）は次回に回す。
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Union
+
+from loguru import logger
+
+BLOCK_SIZE = 64 * 1024
+# キャッシュ上限（ファイル数・1ファイルあたりの保持レコード数）
+CACHE_MAX_FILES = 32
+CACHE_MAX_RECORDS = 5000
+# 追記判定用に、前回読んだ末尾のバイト列を覚えておく長さ
+_FINGERPRINT_BYTES = 64
+
+PathLike = Union[str, Path]
+Predicate = Callable[[dict], bool]
+
+
+def _parse_line(raw: bytes, path: Path) -> Optional[dict]:
+    line = raw.strip()
+    if not line or not line.startswith(b"{"):
+        return None
+    try:
+        rec = json.loads(line.decode("utf-8", errors="replace"))
+    except Exception:
+        logger.warning(f"Skipping invalid JSON line in {path}")
+        return None
+    return rec if isinstance(rec, dict) else None
+
+
+def _iter_lines_backward(f, end: int, block_size: int = BLOCK_SIZE) -> Iterator[tuple[int, bytes]]:
+    """
+    [0, end) の範囲を末尾から逆向きに読み、(行の開始オフセット, 行バイト列) を新しい順に返す。
+    end の直前が改行でない場合、最後の断片も1行として返す。
+    """
+    pos = int(end)
+    buf = b""
+    while pos > 0:
+        n = min(int(block_size), pos)
+        pos -= n
+        f.seek(pos)
+        buf = f.read(n) + buf
+        parts = buf.split(b"\n")
+        # 先頭の断片は前のブロックに続く可能性がある（pos == 0 なら確定）
+        buf = parts[0]
+        off = pos + len(buf) + 1
+        offs = []
+        for p in parts[1:]:
+            offs.append(off)
+            off += len(p) + 1
+        for o, p in zip(reversed(offs), reversed(parts[1:])):
+            yield o, p
+    if buf:
+        yield 0, buf
+
+
+def iter_jsonl_reverse(path: PathLike, *, block_size: int = BLOCK_SIZE) -> Iterator[dict]:
+    """JSONL を末尾から読み、レコードを新しい順に返す（読めないファイルは何も返さない）"""
+    p = Path(path)
+    try:
+        f = p.open("rb")
+    except Exception:
+        return
+    with f:
+        try:
+            end = os.fstat(f.fileno()).st_size
+        except Exception:
+            return
+        for _, raw in _iter_lines_backward(f, end, block_size):
+            rec = _parse_line(raw, p)
+            if rec is not None:
+                yield rec
+
+
+@dataclass
+class _TailEntry:
+    """1ファイル分の解析済み末尾。recs / offs は新しい順で、[lo, hi) のバイト範囲に対応する"""
+
+    size: int = 0
+    mtime_ns: int = -1
+    lo: int = 0
+    hi: int = 0
+    fingerprint: bytes = b""
+    recs: deque = field(default_factory=deque)
+    offs: deque = field(default_factory=deque)
+
+
+_CACHE: "OrderedDict[str, _TailEntry]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+
+
+def clear_jsonl_tail_cache() -> None:
+    """末尾キャッシュを破棄する（テスト・ログローテーション後など）"""
+    with _CACHE_LOCK:
+        _CACHE.clear()
+
+
+def _read_fingerprint(f, hi: int) -> bytes:
+    start = max(0, int(hi) - _FINGERPRINT_BYTES)
+    f.seek(start)
+    return f.read(int(hi) - start)
+
+
+def _read_forward(f, path: Path, start: int, end: int) -> tuple[list[tuple[int, dict]], int]:
+    """
+    [start, end) を前向きに読み、(オフセット, レコード) を古い順で返す。
+    戻り値の2つ目は読み終えた位置（書き込み途中の最終行があればその手前）
+    """
+    f.seek(start)
+    data = f.read(int(end) - int(start))
+    out: list[tuple[int, dict]] = []
+    off = int(start)
+    parts = data.split(b"\n")
+    for i, raw in enumerate(parts):
+        last = i == len(parts) - 1
+        if last and raw:
+            # 改行で終わっていない断片：JSON として読めれば採用、読めなければ次回に回す
+            try:
+                obj = json.loads(raw.strip().decode("utf-8", errors="replace"))
+            except Exception:
+                return out, off
+            if isinstance(obj, dict) and raw.strip().startswith(b"{"):
+                out.append((off, obj))
+            return out, off + len(raw)
+        rec = _parse_line(raw, path)
+        if rec is not None:
+            out.append((off, rec))
+        off += len(raw) + (0 if last else 1)
+    return out, off
+
+
+def read_jsonl_appended(
+    path: PathLike, offset: int = 0, fingerprint: bytes = b""
+) -> Optional[tuple[list[dict], int, bytes]]:
+    """
+    offset 以降に追記されたレコード（古い順）と、次回に渡す (offset, fingerprint) を返す。
+
+    fingerprint は前回返した値（offset 直前のバイト列）。ファイルが縮んだ／offset より手前が
+    書き換えられていた場合は None を返すので、呼び出し側で offset=0 から読み直す。
+    書き込み途中の最終行は読まずに次回へ回す。読めないファイルは例外をそのまま送出する。
+    """
+    p = Path(path)
+    with p.open("rb") as f:
+        size = int(os.fstat(f.fileno()).st_size)
+        offset = int(offset)
+        if size < offset or _read_fingerprint(f, offset) != bytes(fingerprint):
+            return None
+        new, hi = _read_forward(f, p, offset, size)
+        return [rec for _, rec in new], hi, _read_fingerprint(f, hi)
+
+
+def _refresh(key: str, path: Path, f, size: int, mtime_ns: int) -> _TailEntry:
+    """キャッシュを現在のファイル内容に合わせる（追記分だけ読む。合わなければ作り直す）"""
+    ent = _CACHE.get(key)
+    if ent is not None:
+        if size == ent.size and mtime_ns == ent.mtime_ns:
+            _CACHE.move_to_end(key)
+            return ent
+        appended = size >= ent.hi and _read_fingerprint(f, ent.hi) == ent.fingerprint
+        if not appended:
+            ent = None
+    if ent is None:
+        ent = _TailEntry()
+        # 空の範囲 [hi, hi) から始め、中身は read_jsonl_tail が古い側へ読み進めて埋める
+        # （書き込み途中の最終行は hi の外に置き、次回の追記読みで拾う）
+        _, hi = _read_forward(f, path, _last_line_start(f, size), size)
+        ent.lo = ent.hi = hi
+    new, hi = _read_forward(f, path, ent.hi, size)
+    for off, rec in new:
+        ent.recs.appendleft(rec)
+        ent.offs.appendleft(off)
+    ent.hi = hi
+    ent.size = size
+    ent.mtime_ns = mtime_ns
+    ent.fingerprint = _read_fingerprint(f, hi)
+    _trim(ent)
+    _CACHE[key] = ent
+    _CACHE.move_to_end(key)
+    while len(_CACHE) > CACHE_MAX_FILES:
+        _CACHE.popitem(last=False)
+    return ent
+
+
+def _last_line_start(f, size: int) -> int:
+    """最後の改行の直後のオフセット（改行が無ければ 0）"""
+    for off, _ in _iter_lines_backward(f, size):
+        return off
+    return 0
+
+
+def _trim(ent: _TailEntry) -> None:
+    while len(ent.recs) > CACHE_MAX_RECORDS:
+        ent.recs.pop()
+        ent.offs.pop()
+        ent.lo = ent.offs[-1]
+
+
+def read_jsonl_tail(
+    path: PathLike,
+    limit: int,
+    *,
+    predicate: Optional[Predicate] = None,
+    use_cache: bool = True,
+) -> list[dict]:
+    """
+    JSONL の末尾から predicate を満たすレコードを最大 limit 件、新しい順に返す。
+
+    返す dict はキャッシュの浅いコピー（トップレベルのキー追加・上書きは安全。
+    入れ子の値は共有しているので書き換えないこと）。読めないファイルは [] を返す。
+    """
+    p = Path(path)
+    limit = int(limit)
+    if limit <= 0:
+        return []
+    if not use_cache:
+        out = []
+        for rec in iter_jsonl_reverse(p):
+            if predicate is None or predicate(rec):
+                out.append(rec)
+                if len(out) >= limit:
+                    break
+        return out
+
+    try:
+        key = str(p.resolve())
+    except Exception:
+        key = str(p)
+    out: list[dict] = []
+    try:
+        with p.open("rb") as f, _CACHE_LOCK:
+            st = os.fstat(f.fileno())
+            size = int(st.st_size)
+            mtime_ns = int(getattr(st, "st_mtime_ns", int(st.st_mtime * 1e9)))
+            ent = _refresh(key, p, f, size, mtime_ns)
+            for rec in ent.recs:
+                if predicate is None or predicate(rec):
+                    out.append(dict(rec))
+                    if len(out) >= limit:
+                        return out
+            # 足りなければキャッシュより古い側へ読み進める（上限まではキャッシュに積む）
+            for off, raw in _iter_lines_backward(f, ent.lo):
+                rec = _parse_line(raw, p)
+                if len(ent.recs) < CACHE_MAX_RECORDS:
+                    ent.lo = off
+                    if rec is not None:
+                        ent.recs.append(rec)
+                        ent.offs.append(off)
+                if rec is not None and (predicate is None or predicate(rec)):
+                    out.append(dict(rec))
+                    if len(out) >= limit:
+                        break
+    except FileNotFoundError:
+        return []
+    except Exception as e:
+        logger.warning(f"Failed to read {p}: {e}")
+    return out
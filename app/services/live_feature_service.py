@@ -0,0 +1,117 @@
+# app/services/live_feature_service.py
+"""
+Live 用インクリメンタル特徴量の窓口。
+
+- (symbol, timeframe) ごとに IncrementalFeatureEngine を1つ保持（プロセス内）
+- 初回は OHLCV CSV の末尾 seed_bars 本で seed
+- 以降は CSV の (size, mtime) が変わったときだけ末尾数十行を読み、新しい確定バーだけ update
+- 特徴量は学習・バックテストと同じレシピ（既定: ohlcv_tech_v1）
+"""
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from loguru import logger
+
+from app.services import data_guard
+from app.services.ohlcv_store import read_csv_tail
+from core.ai.incremental_features import DEFAULT_SEED_BARS, IncrementalFeatureEngine
+
+# 更新時に読む CSV 末尾の行数（この本数より多く取りこぼしたら seed し直す）
+SYNC_TAIL_ROWS = 64
+
+
+@dataclass
+class _LiveFeatureState:
+    engine: IncrementalFeatureEngine
+    path: Path
+    stat: Tuple[int, int] = (0, 0)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+# key = (symbol_tag, timeframe, recipe)
+_states: Dict[Tuple[str, str, str], _LiveFeatureState] = {}
+_states_lock = threading.Lock()
+
+
+def _symbol_tag(symbol: str) -> str:
+    return (symbol or "USDJPY").rstrip("-").upper().strip()
+
+
+def _file_stat(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return int(st.st_size), int(st.st_mtime_ns)
+
+
+def _seed(state: _LiveFeatureState, seed_bars: int) -> None:
+    df = read_csv_tail(state.path, seed_bars)
+    state.engine = IncrementalFeatureEngine(state.engine.recipe)
+    state.engine.seed(df, seed_bars=None)
+    logger.info(
+        "[live_features] seeded path={} bars={} last_time={} ready={}",
+        state.path,
+        len(df),
+        state.engine.last_time,
+        state.engine.is_ready,
+    )
+
+
+def _sync(state: _LiveFeatureState, seed_bars: int) -> None:
+    st = _file_stat(state.path)
+    if st == state.stat:
+        return
+    if state.engine.last_time is None:
+        _seed(state, seed_bars)
+    else:
+        tail = read_csv_tail(state.path, SYNC_TAIL_ROWS)
+        new = tail[tail["time"] > state.engine.last_time]
+        if len(new) == len(tail) and len(tail) > 0:
+            # 取りこぼし（末尾窓より多くのバーが追加された）→ seed し直す
+            _seed(state, seed_bars)
+        else:
+            for bar in new.to_dict("records"):
+                state.engine.update(bar)
+    state.stat = st
+
+
+def get_live_features(
+    symbol: str,
+    timeframe: str = "M5",
+    recipe: str = "ohlcv_tech_v1",
+    seed_bars: int = DEFAULT_SEED_BARS,
+) -> Optional[Dict[str, float]]:
+    """
+    最新確定バーの特徴量を返す。CSV が無い／まだ warm-up 中なら None。
+    CSV が更新されていなければ stat() 1回だけで返る。
+    """
+    tag = _symbol_tag(symbol)
+    key = (tag, str(timeframe), str(recipe))
+    with _states_lock:
+        state = _states.get(key)
+        if state is None:
+            path = data_guard.csv_path(symbol_tag=tag, timeframe=str(timeframe), layout="per-symbol")
+            state = _LiveFeatureState(engine=IncrementalFeatureEngine(recipe), path=path)
+            _states[key] = state
+
+    if not state.path.exists():
+        return None
+
+    with state.lock:
+        try:
+            _sync(state, seed_bars)
+        except Exception as e:
+            logger.warning("[live_features] sync failed path={} err={}", state.path, e)
+            return None
+        if not state.engine.is_ready:
+            return None
+        return state.engine.features()
+
+
+def reset_live_features() -> None:
+    """保持中のエンジンを全て破棄する（テスト・モデル切替用）。"""
+    with _states_lock:
+        _states.clear()
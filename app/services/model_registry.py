@@ -0,0 +1,481 @@
+# app/services/model_registry.py
+"""
+推論モデルのプロセス内レジストリ（モデルファイルの sha256 ごとに1回だけロード）
+
+- load(path, params): モデル本体・スケーラー・キャリブレータを1回だけ読み、
+  classes_ から BUY/SELL の index（class_index_map）と feature_order を確定した LoadedModel を返す
+  （同じ中身のファイルなら何度呼んでもロードしない。ハッシュは size / mtime が変わらない限り再計算しない）
+- active(): models/active_model.json が指すモデル。active_model.json / モデルファイルの
+  (size, mtime) が変わっていたら読み直して参照を差し替える（読み込み失敗時は前のモデルのまま）
+- start_watcher(): 設定スナップショット（app.core.config_snapshot）の active_model.json 変更通知を購読し、
+  昇格をスナップショットの監視スレッドでロードする（昇格後の最初のバーでロードしない。独自の監視スレッドは持たない）
+- 利用側: AISvc / BacktestEngine / ai_strategy.predict_signals / core.ai.service.AISvc
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.core.config_snapshot import (
+    CHANGED_ACTIVE_MODEL,
+    ConfigSnapshot,
+    ConfigSnapshotService,
+    get_config_snapshot_service,
+)
+from app.services.proba_cache import file_sha256
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+MODELS_DIR = PROJECT_ROOT / "models"
+
+# 保持するモデル数（昇格直後に前のモデルへ戻す場合も再ロードしない程度）
+MAX_ENTRIES = 4
+
+
+# =====================================================
+# classes_ → BUY/SELL index（AISvc / BacktestEngine と同じ規約）
+# =====================================================
+def extract_classes_any(model_obj: Any) -> Optional[Any]:
+    """Pipeline / CalibratedClassifierCV / ラッパー / tuple / dict から classes_ を回収する。"""
+    if model_obj is None:
+        return None
+    cls = getattr(model_obj, "classes_", None)
+    if cls is not None:
+        return cls
+    named_steps = getattr(model_obj, "named_steps", None)
+    if isinstance(named_steps, dict) and named_steps:
+        for step in reversed(list(named_steps.values())):
+            cls = getattr(step, "classes_", None)
+            if cls is not None:
+                return cls
+    for attr in ("estimator", "base_estimator", "classifier", "model"):
+        inner = getattr(model_obj, attr, None)
+        if inner is not None:
+            cls = getattr(inner, "classes_", None)
+            if cls is not None:
+                return cls
+    ccs = getattr(model_obj, "calibrated_classifiers_", None)
+    if isinstance(ccs, (list, tuple)) and ccs:
+        for cc in ccs:
+            est = getattr(cc, "estimator", None)
+            if est is not None:
+                cls = getattr(est, "classes_", None)
+                if cls is not None:
+                    return cls
+    if isinstance(model_obj, (list, tuple)) and model_obj:
+        for item in model_obj:
+            cls = extract_classes_any(item)
+            if cls is not None:
+                return cls
+    if isinstance(model_obj, dict) and model_obj:
+        for item in model_obj.values():
+            cls = extract_classes_any(item)
+            if cls is not None:
+                return cls
+    return None
+
+
+def determine_class_index_map(model: Any) -> Optional[Dict[str, Any]]:
+    """
+    classes_ から {"classes", "buy_index", "sell_index", "source"} を作る。
+    BUY/LONG・SELL/SHORT のラベル、または {0,1} / {-1,1}（1=BUY）のみ対応。確定できなければ None。
+    """
+    try:
+        classes = extract_classes_any(model)
+    except Exception:
+        return None
+    if classes is None:
+        return None
+    if hasattr(model, "classes_"):
+        source = "classes_"
+    elif hasattr(model, "named_steps"):
+        source = "pipeline.named_steps"
+    elif hasattr(model, "base_estimator"):
+        source = "base_estimator"
+    elif hasattr(model, "calibrated_classifiers_"):
+        source = "calibrated_classifiers_"
+    else:
+        source = "extracted"
+    try:
+        classes_list = list(classes)
+    except Exception:
+        return None
+    if len(classes_list) < 2:
+        return None
+
+    buy_index = sell_index = None
+    for idx, cls in enumerate(classes_list):
+        cls_str = str(cls).upper()
+        if cls_str in ("BUY", "LONG"):
+            buy_index = idx
+        elif cls_str in ("SELL", "SHORT"):
+            sell_index = idx
+
+    if buy_index is None or sell_index is None:
+        try:
+            classes_set = set(classes_list)
+            if classes_set == {0, 1}:
+                neg, source = 0, "numeric:{0,1}"
+            elif classes_set == {-1, 1}:
+                neg, source = -1, "numeric:{-1,1}"
+            else:
+                return None
+            for idx, cls in enumerate(classes_list):
+                if cls == neg:
+                    sell_index = idx
+                elif cls == 1:
+                    buy_index = idx
+        except Exception:
+            return None
+
+    if buy_index is None or sell_index is None:
+        return None
+    return {"classes": classes_list, "buy_index": buy_index, "sell_index": sell_index, "source": source}
+
+
+def _model_feature_names(model: Any) -> List[str]:
+    for attr in ("expected_features", "feature_name_", "feature_names_in_"):
+        names = getattr(model, attr, None)
+        if names is not None and len(names):
+            return [str(c) for c in names]
+    try:
+        names = model.feature_name()
+        if names:
+            return [str(c) for c in names]
+    except Exception:
+        pass
+    return []
+
+
+# =====================================================
+# ロード済みモデル
+# =====================================================
+@dataclass
+class LoadedModel:
+    """1モデル分のロード結果（共有オブジェクトなので書き換え禁止）。"""
+
+    model_hash: str
+    model_path: Path
+    model: Any
+    scaler: Any = None
+    calibrator: Any = None
+    class_index_map: Optional[Dict[str, Any]] = None
+    # モデルに渡す列順（active_model.json の expected_features → feature_order → features → モデル自身の列名）
+    feature_order: Tuple[str, ...] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    # active() で得た場合の active_model.json の中身
+    meta: Dict[str, Any] = field(default_factory=dict)
+    loaded_at: float = 0.0
+    _indexers: Dict[Tuple[str, ...], np.ndarray] = field(default_factory=dict, repr=False, compare=False)
+    # compiled() の結果（[推論器 or None]。未作成なら空）
+    _compiled: List[Any] = field(default_factory=list, repr=False, compare=False)
+
+    @property
+    def threshold(self) -> float:
+        try:
+            return float(self.meta.get("best_threshold", 0.52))
+        except Exception:
+            return 0.52
+
+    def compiled(self) -> Optional[Any]:
+        """
+        木をフラット配列化した推論器（core.ai.tree_inference.CompiledModel、キャリブレータ込み）。
+        LightGBM の二値分類以外・変換失敗は None。初回だけ作る。
+        """
+        if not self._compiled:
+            from core.ai.tree_inference import compile_model
+
+            try:
+                cm = compile_model(self.model, calibrator=self.calibrator)
+            except Exception as e:
+                logger.warning("[model_registry] compile failed ({}): {}", self.model_path.name, e)
+                cm = None
+            self._compiled[:] = [cm]
+        return self._compiled[0]
+
+    def feature_indexer(self, columns: Sequence[str]) -> np.ndarray:
+        """columns から feature_order の位置を引く index 配列（列構成ごとに1回だけ作る）。"""
+        key = tuple(columns)
+        idx = self._indexers.get(key)
+        if idx is None:
+            pos = {c: i for i, c in enumerate(key)}
+            missing = [c for c in self.feature_order if c not in pos]
+            if missing:
+                raise ValueError(f"[feature_check] Missing features for model: {missing}")
+            idx = np.array([pos[c] for c in self.feature_order], dtype=np.intp)
+            self._indexers[key] = idx
+        return idx
+
+    def project(self, X: pd.DataFrame) -> pd.DataFrame:
+        """X を feature_order の列・順序にそろえる（feature_order が空ならそのまま）。"""
+        if not self.feature_order:
+            return X
+        return X.iloc[:, self.feature_indexer(list(X.columns))]
+
+
+def _stat(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    if path is None:
+        return None
+    try:
+        st = os.stat(path)
+        return int(st.st_size), int(st.st_mtime_ns)
+    except OSError:
+        return None
+
+
+def _read_active_meta(path: Path) -> Dict[str, Any]:
+    meta = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(meta, dict):
+        raise ValueError(f"{path} is not a JSON object")
+    return meta
+
+
+def resolve_model_path(meta: Dict[str, Any], models_dir: Path = MODELS_DIR) -> Optional[Path]:
+    """active_model.json の file（無ければ model_path / model_name.pkl）から実ファイルを引く。builtin は None。"""
+    model_name = str(meta.get("model_name", "")).strip()
+    if model_name.startswith("builtin_"):
+        return None
+    file_name = str(meta.get("file", "")).strip()
+    if file_name:
+        return models_dir / file_name
+    model_path = str(meta.get("model_path", "") or "").strip()
+    if model_path:
+        p = Path(model_path)
+        return p if p.is_absolute() else PROJECT_ROOT / p
+    if model_name:
+        return models_dir / f"{model_name}.pkl"
+    raise FileNotFoundError("active_model.json has neither 'file' nor 'model_name'")
+
+
+class ModelRegistry:
+    """モデルファイルの sha256 をキーにしたロード済みモデルの置き場と active_model.json の監視。"""
+
+    def __init__(self, models_dir: Path = MODELS_DIR):
+        self.models_dir = Path(models_dir)
+        self.active_path = self.models_dir / "active_model.json"
+        self._entries: "OrderedDict[Tuple[str, str, str], LoadedModel]" = OrderedDict()
+        self._load_lock = threading.RLock()
+        self._current: Optional[LoadedModel] = None
+        # (active_model.json の stat, モデルファイルの stat)
+        self._current_stat: Optional[Tuple[Any, Any]] = None
+        self._current_model_path: Optional[Path] = None
+        # 設定スナップショットの購読解除（start_watcher 中のみ）
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    # ------------------------------------------------------------------
+    # ロード
+    # ------------------------------------------------------------------
+    def _load_scaler(self, params: Dict[str, Any]) -> Any:
+        if not params.get("scaler_name"):
+            return None
+        from app.strategies.ai_strategy import _load_scaler_if_any
+
+        return _load_scaler_if_any(params)
+
+    def _load_calibrator(self, name: str) -> Any:
+        if not name:
+            return None
+        import joblib
+
+        p = Path(name)
+        return joblib.load(p if p.is_absolute() else self.models_dir / p)
+
+    def load(
+        self,
+        model_path: Path | str,
+        params: Optional[Dict[str, Any]] = None,
+        *,
+        calibrator: str = "",
+        feature_order: Optional[Sequence[str]] = None,
+        meta: Optional[Dict[str, Any]] = None,
+        loader: Optional[Callable[[str], Any]] = None,
+    ) -> LoadedModel:
+        """
+        model_path のモデル（+ params["scaler_name"] のスケーラー + calibrator）を返す。
+        同じ中身・同じスケーラー / キャリブレータならロード済みのものを返す。
+        """
+        from app.strategies.ai_strategy import _load_model_generic
+
+        path = Path(model_path)
+        params = dict(params or {})
+        digest = file_sha256(path)
+        key = (digest, str(params.get("scaler_name") or ""), str(calibrator or ""))
+        with self._load_lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if meta is None and feature_order is None:
+                    return entry
+                # 同じモデルでもメタ（閾値・列順）は呼び出し側のものを使う
+                return self._with_meta(entry, path, feature_order, meta)
+
+            t0 = time.perf_counter()
+            model = (loader or _load_model_generic)(str(path))
+            scaler = self._load_scaler(params)
+            calib = self._load_calibrator(calibrator)
+            entry = LoadedModel(
+                model_hash=digest,
+                model_path=path,
+                model=model,
+                scaler=scaler,
+                calibrator=calib,
+                class_index_map=determine_class_index_map(model),
+                feature_order=tuple(feature_order or _model_feature_names(model)),
+                params=params,
+                meta=dict(meta or {}),
+                loaded_at=time.time(),
+            )
+            self._entries[key] = entry
+            while len(self._entries) > MAX_ENTRIES:
+                self._entries.popitem(last=False)
+            logger.info(
+                "[model_registry] loaded {} sha256={} type={} elapsed={:.2f}s",
+                path.name,
+                digest[:12],
+                type(model).__name__,
+                time.perf_counter() - t0,
+            )
+            return entry
+
+    @staticmethod
+    def _with_meta(
+        entry: LoadedModel,
+        path: Path,
+        feature_order: Optional[Sequence[str]],
+        meta: Optional[Dict[str, Any]],
+    ) -> LoadedModel:
+        order = tuple(feature_order) if feature_order is not None else entry.feature_order
+        new_meta = dict(meta) if meta is not None else entry.meta
+        if order == entry.feature_order and new_meta == entry.meta and path == entry.model_path:
+            return entry
+        return LoadedModel(
+            model_hash=entry.model_hash,
+            model_path=path,
+            model=entry.model,
+            scaler=entry.scaler,
+            calibrator=entry.calibrator,
+            class_index_map=entry.class_index_map,
+            feature_order=order,
+            params=entry.params,
+            meta=new_meta,
+            loaded_at=entry.loaded_at,
+            _compiled=entry._compiled,
+        )
+
+    # ------------------------------------------------------------------
+    # active_model.json
+    # ------------------------------------------------------------------
+    def _stat_key(self) -> Tuple[Any, Any]:
+        return _stat(self.active_path), _stat(self._current_model_path)
+
+    def active(self, *, refresh: bool = True) -> Optional[LoadedModel]:
+        """
+        active_model.json が指すモデル。refresh=True なら変更を確認してから返す
+        （変わっていなければ stat 2回）。builtin / 未配置 / 読み込み失敗（初回）なら None。
+        """
+        if refresh and self._stat_key() != self._current_stat:
+            self.reload()
+        return self._current
+
+    def reload(self) -> Optional[LoadedModel]:
+        """active_model.json を読み直してモデルを差し替える。失敗時は前のモデルのまま。"""
+        with self._load_lock:
+            if self._current_stat is not None and self._stat_key() == self._current_stat:
+                # 待っている間に別スレッド（変更通知）が読み直し済み
+                return self._current
+            before = _stat(self.active_path)
+            try:
+                meta = _read_active_meta(self.active_path)
+                model_path = resolve_model_path(meta, self.models_dir)
+                if model_path is None:
+                    entry = None
+                else:
+                    params = meta.get("params", {}) or {}
+                    order = meta.get("expected_features") or meta.get("feature_order") or meta.get("features")
+                    entry = self.load(
+                        model_path,
+                        params,
+                        calibrator=str(meta.get("calibrator_file", "") or ""),
+                        feature_order=order if isinstance(order, (list, tuple)) and order else None,
+                        meta=meta,
+                    )
+            except Exception as e:
+                # 昇格中（active_model.json だけ先に置き換わった等）は次の確認で読み直す
+                logger.warning("[model_registry] reload failed (keep current model): {}", e)
+                return self._current
+
+            prev = self._current
+            self._current_model_path = model_path
+            self._current_stat = (before, _stat(model_path))
+            # 参照の差し替えだけ（読み手は古い LoadedModel をそのまま使い切れる）
+            self._current = entry
+            if prev is None or entry is None or prev.model_hash != entry.model_hash:
+                logger.info(
+                    "[model_registry] active model -> {} sha256={}",
+                    model_path.name if model_path is not None else meta.get("model_name"),
+                    entry.model_hash[:12] if entry is not None else None,
+                )
+            return entry
+
+    # ------------------------------------------------------------------
+    # 変更通知（設定スナップショットの監視スレッド）
+    # ------------------------------------------------------------------
+    def start_watcher(self, snapshot_service: Optional[ConfigSnapshotService] = None) -> None:
+        """
+        設定スナップショットの active_model.json 変更通知を購読してロードする（多重購読しない）。
+        監視スレッドはスナップショット側のもの（config と active_model.json を1本で確認する）。
+        """
+        svc = snapshot_service or get_config_snapshot_service()
+        with self._load_lock:
+            if self._unsubscribe is not None:
+                return
+            if svc.active_model_path.resolve() != self.active_path.resolve():
+                logger.warning(
+                    "[model_registry] snapshot watches {} (not {}); change notification disabled",
+                    svc.active_model_path,
+                    self.active_path,
+                )
+                return
+            self._unsubscribe = svc.subscribe(self._on_snapshot_change)
+        svc.start_watcher()
+
+    def stop_watcher(self) -> None:
+        with self._load_lock:
+            unsubscribe, self._unsubscribe = self._unsubscribe, None
+        if unsubscribe is not None:
+            unsubscribe()
+
+    def _on_snapshot_change(self, snap: ConfigSnapshot, changed: FrozenSet[str]) -> None:
+        if CHANGED_ACTIVE_MODEL in changed:
+            self.reload()
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """プロセス共通の ModelRegistry。"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+
+def reset_model_registry() -> None:
+    """ロード済みモデルを全て破棄する（テスト用）。"""
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.stop_watcher()
+        _registry = None
@@ -0,0 +1,346 @@
+# app/services/mt5_bar_appender.py
+"""
+MT5 → OHLCV CSV のプロセス内追記（scripts/make_csv_from_mt5.py のサブプロセスを置き換える定期更新用）
+
+- MT5 のセッションはプロセス内で1回だけ initialize して使い回す（切れていたら1回だけ繋ぎ直す）
+- CSV の末尾バーから先だけを copy_rates_from_pos で取得する（末尾バー自身も重ねて取り、続きであることを確認）
+- 確定済みのバー（open + 足の長さ <= サーバ時刻）だけを、CSV の末尾に1回の write で追記する
+  （過去の行は書き換えない。重ねて取った末尾バーの値がブローカー側と違う場合だけ最終行を差し替える）
+- time は make_csv_from_mt5 と同じく JST naive（サーバ時刻オフセットを補正）、列の並び・型・改行も既存 CSV に合わせる
+- CSV が無い／取得範囲が末尾まで届かない／時刻が足の刻みに揃っていない場合は ok=False を返し、
+  呼び出し側（data_guard.ensure_data）が従来のサブプロセスでの作成・更新にフォールバックする
+
+mt5_module に MetaTrader5 互換のモジュール（テスト用の偽モジュール等）を渡せる。
+"""
+from __future__ import annotations
+
+import io
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.core.symbol_map import resolve_symbol
+from app.services import data_guard
+from app.services.ohlcv_store import _FileLock
+
+# CSV の列（make_csv_from_mt5.CSV_COLS と同じ）
+CSV_COLS = ["time", "open", "high", "low", "close", "tick_volume", "spread", "real_volume"]
+FLOAT_COLS = ["open", "high", "low", "close"]
+INT_COLS = ["tick_volume", "spread", "real_volume"]
+
+TF_MINUTES = {"M1": 1, "M5": 5, "M15": 15, "M30": 30, "H1": 60, "H4": 240, "D1": 1440}
+
+# 1回目に取得する本数（5分ごとの更新なら数本で足りる）。末尾まで届かなければ倍々で広げる
+FETCH_BARS = 64
+MAX_FETCH_BARS = 100_000
+
+# サーバ時刻オフセットの見直し間隔（秒）と採否の閾値（make_csv_from_mt5.update_server_offset と同じ）
+OFFSET_REFRESH_SEC = 3600.0
+_MIN_ADOPT_SEC = 15 * 60
+_MAX_JUMP_SEC = 3600
+
+
+@dataclass
+class AppendResult:
+    """
+    append_new_bars の結果
+
+    status: "appended" / "up_to_date"（ok=True）、
+            "no_csv" / "gap"（末尾まで遡れない）/ "invalid"（CSV やレートが想定外）（ok=False → フォールバック）
+    """
+
+    status: str
+    rows: int = 0
+    tail_before: Optional[pd.Timestamp] = None
+    tail_after: Optional[pd.Timestamp] = None
+    # ブローカー側と値が違った末尾バーを差し替えたか
+    replaced_tail: bool = False
+    message: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("appended", "up_to_date")
+
+
+def _read_last_line(f, size: int) -> tuple[int, bytes]:
+    """(最終行の開始オフセット, 最終行（改行を含む）)"""
+    pos = size
+    buf = b""
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+        i = buf.rfind(b"\n", 0, len(buf) - 1)
+        if i >= 0:
+            return pos + i + 1, buf[i + 1:]
+    return 0, buf
+
+
+class Mt5BarAppender:
+    """MT5 の常駐セッションと、CSV 末尾への確定バー追記"""
+
+    def __init__(self, mt5_module: Any = None, *, terminal_path: Optional[str] = None) -> None:
+        self._mt5 = mt5_module
+        self.terminal_path = terminal_path
+        self._lock = threading.RLock()
+        self._connected = False
+        self._selected: set[str] = set()
+        self.server_offset_sec = 0
+        self._offset_checked_at = 0.0
+
+    # ------------------------------------------------------------------
+    # セッション
+    # ------------------------------------------------------------------
+    @property
+    def mt5(self) -> Any:
+        if self._mt5 is None:
+            import MetaTrader5 as mt5  # 遅延 import（テストでは偽モジュールを渡す）
+
+            self._mt5 = mt5
+        return self._mt5
+
+    def _connect(self, *, force: bool = False) -> Any:
+        mt5 = self.mt5
+        if self._connected and not force:
+            return mt5
+        ok = mt5.initialize(path=self.terminal_path) if self.terminal_path else mt5.initialize()
+        if not ok:
+            self._connected = False
+            raise RuntimeError(f"MT5 initialize failed: {mt5.last_error()}")
+        self._connected = True
+        self._selected.clear()
+        self._offset_checked_at = 0.0
+        logger.info("[mt5_appender] MT5 session initialized")
+        return mt5
+
+    def shutdown(self) -> None:
+        """セッションを閉じる（次の呼び出しで繋ぎ直す）"""
+        with self._lock:
+            if self._connected and self._mt5 is not None:
+                try:
+                    self._mt5.shutdown()
+                except Exception:
+                    pass
+            self._connected = False
+            self._selected.clear()
+
+    def _prepare_symbol(self, mt5: Any, symbol: str) -> str:
+        sym = resolve_symbol(symbol)
+        if sym not in self._selected:
+            mt5.symbol_select(sym, True)
+            self._selected.add(sym)
+        if time.monotonic() - self._offset_checked_at >= OFFSET_REFRESH_SEC:
+            self._update_server_offset(mt5, sym)
+        return sym
+
+    def _update_server_offset(self, mt5: Any, sym: str) -> None:
+        """tick.time と PC の epoch の差からサーバ時刻オフセットを推定（時間単位。小さい差・大きな跳びは採用しない）"""
+        self._offset_checked_at = time.monotonic()
+        try:
+            tick = mt5.symbol_info_tick(sym)
+            if not tick or not getattr(tick, "time", None):
+                return
+            delta = int(tick.time) - int(time.time())
+            if abs(delta) < _MIN_ADOPT_SEC:
+                return
+            candidate = int(round(delta / 3600)) * 3600
+            if self.server_offset_sec != 0 and abs(candidate - self.server_offset_sec) >= _MAX_JUMP_SEC:
+                logger.warning(
+                    "[mt5_appender] server offset jump ignored: candidate={} current={}", candidate, self.server_offset_sec
+                )
+                return
+            if candidate != self.server_offset_sec:
+                logger.info("[mt5_appender] server offset {} -> {}", self.server_offset_sec, candidate)
+            self.server_offset_sec = candidate
+        except Exception as e:
+            logger.warning("[mt5_appender] failed to update server offset: {}", e)
+
+    def _server_now(self, mt5: Any, sym: str) -> int:
+        """サーバ時刻の epoch 秒（tick が取れなければ PC 時刻 + オフセット）"""
+        try:
+            tick = mt5.symbol_info_tick(sym)
+            if tick and getattr(tick, "time", None):
+                return int(tick.time)
+        except Exception:
+            pass
+        return int(time.time()) + int(self.server_offset_sec)
+
+    def _rates(self, mt5: Any, sym: str, tf_const: int, count: int) -> Optional[np.ndarray]:
+        rates = mt5.copy_rates_from_pos(sym, tf_const, 0, int(count))
+        if rates is None:
+            # セッション切れの可能性 → 1回だけ繋ぎ直す
+            logger.warning("[mt5_appender] copy_rates_from_pos returned None: {} -> reconnect", mt5.last_error())
+            mt5 = self._connect(force=True)
+            sym = self._prepare_symbol(mt5, sym)
+            rates = mt5.copy_rates_from_pos(sym, tf_const, 0, int(count))
+        return rates
+
+    def _to_jst(self, epoch: np.ndarray) -> pd.Series:
+        s = pd.to_datetime(pd.Series(np.asarray(epoch, dtype=np.int64)), unit="s", utc=True)
+        if self.server_offset_sec:
+            s = s - pd.Timedelta(seconds=self.server_offset_sec)
+        return s.dt.tz_convert("Asia/Tokyo").dt.tz_localize(None).astype("datetime64[ns]")
+
+    # ------------------------------------------------------------------
+    # 取得
+    # ------------------------------------------------------------------
+    def fetch_closed_bars(self, symbol: str, timeframe: str, since: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        確定済みのバーを CSV と同じ列・型（time は JST naive）で返す。
+        since を渡すと since 以降（since のバーを含む）が揃うまで遡って取得する（届かなければ先頭が since より後）。
+        """
+        tf = str(timeframe).upper()
+        tf_const = getattr(self.mt5, f"TIMEFRAME_{tf}", None)
+        if tf not in TF_MINUTES or tf_const is None:
+            raise ValueError(f"unknown timeframe: {timeframe}")
+        interval = TF_MINUTES[tf] * 60
+        with self._lock:
+            mt5 = self._connect()
+            sym = self._prepare_symbol(mt5, symbol)
+            count = FETCH_BARS
+            while True:
+                rates = self._rates(mt5, sym, tf_const, count)
+                if rates is None:
+                    raise RuntimeError(f"copy_rates_from_pos failed: {self.mt5.last_error()}")
+                df = pd.DataFrame(rates)
+                if df.empty or since is None or count >= MAX_FETCH_BARS or len(df) < count:
+                    break
+                if self._to_jst(df["time"].iloc[:1].to_numpy())[0] <= since:
+                    break
+                count = min(count * 4, MAX_FETCH_BARS)
+            now = self._server_now(mt5, sym)
+        if df.empty:
+            return pd.DataFrame({c: pd.Series(dtype="float64") for c in CSV_COLS})
+        df = df.sort_values("time").drop_duplicates(subset=["time"], keep="last").reset_index(drop=True)
+        df = df[df["time"].astype(np.int64) + interval <= now]
+        epoch = df["time"].to_numpy(dtype=np.int64)
+        out = pd.DataFrame({"time": self._to_jst(epoch).to_numpy()})
+        out["_epoch"] = epoch
+        for c in FLOAT_COLS:
+            out[c] = df[c].to_numpy(dtype=np.float32)
+        for c in INT_COLS:
+            vals = df[c].to_numpy() if c in df.columns else np.zeros(len(df))
+            out[c] = np.nan_to_num(np.asarray(vals, dtype=np.float64)).astype(np.int32)
+        return out
+
+    def latest_bar_time(self, symbol: str, timeframe: str) -> Optional[pd.Timestamp]:
+        """最新の確定バーの time（JST naive）"""
+        df = self.fetch_closed_bars(symbol, timeframe)
+        return pd.Timestamp(df["time"].iloc[-1]) if len(df) else None
+
+    # ------------------------------------------------------------------
+    # 追記
+    # ------------------------------------------------------------------
+    def append_new_bars(self, symbol: str, timeframe: str, *, layout: str = "per-symbol") -> AppendResult:
+        """data_guard.csv_path の CSV に、末尾バーより新しい確定バーを追記する"""
+        tf = str(timeframe).upper()
+        path = data_guard.csv_path(str(symbol).rstrip("-").upper(), tf, layout)
+        if not path.exists():
+            return AppendResult("no_csv", message=str(path))
+        t0 = time.perf_counter()
+        with _FileLock(path.with_name(path.name + ".lock")):
+            res = self._append_locked(symbol, tf, path)
+        if res.rows or res.replaced_tail:
+            logger.info(
+                "[mt5_appender] {} rows={} replaced_tail={} tail={} elapsed={:.1f}ms",
+                path.name,
+                res.rows,
+                res.replaced_tail,
+                res.tail_after,
+                (time.perf_counter() - t0) * 1000.0,
+            )
+        return res
+
+    def _append_locked(self, symbol: str, tf: str, path: Path) -> AppendResult:
+        with open(path, "rb") as f:
+            header = f.readline()
+            size = os.fstat(f.fileno()).st_size
+            last_off, last_line = _read_last_line(f, size)
+        if not header.strip() or not last_line.endswith(b"\n") or last_off < len(header):
+            return AppendResult("invalid", message="CSV is empty or does not end with a newline")
+        newline = b"\r\n" if header.endswith(b"\r\n") else b"\n"
+        cols = header.decode("utf-8").strip().split(",")
+        if cols[0] != "time" or not set(FLOAT_COLS) <= set(cols):
+            return AppendResult("invalid", message=f"unexpected CSV columns: {cols}")
+        tail_row = pd.read_csv(io.BytesIO(header + last_line), parse_dates=["time"])
+        tail = pd.Timestamp(tail_row["time"].iloc[0])
+
+        new = self.fetch_closed_bars(symbol, tf, since=tail)
+        res = AppendResult("up_to_date", tail_before=tail, tail_after=tail)
+        if new.empty:
+            return res
+        if new["time"].iloc[0] > tail:
+            # 末尾バーまで遡れない（長時間の停止など）→ 従来の取り直しに任せる
+            res.status, res.message = "gap", f"oldest fetched {new['time'].iloc[0]} > csv tail {tail}"
+            return res
+        interval = TF_MINUTES[tf] * 60
+        if np.any(new["_epoch"].to_numpy() % interval) and interval <= 3600:
+            res.status, res.message = "invalid", "bar times are not aligned to the timeframe"
+            return res
+
+        overlap = new[new["time"] == tail]
+        if overlap.empty:
+            res.status, res.message = "invalid", f"csv tail {tail} not found at the broker"
+            return res
+        rows = new[new["time"] > tail]
+        replace_tail = not self._same_bar(overlap.iloc[0], tail_row.iloc[0])
+        if rows.empty and not replace_tail:
+            return res
+
+        out = pd.concat([overlap, rows], ignore_index=True) if replace_tail else rows
+        out = out[[c for c in cols if c in out.columns]].reindex(columns=cols)
+        payload = out.to_csv(header=False, index=False, lineterminator=newline.decode("ascii")).encode("utf-8")
+        # 1回の write で追記（差し替えは最終行だけ切り詰めてから）
+        with open(path, "r+b") as f:
+            if replace_tail:
+                f.truncate(last_off)
+            f.seek(0, os.SEEK_END)
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        res.status = "appended"
+        res.rows = len(rows)
+        res.replaced_tail = replace_tail
+        res.tail_after = pd.Timestamp(out["time"].iloc[-1])
+        return res
+
+    @staticmethod
+    def _same_bar(broker: pd.Series, csv_row: pd.Series) -> bool:
+        for c in FLOAT_COLS:
+            if np.float32(broker[c]) != np.float32(csv_row[c]):
+                return False
+        for c in INT_COLS:
+            if c in csv_row.index and int(broker[c]) != int(csv_row[c]):
+                return False
+        return True
+
+
+_appender: Optional[Mt5BarAppender] = None
+_appender_lock = threading.Lock()
+
+
+def get_bar_appender() -> Mt5BarAppender:
+    """プロセス共通の Mt5BarAppender（MT5 セッションを使い回す）"""
+    global _appender
+    with _appender_lock:
+        if _appender is None:
+            _appender = Mt5BarAppender()
+        return _appender
+
+
+def reset_bar_appender(mt5_module: Any = None) -> Mt5BarAppender:
+    """セッションを閉じて作り直す（テストでは偽の MetaTrader5 モジュールを渡す）"""
+    global _appender
+    with _appender_lock:
+        if _appender is not None:
+            _appender.shutdown()
+        _appender = Mt5BarAppender(mt5_module)
+        return _appender
@@ -0,0 +1,323 @@
+# app/services/ohlcv_resample.py
+"""
+M5（正本）からの上位足（M15 / H1 / H4 / D1）の導出
+
+- ブローカーから足ごとに取得する代わりに、M5 の CSV を集計して各足の CSV を作る
+  （open=最初 / high=最大 / low=最小 / close=最後 / tick_volume・real_volume=合計 / spread=最小）
+- 増分更新: 上位足 CSV の最終行（まだ閉じていない可能性のある足）の開始時刻以降の M5 だけを読み、
+  その足を集計し直して最終行を差し替え、以降の足を追記する（それより前の行は書き換えない）
+- 足の区切りはブローカーのサーバ時刻基準（CSV の time は JST naive）
+    server_tz="ny_close": NY 時間 + 7h（夏時間で UTC+2/+3 が切り替わる、FX ブローカーで一般的な設定）
+    それ以外: IANA のタイムゾーン名（例 "Etc/GMT-2"）
+  H4 / D1 はサーバ時刻の 0 時起点、M15 / H1 はサーバ時刻の正時起点。
+  土日など M5 が無い時間帯には足を作らない（ブローカーと同じく欠損のまま）
+- 既存の上位足 CSV と足の区切りが合わない（サーバ時刻の設定違い等）場合は書き換えずに misaligned を返す
+- verify_against_broker(): ブローカーの確定足と導出足を突き合わせる整合チェック
+
+サーバ時刻は config の runtime.mt5_server_tz（未設定なら "ny_close"）。
+"""
+from __future__ import annotations
+
+import io
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.services import data_guard
+from app.services.mt5_bar_appender import CSV_COLS, FLOAT_COLS, INT_COLS, TF_MINUTES, _read_last_line
+from app.services.ohlcv_store import _FileLock, read_csv_tail
+
+BASE_TF = "M5"
+DERIVED_TFS = ("M15", "H1", "H4", "D1")
+DEFAULT_SERVER_TZ = "ny_close"
+
+# 差し替え対象の足の開始時刻まで M5 を遡る際、最初に読む本数（足りなければ倍々）
+TAIL_ROWS = 512
+
+# 整合チェックで価格を同一とみなす差（float32 の丸め分）
+PRICE_TOL = 1e-4
+
+
+@dataclass
+class ResampleResult:
+    """
+    derive_timeframe の結果
+
+    status: "created"（新規作成）/ "appended" / "up_to_date"（ok=True）、
+            "no_base"（M5 が無い・空）/ "gap"（差し替える足の開始まで M5 が遡れない）/
+            "misaligned"（既存 CSV と足の区切りが合わない）（ok=False）
+    """
+
+    status: str
+    rows: int = 0
+    replaced_tail: bool = False
+    tail_after: Optional[pd.Timestamp] = None
+    message: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status in ("created", "appended", "up_to_date")
+
+
+def server_tz_from_config() -> str:
+    """runtime.mt5_server_tz（読めなければ既定）"""
+    try:
+        from app.core.config_snapshot import get_config_snapshot
+
+        return str(get_config_snapshot().runtime.get("mt5_server_tz") or DEFAULT_SERVER_TZ)
+    except Exception:
+        return DEFAULT_SERVER_TZ
+
+
+def _to_server(jst: pd.Series, server_tz: str) -> pd.Series:
+    """JST naive → サーバ時刻 naive"""
+    aware = jst.dt.tz_localize("Asia/Tokyo", ambiguous="NaT", nonexistent="NaT")
+    if server_tz == "ny_close":
+        return aware.dt.tz_convert("America/New_York").dt.tz_localize(None) + pd.Timedelta(hours=7)
+    return aware.dt.tz_convert(server_tz).dt.tz_localize(None)
+
+
+def bucket_start(jst: pd.Series, timeframe: str, server_tz: str = DEFAULT_SERVER_TZ) -> pd.Series:
+    """各時刻が属する足の開始時刻（JST naive）。区切りはサーバ時刻基準"""
+    tf = str(timeframe).upper()
+    jst = pd.to_datetime(pd.Series(jst)).astype("datetime64[ns]")
+    server = _to_server(jst, server_tz)
+    floored = server.dt.floor("1D") if tf == "D1" else server.dt.floor(f"{TF_MINUTES[tf]}min")
+    # サーバ時刻とのずれは足の中で一定（夏時間の切り替えは週末で M5 が無い）
+    return jst - (server - floored)
+
+
+def resample_bars(m5: pd.DataFrame, timeframe: str, server_tz: str = DEFAULT_SERVER_TZ) -> pd.DataFrame:
+    """M5 の DataFrame（CSV と同じ列）を上位足に集計する（CSV と同じ列・型）"""
+    if m5.empty:
+        return pd.DataFrame({c: pd.Series(dtype="float64") for c in CSV_COLS})
+    m5 = m5.sort_values("time", kind="mergesort")
+    key = bucket_start(m5["time"], timeframe, server_tz)
+    g = m5.assign(time=key.to_numpy()).groupby("time", sort=True)
+    out = pd.DataFrame(
+        {
+            "open": g["open"].first(),
+            "high": g["high"].max(),
+            "low": g["low"].min(),
+            "close": g["close"].last(),
+        }
+    )
+    for c, how in (("tick_volume", "sum"), ("spread", "min"), ("real_volume", "sum")):
+        out[c] = g[c].agg(how) if c in m5.columns else 0
+    out = out.reset_index()
+    for c in FLOAT_COLS:
+        out[c] = out[c].astype("float32")
+    for c in INT_COLS:
+        out[c] = pd.to_numeric(out[c], errors="coerce").fillna(0).astype("int32")
+    return out[CSV_COLS]
+
+
+def _read_base_since(base_csv: Path, since: pd.Timestamp) -> pd.DataFrame:
+    """M5 CSV の since 以降（since より前の行を1行以上含むか、ファイル全体になるまで末尾から広げる）"""
+    n = TAIL_ROWS
+    while True:
+        df = read_csv_tail(base_csv, n)
+        if df.empty or len(df) < n or df["time"].iloc[0] < since:
+            return df
+        n *= 2
+
+
+def derive_timeframe(
+    base_csv: Path,
+    out_csv: Path,
+    timeframe: str,
+    *,
+    server_tz: Optional[str] = None,
+) -> ResampleResult:
+    """
+    base_csv（M5）から out_csv（timeframe）を作成・増分更新する。
+    out_csv が無ければ M5 全体から作る。あれば最終行の足を集計し直して差し替え、以降を追記する。
+    """
+    tf = str(timeframe).upper()
+    if tf not in TF_MINUTES or TF_MINUTES[tf] <= TF_MINUTES[BASE_TF]:
+        raise ValueError(f"cannot derive {tf} from {BASE_TF}")
+    server_tz = server_tz or server_tz_from_config()
+    base_csv, out_csv = Path(base_csv), Path(out_csv)
+    if not base_csv.exists():
+        return ResampleResult("no_base", message=str(base_csv))
+
+    t0 = time.perf_counter()
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    with _FileLock(out_csv.with_name(out_csv.name + ".lock")):
+        if out_csv.exists() and out_csv.stat().st_size > 0:
+            res = _update_locked(base_csv, out_csv, tf, server_tz)
+        else:
+            res = _create_locked(base_csv, out_csv, tf, server_tz)
+    if res.rows or res.replaced_tail or not res.ok:
+        logger.info(
+            "[ohlcv_resample] {} {} status={} rows={} replaced_tail={} tail={} elapsed={:.1f}ms {}",
+            out_csv.name,
+            tf,
+            res.status,
+            res.rows,
+            res.replaced_tail,
+            res.tail_after,
+            (time.perf_counter() - t0) * 1000.0,
+            res.message,
+        )
+    return res
+
+
+def _create_locked(base_csv: Path, out_csv: Path, tf: str, server_tz: str) -> ResampleResult:
+    m5 = pd.read_csv(base_csv, parse_dates=["time"])
+    if m5.empty:
+        return ResampleResult("no_base", message=f"{base_csv} is empty")
+    bars = resample_bars(m5, tf, server_tz)
+    tmp = out_csv.with_name(out_csv.name + ".tmp")
+    bars.to_csv(tmp, index=False)
+    os.replace(tmp, out_csv)
+    return ResampleResult("created", rows=len(bars), tail_after=pd.Timestamp(bars["time"].iloc[-1]))
+
+
+def _update_locked(base_csv: Path, out_csv: Path, tf: str, server_tz: str) -> ResampleResult:
+    with open(out_csv, "rb") as f:
+        header = f.readline()
+        size = os.fstat(f.fileno()).st_size
+        last_off, last_line = _read_last_line(f, size)
+    if not last_line.endswith(b"\n") or last_off < len(header):
+        # 行の途中で終わっている／データ行が無い → 作り直す
+        return _create_locked(base_csv, out_csv, tf, server_tz)
+    newline = b"\r\n" if header.endswith(b"\r\n") else b"\n"
+    cols = header.decode("utf-8").strip().split(",")
+    tail_row = pd.read_csv(io.BytesIO(header + last_line), parse_dates=["time"])
+    tail = pd.Timestamp(tail_row["time"].iloc[0])
+
+    m5 = _read_base_since(base_csv, tail)
+    if m5.empty:
+        return ResampleResult("no_base", message=f"{base_csv} is empty")
+    m5 = m5[m5["time"] >= tail]
+    res = ResampleResult("up_to_date", tail_after=tail)
+    if m5.empty:
+        return res
+    bars = resample_bars(m5, tf, server_tz)
+    first = pd.Timestamp(bars["time"].iloc[0])
+    if first != tail:
+        # 最終行の足が M5 の区切りと一致しない（サーバ時刻の設定違い・M5 側の欠落）
+        status = "gap" if first > tail else "misaligned"
+        res.status, res.message = status, f"first derived bar {first} != csv tail {tail}"
+        return res
+
+    replace_tail = not _same_bar(bars.iloc[0], tail_row.iloc[0])
+    rows = bars.iloc[1:]
+    if rows.empty and not replace_tail:
+        return res
+    out = bars if replace_tail else rows
+    out = out[[c for c in cols if c in out.columns]].reindex(columns=cols)
+    payload = out.to_csv(header=False, index=False, lineterminator=newline.decode("ascii")).encode("utf-8")
+    with open(out_csv, "r+b") as f:
+        if replace_tail:
+            f.truncate(last_off)
+        f.seek(0, os.SEEK_END)
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    res.status = "appended"
+    res.rows = len(rows)
+    res.replaced_tail = replace_tail
+    res.tail_after = pd.Timestamp(out["time"].iloc[-1])
+    return res
+
+
+def _same_bar(a: pd.Series, b: pd.Series) -> bool:
+    for c in FLOAT_COLS:
+        if np.float32(a[c]) != np.float32(b[c]):
+            return False
+    for c in INT_COLS:
+        if c in b.index and int(a[c]) != int(b[c]):
+            return False
+    return True
+
+
+def derive_from_m5(
+    symbol_tag: str,
+    timeframes: Sequence[str] = DERIVED_TFS,
+    *,
+    layout: str = "per-symbol",
+    server_tz: Optional[str] = None,
+) -> Dict[str, ResampleResult]:
+    """data_guard.csv_path の M5 CSV から各上位足の CSV を作成・増分更新する（足ごとの失敗は他に波及させない）"""
+    tag = str(symbol_tag).rstrip("-").upper()
+    base = data_guard.csv_path(tag, BASE_TF, layout)
+    server_tz = server_tz or server_tz_from_config()
+    out: Dict[str, ResampleResult] = {}
+    for tf in timeframes:
+        try:
+            out[tf] = derive_timeframe(base, data_guard.csv_path(tag, tf, layout), tf, server_tz=server_tz)
+        except Exception as e:
+            logger.warning("[ohlcv_resample] derive {} {} failed: {}", tag, tf, e)
+            out[tf] = ResampleResult("error", message=str(e))
+    return out
+
+
+def verify_against_broker(
+    symbol: str,
+    timeframe: str,
+    *,
+    layout: str = "per-symbol",
+    appender: Any = None,
+) -> Dict[str, Any]:
+    """
+    ブローカーの確定足（copy_rates_from_pos の直近分）と導出済み CSV を time で突き合わせる。
+    導出側の範囲（先頭〜末尾）に入るブローカーの足だけを比べる。
+
+    戻り値: {"checked", "missing", "extra", "price_mismatch", "volume_mismatch", "max_price_diff", "ok"}
+      missing: ブローカーにあって導出に無い足 / extra: 導出にあってブローカーに無い足
+      ok は missing / extra / price_mismatch が無いこと（出来高の差は参考値）
+    """
+    from app.services.mt5_bar_appender import get_bar_appender
+
+    tf = str(timeframe).upper()
+    tag = str(symbol).rstrip("-").upper()
+    broker = (appender or get_bar_appender()).fetch_closed_bars(symbol, tf)
+    path = data_guard.csv_path(tag, tf, layout)
+    derived = read_csv_tail(path, len(broker) + 2) if path.exists() and len(broker) else pd.DataFrame()
+    report: Dict[str, Any] = {
+        "checked": 0,
+        "missing": [],
+        "extra": [],
+        "price_mismatch": [],
+        "volume_mismatch": 0,
+        "max_price_diff": 0.0,
+        "ok": False,
+    }
+    if broker.empty or derived.empty:
+        return report
+    lo = max(broker["time"].iloc[0], derived["time"].iloc[0])
+    hi = min(broker["time"].iloc[-1], derived["time"].iloc[-1])
+    b = broker[(broker["time"] >= lo) & (broker["time"] <= hi)].set_index("time")
+    d = derived[(derived["time"] >= lo) & (derived["time"] <= hi)].set_index("time")
+    report["missing"] = [str(t) for t in b.index.difference(d.index)]
+    report["extra"] = [str(t) for t in d.index.difference(b.index)]
+    common = b.index.intersection(d.index)
+    report["checked"] = int(len(common))
+    if len(common):
+        diff = np.abs(
+            b.loc[common, FLOAT_COLS].to_numpy(dtype=np.float64) - d.loc[common, FLOAT_COLS].to_numpy(dtype=np.float64)
+        ).max(axis=1)
+        report["max_price_diff"] = float(diff.max())
+        report["price_mismatch"] = [str(t) for t in common[diff > PRICE_TOL]]
+        report["volume_mismatch"] = int(
+            (b.loc[common, "tick_volume"].to_numpy() != d.loc[common, "tick_volume"].to_numpy()).sum()
+        )
+    report["ok"] = not (report["missing"] or report["extra"] or report["price_mismatch"])
+    if not report["ok"]:
+        logger.warning(
+            "[ohlcv_resample] broker check {} {}: missing={} extra={} price_mismatch={}",
+            tag,
+            tf,
+            len(report["missing"]),
+            len(report["extra"]),
+            len(report["price_mismatch"]),
+        )
+    return report
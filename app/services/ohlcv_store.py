@@ -0,0 +1,459 @@
+# app/services/ohlcv_store.py
+"""
+OHLCV の列指向ストア（月パーティション × 列ごとの生バイナリ + manifest.json）
+
+- 配置: data/<SYM>/ohlcv/store_<TF>/
+    manifest.json            … 列 dtype / パーティションごとの行数・time 範囲 / 同期元 CSV の stat
+    <YYYYMM>/<col>.bin       … 1列 = 1ファイル（np.memmap で必要な範囲だけ読む）
+- head/tail の time は manifest だけで O(1) に返す
+- 書き込みは追記のみ（tail_time 以下の行は捨てる）。manifest は tmp → os.replace で原子的に更新
+  （例外は CSV の最終行が同じ time のまま書き換えられた場合で、ストアの最終行だけをその場で上書きする）
+- CSV は従来通り正本（make_csv_from_mt5 が書く）。sync_from_csv() で末尾の新規行だけ取り込む
+"""
+from __future__ import annotations
+
+import io
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# 同期時に最初に読む CSV 末尾の行数（足りなければ倍々で広げる）
+SYNC_TAIL_ROWS = 256
+
+# 他プロセスの書き込みロックを待つ上限（秒）と、放置ロックとみなす経過秒
+LOCK_TIMEOUT_SEC = 10.0
+LOCK_STALE_SEC = 120.0
+
+
+def read_csv_tail(path: Path, n_rows: int) -> pd.DataFrame:
+    """CSV のヘッダ + 末尾 n_rows 行だけを読む（ファイル全体は読まない）。"""
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(0, os.SEEK_END)
+        end = f.tell()
+        pos = end
+        block = 64 * 1024
+        chunk = b""
+        while pos > len(header) and chunk.count(b"\n") <= n_rows + 1:
+            step = min(block, pos - len(header))
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + chunk
+    lines = chunk.splitlines()
+    if pos > len(header) and lines:
+        lines = lines[1:]  # 先頭は途中から読んだ行
+    lines = [ln for ln in lines if ln.strip()][-n_rows:]
+    buf = header + b"\n".join(lines) + b"\n"
+    df = pd.read_csv(io.BytesIO(buf), parse_dates=["time"])
+    return df.sort_values("time").reset_index(drop=True)
+
+
+def _file_stat(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return int(st.st_size), int(st.st_mtime_ns)
+
+
+def _month_key(t_ns: np.ndarray) -> np.ndarray:
+    """int64 ns → 'YYYYMM' の配列"""
+    months = t_ns.astype("datetime64[ns]").astype("datetime64[M]")
+    return np.char.replace(np.datetime_as_string(months, unit="M"), "-", "")
+
+
+class _FileLock:
+    """O_EXCL でロックファイルを作るだけのプロセス間ロック（Windows/Linux 共通）。"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self) -> "_FileLock":
+        deadline = time.monotonic() + LOCK_TIMEOUT_SEC
+        while True:
+            try:
+                fd = os.open(str(self.path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode("ascii"))
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.stat(self.path).st_mtime > LOCK_STALE_SEC:
+                        logger.warning("[ohlcv_store] removing stale lock: {}", self.path)
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"ohlcv_store lock timeout: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc: Any) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class OhlcvStore:
+    """
+    1シンボル×1タイムフレーム分の列指向ストア。
+    読み出しは manifest の行数までしか見ないので、書き込み途中のバイトがあっても壊れない。
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._lock = threading.RLock()
+        self._manifest: Dict[str, Any] = self._empty_manifest()
+        self._manifest_stat: Optional[Tuple[int, int]] = None
+        self._reload_if_changed()
+
+    # ------------------------------------------------------------------
+    # manifest
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _empty_manifest() -> Dict[str, Any]:
+        return {"version": MANIFEST_VERSION, "time_dtype": "<M8[ns]", "columns": {}, "partitions": [], "source": None}
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    def _reload_if_changed(self) -> None:
+        """他プロセスが追記していたら manifest を読み直す（stat 1回）。"""
+        try:
+            st = _file_stat(self._manifest_path)
+        except FileNotFoundError:
+            self._manifest = self._empty_manifest()
+            self._manifest_stat = None
+            return
+        if st == self._manifest_stat:
+            return
+        try:
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                m = json.load(f)
+            if int(m.get("version", 0)) != MANIFEST_VERSION:
+                logger.warning("[ohlcv_store] manifest version mismatch -> treat as empty: {}", self.root)
+                m = self._empty_manifest()
+        except Exception as e:
+            logger.warning("[ohlcv_store] manifest read failed -> treat as empty: {} err={}", self.root, e)
+            m = self._empty_manifest()
+        self._manifest = m
+        self._manifest_stat = st
+
+    def _write_manifest(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self._manifest_path)
+        self._manifest_stat = _file_stat(self._manifest_path)
+
+    # ------------------------------------------------------------------
+    # O(1) メタ情報
+    # ------------------------------------------------------------------
+    @property
+    def columns(self) -> List[str]:
+        """time を除いた列名（CSV と同じ順）"""
+        self._reload_if_changed()
+        return list(self._manifest["columns"].keys())
+
+    def __len__(self) -> int:
+        self._reload_if_changed()
+        return int(sum(p["rows"] for p in self._manifest["partitions"]))
+
+    def head_time(self) -> Optional[pd.Timestamp]:
+        self._reload_if_changed()
+        parts = self._manifest["partitions"]
+        return pd.Timestamp(parts[0]["t_min"]) if parts else None
+
+    def tail_time(self) -> Optional[pd.Timestamp]:
+        self._reload_if_changed()
+        parts = self._manifest["partitions"]
+        return pd.Timestamp(parts[-1]["t_max"]) if parts else None
+
+    def time_bounds(self) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        head, tail = self.head_time(), self.tail_time()
+        if head is None or tail is None:
+            return None
+        return head, tail
+
+    @property
+    def source(self) -> Dict[str, Any]:
+        """同期元の情報（CSV なら path / size / mtime_ns）。"""
+        self._reload_if_changed()
+        return dict(self._manifest.get("source") or {})
+
+    def set_source(self, source: Dict[str, Any]) -> None:
+        """同期元の情報を manifest に記録する（CSV 以外から作るストア用）。"""
+        with self._lock:
+            self._reload_if_changed()
+            self._manifest["source"] = dict(source)
+            self._write_manifest()
+
+    # ------------------------------------------------------------------
+    # 書き込み（追記のみ）
+    # ------------------------------------------------------------------
+    def _col_path(self, key: str, col: str) -> Path:
+        return self.root / key / f"{col}.bin"
+
+    def append(self, df: pd.DataFrame) -> int:
+        """
+        tail_time より新しい行だけを追記する。戻り値: 追記した行数。
+        初回は df の列・dtype で manifest の列定義を決める（time 以外の数値列のみ）。
+        """
+        if df is None or df.empty or "time" not in df.columns:
+            return 0
+        with self._lock:
+            self._reload_if_changed()
+            df = df.copy()
+            df["time"] = pd.to_datetime(df["time"], errors="coerce")
+            df = df.dropna(subset=["time"]).drop_duplicates(subset=["time"], keep="last")
+            df = df.sort_values("time", kind="mergesort").reset_index(drop=True)
+
+            cols: Dict[str, str] = self._manifest["columns"]
+            if not cols:
+                # 読み出し時に CSV を read_csv したときと同じ time の dtype（単位）で返すため記録
+                self._manifest["time_dtype"] = np.dtype(df["time"].dtype).str
+                for c in df.columns:
+                    if c == "time":
+                        continue
+                    if pd.api.types.is_numeric_dtype(df[c]):
+                        cols[c] = np.dtype(df[c].dtype).str
+                    else:
+                        logger.warning("[ohlcv_store] non-numeric column skipped: {}", c)
+            missing = [c for c in cols if c not in df.columns]
+            if missing:
+                raise ValueError(f"ohlcv_store append: missing columns {missing}")
+
+            parts: List[Dict[str, Any]] = self._manifest["partitions"]
+            if parts:
+                df = df[df["time"] > pd.Timestamp(parts[-1]["t_max"])]
+            if df.empty:
+                return 0
+
+            t_ns = df["time"].to_numpy(dtype="datetime64[ns]").view("int64")
+            keys = _month_key(t_ns)
+            by_key = {p["key"]: p for p in parts}
+
+            for key in pd.unique(keys):
+                sel = keys == key
+                part = by_key.get(key)
+                if part is None:
+                    part = {"key": str(key), "rows": 0, "t_min": int(t_ns[sel][0]), "t_max": int(t_ns[sel][-1])}
+                    parts.append(part)
+                    by_key[key] = part
+                (self.root / key).mkdir(parents=True, exist_ok=True)
+                rows = int(part["rows"])
+                arrays = {"time": t_ns[sel]}
+                for c, dt in cols.items():
+                    arrays[c] = df[c].to_numpy()[sel].astype(np.dtype(dt), copy=False)
+                for c, arr in arrays.items():
+                    with open(self._col_path(key, c), "ab") as f:
+                        # manifest より後ろのバイト（前回の中断書き込み）は捨ててから追記
+                        f.truncate(rows * arr.dtype.itemsize)
+                        f.write(np.ascontiguousarray(arr).tobytes())
+                part["rows"] = rows + int(sel.sum())
+                part["t_max"] = int(t_ns[sel][-1])
+
+            self._write_manifest()
+            return int(len(df))
+
+    def clear(self) -> None:
+        """ストアを空にする（CSV から作り直す用）。"""
+        with self._lock:
+            if self.root.exists():
+                for child in self.root.iterdir():
+                    if child.is_dir():
+                        shutil.rmtree(child, ignore_errors=True)
+                    elif child.name != "store.lock":
+                        child.unlink(missing_ok=True)
+            self._manifest = self._empty_manifest()
+            self._manifest_stat = None
+
+    # ------------------------------------------------------------------
+    # 読み出し
+    # ------------------------------------------------------------------
+    def _offsets(self) -> np.ndarray:
+        rows = [int(p["rows"]) for p in self._manifest["partitions"]]
+        return np.concatenate([[0], np.cumsum(rows, dtype=np.int64)])
+
+    def _read_rows(self, i0: int, i1: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        """通し行番号 [i0, i1) を DataFrame で返す（必要なパーティションだけ memmap）。"""
+        cols: Dict[str, str] = self._manifest["columns"]
+        want = [c for c in (columns or list(cols.keys())) if c in cols and c != "time"]
+        offsets = self._offsets()
+        chunks: Dict[str, List[np.ndarray]] = {"time": [], **{c: [] for c in want}}
+        for pi, part in enumerate(self._manifest["partitions"]):
+            p0, p1 = int(offsets[pi]), int(offsets[pi + 1])
+            a, b = max(i0, p0), min(i1, p1)
+            if a >= b:
+                continue
+            for c in chunks:
+                dt = np.dtype("int64") if c == "time" else np.dtype(cols[c])
+                mm = np.memmap(self._col_path(part["key"], c), dtype=dt, mode="r", shape=(p1 - p0,))
+                # 返り値は memmap を参照しない（Windows でファイルを掴みっぱなしにしない）
+                chunks[c].append(np.array(mm[a - p0 : b - p0]))
+                del mm
+        data: Dict[str, Any] = {}
+        for c, parts in chunks.items():
+            if c == "time":
+                arr = np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+                data[c] = arr.view("datetime64[ns]").astype(self._manifest.get("time_dtype", "<M8[ns]"))
+            else:
+                data[c] = np.concatenate(parts) if parts else np.empty(0, dtype=np.dtype(cols[c]))
+        return pd.DataFrame(data)
+
+    def tail(self, n: int, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+        with self._lock:
+            self._reload_if_changed()
+            total = int(self._offsets()[-1])
+            return self._read_rows(max(0, total - int(n)), total, columns)
+
+    def read_range(
+        self,
+        start: Any = None,
+        end: Any = None,
+        columns: Optional[Sequence[str]] = None,
+        pad_before: int = 0,
+    ) -> pd.DataFrame:
+        """
+        start <= time <= end の行を返す（None は端まで）。
+        pad_before > 0 なら start より前の行をその本数だけ余分に含める（rolling の warm-up 用）。
+        """
+        with self._lock:
+            self._reload_if_changed()
+            parts = self._manifest["partitions"]
+            offsets = self._offsets()
+            total = int(offsets[-1])
+            i0, i1 = 0, total
+            if start is not None:
+                i0 = self._search(pd.Timestamp(start), parts, offsets, side="left")
+            if end is not None:
+                i1 = self._search(pd.Timestamp(end), parts, offsets, side="right")
+            i0 = max(0, i0 - max(0, int(pad_before)))
+            if i0 >= i1:
+                return self._read_rows(0, 0, columns)
+            return self._read_rows(i0, i1, columns)
+
+    def _search(self, ts: pd.Timestamp, parts: List[Dict[str, Any]], offsets: np.ndarray, side: str) -> int:
+        """ts の通し行番号（searchsorted 相当）。manifest の t_min/t_max で対象パーティションを1つに絞る。"""
+        t = int(ts.value)
+        for pi, part in enumerate(parts):
+            if t < int(part["t_min"]):
+                return int(offsets[pi])
+            if t <= int(part["t_max"]):
+                mm = np.memmap(self._col_path(part["key"], "time"), dtype="int64", mode="r", shape=(int(part["rows"]),))
+                pos = int(np.searchsorted(mm, t, side=side))
+                del mm
+                return int(offsets[pi]) + pos
+        return int(offsets[-1])
+
+    # ------------------------------------------------------------------
+    # CSV 同期
+    # ------------------------------------------------------------------
+    def sync_from_csv(self, csv_path: Path) -> int:
+        """
+        CSV（正本）の新規行をストアへ取り込む。戻り値: 追記した行数。
+        - CSV の (size, mtime) が前回同期時と同じなら stat 1回で終わる
+        - 通常は CSV 末尾だけ読んで tail_time より新しい行を追記
+        - 先頭 time / 列構成が変わっていたら（過去側の作り直し等）全体を読み直して再構築
+        """
+        csv_path = Path(csv_path)
+        st = _file_stat(csv_path)
+        with self._lock:
+            self._reload_if_changed()
+            src = self._manifest.get("source") or {}
+            if [src.get("size"), src.get("mtime_ns")] == list(st):
+                return 0
+            self.root.mkdir(parents=True, exist_ok=True)
+            with _FileLock(self.root / "store.lock"):
+                self._reload_if_changed()
+                appended = self._sync_locked(csv_path)
+                self._manifest["source"] = {"path": str(csv_path), "size": st[0], "mtime_ns": st[1]}
+                self._write_manifest()
+                return appended
+
+    def _sync_locked(self, csv_path: Path) -> int:
+        tail = self.tail_time()
+        if tail is not None:
+            head_df = pd.read_csv(csv_path, nrows=1, parse_dates=["time"])
+            same_cols = [c for c in head_df.columns if c != "time"] == self.columns
+            if head_df.empty or not same_cols or pd.Timestamp(head_df["time"].iloc[0]) != self.head_time():
+                logger.info("[ohlcv_store] CSV head/columns changed -> rebuild: {}", csv_path)
+                tail = None
+        if tail is None:
+            return self._rebuild(csv_path)
+
+        n = SYNC_TAIL_ROWS
+        while True:
+            df_tail = read_csv_tail(csv_path, n)
+            if df_tail.empty or len(df_tail) < n or df_tail["time"].iloc[0] <= tail:
+                break
+            n *= 2
+        replaced = self._replace_last_row(df_tail[df_tail["time"] == tail])
+        appended = self.append(df_tail)
+        if replaced:
+            logger.debug("[ohlcv_store] last row rewritten path={} time={}", csv_path, tail)
+        if appended:
+            logger.debug("[ohlcv_store] synced path={} appended={} tail={}", csv_path, appended, self.tail_time())
+        return appended
+
+    def _replace_last_row(self, row: pd.DataFrame) -> bool:
+        """
+        CSV の最終行が同じ time のまま書き換えられていたら（形成中バーの確定・ブローカー側の値の修正・上位足の再集計）、
+        ストアの最終行をその場で上書きする。戻り値: 上書きしたか。
+        """
+        parts: List[Dict[str, Any]] = self._manifest["partitions"]
+        if row.empty or not parts:
+            return False
+        cols: Dict[str, str] = self._manifest["columns"]
+        if any(c not in row.columns for c in cols):
+            return False
+        part = parts[-1]
+        pos = int(part["rows"]) - 1
+        current = self._read_rows(len(self) - 1, len(self), list(cols))
+        new = {c: np.asarray(row[c].to_numpy()[-1:]).astype(np.dtype(dt)) for c, dt in cols.items()}
+        if all(np.array_equal(current[c].to_numpy(), new[c], equal_nan=True) for c in cols):
+            return False
+        for c, arr in new.items():
+            with open(self._col_path(part["key"], c), "r+b") as f:
+                f.seek(pos * arr.dtype.itemsize)
+                f.write(arr.tobytes())
+        return True
+
+    def _rebuild(self, csv_path: Path) -> int:
+        t0 = time.perf_counter()
+        self.clear()
+        df = pd.read_csv(csv_path, parse_dates=["time"])
+        appended = self.append(df)
+        logger.info(
+            "[ohlcv_store] built from CSV path={} rows={} elapsed={:.2f}s",
+            csv_path,
+            appended,
+            time.perf_counter() - t0,
+        )
+        return appended
+
+
+# root ごとに1インスタンス（プロセス内キャッシュ）
+_stores: Dict[str, OhlcvStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(root: Path) -> OhlcvStore:
+    key = str(Path(root).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = OhlcvStore(Path(root))
+            _stores[key] = store
+        return store
@@ -12,15 +12,19 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, Optional
 
-import MetaTrader5 as mt5
 import pandas as pd
 from loguru import logger
 from pandas.errors import EmptyDataError
 
-from app.core.symbol_map import resolve_symbol
 from app.services import data_guard
 from app.services.ai_service import get_ai_service, load_active_model_meta
 from app.services.execution_stub import _write_decision_log
+from app.services.mt5_bar_appender import get_bar_appender
+from app.services.ohlcv_resample import BASE_TF, derive_from_m5
+from core.ai.incremental_features import DEFAULT_SEED_BARS
+
+# 推論対象行より前に読む本数（ohlcv_tech_v1 の rolling/EMA の warm-up。EMA20 は 5000 本で全履歴と一致）
+FEATURE_WARMUP_BARS = DEFAULT_SEED_BARS
 
 
 def _jst_from_mt5_epoch(series) -> pd.Series:
@@ -155,6 +159,7 @@ def ensure_ohlcv_uptodate(symbol: str = "USDJPY-", timeframe: str = "M5") -> Dic
             "mt5_latest": Optional[str],
             "append_rows": int,
             "infer_rows": int,
+            "derived": Dict[str, str],  # M5 から集計した上位足ごとの結果（status）
             "error": Optional[str],
         }
     """
@@ -170,6 +175,7 @@ def ensure_ohlcv_uptodate(symbol: str = "USDJPY-", timeframe: str = "M5") -> Dic
         "mt5_latest": None,
         "append_rows": 0,
         "infer_rows": 0,
+        "derived": {},
         "error": None,
     }
 
@@ -187,34 +193,23 @@ def ensure_ohlcv_uptodate(symbol: str = "USDJPY-", timeframe: str = "M5") -> Dic
             str(sys.executable),
         )
 
-        # 1) CSV末尾tsを読む（更新前）
+        # 1) CSV末尾tsを読む（更新前）: 列指向ストアの manifest から O(1)
         csv_tail_before: Optional[pd.Timestamp] = None
         if csv_path.exists():
             try:
-                df_csv = pd.read_csv(csv_path, parse_dates=["time"])
-                if not df_csv.empty and "time" in df_csv.columns:
-                    csv_tail_before = df_csv["time"].max()
+                bounds = data_guard.ohlcv_time_bounds(symbol_tag, tf, layout="per-symbol")
+                if bounds is not None:
+                    csv_tail_before = bounds[1]
                     result["csv_tail_before"] = str(csv_tail_before)
             except Exception as e:
                 logger.warning(f"[ohlcv][m5][update] failed to read CSV tail: {e}")
 
-        # 2) MT5最新M5 tsを取得
+        # 2) MT5最新M5 tsを取得（確定バー。MT5 セッションは initialize/shutdown せず使い回す）
         mt5_latest: Optional[pd.Timestamp] = None
         try:
-            if not mt5.initialize():
-                err = mt5.last_error()
-                raise RuntimeError(f"MT5 initialize failed: {err}")
-            resolved = resolve_symbol(symbol)
-            tf_map = {"M5": mt5.TIMEFRAME_M5, "M15": mt5.TIMEFRAME_M15, "H1": mt5.TIMEFRAME_H1}
-            tf_const = tf_map.get(tf, mt5.TIMEFRAME_M5)
-            # 修正: copy_rates_from_pos を使用（最新取得の正規ルート）
-            rates = mt5.copy_rates_from_pos(resolved, tf_const, 0, 1)
-            if rates and len(rates) > 0:
-                df_mt5 = pd.DataFrame(rates)
-                df_mt5["time"] = _jst_from_mt5_epoch(df_mt5["time"])
-                mt5_latest = df_mt5["time"].iloc[-1]
+            mt5_latest = get_bar_appender().latest_bar_time(symbol, tf)
+            if mt5_latest is not None:
                 result["mt5_latest"] = str(mt5_latest)
-            mt5.shutdown()
         except Exception as e:
             logger.error(f"[ohlcv][m5][update] MT5 fetch failed: {e}")
             result["error"] = f"mt5_fetch_failed: {e}"
@@ -257,22 +252,30 @@ def ensure_ohlcv_uptodate(symbol: str = "USDJPY-", timeframe: str = "M5") -> Dic
             result["error"] = f"ensure_data_failed: {e}"
             return result
 
-        # 4) 更新後のCSV末尾tsを読む
+        # 3b) M5 から上位足（M15/H1/H4/D1）を増分集計（ブローカーへは取りに行かない。失敗しても M5 の更新は続ける）
+        if tf == BASE_TF:
+            try:
+                derived = derive_from_m5(symbol_tag, layout="per-symbol")
+                result["derived"] = {k: v.status for k, v in derived.items()}
+            except Exception as e:
+                logger.warning(f"[ohlcv][m5][update] derive higher timeframes failed: {e}")
+
+        # 4) 更新後のCSV末尾tsを読む（ストアが CSV の新規行だけ取り込む）
         csv_tail_after: Optional[pd.Timestamp] = None
         append_rows = 0
         if csv_path_abs.exists():
             try:
-                df_csv_after = pd.read_csv(csv_path_abs, parse_dates=["time"])
-                if not df_csv_after.empty and "time" in df_csv_after.columns:
-                    csv_tail_after = df_csv_after["time"].max()
+                store = data_guard.ohlcv_store(symbol_tag, tf, layout="per-symbol")
+                if store is not None and len(store) > 0:
+                    csv_tail_after = store.tail_time()
                     result["csv_tail_after"] = str(csv_tail_after)
                     if csv_tail_before is not None:
                         # 更新前後の差から追加行数を算出
-                        df_new = df_csv_after[df_csv_after["time"] > csv_tail_before]
-                        append_rows = len(df_new)
+                        df_new = store.read_range(start=csv_tail_before, columns=[])
+                        append_rows = int((df_new["time"] > csv_tail_before).sum())
                     else:
                         # 更新前が無い場合は全体行数（初回実行想定）
-                        append_rows = len(df_csv_after)
+                        append_rows = len(store)
                     logger.info(
                         "[ohlcv][m5][update] csv_tail_after={} append_rows={}",
                         str(csv_tail_after),
@@ -287,9 +290,13 @@ def ensure_ohlcv_uptodate(symbol: str = "USDJPY-", timeframe: str = "M5") -> Dic
         infer_rows = 0
         if append_rows > 0 and csv_path_abs.exists():
             try:
-                # CSV全体を読み込んで特徴量生成（rolling計算に過去データが必要）
-                df_csv_after = pd.read_csv(csv_path_abs, parse_dates=["time"])
-                df_csv_after = df_csv_after.sort_values("time").reset_index(drop=True)
+                # 新規行 + warm-up 分だけ読んで特徴量生成（rolling計算に過去データが必要）
+                if csv_tail_before is not None:
+                    df_csv_after = data_guard.read_ohlcv(
+                        symbol_tag, tf, start=csv_tail_before, pad_before=FEATURE_WARMUP_BARS
+                    )
+                else:
+                    df_csv_after = data_guard.read_ohlcv(symbol_tag, tf, tail=100 + FEATURE_WARMUP_BARS)
 
                 # 新規行のインデックス範囲を特定
                 if csv_tail_before is not None:
@@ -323,13 +330,15 @@ def ensure_ohlcv_uptodate(symbol: str = "USDJPY-", timeframe: str = "M5") -> Dic
                             ai_service = get_ai_service()
                             first_ts: Optional[str] = None
                             last_ts: Optional[str] = None
+                            # build_features は dropna で先頭行が落ちるため time で突き合わせる
+                            df_feat_indexed = df_feat.set_index("time", drop=False)
 
                             for idx in new_indices:
-                                if idx >= len(df_feat):
-                                    continue
                                 try:
-                                    row_feat = df_feat.iloc[idx]
                                     row_ohlc = df_csv_after.iloc[idx]
+                                    if row_ohlc["time"] not in df_feat_indexed.index:
+                                        continue
+                                    row_feat = df_feat_indexed.loc[row_ohlc["time"]]
 
                                     # 特徴量をdictに変換（AISvc.predict用）
                                     feat_dict = row_feat.drop("time").to_dict()
@@ -432,6 +441,43 @@ def main() -> None:
         sys.exit(1)
 
 
+def _bar_window_inputs(
+    symbol_tag: str,
+    tf: str,
+    t_proba_last: Optional[pd.Timestamp],
+) -> Optional[tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    共有バー窓（app.services.bar_window）で未推論分をまかなえるなら (df_ohlc, df_feat) を返す。
+    窓より前から未推論 / 未推論行の warm-up が窓に収まらない場合は None（従来の読み込みに戻る）。
+    """
+    try:
+        from app.services.bar_window import get_bar_window
+
+        window = get_bar_window(symbol_tag, tf)
+        if window is None:
+            return None
+        ready = window.feature_ready_time()
+        if ready is None:
+            return None
+        df_ohlc = window.frame()
+        if t_proba_last is None:
+            # 初回: 末尾100行が対象
+            first_needed = df_ohlc["time"].iloc[max(0, len(df_ohlc) - 100)]
+        else:
+            if t_proba_last < df_ohlc["time"].iloc[0]:
+                return None
+            later = df_ohlc["time"][df_ohlc["time"] > t_proba_last]
+            if later.empty:
+                return df_ohlc, window.features()
+            first_needed = later.iloc[0]
+        if first_needed < ready:
+            return None
+        return df_ohlc, window.features()
+    except Exception as e:
+        logger.warning("[lgbm] bar window unavailable -> read OHLCV: {}", e)
+        return None
+
+
 def ensure_lgbm_proba_uptodate(
     symbol: str = "USDJPY-",
     timeframe: str = "M5",
@@ -475,20 +521,13 @@ def ensure_lgbm_proba_uptodate(
             logger.warning(f"[lgbm] OHLC CSV not found: {ohlc_csv_path}")
             return
 
-        # 2) M5 CSVを読み込む
-        df_ohlc = pd.read_csv(ohlc_csv_path, parse_dates=["time"])
-        if df_ohlc.empty or "time" not in df_ohlc.columns:
+        # 2) M5 の末尾 time（列指向ストアの manifest から。行本体は 6) で必要範囲だけ読む）
+        ohlc_bounds = data_guard.ohlcv_time_bounds(symbol_tag, tf, layout="per-symbol")
+        if ohlc_bounds is None:
             logger.warning(f"[lgbm] OHLC CSV is empty or missing time column: {ohlc_csv_path}")
             return
-        df_ohlc["time"] = pd.to_datetime(df_ohlc["time"], errors="coerce")
-        df_ohlc = df_ohlc.dropna(subset=["time"])
-        if df_ohlc.empty:
-            logger.warning(f"[lgbm] OHLC CSV has no valid time after coerce: {ohlc_csv_path}")
-            return
-        df_ohlc = df_ohlc.sort_values("time").reset_index(drop=True)
-        t_ohlc_last = pd.Timestamp(df_ohlc["time"].iloc[-1])
+        t_ohlc_last = pd.Timestamp(ohlc_bounds[1])
         ohlc_last_time_str = str(t_ohlc_last)
-        df_ohlc_shape = df_ohlc.shape
 
         # 3) proba CSVのパスを取得
         proba_dir = ohlc_csv_path.parent.parent / "lgbm"
@@ -564,13 +603,33 @@ def ensure_lgbm_proba_uptodate(
                     proba_last_time_str = str(t_proba_last)
                     proba_last_time_str_out = proba_last_time_str
                     if "model_id" in df_proba.columns:
-                        for _, row in df_proba.iterrows():
-                            existing_keys.add((pd.Timestamp(row["time"]), str(row["model_id"])))
+                        existing_keys.update(zip(df_proba["time"], df_proba["model_id"].astype(str)))
                     else:
-                        for _, row in df_proba.iterrows():
-                            existing_keys.add((pd.Timestamp(row["time"]), "unknown"))
+                        existing_keys.update((t, "unknown") for t in df_proba["time"])
+
+        # 6) 対象範囲 + 特徴量 warm-up 分だけ M5 を読む（CSV 全体は読まない）
+        #    通常の追随（範囲指定なし）は共有バー窓で足りればそれを使う（特徴量も窓の計算済みを再利用）
+        window_inputs = None
+        if start_time is None and end_time is None:
+            window_inputs = _bar_window_inputs(symbol_tag, tf, t_proba_last)
+        if window_inputs is not None:
+            df_ohlc, df_feat_window = window_inputs
+        elif start_time is not None or end_time is not None:
+            df_ohlc = data_guard.read_ohlcv(
+                symbol_tag, tf, start=start_time, end=end_time, pad_before=FEATURE_WARMUP_BARS
+            )
+        elif t_proba_last is None:
+            df_ohlc = data_guard.read_ohlcv(symbol_tag, tf, tail=100 + FEATURE_WARMUP_BARS)
+        else:
+            df_ohlc = data_guard.read_ohlcv(
+                symbol_tag, tf, start=t_proba_last, pad_before=FEATURE_WARMUP_BARS
+            )
+        if df_ohlc.empty or "time" not in df_ohlc.columns:
+            logger.warning(f"[lgbm] OHLC CSV is empty or missing time column: {ohlc_csv_path}")
+            return
+        df_ohlc_shape = df_ohlc.shape
 
-        # 6) 未推論のM5行を抽出（model_idは関数冒頭で確定済み）。比較はすべて Timestamp で統一。
+        # 未推論のM5行を抽出（model_idは関数冒頭で確定済み）。比較はすべて Timestamp で統一。
         if start_time is not None and end_time is not None:
             # 範囲指定時: start_time から end_time の範囲で、既存の (time, model_id) が存在しない行
             ts_start = pd.Timestamp(start_time)
@@ -603,6 +662,7 @@ def ensure_lgbm_proba_uptodate(
             if t_proba_last is None:
                 # 初回実行: 末尾100行を対象（過去データが必要なため）
                 missing_mask = df_ohlc.index >= max(0, len(df_ohlc) - 100)
+                df_missing = df_ohlc[missing_mask].copy()
             else:
                 # 通常: t_proba_lastより後の行で、既存の (time, model_id) が存在しない行
                 t_proba_ts = pd.Timestamp(t_proba_last)
@@ -637,7 +697,10 @@ def ensure_lgbm_proba_uptodate(
             return
 
         try:
-            df_feat = build_features(df_ohlc[required_cols], {"feature_recipe": "ohlcv_tech_v1"})
+            if window_inputs is not None:
+                df_feat = df_feat_window
+            else:
+                df_feat = build_features(df_ohlc[required_cols], {"feature_recipe": "ohlcv_tech_v1"})
         except Exception as e:
             logger.warning(f"[lgbm] feature generation failed: {e}")
             return
@@ -11,12 +11,14 @@ import re
 import time
 import copy
 from collections import deque
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional, Any
 
 from loguru import logger
 
+from app.services.jsonl_tail import read_jsonl_tail
+from app.services.ops_summary_state import STATE_NAME, OpsSummaryState
 from app.services.wfo_stability_service import evaluate_wfo_stability, load_saved_stability
 
 
@@ -339,6 +341,38 @@ class OpsHistoryService:
         self.history_file = self.project_root / "logs" / "ops" / "ops_result.jsonl"
         # ディレクトリが存在しない場合は作成
         self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        self._summary_state: Optional[OpsSummaryState] = None
+
+    def _get_summary_state(self) -> OpsSummaryState:
+        """logs/ops/ops_summary_state.json の集計状態（project_root ごとに1つ）"""
+        path = self.project_root / "logs" / "ops" / STATE_NAME
+        st = self._summary_state
+        if st is None or st.path != path:
+            st = OpsSummaryState(path, parse_started_at=self._parse_started_at, prepare=self._prepare_loaded_record)
+            self._summary_state = st
+        return st
+
+    def _ops_candidates(self) -> list[Path]:
+        """集計対象の ops_result_*.jsonl / ops_start_*.jsonl（更新日時の新しい順）"""
+        base_dir = self.project_root / "logs" / "ops"
+        if not base_dir.exists():
+            return []
+        candidates = []
+        candidates += list(base_dir.glob("ops_result_*.jsonl"))
+        candidates += list(base_dir.glob("ops_start_*.jsonl"))
+        return sorted(candidates, key=lambda p: p.stat().st_mtime, reverse=True)
+
+    def _prepare_loaded_record(self, rec: dict) -> dict:
+        """読み込んだレコードに record_id を付与する（読み取り時に生成）"""
+        if "record_id" not in rec:
+            rec["record_id"] = self._generate_record_id(rec)
+        return rec
+
+    def rebuild_summary_state(self) -> None:
+        """集計状態（ops_summary_state.json）を全履歴から作り直す（復旧用）"""
+        self._get_summary_state().rebuild(self._ops_candidates())
+        _SUMMARY_CACHE["ts"] = 0.0
+        _SUMMARY_CACHE["value"] = None
 
     def append_ops_result(self, rec: dict) -> None:
         """
@@ -381,6 +415,13 @@ class OpsHistoryService:
         except Exception as e:
             logger.error(f"Failed to append ops result: {e}")
             # クラッシュさせない（例外はログのみ）
+            return
+
+        # 集計状態を追記分だけ更新（失敗しても次の集計時に追いつく）
+        try:
+            self._get_summary_state().sync(self._ops_candidates())
+        except Exception as e:
+            logger.warning(f"Failed to update ops summary state: {e}")
 
     def _normalize_record(self, rec: dict) -> dict:
         """
@@ -494,12 +535,21 @@ class OpsHistoryService:
             },
         }
 
-    def _calc_next_action(self, record: dict) -> dict:
+    def _latest_wfo_inputs(self, memo: Optional[dict]) -> Optional[dict[str, Any]]:
+        """_load_latest_wfo_inputs の結果を memo に保持して使い回す（rglob を1回の集計で1度だけにする）"""
+        if memo is None:
+            return self._load_latest_wfo_inputs()
+        if "wfo_inputs" not in memo:
+            memo["wfo_inputs"] = self._load_latest_wfo_inputs()
+        return memo["wfo_inputs"]
+
+    def _calc_next_action(self, record: dict, wfo_memo: Optional[dict] = None) -> dict:
         """
         recordからnext_actionを軽量ルールで計算する（replay_from_recordを呼ばない）。
 
         Args:
             record: Ops履歴レコード（またはviewのraw）
+            wfo_memo: 最新WFO成果物の読み込み結果を使い回すdict（1回の集計内で共有、None なら毎回読む）
 
         Returns:
             next_action dict（{"kind":"...", "reason":"...", "params":{}, "priority":int}）
@@ -547,7 +597,7 @@ class OpsHistoryService:
                     f"promoted_at={repr(promoted_at)} applied_at={repr(record.get('applied_at'))} "
                     f"apply_performed={repr(apply_performed)} ok={repr(ok)} dry={repr(dry)}"
                 )
-                wfo_inputs = self._load_latest_wfo_inputs()
+                wfo_inputs = self._latest_wfo_inputs(wfo_memo)
                 if not wfo_inputs:
                     return _normalize_next_action({
                         "kind": "NONE",
@@ -596,7 +646,7 @@ class OpsHistoryService:
                     f"promoted_at={repr(promoted_at)} applied_at={repr(record.get('applied_at'))} "
                     f"apply_performed={repr(apply_performed)} ok={repr(ok)} dry={repr(dry)}"
                 )
-                wfo_inputs = self._load_latest_wfo_inputs()
+                wfo_inputs = self._latest_wfo_inputs(wfo_memo)
                 if not wfo_inputs:
                     return _normalize_next_action({
                         "kind": "NONE",
@@ -656,7 +706,7 @@ class OpsHistoryService:
                     f"promoted_at={repr(promoted_at)} applied_at={repr(record.get('applied_at'))} "
                     f"apply_performed={repr(apply_performed)} ok={repr(ok)} dry={repr(dry)}"
                 )
-                wfo_inputs = self._load_latest_wfo_inputs()
+                wfo_inputs = self._latest_wfo_inputs(wfo_memo)
                 if not wfo_inputs:
                     return _normalize_next_action({
                         "kind": "NONE",
@@ -858,61 +908,22 @@ class OpsHistoryService:
         Returns:
             レコードのリスト（新しい順）
         """
-        # 候補ファイルを列挙（ops_result_*.jsonl と ops_start_*.jsonl）
-        base_dir = self.project_root / "logs" / "ops"
-        if not base_dir.exists():
-            return []
-
-        candidates = []
-        candidates += list(base_dir.glob("ops_result_*.jsonl"))
-        candidates += list(base_dir.glob("ops_start_*.jsonl"))
-        if not candidates:
-            return []
+        # 候補ファイルを列挙（ops_result_*.jsonl と ops_start_*.jsonl、更新日時の新しい順）
+        return self._load_records(self._ops_candidates(), symbol=symbol, limit=limit)
 
-        # 更新日時でソート（最新順）
-        candidates = sorted(candidates, key=lambda p: p.stat().st_mtime, reverse=True)
+    def _load_records(self, candidates: list[Path], *, symbol: Optional[str], limit: int) -> list[dict]:
+        """candidates（新しい順）の末尾から最大 limit 件（新しい順）"""
+        def _match(rec: dict) -> bool:
+            return not symbol or rec.get("symbol") == symbol
 
         records = []
         try:
-            # すべての候補ファイルから読み込む（最新のファイルから順に）
+            # すべての候補ファイルから読み込む（最新のファイルから順に、末尾から必要な件数だけ）
             for candidate_file in candidates:
                 if len(records) >= limit:
                     break
-
-                try:
-                    # ファイルを末尾から読み込む（効率化のため全行読み込み）
-                    with candidate_file.open("r", encoding="utf-8") as f:
-                        lines = f.readlines()
-
-                    # 末尾から逆順に処理
-                    for line in reversed(lines):
-                        if len(records) >= limit:
-                            break
-
-                        line = line.strip()
-                        if not line:
-                            continue
-
-                        # JSONじゃない行（プレーンログ）を静かにスキップ
-                        if not line.startswith("{"):
-                            continue
-
-                        try:
-                            rec = json.loads(line)
-                            # symbol フィルタ
-                            if symbol and rec.get("symbol") != symbol:
-                                continue
-                            # record_idを付与（読み取り時に生成）
-                            if "record_id" not in rec:
-                                rec["record_id"] = self._generate_record_id(rec)
-                            records.append(rec)
-                        except Exception:
-                            # 本当に壊れたJSON行（{... が途中で欠けてる場合）は警告
-                            logger.warning(f"Skipping invalid JSON line in {candidate_file}")
-                            continue
-                except Exception as e:
-                    logger.warning(f"Failed to read {candidate_file}: {e}")
-                    continue
+                for rec in read_jsonl_tail(candidate_file, limit - len(records), predicate=_match):
+                    records.append(self._prepare_loaded_record(rec))
 
         except Exception as e:
             logger.error(f"Failed to load ops history: {e}")
@@ -1041,9 +1052,12 @@ class OpsHistoryService:
         # 計測開始
         t_total_start = time.perf_counter()
 
-        # ログ読み込み
+        # ログ読み込み（集計は ops_summary_state.json を追記分だけ更新して使い、生レコードは表示用の最新50件だけ）
         t_load_start = time.perf_counter()
-        records = self.load_ops_history(symbol=symbol, limit=1000)  # 集計用に多めに取得
+        candidates = self._ops_candidates()
+        state = self._get_summary_state()
+        state.sync(candidates)
+        records = self._load_records(candidates, symbol=symbol, limit=50)
         t_load_end = time.perf_counter()
         load_sec = t_load_end - t_load_start
 
@@ -1053,91 +1067,61 @@ class OpsHistoryService:
         month_ok = 0
         week_model_updates = 0
         month_model_updates = 0
-        consecutive_failures = 0
         last = None
         last_model_update = None
 
-        # 連続失敗をカウント（records は新しい順なので最初から見る）
-        for idx, rec in enumerate(records):
-            if not rec.get("ok", False):
-                consecutive_failures += 1
-            else:
-                break
-
-        for rec in records:
-            started_at_str = rec.get("started_at")
-            if not started_at_str:
-                continue
+        # 週次・月次の判定は日付のみで行う（時刻は無視）
+        now_date = datetime.now().date()
+        week_ago_date = now_date - timedelta(days=7)
+        month_start_date = datetime(now_date.year, now_date.month, 1).date()
+        agg = state.summarize(candidates, symbol, since=min(week_ago_date, month_start_date))
+
+        # 連続失敗（新しい順に ok でないものが続く件数）
+        consecutive_failures = int(agg["consecutive_failures"])
+
+        for day, (n_total, n_ok, n_updates) in agg["days"].items():
+            dt_date = date.fromisoformat(day)
+            # 週次カウント（日付のみで判定）
+            if dt_date >= week_ago_date:
+                week_total += n_total
+                week_ok += n_ok
+                week_model_updates += n_updates
+            # 月次カウント（日付のみで判定）
+            if dt_date >= month_start_date:
+                month_total += n_total
+                month_ok += n_ok
+                month_model_updates += n_updates
+
+        # 最後の1件（started_at が読める最新レコード）
+        rec = agg["last"]
+        if rec is not None:
+            # _normalize_record()を通して正規化（promoted_at等も含める）
+            normalized_rec = self._normalize_record(rec)
+            record_id = self._generate_record_id(normalized_rec)
+            last = {
+                "record_id": record_id,
+                "started_at": rec.get("started_at"),
+                "ok": rec.get("ok", False),
+                "step": normalized_rec.get("step", "unknown"),
+                "model_path": normalized_rec.get("model_path"),
+                "profiles": normalized_rec.get("profiles", []),
+                "symbol": normalized_rec.get("symbol", "USDJPY-"),
+                "dry": normalized_rec.get("dry"),
+                "cmd": normalized_rec.get("cmd"),
+                "close_now": normalized_rec.get("close_now"),
+                "promoted_at": normalized_rec.get("promoted_at"),
+            }
 
-            try:
-                # started_at をパース（複数フォーマット対応）
-                dt = self._parse_started_at(started_at_str)
-                if dt is None:
-                    # パース失敗時はそのレコードを集計対象から除外（WARNは出さない）
-                    continue
-
-                # naive/aware混在を避けるため、naiveに統一してから比較
-                if dt.tzinfo is None:
-                    dt_naive = dt
-                else:
-                    dt_naive = dt.replace(tzinfo=None)
-
-                # 週次・月次の判定は日付のみで行う（時刻は無視）
-                dt_date = dt_naive.date()
-                now_date = datetime.now().date()
-                week_ago_date = now_date - timedelta(days=7)
-                month_start_date = datetime(now_date.year, now_date.month, 1).date()
-                ok = rec.get("ok", False)
-                apply_performed = rec.get("apply_performed", False)
-
-                # 週次カウント（日付のみで判定）
-                if dt_date >= week_ago_date:
-                    week_total += 1
-                    if ok:
-                        week_ok += 1
-                    if apply_performed:
-                        week_model_updates += 1
-
-                # 月次カウント（日付のみで判定）
-                if dt_date >= month_start_date:
-                    month_total += 1
-                    if ok:
-                        month_ok += 1
-                    if apply_performed:
-                        month_model_updates += 1
-
-                # 最後の1件を取得（records は新しい順なので最初の有効なものが最新）
-                if last is None:
-                    # _normalize_record()を通して正規化（promoted_at等も含める）
-                    normalized_rec = self._normalize_record(rec)
-                    record_id = self._generate_record_id(normalized_rec)
-                    last = {
-                        "record_id": record_id,
-                        "started_at": started_at_str,
-                        "ok": ok,
-                        "step": normalized_rec.get("step", "unknown"),
-                        "model_path": normalized_rec.get("model_path"),
-                        "profiles": normalized_rec.get("profiles", []),
-                        "symbol": normalized_rec.get("symbol", "USDJPY-"),
-                        "dry": normalized_rec.get("dry"),
-                        "cmd": normalized_rec.get("cmd"),
-                        "close_now": normalized_rec.get("close_now"),
-                        "promoted_at": normalized_rec.get("promoted_at"),
-                    }
-
-                # 最後のモデル更新を取得（apply_performed == True の最初のもの）
-                if last_model_update is None and apply_performed:
-                    record_id = self._generate_record_id(rec)
-                    last_model_update = {
-                        "record_id": record_id,
-                        "started_at": started_at_str,
-                        "model_path": rec.get("model_path"),
-                        "ok": ok,
-                        "step": rec.get("step", "unknown"),
-                    }
-            except Exception as e:
-                logger.warning(f"Failed to parse started_at '{started_at_str}': {e}")
-                continue
+        # 最後のモデル更新（apply_performed == True の最新）
+        rec = agg["last_apply"]
+        if rec is not None:
+            last_model_update = {
+                "record_id": self._generate_record_id(rec),
+                "started_at": rec.get("started_at"),
+                "model_path": rec.get("model_path"),
+                "ok": rec.get("ok", False),
+                "step": rec.get("step", "unknown"),
+            }
 
         # 成功率を計算
         week_ok_rate = (week_ok / week_total) if week_total > 0 else 0.0
@@ -1165,6 +1149,7 @@ class OpsHistoryService:
         t_hint_start = time.perf_counter()
         MAX_HINT_ITEMS = 30  # 先頭30件だけnext_actionを計算
         next_action_cache = {}  # メモ化用（key: record_id or cmd）
+        wfo_memo: dict = {}  # 最新WFO成果物はこの集計内で1回だけ読む
 
         for idx, view in enumerate(items[:MAX_HINT_ITEMS]):
             if not view:
@@ -1180,7 +1165,7 @@ class OpsHistoryService:
             if cache_key not in next_action_cache:
                 try:
                     raw = view.get("raw", {})
-                    next_action = self._calc_next_action(raw)
+                    next_action = self._calc_next_action(raw, wfo_memo)
                     next_action_cache[cache_key] = next_action
                 except Exception as e:
                     logger.warning(f"Failed to calculate next_action for view {idx}: {e}")
@@ -1211,7 +1196,7 @@ class OpsHistoryService:
                 try:
                     raw = last_view.get("raw", {})
                     # 軽量ルールでnext_actionを計算（replay_from_recordを呼ばない）
-                    last_view["next_action"] = self._calc_next_action(raw)
+                    last_view["next_action"] = self._calc_next_action(raw, wfo_memo)
                 except Exception as e:
                     logger.warning(f"Failed to calculate next_action for last_view: {e}")
                     last_view["next_action"] = {"kind": "NONE", "reason": "", "params": {}, "priority": 0}
@@ -1449,6 +1434,13 @@ def append_ops_result(rec: dict) -> None:
     return get_ops_history_service().append_ops_result(rec)
 
 
+def rebuild_ops_summary_state() -> None:
+    """
+    logs/ops/ops_summary_state.json を全履歴から作り直す（トップレベル関数ラッパー、復旧用）。
+    """
+    return get_ops_history_service().rebuild_summary_state()
+
+
 def replay_from_record(record: dict, *, run: bool = False, overrides: dict | None = None) -> dict:
     """
     レコードから条件を復元して再実行する。
@@ -0,0 +1,221 @@
+"""
+Ops履歴の集計状態（summarize_ops_history 用のマテリアライズド集計）
+
+logs/ops/ops_*.jsonl を毎回読み直さずに済むよう、ファイルごとの集計を
+logs/ops/ops_summary_state.json に保存し、2回目以降は追記されたバイトだけを畳み込む。
+
+ファイルごと・キーごと（"" = 全件、それ以外はシンボル）に持つもの:
+- days: 日付(YYYY-MM-DD) → [件数, 成功件数, モデル更新件数]（started_at が読めた行のみ）
+- trail_fail: 末尾から連続する失敗件数 / all_fail: ファイル内が全て失敗か（連続失敗の連結用）
+- last / last_apply: started_at が読める最新レコード / apply_performed の最新レコード
+
+ファイル間の並び（新しい順）は load_ops_history と同じく mtime 降順で、集計時に連結する。
+状態ファイルが壊れている・バージョン違いの場合は作り直す（rebuild でも明示的に作り直せる）。
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from loguru import logger
+
+from app.services.jsonl_tail import read_jsonl_appended
+
+STATE_NAME = "ops_summary_state.json"
+STATE_VERSION = 1
+ALL_KEY = ""
+
+
+def _new_key_stats() -> dict[str, Any]:
+    return {"n": 0, "days": {}, "trail_fail": 0, "all_fail": True, "last": None, "last_apply": None}
+
+
+def _new_file_entry() -> dict[str, Any]:
+    return {"size": 0, "mtime_ns": -1, "offset": 0, "fp": "", "keys": {}}
+
+
+class OpsSummaryState:
+    """
+    ops_*.jsonl のファイル単位集計（スレッドセーフ）
+
+    parse_started_at / prepare はサービス側の規則（OpsHistoryService._parse_started_at、
+    record_id の付与）をそのまま使うために外から渡す。
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        parse_started_at: Callable[[str], Optional[datetime]],
+        prepare: Callable[[dict], dict],
+    ) -> None:
+        self.path = Path(path)
+        self._parse_started_at = parse_started_at
+        self._prepare = prepare
+        self._lock = threading.RLock()
+        self._files: Optional[dict[str, dict[str, Any]]] = None
+
+    # ------------------------------------------------------------------
+    # 永続化
+    def _load(self) -> dict[str, dict[str, Any]]:
+        if self._files is not None:
+            return self._files
+        files: dict[str, dict[str, Any]] = {}
+        try:
+            if self.path.exists():
+                obj = json.loads(self.path.read_text(encoding="utf-8"))
+                if isinstance(obj, dict) and obj.get("version") == STATE_VERSION and isinstance(obj.get("files"), dict):
+                    files = obj["files"]
+                else:
+                    logger.info(f"[ops_summary] state version mismatch, rebuilding: {self.path}")
+        except Exception as e:
+            logger.warning(f"[ops_summary] failed to read state, rebuilding: {e}")
+            files = {}
+        self._files = files
+        return files
+
+    def _save(self) -> None:
+        if self._files is None:
+            return
+        tmp = self.path.with_suffix(".json.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(
+                json.dumps({"version": STATE_VERSION, "files": self._files}, ensure_ascii=False),
+                encoding="utf-8",
+            )
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.warning(f"[ops_summary] failed to save state: {e}")
+
+    # ------------------------------------------------------------------
+    # 差分更新
+    def _fold(self, ent: dict[str, Any], rec: dict) -> None:
+        """1レコード（ファイル内で古い順）を集計に畳み込む"""
+        rec = self._prepare(rec)
+        sym = rec.get("symbol")
+        keys = [ALL_KEY] + ([sym] if isinstance(sym, str) and sym else [])
+        ok = rec.get("ok", False)
+        dt = None
+        started_at = rec.get("started_at")
+        if started_at:
+            try:
+                dt = self._parse_started_at(started_at)
+            except Exception as e:
+                logger.warning(f"Failed to parse started_at '{started_at}': {e}")
+                dt = None
+        for k in keys:
+            st = ent["keys"].setdefault(k, _new_key_stats())
+            st["n"] += 1
+            if ok:
+                st["trail_fail"] = 0
+                st["all_fail"] = False
+            else:
+                st["trail_fail"] += 1
+            if dt is None:
+                continue
+            d = (dt if dt.tzinfo is None else dt.replace(tzinfo=None)).date().isoformat()
+            c = st["days"].setdefault(d, [0, 0, 0])
+            c[0] += 1
+            if ok:
+                c[1] += 1
+            if rec.get("apply_performed", False):
+                c[2] += 1
+                st["last_apply"] = rec
+            st["last"] = rec
+
+    def _sync_file(self, files: dict[str, dict[str, Any]], path: Path) -> bool:
+        key = path.name
+        try:
+            stat = path.stat()
+        except Exception:
+            return False
+        mtime_ns = int(getattr(stat, "st_mtime_ns", int(stat.st_mtime * 1e9)))
+        ent = files.get(key)
+        if ent is not None and ent.get("size") == int(stat.st_size) and ent.get("mtime_ns") == mtime_ns:
+            return False
+        if ent is None:
+            ent = _new_file_entry()
+        try:
+            got = read_jsonl_appended(path, int(ent.get("offset") or 0), bytes.fromhex(ent.get("fp") or ""))
+            if got is None:
+                # 縮んだ／書き換えられた → このファイルだけ最初から数え直す
+                ent = _new_file_entry()
+                got = read_jsonl_appended(path, 0, b"")
+            assert got is not None
+            recs, offset, fp = got
+        except Exception as e:
+            logger.warning(f"Failed to read {path}: {e}")
+            return False
+        for rec in recs:
+            self._fold(ent, rec)
+        ent.update({"size": int(stat.st_size), "mtime_ns": mtime_ns, "offset": int(offset), "fp": fp.hex()})
+        files[key] = ent
+        return True
+
+    def sync(self, candidates: Iterable[Path]) -> None:
+        """候補ファイルの追記分を畳み込む（消えたファイルは集計から外す）"""
+        with self._lock:
+            files = self._load()
+            paths = list(candidates)
+            changed = False
+            for p in paths:
+                changed = self._sync_file(files, p) or changed
+            names = {p.name for p in paths}
+            for gone in [k for k in files if k not in names]:
+                del files[gone]
+                changed = True
+            if changed:
+                self._save()
+
+    def rebuild(self, candidates: Iterable[Path]) -> None:
+        """集計状態を捨てて全ファイルから作り直す（復旧用）"""
+        with self._lock:
+            self._files = {}
+            try:
+                self.path.unlink(missing_ok=True)
+            except Exception:
+                pass
+            self.sync(candidates)
+            self._save()
+
+    # ------------------------------------------------------------------
+    # 読み出し
+    def summarize(self, ordered: list[Path], symbol: Optional[str], *, since: date) -> dict[str, Any]:
+        """
+        ordered（新しい順のファイル）を連結した集計を返す。
+
+        Returns:
+            {"days": {日付: [件数, 成功, 更新]}（since 以降）, "consecutive_failures": int,
+             "last": dict|None, "last_apply": dict|None}
+        """
+        k = symbol if symbol else ALL_KEY
+        since_s = since.isoformat()
+        days: dict[str, list[int]] = {}
+        streak = 0
+        streak_open = True
+        last = None
+        last_apply = None
+        with self._lock:
+            files = self._load()
+            for p in ordered:
+                st = (files.get(p.name) or {}).get("keys", {}).get(k)
+                if st is None:
+                    continue
+                for d, c in st["days"].items():
+                    if d >= since_s:
+                        acc = days.setdefault(d, [0, 0, 0])
+                        for i in range(3):
+                            acc[i] += int(c[i])
+                if streak_open:
+                    streak += int(st["trail_fail"])
+                    streak_open = bool(st["all_fail"])
+                if last is None:
+                    last = st.get("last")
+                if last_apply is None:
+                    last_apply = st.get("last_apply")
+        return {"days": days, "consecutive_failures": streak, "last": last, "last_apply": last_apply}
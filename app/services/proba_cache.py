@@ -0,0 +1,183 @@
+# app/services/proba_cache.py
+"""
+推論確率（p_buy, p_sell）のキャッシュ（バックテスト / スイープ共通）
+
+- キー: モデルファイルの sha256 + feature_order + スケーラーファイルの sha256
+  （active_model.json の model_id ではなく中身で判定するので、同名で作り直したモデルは別キー）
+- 保存先: data/<SYM>/lgbm/proba_cache/<key 先頭16桁>.npz
+    time  : int64（ns）昇順・重複なし
+    fhash : uint64  特徴量行のハッシュ（同じ time でも特徴量が違えば再推論する）
+    probs : float64 (n, 2)  [p_buy, p_sell]（class_index_map 適用・0〜1 クリップ済み）
+- lookup() でヒットした行だけ埋め、残り（未キャッシュ or 特徴量が変わった行）の位置を返す。
+  呼び出し側は残りだけ推論して store() でマージする
+- 書き込みは ohlcv_store と同じロックファイル + 一時ファイル → os.replace（途中で落ちても壊れない）
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from app.services.data_guard import DATA_DIR
+from app.services.ohlcv_store import _FileLock
+
+CACHE_VERSION = 1
+
+# ファイル sha256 のプロセス内キャッシュ: path -> (size, mtime_ns, sha256)
+_file_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+_file_hash_lock = threading.Lock()
+
+
+def file_sha256(path: Union[str, Path]) -> str:
+    """ファイル内容の sha256（size / mtime_ns が変わらない限り再計算しない）。"""
+    p = Path(path)
+    st = p.stat()
+    key = str(p.resolve())
+    with _file_hash_lock:
+        hit = _file_hash_cache.get(key)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+    h = hashlib.sha256()
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _file_hash_lock:
+        _file_hash_cache[key] = (st.st_size, st.st_mtime_ns, digest)
+    return digest
+
+
+def cache_key(
+    model_path: Union[str, Path],
+    feature_order: Sequence[str],
+    scaler_path: Union[str, Path, None] = None,
+) -> str:
+    """モデル・特徴量順・スケーラーからキャッシュキー（sha256 hex）を作る。"""
+    parts = {
+        "version": CACHE_VERSION,
+        "model": file_sha256(model_path),
+        "feature_order": [str(c) for c in feature_order],
+        "scaler": file_sha256(scaler_path) if scaler_path else None,
+    }
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cache_dir(symbol: str) -> Path:
+    symbol_tag = str(symbol or "USDJPY").rstrip("-").upper().strip()
+    return DATA_DIR / symbol_tag / "lgbm" / "proba_cache"
+
+
+def feature_row_hashes(X: pd.DataFrame) -> np.ndarray:
+    """特徴量行ごとの uint64 ハッシュ（列順込み、値は丸めずにそのまま）。"""
+    return pd.util.hash_pandas_object(X.astype("float64"), index=False).to_numpy(dtype=np.uint64)
+
+
+def _to_ns(times: Union[pd.Series, np.ndarray, Sequence]) -> np.ndarray:
+    return pd.to_datetime(pd.Series(times)).to_numpy(dtype="datetime64[ns]").view("i8")
+
+
+class ProbaCache:
+    """1キー（モデル × 特徴量順 × スケーラー）× 1シンボル分の推論確率キャッシュ。"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._stat: Optional[Tuple[int, int]] = None
+        self._time = np.empty(0, dtype=np.int64)
+        self._fhash = np.empty(0, dtype=np.uint64)
+        self._probs = np.empty((0, 2), dtype=np.float64)
+
+    def __len__(self) -> int:
+        self._reload_if_changed()
+        return int(self._time.size)
+
+    def _reload_if_changed(self) -> None:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            self._stat = None
+            self._time = np.empty(0, dtype=np.int64)
+            self._fhash = np.empty(0, dtype=np.uint64)
+            self._probs = np.empty((0, 2), dtype=np.float64)
+            return
+        stat = (st.st_size, st.st_mtime_ns)
+        if stat == self._stat:
+            return
+        try:
+            with np.load(self.path) as z:
+                t, fh, pr = z["time"], z["fhash"], z["probs"]
+            if t.ndim != 1 or fh.shape != t.shape or pr.shape != (t.size, 2):
+                raise ValueError(f"shape mismatch time={t.shape} fhash={fh.shape} probs={pr.shape}")
+        except Exception as e:
+            logger.warning("[proba_cache] unreadable cache {} ({}); ignoring", self.path, e)
+            t = np.empty(0, dtype=np.int64)
+            fh = np.empty(0, dtype=np.uint64)
+            pr = np.empty((0, 2), dtype=np.float64)
+        self._time = t.astype(np.int64, copy=False)
+        self._fhash = fh.astype(np.uint64, copy=False)
+        self._probs = pr.astype(np.float64, copy=False)
+        self._stat = stat
+
+    def lookup(self, times, fhashes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns
+        -------
+        (probs, missing)
+            probs   : (n, 2)。ヒットしなかった行は NaN
+            missing : 推論が必要な行の位置（int の配列）
+        """
+        self._reload_if_changed()
+        t = _to_ns(times)
+        n = t.size
+        probs = np.full((n, 2), np.nan, dtype=np.float64)
+        if self._time.size == 0 or n == 0:
+            return probs, np.arange(n)
+        pos = np.searchsorted(self._time, t)
+        pos_c = np.minimum(pos, self._time.size - 1)
+        hit = (pos < self._time.size) & (self._time[pos_c] == t) & (self._fhash[pos_c] == fhashes)
+        probs[hit] = self._probs[pos_c[hit]]
+        return probs, np.flatnonzero(~hit)
+
+    def store(self, times, fhashes: np.ndarray, probs: np.ndarray) -> None:
+        """行を追加・上書き（同じ time は新しい値で置き換え）してファイルに書く。"""
+        t = _to_ns(times)
+        if t.size == 0:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with _FileLock(self.path.with_name(self.path.name + ".lock")):
+            self._reload_if_changed()
+            all_t = np.concatenate([self._time, t])
+            all_fh = np.concatenate([self._fhash, np.asarray(fhashes, dtype=np.uint64)])
+            all_pr = np.concatenate([self._probs, np.asarray(probs, dtype=np.float64).reshape(-1, 2)])
+            # 新しい行を優先して time で一意化（逆順にして最初の出現を残す）
+            rev_t = all_t[::-1]
+            _, first = np.unique(rev_t, return_index=True)
+            keep = all_t.size - 1 - first
+            tmp = self.path.with_name(self.path.name + ".tmp.npz")
+            np.savez(tmp, time=all_t[keep], fhash=all_fh[keep], probs=all_pr[keep])
+            os.replace(tmp, self.path)
+            self._stat = None
+            self._reload_if_changed()
+
+
+_cache: Dict[str, ProbaCache] = {}
+_cache_lock = threading.Lock()
+
+
+def get_proba_cache(symbol: str, key: str, root: Optional[Path] = None) -> ProbaCache:
+    """(symbol, key) の ProbaCache（プロセス内で使い回す）。"""
+    path = Path(root or cache_dir(symbol)) / f"{key[:16]}.npz"
+    k = str(path)
+    with _cache_lock:
+        c = _cache.get(k)
+        if c is None:
+            c = ProbaCache(path)
+            _cache[k] = c
+        return c
+
@@ -6,6 +6,7 @@ from dataclasses import dataclass
 from typing import Iterable, Mapping, Optional, Sequence, Union
 
 from app.services.decision_log import load_recent_decisions
+from app.services.decision_store import decision_columns
 
 import math
 
@@ -339,7 +340,11 @@ def compute_recent_kpi_from_decisions(
     RecentKpiResult
         KPI result even when there are zero pnl trades.
     """
-    df = load_recent_decisions(limit=None)
+    if profit_field in decision_columns():
+        # 必要な列だけ読む（コンパクション済みの日は Parquet の2列だけ）
+        df = load_recent_decisions(limit=None, columns=["ts_jst", profit_field])
+    else:
+        df = load_recent_decisions(limit=None)
 
     if df.empty or profit_field not in df.columns:
         return compute_kpi_from_trades(
@@ -21,6 +21,7 @@ if str(ROOT) not in sys.path:
 
 from app.services.job_scheduler import JobScheduler
 from app.services.execution_service import ExecutionService
+from app.services.model_registry import get_model_registry
 from app.services import trade_state
 
 _RUNTIME_FLAGS_PATH = Path("config/runtime_flags.json")
@@ -70,6 +71,8 @@ def main(poll_sec: float = 1.0) -> int:
         scheduler = JobScheduler()
         logger.info("[SchedulerDaemon] JobScheduler initialized (jobs={})", len(scheduler.get_jobs()))
         exec_service = ExecutionService()
+        # モデル昇格（active_model.json の更新）をバックグラウンドでロードしておく（バー処理側は参照の差し替えだけ）
+        get_model_registry().start_watcher()
 
         # メインループ
         while True:
@@ -11,6 +11,7 @@ from loguru import logger as loguru_logger
 
 from app.core import mt5_client
 from app.core.config_loader import load_config
+from app.core.config_snapshot import get_config_snapshot
 from app.services import trade_state
 from app.services.circuit_breaker import CircuitBreaker
 from app.services.event_store import EVENT_STORE
@@ -452,8 +453,7 @@ class TradeService:
         return self.pos_guard.can_open()
 
     def decide_entry_from_probs(self, p_buy: float, p_sell: float) -> Dict:
-        conf = load_config()
-        entry_cfg = conf.get("entry", {}) if isinstance(conf, dict) else {}
+        entry_cfg = get_config_snapshot(refresh=False).entry
         th = float(entry_cfg.get("prob_threshold", entry_cfg.get("threshold_buy", 0.60)))
         edge = float(entry_cfg.get("entry_min_edge", entry_cfg.get("min_edge", 0.0)))
         bias = (entry_cfg.get("side_bias") or "auto").lower()
@@ -1515,8 +1515,7 @@ def post_fill_grace_active() -> bool:
     if _trade_last_fill_ts is None:
         return False
 
-    conf = load_config()
-    runtime_cfg = conf.get("runtime", {}) if isinstance(conf, dict) else {}
+    runtime_cfg = get_config_snapshot(refresh=False).runtime
     grace_sec = int((runtime_cfg or {}).get("post_fill_grace_sec", 0) or 0)
     if grace_sec <= 0:
         return False
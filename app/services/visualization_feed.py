@@ -0,0 +1,357 @@
+from __future__ import annotations
+
+import bisect
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Optional
+
+from loguru import logger
+
+from app.services.ohlcv_update_service import ensure_lgbm_proba_uptodate
+from app.services.visualization_service import get_recent_lgbm_series, get_recent_ohlcv
+
+OHLC_COLUMNS = ("open", "high", "low", "close")
+LGBM_KEYS = ("prob_buy", "prob_sell")
+
+
+@dataclass
+class VizDelta:
+    """
+    VizFeed から可視化タブへ渡す差分
+
+    - reset=True : ohlc / lgbm は表示範囲全体（タブ側のバッファを置き換える）
+    - reset=False: ohlc は ohlc_start 以降、lgbm は lgbm_start 以降の行だけ
+      （タブ側のバッファの先頭から *_drop 行を落とし、start 位置で切って後ろに繋げる。
+        start は落とした後の index。変化が無ければ行は空）
+    表示範囲は count 本（左パンで prepend した後はその本数）に保つため、新しいバーが増えた分だけ
+    先頭を落とす（ohlc_drop / lgbm_drop）。
+    ohlc / lgbm は get_recent_ohlcv / get_recent_lgbm_series と同じ dict 形式。
+    """
+
+    key: tuple[str, str]
+    count: int
+    seq: int
+    base_seq: int
+    reset: bool
+    ohlc: dict[str, Any] = field(default_factory=dict)
+    ohlc_start: int = 0
+    lgbm: dict[str, Any] = field(default_factory=dict)
+    lgbm_start: int = 0
+    ohlc_drop: int = 0
+    lgbm_drop: int = 0
+    # 表示を描き直す必要があるか（reset、または start 以降が変わった／切り詰められた／先頭を落とした）
+    changed: bool = True
+
+
+def merge_tail(base: Optional[dict], start: int, tail: dict) -> dict:
+    """
+    base の列（time / open..close / series[*]）を start 位置で切り、tail の行を後ろに繋げた dict を返す。
+    ok / reason / path などのメタ情報は tail の値で上書きする（base は変更しない）。
+    """
+    out = dict(base or {})
+    for k, v in tail.items():
+        if k not in ("time", "series", *OHLC_COLUMNS):
+            out[k] = v
+    start = max(0, int(start))
+    times = list(out.get("time") or [])[:start] + list(tail.get("time") or [])
+    out["time"] = times
+    for col in OHLC_COLUMNS:
+        if col in tail or col in out:
+            out[col] = list(out.get(col) or [])[:start] + list(tail.get(col) or [])
+    if isinstance(tail.get("series"), dict) or isinstance(out.get("series"), dict):
+        base_series = out.get("series") if isinstance(out.get("series"), dict) else {}
+        tail_series = tail.get("series") if isinstance(tail.get("series"), dict) else {}
+        out["series"] = {
+            k: list(base_series.get(k) or [])[:start] + list(tail_series.get(k) or [])
+            for k in set(base_series) | set(tail_series)
+        }
+    out["rows"] = len(times)
+    return out
+
+
+def shift_tail(base: Optional[dict], drop: int, start: int, tail: dict) -> dict:
+    """base の先頭から drop 行を落とした上で merge_tail(base, start, tail) した dict（VizDelta の適用）"""
+    return merge_tail(_slice_rows(base or {}, max(0, int(drop))), start, tail)
+
+
+def _slice_rows(d: dict, start: int) -> dict:
+    """d の列を start 以降だけにした dict（メタ情報はそのまま）"""
+    out = {k: v for k, v in d.items() if k not in ("time", "series", *OHLC_COLUMNS)}
+    out["time"] = list(d.get("time") or [])[start:]
+    for col in OHLC_COLUMNS:
+        if col in d:
+            out[col] = list(d.get(col) or [])[start:]
+    if isinstance(d.get("series"), dict):
+        out["series"] = {k: list(v or [])[start:] for k, v in d["series"].items()}
+    out["rows"] = len(out["time"])
+    return out
+
+
+def _first_diff(old: dict, new: dict, start: int) -> int:
+    """old の start 以降と new（start 以降の行）が最初に食い違う位置（old 上の index）。同じなら len(old)"""
+    old_t = list(old.get("time") or [])
+    new_t = list(new.get("time") or [])
+    cols = [c for c in OHLC_COLUMNS if c in new]
+    old_s = old.get("series") if isinstance(old.get("series"), dict) else {}
+    new_s = new.get("series") if isinstance(new.get("series"), dict) else {}
+    for j, t in enumerate(new_t):
+        i = start + j
+        if i >= len(old_t) or old_t[i] != t:
+            return i
+        for c in cols:
+            if (old.get(c) or [None] * len(old_t))[i] != new[c][j]:
+                return i
+        for k, v in new_s.items():
+            ov = old_s.get(k)
+            if not isinstance(ov, list) or i >= len(ov) or ov[i] != v[j]:
+                return i
+    if start + len(new_t) < len(old_t):
+        return start + len(new_t)
+    return len(old_t)
+
+
+class VizCache:
+    """
+    可視化タブ側のバッファ（VizFeed の共有バッファの写し。Qt / matplotlib に依存しない）
+
+    VizFeed から届いた VizDelta を順に apply すると VizFeed.snapshot() と同じ内容になる。
+    base_seq が合わない差分（取りこぼし）は積まずに resync を立てる（次の依頼で全体を取り直す）。
+    """
+
+    def __init__(self) -> None:
+        self.ohlc: Optional[dict[str, Any]] = None
+        self.lgbm: Optional[dict[str, Any]] = None
+        self.key: Optional[tuple[str, str]] = None
+        self.count: Optional[int] = None
+        self.seq: int = -1
+        self.resync: bool = False
+
+    def apply(self, delta: VizDelta) -> Optional[str]:
+        """
+        delta を積む。戻り値は描き直しの種類
+        "full"（全体を描き直す）/ "tail"（delta の drop / start 以降だけ）/ None（描き直し不要）
+        """
+        if delta.reset:
+            self.ohlc = delta.ohlc
+            self.lgbm = delta.lgbm
+            self.key = delta.key
+            self.count = int(delta.count)
+            self.seq = delta.seq
+            return "full"
+        if delta.base_seq != self.seq:
+            self.resync = True
+            return None
+        self.seq = delta.seq
+        if not delta.changed:
+            return None
+        self.ohlc = shift_tail(self.ohlc, delta.ohlc_drop, delta.ohlc_start, delta.ohlc)
+        self.lgbm = shift_tail(self.lgbm, delta.lgbm_drop, delta.lgbm_start, delta.lgbm)
+        return "tail"
+
+
+class VizFeed:
+    """
+    可視化タブ用のデータ供給（ワーカースレッドから呼ぶ前提。GUI スレッドでは I/O しない）
+
+    - 共有バッファ（OHLC / proba）を持ち、2回目以降は末尾の新しいバー・推論値だけを読み足す
+    - OHLC は get_recent_ohlcv(since=最終バー) で列指向ストアから差分だけ読む
+    - proba は ensure_lgbm_proba_uptodate / get_recent_lgbm_series を最後に埋まった時刻以降に絞って呼ぶ
+    - 表示範囲は count 本に保つ（新しいバーの分だけ先頭を落とす。左パンの prepend 後はその本数）
+    - 結果は VizDelta（変化した末尾と、先頭から落とした行数）で返す
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key: Optional[tuple[str, str]] = None
+        self._n: int = 0
+        self._window: int = 0
+        self._seq: int = 0
+        self._ohlc: dict[str, Any] = {}
+        self._lgbm: dict[str, Any] = {}
+
+    def snapshot(self) -> tuple[dict[str, Any], dict[str, Any]]:
+        """共有バッファのコピー（ohlc, lgbm）"""
+        with self._lock:
+            return _slice_rows(self._ohlc, 0), _slice_rows(self._lgbm, 0)
+
+    def poll(self, symbol: str, timeframe: str, count: int, *, reload: bool = False) -> VizDelta:
+        """
+        表示データを更新して差分を返す
+
+        reload=True またはシンボル/TF が前回と違う場合は全体を取り直す（reset）。
+        それ以外は末尾の新しいバー・推論値だけを読み足す。
+        """
+        key = (str(symbol), str(timeframe))
+        with self._lock:
+            if reload or key != self._key or not bool(self._ohlc.get("ok")):
+                return self._load_full(key, int(count))
+            return self._load_tail()
+
+    def prepend(self, symbol: str, timeframe: str, bars: int) -> Optional[VizDelta]:
+        """
+        保持している最古バーより過去を bars 本足す（左パン用）。足せた場合は reset の差分を返す
+        """
+        key = (str(symbol), str(timeframe))
+        with self._lock:
+            times = self._ohlc.get("time") if self._key == key else None
+            if not (isinstance(times, list) and times and isinstance(times[0], datetime)):
+                return None
+            min_time = times[0]
+            older = get_recent_ohlcv(symbol=key[0], timeframe=key[1], count=int(bars), until=min_time)
+            if not (isinstance(older, dict) and bool(older.get("ok"))):
+                return None
+            ot = older.get("time")
+            if not (isinstance(ot, list) and ot):
+                return None
+            # 重複（境界）を避けて strictly older のみ prepend
+            keep = [i for i, t in enumerate(ot) if isinstance(t, datetime) and t < min_time]
+            if not keep:
+                return None
+            ohlc = dict(self._ohlc)
+            ohlc["time"] = [ot[i] for i in keep] + list(times)
+            for col in OHLC_COLUMNS:
+                arr = older.get(col) if isinstance(older.get(col), list) else []
+                picked = []
+                for i in keep:
+                    try:
+                        picked.append(float(arr[i]))
+                    except Exception:
+                        picked.append(0.0)
+                ohlc[col] = picked + list(self._ohlc.get(col) or [])
+            ohlc["rows"] = len(ohlc["time"])
+            self._ohlc = ohlc
+            self._window = max(self._window, ohlc["rows"])
+            self._lgbm = self._fetch_lgbm(key, ohlc, since=None)
+            logger.info(
+                "[viz] ohlc prepend: added={} total_rows={} until={}", len(keep), ohlc["rows"], str(min_time)
+            )
+            return self._delta(key, reset=True)
+
+    # ------------------------------------------------------------------
+    def _delta(
+        self,
+        key: tuple[str, str],
+        *,
+        reset: bool,
+        ohlc_start: int = 0,
+        lgbm_start: int = 0,
+        ohlc_drop: int = 0,
+        lgbm_drop: int = 0,
+        changed: bool = True,
+    ) -> VizDelta:
+        base = self._seq
+        self._seq += 1
+        return VizDelta(
+            key=key,
+            count=self._n,
+            seq=self._seq,
+            base_seq=base,
+            reset=reset,
+            ohlc=_slice_rows(self._ohlc, ohlc_start),
+            ohlc_start=ohlc_start,
+            lgbm=_slice_rows(self._lgbm, lgbm_start),
+            lgbm_start=lgbm_start,
+            ohlc_drop=ohlc_drop,
+            lgbm_drop=lgbm_drop,
+            changed=changed,
+        )
+
+    def _fetch_lgbm(self, key: tuple[str, str], ohlc: dict, *, since: Optional[datetime]) -> dict:
+        sym, tf = key
+        times = ohlc.get("time") if bool(ohlc.get("ok")) else None
+        t_min = times[0] if isinstance(times, list) and times else None
+        t_max = times[-1] if isinstance(times, list) and times else None
+        start = since if since is not None else t_min
+        # proba CSVの自動更新（M5のみ、表示範囲を埋める）
+        if tf == "M5" and start is not None and t_max is not None:
+            try:
+                ensure_lgbm_proba_uptodate(symbol=sym, timeframe=tf, start_time=start, end_time=t_max)
+            except Exception as e:
+                logger.warning(f"[viz] ensure_lgbm_proba_uptodate failed: {e}")
+        return get_recent_lgbm_series(
+            symbol=sym, count=max(10, int(self._n)), keys=LGBM_KEYS, start_time=start, end_time=t_max
+        )
+
+    def _load_full(self, key: tuple[str, str], count: int) -> VizDelta:
+        self._key = key
+        self._n = count
+        self._window = count
+        ohlc = get_recent_ohlcv(symbol=key[0], timeframe=key[1], count=count)
+        self._ohlc = ohlc if isinstance(ohlc, dict) else {"ok": False, "reason": "ohlc_invalid"}
+        self._lgbm = self._fetch_lgbm(key, self._ohlc, since=None)
+        return self._delta(key, reset=True)
+
+    def _load_tail(self) -> VizDelta:
+        key = self._key
+        assert key is not None
+        times = list(self._ohlc.get("time") or [])
+        prev_lgbm_rows = len(self._lgbm.get("time") or [])
+        ohlc_start = len(times)
+        lgbm_flip = False
+        if times:
+            # 最終バー（time >= 最終バー）から読み、実際に変わった位置は比較で求める
+            newer = get_recent_ohlcv(symbol=key[0], timeframe=key[1], count=self._n, since=times[-1])
+            if isinstance(newer, dict) and bool(newer.get("ok")) and newer.get("time"):
+                ohlc_start = _first_diff(self._ohlc, newer, len(times) - 1)
+                self._ohlc = merge_tail(self._ohlc, len(times) - 1, newer)
+
+        lgbm_times = list(self._lgbm.get("time") or []) if bool(self._lgbm.get("ok")) else []
+        if not lgbm_times:
+            # proba がまだ無い / 読めていない → 表示範囲全体で取り直す
+            lgbm_new = self._fetch_lgbm(key, self._ohlc, since=None)
+            lgbm_start = _first_diff(self._lgbm, lgbm_new, 0)
+            lgbm_flip = bool(lgbm_new.get("ok")) != bool(self._lgbm.get("ok"))
+            self._lgbm = lgbm_new
+        else:
+            lgbm_new = self._fetch_lgbm(key, self._ohlc, since=lgbm_times[-1])
+            if bool(lgbm_new.get("ok")):
+                start = bisect.bisect_left(lgbm_times, lgbm_times[-1])
+                lgbm_start = _first_diff(self._lgbm, lgbm_new, start)
+                self._lgbm = merge_tail(self._lgbm, start, lgbm_new)
+            else:
+                # 一時的な読み込み失敗は直前の表示を維持
+                lgbm_start = len(lgbm_times)
+        changed = (
+            lgbm_flip
+            or ohlc_start < max(len(times), len(self._ohlc.get("time") or []))
+            or lgbm_start < max(prev_lgbm_rows, len(self._lgbm.get("time") or []))
+        )
+
+        # 表示範囲を保つ: 増えた分だけ先頭を落とし、proba も OHLC の最古バーより前を落とす
+        ohlc_drop = lgbm_drop = 0
+        rows = len(self._ohlc.get("time") or [])
+        if self._window > 0 and rows > self._window:
+            ohlc_drop = rows - self._window
+            self._ohlc = _slice_rows(self._ohlc, ohlc_drop)
+            ohlc_start = max(0, ohlc_start - ohlc_drop)
+            lgbm_times = list(self._lgbm.get("time") or [])
+            t0 = self._ohlc["time"][0]
+            if lgbm_times and isinstance(t0, datetime):
+                lgbm_drop = bisect.bisect_left(lgbm_times, t0)
+            if lgbm_drop:
+                self._lgbm = _slice_rows(self._lgbm, lgbm_drop)
+                lgbm_start = max(0, lgbm_start - lgbm_drop)
+            changed = True
+        return self._delta(
+            key,
+            reset=False,
+            ohlc_start=ohlc_start,
+            lgbm_start=lgbm_start,
+            ohlc_drop=ohlc_drop,
+            lgbm_drop=lgbm_drop,
+            changed=changed,
+        )
+
+
+_FEED: Optional[VizFeed] = None
+_FEED_LOCK = threading.Lock()
+
+
+def get_viz_feed() -> VizFeed:
+    """プロセス共通の VizFeed"""
+    global _FEED
+    with _FEED_LOCK:
+        if _FEED is None:
+            _FEED = VizFeed()
+        return _FEED
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import json
 from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
@@ -12,6 +11,7 @@ from loguru import logger
 
 from app.core.config_loader import load_config
 from app.services import data_guard
+from app.services.jsonl_tail import read_jsonl_tail
 
 
 _VIZ_LGBM_EMPTY_LOGGED: set[tuple[str, str]] = set()
@@ -55,6 +55,7 @@ def get_recent_ohlcv(
     timeframe: str,
     count: int = 120,
     until: datetime | None = None,
+    since: datetime | None = None,
 ) -> dict[str, Any]:
     """
     表示用の OHLCV を返す。
@@ -62,6 +63,8 @@ def get_recent_ohlcv(
     - 現段階は既存資産（data/.../ohlcv CSV）を優先（新規依存追加なし）
     - until が None の場合: 直近 N 本
     - until が指定された場合: until より過去（time < until）の中から末尾 N 本
+    - since が指定された場合: since 以降（time >= since）の全行（count は無視。
+      差分取得用で、CSV 全体ではなく列指向ストアから範囲だけ読む）
     """
     symbol_tag = str(symbol or "USDJPY").rstrip("-").upper().strip()
     tf = str(timeframe or "M5").upper().strip()
@@ -80,7 +83,12 @@ def get_recent_ohlcv(
         }
 
     try:
-        df = pd.read_csv(csvp)
+        if isinstance(since, datetime):
+            df = data_guard.read_ohlcv(symbol_tag, tf, start=pd.Timestamp(since))
+            if df.empty:
+                df = pd.DataFrame({"time": []})
+        else:
+            df = pd.read_csv(csvp)
         if "time" not in df.columns:
             return {
                 "ok": False,
@@ -99,7 +107,7 @@ def get_recent_ohlcv(
         df = df.sort_values("time")
         if isinstance(until, datetime):
             df = df[df["time"] < pd.Timestamp(until)]
-        tail = df.tail(n)
+        tail = df if isinstance(since, datetime) else df.tail(n)
         out = {
             "ok": True,
             "symbol_tag": symbol_tag,
@@ -133,25 +141,8 @@ def _latest_decisions_log_path(project_root: Optional[Path] = None) -> Optional[
     return files[0] if files else None
 
 
-def _read_tail_lines(path: Path, *, max_bytes: int = 2_000_000) -> list[str]:
-    try:
-        size = path.stat().st_size
-    except Exception:
-        size = 0
-    start = max(0, int(size) - int(max_bytes))
-    try:
-        with path.open("rb") as f:
-            f.seek(start)
-            data = f.read()
-        # 途中から読むので先頭は行途中の可能性あり → 最初の改行まで捨てる
-        if start > 0:
-            nl = data.find(b"\n")
-            if nl >= 0:
-                data = data[nl + 1 :]
-        text = data.decode("utf-8", errors="replace")
-        return [ln for ln in text.splitlines() if ln.strip()]
-    except Exception:
-        return []
+# decisions ログの末尾から読むレコード数（シンボル別バッファの材料）
+_DECISIONS_TAIL_RECORDS = 5000
 
 
 @dataclass
@@ -184,14 +175,8 @@ class _DecisionsCache:
             self.path = path
             self.mtime_ns = mtime_ns
 
-            lines = _read_tail_lines(path)
-            for ln in lines:
-                try:
-                    rec = json.loads(ln)
-                except Exception:
-                    continue
-                if not isinstance(rec, dict):
-                    continue
+            # 末尾から読み（追記分以外は jsonl_tail のキャッシュ）、古い順に積む
+            for rec in reversed(read_jsonl_tail(path, _DECISIONS_TAIL_RECORDS)):
                 sym = str(rec.get("symbol") or "")
                 if not sym:
                     continue
@@ -4,12 +4,13 @@ from pathlib import Path
 import json
 import pandas as pd
 import numpy as np
-import math
 import joblib
 import pickle
 import binascii
 from typing import Tuple, Dict, Any
 
+from app.core.config_snapshot import get_config_snapshot_service, thaw
+
 PROJECT_ROOT = Path(__file__).resolve().parents[2]
 
 def _load_model_generic(path_str: str):
@@ -83,6 +84,17 @@ def _load_model_generic(path_str: str):
 # =====================================================
 # active_model.json の読み込み
 # =====================================================
+def _active_meta_from_snapshot() -> Dict[str, Any]:
+    """models/active_model.json の解析済みスナップショット（可変コピー。size / mtime が変わったときだけ読み直す。取れなければ {}）"""
+    try:
+        svc = get_config_snapshot_service()
+        if svc.active_model_path != PROJECT_ROOT / "models" / "active_model.json":
+            return {}
+        return thaw(svc.get().active_model)
+    except Exception:
+        return {}
+
+
 def load_active_model() -> Tuple[str, str, float, Dict[str, Any]]:
     """
     モデルの唯一の真実は `models/active_model.json` とする（T-50 方針）。
@@ -93,7 +105,7 @@ def load_active_model() -> Tuple[str, str, float, Dict[str, Any]]:
     if not meta.exists():
         raise FileNotFoundError(f"{meta} not found.")
 
-    j = json.loads(meta.read_text(encoding="utf-8"))
+    j = _active_meta_from_snapshot() or json.loads(meta.read_text(encoding="utf-8"))
     model_name = str(j.get("model_name", "")).strip()
     threshold = float(j.get("best_threshold", 0.5))
     params = j.get("params", {}) or {}
@@ -122,7 +134,10 @@ def get_active_model_meta() -> dict:
     軽量な実装: active_model.json を読み込んで返す。
     backtest_run.py で使用（ai_service 依存を避けるため）。
     """
-    # 唯一の真実: models/active_model.json を最優先
+    # 唯一の真実: models/active_model.json を最優先（解析済みスナップショットを使う）
+    active = _active_meta_from_snapshot()
+    if active:
+        return active
     candidates = [
         PROJECT_ROOT / "models" / "active_model.json",
         PROJECT_ROOT / "config" / "active_model.json",
@@ -176,100 +191,18 @@ def validate_feature_order_fail_fast(df_cols: list[str], expected: list[str], co
 # =====================================================
 # 特徴量レシピ
 # =====================================================
-def _rsi(x: pd.Series, period: int = 14) -> pd.Series:
-    delta = x.diff()
-    up = (delta.clip(lower=0)).rolling(period).mean()
-    down = (-delta.clip(upper=0)).rolling(period).mean()
-    rs = up / (down + 1e-12)
-    return 100 - (100 / (1 + rs))
-
-def _ema(x: pd.Series, span: int) -> pd.Series:
-    return x.ewm(span=span, adjust=False).mean()
-
-def _bbands(x: pd.Series, window: int = 20, n_sigma: float = 2.0):
-    ma = x.rolling(window).mean()
-    sd = x.rolling(window).std(ddof=0)
-    upper = ma + n_sigma * sd
-    lower = ma - n_sigma * sd
-    return upper, lower
-
-def _stoch(high: pd.Series, low: pd.Series, close: pd.Series, k_win: int = 14, d_win: int = 3):
-    ll = low.rolling(k_win).min()
-    hh = high.rolling(k_win).max()
-    k = (close - ll) / (hh - ll + 1e-12) * 100
-    d = k.rolling(d_win).mean()
-    return k, d
+# 定義本体は core.ai.feature_registry（学習・バックテスト・Live で共通）
+from core.ai.feature_registry import get_recipe  # noqa: E402
+
 
 def build_features_recipe(df: pd.DataFrame, name: str) -> pd.DataFrame:
     """
     内蔵レシピで特徴量を作成。time列は残します。
     name:
       - "ohlcv_tech_v1": 代表的なテクニカル群
+    レシピの中身は core.ai.feature_registry に登録されたもの。
     """
-    out = df.copy()
-    close = out["close"].astype(float)
-    high = out["high"].astype(float)
-    low  = out["low"].astype(float)
-
-    if name == "ohlcv_tech_v1":
-        out["ret1"]  = close.pct_change()
-        out["ret5"]  = close.pct_change(5)
-        out["ret20"] = close.pct_change(20)
-
-        out["sma_10"] = close.rolling(10, min_periods=1).mean()
-        out["sma_50"] = close.rolling(50, min_periods=1).mean()
-        out["ema_20"] = _ema(close, 20)
-
-        out["rsi_14"] = _rsi(close, 14)
-        u,l = _bbands(close, 20, 2.0)
-        out["bb_high_20_2"] = u
-        out["bb_low_20_2"]  = l
-
-        k,d = _stoch(high, low, close, 14, 3)
-        out["stoch_k_14_3"] = k
-        out["stoch_d_14_3"] = d
-
-        # シンプルなATR風（高低差のEMA）
-        tr = (high - low).abs()
-        out["atr_14"] = tr.rolling(14).mean()
-
-        # ボラ指標
-        out["vol_pct_20"] = close.pct_change().rolling(20).std() * math.sqrt(20)
-
-        # -------------------------------------------------
-        # feature name alias / compatibility (最小差分)
-        # active_model.json の expected_features（例: ret_1 等）に合わせて列を補完する。
-        # - 既存列は壊さない（不足分のみ追加）
-        # - “推測で別名を当てる”のではなく、現レシピで確定している列/元データ列から埋める
-        # -------------------------------------------------
-        # ret_1 / ret_5: 既存の ret1 / ret5 から copy
-        if "ret_1" not in out.columns and "ret1" in out.columns:
-            out["ret_1"] = out["ret1"]
-        if "ret_5" not in out.columns and "ret5" in out.columns:
-            out["ret_5"] = out["ret5"]
-
-        # ema_5 / ema_ratio: close と ema_20（本レシピ既存）から補完
-        if "ema_5" not in out.columns:
-            out["ema_5"] = _ema(close, 5)
-        if "ema_ratio" not in out.columns:
-            out["ema_ratio"] = out["ema_5"] / (out["ema_20"] + 1e-12)
-
-        # range: 高低差（本レシピ内でも tr として使用している値）を列として残す
-        if "range" not in out.columns:
-            out["range"] = (high - low).abs()
-
-        # vol_chg: tick_volume / real_volume がある場合のみ生成
-        if "vol_chg" not in out.columns:
-            if "tick_volume" in out.columns:
-                out["vol_chg"] = pd.to_numeric(out["tick_volume"], errors="coerce").pct_change()
-            elif "real_volume" in out.columns:
-                out["vol_chg"] = pd.to_numeric(out["real_volume"], errors="coerce").pct_change()
-
-    else:
-        raise ValueError(f"unknown feature recipe: {name}")
-
-    out = out.dropna().reset_index(drop=True)
-    return out
+    return get_recipe(name).build(df)
 
 def build_features(df: pd.DataFrame, params: Dict[str, Any]) -> pd.DataFrame:
     """外部モデル・内蔵双方で使う特徴量ビルドの統一入口"""
@@ -472,9 +405,13 @@ def predict_signals(kind: str, payload, df_feat: pd.DataFrame, threshold: float
 
     else:
         # 外部モデル推論
-        model = _load_model_generic(payload)
+        # モデル・スケーラーはプロセス内で1回だけロード（ファイル内容が変わったら読み直す）
+        from app.services.model_registry import get_model_registry
+
+        loaded = get_model_registry().load(payload, params)
+        model = loaded.model
         X = _ensure_feature_order(df_feat, params)
-        scaler = _load_scaler_if_any(params)
+        scaler = loaded.scaler
         if scaler is not None:
             Xv = X.values
             try:
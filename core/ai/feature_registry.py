@@ -0,0 +1,433 @@
+# core/ai/feature_registry.py
+"""
+特徴量レジストリ（レシピごとの特徴量定義を1か所にまとめる）
+
+- Feature: 名前 / lookback（値が決まるのに必要な過去バー数）/ 計算式の識別子 spec / ベクトル化実装
+- Recipe : Feature の並び + 仕上げ（dropna・列の選び方など、従来の各 build_features の出力形式）
+- recipe.hash: 特徴量の (name, lookback, spec, version) から作る sha256。
+  計算式を変えたら spec か version を変える（→ 特徴量ストアのキャッシュも別物になる）
+
+登録済みレシピ（従来の実装と同じ値・同じ出力形式）:
+- "ohlcv_tech_v1"      : app.strategies.ai_strategy.build_features_recipe
+- "core_v1"            : core.ai.features.build_features
+- "weekly_retrain_v1"  : scripts/weekly_retrain.build_features
+- "walkforward_v1"     : scripts/walkforward_retrain.build_features（通常モード）
+
+EWM 系は過去の影響が指数減衰するだけなので lookback は EWM_LOOKBACK（この本数あれば
+全履歴から計算した値と数値一致する。core.ai.incremental_features と同じ前提）。
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from core.ai.incremental_features import DEFAULT_SEED_BARS
+
+EWM_LOOKBACK = DEFAULT_SEED_BARS
+
+# レジストリ全体の版（ハッシュの計算方法を変えたら上げる）
+REGISTRY_VERSION = 1
+
+
+# =====================================================
+# ベクトル化実装（各レシピで共有）
+# =====================================================
+def ema(x: pd.Series, span: int) -> pd.Series:
+    return x.ewm(span=span, adjust=False).mean()
+
+
+def rsi_sma(x: pd.Series, period: int = 14, eps: float = 1e-12) -> pd.Series:
+    """単純移動平均版 RSI（ohlcv_tech_v1）。"""
+    delta = x.diff()
+    up = (delta.clip(lower=0)).rolling(period).mean()
+    down = (-delta.clip(upper=0)).rolling(period).mean()
+    rs = up / (down + eps)
+    return 100 - (100 / (1 + rs))
+
+
+def rsi_wilder(x: pd.Series, period: int = 14, eps: float = 1e-12) -> pd.Series:
+    """Wilder 平滑（ewm alpha=1/period）版 RSI（core_v1 / weekly_retrain_v1）。"""
+    delta = x.diff()
+    up = delta.clip(lower=0)
+    down = -delta.clip(upper=0)
+    roll_up = up.ewm(alpha=1 / period, adjust=False).mean()
+    roll_down = down.ewm(alpha=1 / period, adjust=False).mean()
+    rs = roll_up / (roll_down + eps)
+    return 100 - (100 / (1 + rs))
+
+
+def bbands(x: pd.Series, window: int = 20, n_sigma: float = 2.0) -> Tuple[pd.Series, pd.Series]:
+    ma = x.rolling(window).mean()
+    sd = x.rolling(window).std(ddof=0)
+    return ma + n_sigma * sd, ma - n_sigma * sd
+
+
+def stoch(high: pd.Series, low: pd.Series, close: pd.Series, k_win: int = 14, d_win: int = 3):
+    ll = low.rolling(k_win).min()
+    hh = high.rolling(k_win).max()
+    k = (close - ll) / (hh - ll + 1e-12) * 100
+    d = k.rolling(d_win).mean()
+    return k, d
+
+
+def true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    prev_close = close.shift(1)
+    tr1 = high - low
+    tr2 = (high - prev_close).abs()
+    tr3 = (low - prev_close).abs()
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+
+
+def adx(df: pd.DataFrame, period: int = 14) -> pd.Series:
+    high, low, close = df["high"], df["low"], df["close"]
+    up_arr = np.asarray(high.diff(), dtype=float)
+    down_arr = np.asarray(-low.diff(), dtype=float)
+    plus_dm = np.where((up_arr > down_arr) & (up_arr > 0), up_arr, 0.0)
+    minus_dm = np.where((down_arr > up_arr) & (down_arr > 0), down_arr, 0.0)
+
+    tr = true_range(high, low, close).astype(float)
+    tr_smooth = tr.rolling(period).sum()
+    plus_series = pd.Series(plus_dm, index=df.index)
+    minus_series = pd.Series(minus_dm, index=df.index)
+    plus_di = 100 * plus_series.rolling(period).sum() / (tr_smooth + 1e-12)
+    minus_di = 100 * minus_series.rolling(period).sum() / (tr_smooth + 1e-12)
+
+    dx = ((plus_di - minus_di).abs() / ((plus_di + minus_di) + 1e-12)) * 100
+    return dx.rolling(period).mean()
+
+
+def bb_percent_b(close: pd.Series, period: int = 20, k: float = 2.0) -> pd.Series:
+    ma = close.rolling(period).mean()
+    sd = close.rolling(period).std(ddof=0)
+    upper = ma + k * sd
+    lower = ma - k * sd
+    bbp = (close - lower) / ((upper - lower) + 1e-12)
+    return bbp.clip(0, 1)
+
+
+def wick_body_ratios(df: pd.DataFrame) -> pd.DataFrame:
+    open_, high, low, close = df["open"], df["high"], df["low"], df["close"]
+    body = (close - open_).abs()
+    upper_wick = (high - np.maximum(open_, close)).clip(lower=0)
+    lower_wick = (np.minimum(open_, close) - low).clip(lower=0)
+    total = (high - low).replace(0, np.nan)
+    return pd.DataFrame(
+        {
+            "upper_wick_ratio": (upper_wick / total).fillna(0),
+            "lower_wick_ratio": (lower_wick / total).fillna(0),
+            "body_ratio": (body / total).fillna(0),
+        }
+    )
+
+
+def zscore(series: pd.Series, win: int = 20) -> pd.Series:
+    mean = series.rolling(win).mean()
+    sd = series.rolling(win).std(ddof=0)
+    return (series - mean) / (sd + 1e-12)
+
+
+def atr_wilder(high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14) -> pd.Series:
+    """True Range の ewm(alpha=1/period)（weekly_retrain_v1）。"""
+    return true_range(high, low, close).ewm(alpha=1 / period, adjust=False).mean()
+
+
+# =====================================================
+# Feature / Recipe
+# =====================================================
+# 作業中の DataFrame（入力列 + それまでに作った特徴量）→ 1列。None を返したらその特徴量は作らない
+FeatureFn = Callable[[pd.DataFrame], Optional[pd.Series]]
+
+
+@dataclass(frozen=True)
+class Feature:
+    name: str
+    lookback: int
+    spec: str
+    fn: FeatureFn = field(compare=False, repr=False)
+    version: int = 1
+    # False: 作業中の DataFrame に同名列が既にあれば作らない（互換エイリアス用）
+    overwrite: bool = True
+
+    def key(self) -> List:
+        return [self.name, int(self.lookback), self.spec, int(self.version)]
+
+
+@dataclass(frozen=True)
+class Recipe:
+    name: str
+    features: Tuple[Feature, ...]
+    # (入力 + 特徴量の DataFrame, 作った特徴量名) → 従来の build_features と同じ形の出力
+    finalize: Callable[[pd.DataFrame, List[str]], pd.DataFrame] = field(compare=False, repr=False)
+
+    @property
+    def lookback(self) -> int:
+        """全特徴量の値が決まるのに必要な過去バー数。"""
+        return max((f.lookback for f in self.features), default=0)
+
+    @property
+    def hash(self) -> str:
+        payload = {
+            "registry_version": REGISTRY_VERSION,
+            "recipe": self.name,
+            "features": [f.key() for f in self.features],
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def feature_names(self) -> List[str]:
+        return [f.name for f in self.features]
+
+    def apply(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+        """入力のコピーに特徴量列を足したものと、実際に作った特徴量名を返す（行は落とさない）。"""
+        out = df.copy()
+        made: List[str] = []
+        for f in self.features:
+            if not f.overwrite and f.name in out.columns:
+                continue
+            s = f.fn(out)
+            if s is None:
+                continue
+            out[f.name] = s
+            made.append(f.name)
+        return out, made
+
+    def compute(self, df: pd.DataFrame) -> pd.DataFrame:
+        """特徴量だけの行列（index は df と同じ、NaN 行も残す）。特徴量ストアに保存する形。"""
+        out, made = self.apply(df)
+        return out[made]
+
+    def finish(self, df: pd.DataFrame, feats: pd.DataFrame) -> pd.DataFrame:
+        """入力 df と compute() 済みの特徴量行列（同じ行並び）から build() と同じ出力を作る。"""
+        out = df.copy()
+        made: List[str] = []
+        for c in feats.columns:
+            out[c] = feats[c].to_numpy()
+            made.append(c)
+        return self.finalize(out, made)
+
+    def build(self, df: pd.DataFrame) -> pd.DataFrame:
+        out, made = self.apply(df)
+        return self.finalize(out, made)
+
+
+# =====================================================
+# レシピ定義
+# =====================================================
+def _f(col: str) -> Callable[[pd.DataFrame], pd.Series]:
+    return lambda out: out[col].astype(float)
+
+
+def _vol_chg_tech(out: pd.DataFrame) -> Optional[pd.Series]:
+    # tick_volume / real_volume がある場合のみ
+    if "tick_volume" in out.columns:
+        return pd.to_numeric(out["tick_volume"], errors="coerce").pct_change()
+    if "real_volume" in out.columns:
+        return pd.to_numeric(out["real_volume"], errors="coerce").pct_change()
+    return None
+
+
+def _finalize_tech(out: pd.DataFrame, made: List[str]) -> pd.DataFrame:
+    return out.dropna().reset_index(drop=True)
+
+
+_close = _f("close")
+_high = _f("high")
+_low = _f("low")
+
+OHLCV_TECH_V1 = Recipe(
+    name="ohlcv_tech_v1",
+    features=(
+        Feature("ret1", 1, "pct_change(close,1)", lambda o: _close(o).pct_change()),
+        Feature("ret5", 5, "pct_change(close,5)", lambda o: _close(o).pct_change(5)),
+        Feature("ret20", 20, "pct_change(close,20)", lambda o: _close(o).pct_change(20)),
+        Feature("sma_10", 10, "sma(close,10,min_periods=1)", lambda o: _close(o).rolling(10, min_periods=1).mean()),
+        Feature("sma_50", 50, "sma(close,50,min_periods=1)", lambda o: _close(o).rolling(50, min_periods=1).mean()),
+        Feature("ema_20", EWM_LOOKBACK, "ema(close,20)", lambda o: ema(_close(o), 20)),
+        Feature("rsi_14", 15, "rsi_sma(close,14,eps=1e-12)", lambda o: rsi_sma(_close(o), 14)),
+        Feature("bb_high_20_2", 20, "bbands_upper(close,20,2.0)", lambda o: bbands(_close(o), 20, 2.0)[0]),
+        Feature("bb_low_20_2", 20, "bbands_lower(close,20,2.0)", lambda o: bbands(_close(o), 20, 2.0)[1]),
+        Feature("stoch_k_14_3", 14, "stoch_k(14)", lambda o: stoch(_high(o), _low(o), _close(o), 14, 3)[0]),
+        Feature("stoch_d_14_3", 16, "stoch_d(14,3)", lambda o: stoch(_high(o), _low(o), _close(o), 14, 3)[1]),
+        # シンプルなATR風（高低差の移動平均）
+        Feature("atr_14", 14, "sma(abs(high-low),14)", lambda o: (_high(o) - _low(o)).abs().rolling(14).mean()),
+        Feature(
+            "vol_pct_20", 21, "std(pct_change(close),20)*sqrt(20)",
+            lambda o: _close(o).pct_change().rolling(20).std() * math.sqrt(20),
+        ),
+        # active_model.json の expected_features（ret_1 等）向けの互換列（既存列は壊さない）
+        Feature("ret_1", 1, "alias(ret1)", lambda o: o["ret1"], overwrite=False),
+        Feature("ret_5", 5, "alias(ret5)", lambda o: o["ret5"], overwrite=False),
+        Feature("ema_5", EWM_LOOKBACK, "ema(close,5)", lambda o: ema(_close(o), 5), overwrite=False),
+        Feature(
+            "ema_ratio", EWM_LOOKBACK, "ema_5/(ema_20+1e-12)",
+            lambda o: o["ema_5"] / (o["ema_20"] + 1e-12), overwrite=False,
+        ),
+        Feature("range", 0, "abs(high-low)", lambda o: (_high(o) - _low(o)).abs(), overwrite=False),
+        Feature("vol_chg", 1, "pct_change(tick_volume|real_volume)", _vol_chg_tech, overwrite=False),
+    ),
+    finalize=_finalize_tech,
+)
+
+
+def _finalize_core(out: pd.DataFrame, made: List[str]) -> pd.DataFrame:
+    return out
+
+
+def _wick(col: str) -> FeatureFn:
+    return lambda o: wick_body_ratios(o)[col]
+
+
+CORE_V1 = Recipe(
+    name="core_v1",
+    features=(
+        *(
+            Feature(f"ret_{p}", p, f"pct_change(close,{p})", (lambda p_: lambda o: o["close"].pct_change(p_))(p))
+            for p in (1, 3, 5, 10)
+        ),
+        Feature("ret_std_10", 11, "std0(ret_1,10)", lambda o: o["ret_1"].rolling(10).std(ddof=0)),
+        Feature("ret_std_20", 21, "std0(ret_1,20)", lambda o: o["ret_1"].rolling(20).std(ddof=0)),
+        Feature("tr", 1, "true_range", lambda o: true_range(o["high"], o["low"], o["close"])),
+        Feature("atr_14", 15, "sma(tr,14)", lambda o: o["tr"].rolling(14).mean()),
+        Feature("rsi_14", EWM_LOOKBACK, "rsi_wilder(close,14,eps=1e-12)", lambda o: rsi_wilder(o["close"], 14)),
+        Feature("adx_14", 43, "adx(14)", lambda o: adx(o, 14)),
+        Feature("bbp_20", 20, "bb_percent_b(close,20,2.0)", lambda o: bb_percent_b(o["close"], 20, 2.0)),
+        Feature("upper_wick_ratio", 0, "wick_upper", _wick("upper_wick_ratio")),
+        Feature("lower_wick_ratio", 0, "wick_lower", _wick("lower_wick_ratio")),
+        Feature("body_ratio", 0, "wick_body", _wick("body_ratio")),
+        Feature("vol_zscore_20", 20, "zscore(volume,20)", lambda o: zscore(o["volume"], 20)),
+    ),
+    finalize=_finalize_core,
+)
+
+
+def _finalize_weekly(out: pd.DataFrame, made: List[str]) -> pd.DataFrame:
+    feats = out[made]
+    feats = feats.replace([np.inf, -np.inf], np.nan)
+    return feats.dropna()
+
+
+WEEKLY_RETRAIN_V1 = Recipe(
+    name="weekly_retrain_v1",
+    features=(
+        Feature("ret_1", 1, "pct_change(close,1)", lambda o: o["close"].pct_change()),
+        Feature("ret_5", 5, "pct_change(close,5)", lambda o: o["close"].pct_change(5)),
+        Feature("ema_5", EWM_LOOKBACK, "ema(close,5)", lambda o: ema(o["close"], 5)),
+        Feature("ema_20", EWM_LOOKBACK, "ema(close,20)", lambda o: ema(o["close"], 20)),
+        Feature("ema_ratio", EWM_LOOKBACK, "ema_5/(ema_20+1e-9)", lambda o: o["ema_5"] / (o["ema_20"] + 1e-9)),
+        Feature("rsi_14", EWM_LOOKBACK, "rsi_wilder(close,14,eps=1e-9)", lambda o: rsi_wilder(o["close"], 14, eps=1e-9)),
+        Feature("atr_14", EWM_LOOKBACK, "atr_wilder(14)", lambda o: atr_wilder(o["high"], o["low"], o["close"], 14)),
+        Feature(
+            "range", 1, "(high-low)/(close.shift(1)+1e-9)",
+            lambda o: (o["high"] - o["low"]) / (o["close"].shift(1) + 1e-9),
+        ),
+        Feature("vol_chg", 1, "pct_change(volume).fillna(0)", lambda o: o["volume"].pct_change().fillna(0.0)),
+    ),
+    finalize=_finalize_weekly,
+)
+
+
+WALKFORWARD_FEATURE_COLS = [
+    "ret1", "ret3", "ret5", "vol20",
+    "sma5", "sma10", "sma20", "sma50",
+    "ema5", "ema10", "ema20", "ema50",
+    "bb_p", "rsi14", "atr14", "pos_in_range",
+    "vol_sma20", "vol_chg",
+]
+# 先頭の NaN を一括でトリムする本数（最大ウィンドウ50に合わせる）
+WALKFORWARD_TRIM = 50
+
+
+def _rsi_wfo(series: pd.Series, period: int = 14) -> pd.Series:
+    delta = series.diff()
+    up = np.clip(delta, 0, None)
+    down = -np.clip(delta, None, 0)
+    ma_up = up.rolling(period, min_periods=period // 2).mean()
+    ma_down = down.rolling(period, min_periods=period // 2).mean()
+    rs = ma_up / (ma_down + 1e-12)
+    return 100 - (100 / (1 + rs))
+
+
+def _atr_wfo(df_: pd.DataFrame, period: int = 14) -> pd.Series:
+    return true_range(df_["high"], df_["low"], df_["close"]).rolling(period, min_periods=period // 2).mean()
+
+
+def _pos_in_range(o: pd.DataFrame) -> pd.Series:
+    # ヒゲ比率（レンジのどこで引けたか）
+    rng = (o["high"] - o["low"]).replace(0, np.nan)
+    return (o["close"] - o["low"]) / rng
+
+
+def _if_tick_volume(fn: FeatureFn) -> FeatureFn:
+    return lambda o: fn(o) if "tick_volume" in o.columns else None
+
+
+def _finalize_walkforward(out: pd.DataFrame, made: List[str]) -> pd.DataFrame:
+    feature_cols = [c for c in WALKFORWARD_FEATURE_COLS if c in out.columns]
+    keep_cols = ["time", "open", "high", "low", "close"] + feature_cols
+    df = out[keep_cols].copy()
+    if len(df) > WALKFORWARD_TRIM:
+        df = df.iloc[WALKFORWARD_TRIM:].copy()
+    # それでも残るNaN/infは除去
+    return df.replace([np.inf, -np.inf], np.nan).dropna()
+
+
+def _walkforward_ma(w: int) -> Tuple[Feature, Feature]:
+    mp = max(2, w // 2)
+    return (
+        Feature(f"sma{w}", w, f"sma(close,{w},min_periods={mp})", lambda o: o["close"].rolling(w, min_periods=mp).mean()),
+        Feature(f"ema{w}", EWM_LOOKBACK, f"ema(close,{w})", lambda o: o["close"].ewm(span=w, adjust=False).mean()),
+    )
+
+
+WALKFORWARD_V1 = Recipe(
+    name="walkforward_v1",
+    features=(
+        Feature("ret1", 1, "pct_change(close,1)", lambda o: o["close"].pct_change()),
+        Feature("ret3", 3, "pct_change(close,3)", lambda o: o["close"].pct_change(3)),
+        Feature("ret5", 5, "pct_change(close,5)", lambda o: o["close"].pct_change(5)),
+        Feature(
+            "vol20", 21, "std(pct_change(close),20,min_periods=10)",
+            lambda o: o["close"].pct_change().rolling(20, min_periods=10).std(),
+        ),
+        *(f for w in (5, 10, 20, 50) for f in _walkforward_ma(w)),
+        Feature("bb_mid", 20, "sma(close,20,min_periods=10)", lambda o: o["close"].rolling(20, min_periods=10).mean()),
+        Feature("bb_std", 20, "std(close,20,min_periods=10)", lambda o: o["close"].rolling(20, min_periods=10).std()),
+        Feature("bb_p", 20, "(close-bb_mid)/(bb_std+1e-12)", lambda o: (o["close"] - o["bb_mid"]) / (o["bb_std"] + 1e-12)),
+        Feature("rsi14", 15, "rsi_sma(close,14,min_periods=7)", lambda o: _rsi_wfo(o["close"], 14)),
+        Feature("atr14", 15, "sma(true_range,14,min_periods=7)", lambda o: _atr_wfo(o, 14)),
+        Feature("pos_in_range", 0, "(close-low)/(high-low)", _pos_in_range),
+        # 出来高代理（あれば）
+        Feature(
+            "vol_sma20", 20, "sma(tick_volume,20,min_periods=10)",
+            _if_tick_volume(lambda o: o["tick_volume"].rolling(20, min_periods=10).mean()),
+        ),
+        Feature("vol_chg", 1, "pct_change(tick_volume)", _if_tick_volume(lambda o: o["tick_volume"].pct_change())),
+    ),
+    finalize=_finalize_walkforward,
+)
+
+
+FEATURE_RECIPES: Dict[str, Recipe] = {
+    r.name: r for r in (OHLCV_TECH_V1, CORE_V1, WEEKLY_RETRAIN_V1, WALKFORWARD_V1)
+}
+
+
+def get_recipe(name: str) -> Recipe:
+    recipe = FEATURE_RECIPES.get(str(name))
+    if recipe is None:
+        raise ValueError(f"unknown feature recipe: {name}")
+    return recipe
+
+
+def recipe_hash(name: str) -> str:
+    return get_recipe(name).hash
+
+
+def build_features(df: pd.DataFrame, recipe: str = "ohlcv_tech_v1") -> pd.DataFrame:
+    """レシピ名で特徴量を作る（従来の各 build_features と同じ出力）。"""
+    return get_recipe(recipe).build(df)
@@ -0,0 +1,434 @@
+# core/ai/incremental_features.py
+"""
+確定バー単位で特徴量を O(1) 更新するインクリメンタル特徴量エンジン。
+
+バッチ版と同じ定義の特徴量を、履歴全体を再計算せずに 1 バーずつ更新する。
+- recipe="ohlcv_tech_v1": app.strategies.ai_strategy.build_features_recipe と一致
+- recipe="core_v1"      : core.ai.features.build_features と一致
+
+ローリング状態:
+- EWM（RSI / EMA）は pandas ewm(adjust=False) と同じ漸化式
+- rolling mean/std/sum は固定長ウィンドウの累積和（n バーごとに再集計して誤差を抑制）
+- rolling min/max は単調デック（償却 O(1)）
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Any, Deque, Dict, Mapping, Optional, Tuple
+
+import pandas as pd
+
+NAN = float("nan")
+
+RECIPES = ("ohlcv_tech_v1", "core_v1")
+
+# EWM は過去の影響が指数減衰するため、この本数あればバッチ版と数値一致する
+DEFAULT_SEED_BARS = 5000
+
+
+def _is_nan(x: float) -> bool:
+    return x != x
+
+
+def _pct(cur: float, prev: float) -> float:
+    """pandas pct_change と同じ 0 除算規約（0/0=NaN, x/0=±inf）。"""
+    if _is_nan(cur) or _is_nan(prev):
+        return NAN
+    if prev == 0.0:
+        if cur == 0.0:
+            return NAN
+        return math.copysign(math.inf, cur)
+    return cur / prev - 1.0
+
+
+class _Ewm:
+    """pandas Series.ewm(adjust=False).mean() の逐次版。"""
+
+    __slots__ = ("alpha", "old_wt", "value")
+
+    def __init__(self, *, span: Optional[float] = None, alpha: Optional[float] = None) -> None:
+        # pandas と同じく com 経由で alpha を求める（丸め誤差まで揃える）
+        if span is not None:
+            com = (span - 1) / 2.0
+        elif alpha is not None:
+            com = (1.0 - alpha) / alpha
+        else:
+            raise ValueError("span or alpha is required")
+        self.alpha = 1.0 / (1.0 + com)
+        self.old_wt = 1.0 - self.alpha
+        self.value = NAN
+
+    def push(self, x: float) -> float:
+        if _is_nan(x):
+            return self.value
+        if _is_nan(self.value):
+            self.value = x
+        else:
+            self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+        return self.value
+
+
+class _RollingWindow:
+    """
+    固定長ウィンドウの合計・二乗和を保持する。
+    値は基準値 k からの差分で積算し、n 回 push するごとに再集計して誤差の蓄積を防ぐ。
+    """
+
+    __slots__ = ("n", "buf", "nan", "k", "s", "ss", "_since")
+
+    def __init__(self, n: int) -> None:
+        self.n = int(n)
+        self.buf: Deque[float] = deque()
+        self.nan = 0
+        self.k: Optional[float] = None
+        self.s = 0.0
+        self.ss = 0.0
+        self._since = 0
+
+    def push(self, x: float) -> None:
+        if len(self.buf) == self.n:
+            old = self.buf.popleft()
+            if _is_nan(old):
+                self.nan -= 1
+            else:
+                d = old - self.k
+                self.s -= d
+                self.ss -= d * d
+        self.buf.append(x)
+        if _is_nan(x):
+            self.nan += 1
+        else:
+            if self.k is None:
+                self.k = x
+            d = x - self.k
+            self.s += d
+            self.ss += d * d
+        self._since += 1
+        if self._since >= self.n:
+            self._resync()
+
+    def _resync(self) -> None:
+        self._since = 0
+        valid = [v for v in self.buf if not _is_nan(v)]
+        if not valid:
+            self.k, self.s, self.ss = None, 0.0, 0.0
+            return
+        k = valid[-1]
+        self.k = k
+        self.s = sum(v - k for v in valid)
+        self.ss = sum((v - k) * (v - k) for v in valid)
+
+    @property
+    def full(self) -> bool:
+        return len(self.buf) == self.n and self.nan == 0
+
+    def mean(self) -> float:
+        if not self.full:
+            return NAN
+        return self.k + self.s / self.n
+
+    def mean_partial(self) -> float:
+        """rolling(n, min_periods=1).mean() 相当。"""
+        cnt = len(self.buf) - self.nan
+        if cnt <= 0:
+            return NAN
+        return self.k + self.s / cnt
+
+    def sum(self) -> float:
+        if not self.full:
+            return NAN
+        return self.k * self.n + self.s
+
+    def std(self, ddof: int = 0) -> float:
+        if not self.full or self.n - ddof <= 0:
+            return NAN
+        var = (self.ss - self.s * self.s / self.n) / (self.n - ddof)
+        return math.sqrt(var) if var > 0.0 else 0.0
+
+
+class _RollingExtreme:
+    """rolling(n).min() / max() の単調デック版。"""
+
+    __slots__ = ("n", "is_max", "dq", "i")
+
+    def __init__(self, n: int, is_max: bool) -> None:
+        self.n = int(n)
+        self.is_max = bool(is_max)
+        self.dq: Deque[Tuple[int, float]] = deque()
+        self.i = -1
+
+    def push(self, x: float) -> float:
+        self.i += 1
+        dq = self.dq
+        if self.is_max:
+            while dq and dq[-1][1] <= x:
+                dq.pop()
+        else:
+            while dq and dq[-1][1] >= x:
+                dq.pop()
+        dq.append((self.i, x))
+        while dq[0][0] <= self.i - self.n:
+            dq.popleft()
+        if self.i + 1 < self.n:
+            return NAN
+        return dq[0][1]
+
+
+class IncrementalFeatureEngine:
+    """
+    1 シンボル・1 時間足ぶんのローリング状態を保持し、確定バーごとに特徴量を更新する。
+
+    使い方:
+        eng = IncrementalFeatureEngine("ohlcv_tech_v1")
+        eng.seed(df_ohlcv)              # 起動時に1回（末尾 seed_bars 本で十分）
+        feats = eng.update(bar_dict)    # 確定バーごとに O(1)
+        if eng.is_ready: ...
+
+    bar は time/open/high/low/close と出来高列（tick_volume / real_volume / volume）を持つ Mapping。
+    """
+
+    def __init__(self, recipe: str = "ohlcv_tech_v1") -> None:
+        if recipe not in RECIPES:
+            raise ValueError(f"unknown feature recipe: {recipe}")
+        self.recipe = recipe
+        self.last_time: Optional[pd.Timestamp] = None
+        self.n_bars = 0
+        self._features: Dict[str, float] = {}
+        self._prev: Optional[Dict[str, float]] = None
+        self._closes: Deque[float] = deque(maxlen=21)
+        if recipe == "ohlcv_tech_v1":
+            self._sma_10 = _RollingWindow(10)
+            self._sma_50 = _RollingWindow(50)
+            self._ema_5 = _Ewm(span=5)
+            self._ema_20 = _Ewm(span=20)
+            self._up_14 = _RollingWindow(14)
+            self._down_14 = _RollingWindow(14)
+            self._bb_20 = _RollingWindow(20)
+            self._ll_14 = _RollingExtreme(14, is_max=False)
+            self._hh_14 = _RollingExtreme(14, is_max=True)
+            self._stoch_d = _RollingWindow(3)
+            self._range_14 = _RollingWindow(14)
+            self._ret1_20 = _RollingWindow(20)
+        else:
+            self._ret1_10 = _RollingWindow(10)
+            self._ret1_20 = _RollingWindow(20)
+            self._tr_14 = _RollingWindow(14)
+            self._rsi_up = _Ewm(alpha=1 / 14)
+            self._rsi_down = _Ewm(alpha=1 / 14)
+            self._plus_dm_14 = _RollingWindow(14)
+            self._minus_dm_14 = _RollingWindow(14)
+            self._dx_14 = _RollingWindow(14)
+            self._bb_20 = _RollingWindow(20)
+            self._vol_20 = _RollingWindow(20)
+
+    # ------------------------------------------------------------------
+    # 入力
+    # ------------------------------------------------------------------
+    def seed(self, df: pd.DataFrame, seed_bars: Optional[int] = DEFAULT_SEED_BARS) -> Dict[str, float]:
+        """OHLCV DataFrame（time 昇順）の末尾 seed_bars 本で状態を構築する。"""
+        if seed_bars is not None and len(df) > seed_bars:
+            df = df.iloc[-int(seed_bars):]
+        cols = [c for c in ("open", "high", "low", "close", "tick_volume", "real_volume", "volume") if c in df.columns]
+        arrays = {c: df[c].to_numpy(dtype=float) for c in cols}
+        times = pd.to_datetime(df["time"]).tolist() if "time" in df.columns else [None] * len(df)
+        for i in range(len(df)):
+            bar: Dict[str, Any] = {c: arrays[c][i] for c in cols}
+            bar["time"] = times[i]
+            self.update(bar)
+        return self.features()
+
+    def update(self, bar: Mapping[str, Any]) -> Dict[str, float]:
+        """確定バーを1本追加して最新の特徴量を返す（time が last_time 以下なら無視）。"""
+        t = bar.get("time")
+        if t is not None:
+            t = pd.Timestamp(t)
+            if self.last_time is not None and t <= self.last_time:
+                return self.features()
+        o = float(bar["open"])
+        h = float(bar["high"])
+        low = float(bar["low"])
+        c = float(bar["close"])
+        vol = self._volume_of(bar)
+
+        if self.recipe == "ohlcv_tech_v1":
+            has_volume = "tick_volume" in bar or "real_volume" in bar
+            feats = self._update_tech_v1(o, h, low, c, vol, has_volume)
+        else:
+            feats = self._update_core_v1(o, h, low, c, vol)
+
+        raw: Dict[str, float] = {"open": o, "high": h, "low": low, "close": c}
+        for k in ("tick_volume", "real_volume", "volume"):
+            if k in bar:
+                raw[k] = float(bar[k])
+        raw.update(feats)
+        self._features = raw
+        self._prev = {"open": o, "high": h, "low": low, "close": c, "volume": vol}
+        self._closes.append(c)
+        self.last_time = t
+        self.n_bars += 1
+        return self.features()
+
+    def _volume_of(self, bar: Mapping[str, Any]) -> float:
+        keys = ("volume",) if self.recipe == "core_v1" else ("tick_volume", "real_volume")
+        for k in keys:
+            if k in bar and bar[k] is not None:
+                try:
+                    return float(bar[k])
+                except (TypeError, ValueError):
+                    return NAN
+        return NAN
+
+    def _lag_close(self, k: int) -> float:
+        # update 中は self._closes に当該バーがまだ入っていない
+        if len(self._closes) < k:
+            return NAN
+        return self._closes[-k]
+
+    # ------------------------------------------------------------------
+    # レシピ
+    # ------------------------------------------------------------------
+    def _update_tech_v1(
+        self, o: float, h: float, low: float, c: float, vol: float, has_volume: bool
+    ) -> Dict[str, float]:
+        prev = self._prev
+        ret1 = _pct(c, self._lag_close(1))
+        ret5 = _pct(c, self._lag_close(5))
+        ret20 = _pct(c, self._lag_close(20))
+
+        self._sma_10.push(c)
+        self._sma_50.push(c)
+        ema_5 = self._ema_5.push(c)
+        ema_20 = self._ema_20.push(c)
+
+        delta = c - prev["close"] if prev is not None else NAN
+        self._up_14.push(max(delta, 0.0) if not _is_nan(delta) else NAN)
+        self._down_14.push(-min(delta, 0.0) if not _is_nan(delta) else NAN)
+        up, down = self._up_14.mean(), self._down_14.mean()
+        rsi = 100 - (100 / (1 + up / (down + 1e-12)))
+
+        self._bb_20.push(c)
+        ma, sd = self._bb_20.mean(), self._bb_20.std(ddof=0)
+
+        ll = self._ll_14.push(low)
+        hh = self._hh_14.push(h)
+        stoch_k = (c - ll) / (hh - ll + 1e-12) * 100
+        self._stoch_d.push(stoch_k)
+
+        rng = abs(h - low)
+        self._range_14.push(rng)
+        self._ret1_20.push(ret1)
+
+        vol_chg = _pct(vol, prev["volume"]) if prev is not None else NAN
+
+        feats = {
+            "ret1": ret1,
+            "ret5": ret5,
+            "ret20": ret20,
+            "sma_10": self._sma_10.mean_partial(),
+            "sma_50": self._sma_50.mean_partial(),
+            "ema_20": ema_20,
+            "rsi_14": rsi,
+            "bb_high_20_2": ma + 2.0 * sd,
+            "bb_low_20_2": ma - 2.0 * sd,
+            "stoch_k_14_3": stoch_k,
+            "stoch_d_14_3": self._stoch_d.mean(),
+            "atr_14": self._range_14.mean(),
+            "vol_pct_20": self._ret1_20.std(ddof=1) * math.sqrt(20),
+            "ret_1": ret1,
+            "ret_5": ret5,
+            "ema_5": ema_5,
+            "ema_ratio": ema_5 / (ema_20 + 1e-12),
+            "range": rng,
+        }
+        if has_volume:
+            feats["vol_chg"] = vol_chg
+        return feats
+
+    def _update_core_v1(self, o: float, h: float, low: float, c: float, vol: float) -> Dict[str, float]:
+        prev = self._prev
+        feats: Dict[str, float] = {}
+        for p in (1, 3, 5, 10):
+            feats[f"ret_{p}"] = _pct(c, self._lag_close(p))
+
+        self._ret1_10.push(feats["ret_1"])
+        self._ret1_20.push(feats["ret_1"])
+        feats["ret_std_10"] = self._ret1_10.std(ddof=0)
+        feats["ret_std_20"] = self._ret1_20.std(ddof=0)
+
+        if prev is None:
+            tr = h - low
+        else:
+            pc = prev["close"]
+            tr = max(h - low, abs(h - pc), abs(low - pc))
+        feats["tr"] = tr
+        self._tr_14.push(tr)
+        feats["atr_14"] = self._tr_14.mean()
+
+        delta = c - prev["close"] if prev is not None else NAN
+        ru = self._rsi_up.push(max(delta, 0.0) if not _is_nan(delta) else NAN)
+        rd = self._rsi_down.push(-min(delta, 0.0) if not _is_nan(delta) else NAN)
+        feats["rsi_14"] = 100 - (100 / (1 + ru / (rd + 1e-12)))
+
+        up_move = h - prev["high"] if prev is not None else NAN
+        down_move = prev["low"] - low if prev is not None else NAN
+        plus_dm = up_move if (up_move > down_move and up_move > 0) else 0.0
+        minus_dm = down_move if (down_move > up_move and down_move > 0) else 0.0
+        self._plus_dm_14.push(plus_dm)
+        self._minus_dm_14.push(minus_dm)
+        tr_smooth = self._tr_14.sum()
+        plus_di = 100 * self._plus_dm_14.sum() / (tr_smooth + 1e-12)
+        minus_di = 100 * self._minus_dm_14.sum() / (tr_smooth + 1e-12)
+        dx = (abs(plus_di - minus_di) / ((plus_di + minus_di) + 1e-12)) * 100
+        self._dx_14.push(dx)
+        feats["adx_14"] = self._dx_14.mean()
+
+        self._bb_20.push(c)
+        ma, sd = self._bb_20.mean(), self._bb_20.std(ddof=0)
+        upper, lower = ma + 2.0 * sd, ma - 2.0 * sd
+        bbp = (c - lower) / ((upper - lower) + 1e-12)
+        feats["bbp_20"] = bbp if _is_nan(bbp) else min(max(bbp, 0.0), 1.0)
+
+        body = abs(c - o)
+        upper_wick = max(h - max(o, c), 0.0)
+        lower_wick = max(min(o, c) - low, 0.0)
+        total = h - low
+        feats["upper_wick_ratio"] = upper_wick / total if total != 0 else 0.0
+        feats["lower_wick_ratio"] = lower_wick / total if total != 0 else 0.0
+        feats["body_ratio"] = body / total if total != 0 else 0.0
+
+        self._vol_20.push(vol)
+        feats["vol_zscore_20"] = (vol - self._vol_20.mean()) / (self._vol_20.std(ddof=0) + 1e-12)
+        return feats
+
+    # ------------------------------------------------------------------
+    # 出力
+    # ------------------------------------------------------------------
+    def features(self) -> Dict[str, float]:
+        """最新バーの特徴量（生 OHLCV 列を含む）のコピーを返す。"""
+        return dict(self._features)
+
+    @property
+    def is_ready(self) -> bool:
+        """全列が NaN でない（= バッチ版の dropna 後に残る行と同じ）状態か。"""
+        if not self._features:
+            return False
+        return not any(_is_nan(v) for v in self._features.values())
+
+
+def build_features_incremental(df: pd.DataFrame, recipe: str = "ohlcv_tech_v1") -> pd.DataFrame:
+    """
+    全行をインクリメンタルに更新した結果を DataFrame で返す（パリティ検証・デバッグ用）。
+    dropna は行わない。
+    """
+    eng = IncrementalFeatureEngine(recipe)
+    cols = [c for c in ("open", "high", "low", "close", "tick_volume", "real_volume", "volume") if c in df.columns]
+    arrays = {c: df[c].to_numpy(dtype=float) for c in cols}
+    rows = []
+    for i in range(len(df)):
+        bar: Dict[str, Any] = {c: arrays[c][i] for c in cols}
+        rows.append(eng.update(bar))
+    out = pd.DataFrame(rows, index=df.index)
+    if "time" in df.columns:
+        out.insert(0, "time", df["time"].values)
+    return out
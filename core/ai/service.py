@@ -12,7 +12,7 @@ import numpy as np
 import pandas as pd
 from loguru import logger
 
-from core.ai.loader import ModelWrapper, load_lgb_clf
+from core.ai.loader import ModelWrapper, _CalibratedWrapper, load_lgb_clf
 
 
 def _read_active_model_path(default: str = "models/LightGBM_clf.pkl") -> str:
@@ -120,8 +120,22 @@ class AISvc:
 
         model_path = model_path or self._resolve_model_path()
 
+        # active_model.json のモデルはプロセス内で1回だけロード（app.services.model_registry と共有）
+        bundle = None
+        self._model_entry = None
+        try:
+            from app.services.model_registry import get_model_registry
+
+            entry = get_model_registry().active()
+            if entry is not None:
+                bundle = _CalibratedWrapper(entry.model, entry.calibrator)
+                self._model_entry = entry
+        except Exception as exc:
+            logger.warning(f"model_registry unavailable -> load_lgb_clf: {exc}")
+        if bundle is None:
+            bundle = load_lgb_clf(model_path)
+
         # 何が返っても最終的に推定器へ到達できるよう ModelWrapper で統一
-        bundle = load_lgb_clf(model_path)
         self.model = ModelWrapper(bundle)
 
         # 表示名
@@ -131,6 +145,25 @@ class AISvc:
         # 期待特徴量のロード（既存メソッド）
         self._load_expected_features()
 
+    def _refresh_model(self) -> None:
+        """model_registry の active モデルが差し替わっていれば（昇格）追従する。"""
+        if getattr(self, "_model_entry", None) is None:
+            return
+        try:
+            from app.services.model_registry import get_model_registry
+
+            entry = get_model_registry().active()
+        except Exception as exc:
+            logger.warning(f"model_registry refresh failed: {exc}")
+            return
+        if entry is None or entry.model_hash == self._model_entry.model_hash:
+            return
+        self.model = ModelWrapper(_CalibratedWrapper(entry.model, entry.calibrator))
+        self._model_entry = entry
+        self.model_name = getattr(self.model, "model_name", None) or entry.model_path.name
+        print(f"[AISvc] swapped model: {self.model_name}")
+        self._load_expected_features()
+
     def _load_expected_features(self) -> None:
         """最新レポートの features を expected_features として保持"""
         try:
@@ -165,6 +198,7 @@ class AISvc:
         no_metrics : bool, optional
             True の場合、metrics の更新を行わない（デフォルト: False）
         """
+        self._refresh_model()
         if self.model is None:
             return _ProbOut(0.5, 0.5, model_name=self.model_name, version="na", features_hash="")
 
@@ -0,0 +1,431 @@
+# core/ai/tree_inference.py
+"""
+LightGBM の木をフラットな NumPy 配列に書き出して推論する（Live の1行推論用の軽量バックエンド）
+
+- compile_booster(booster): dump_model() の木を (特徴量 index, 閾値, 左右の子, 葉の値, 欠損の扱い) の配列にする
+  （葉も「自分自身に戻るノード」として同じ配列に置くので、全木を同じ段数だけ一斉に進めればよい）
+- CompiledForest.predict_row(x) / predict(X): Booster.predict と同じ判定・同じ加算順で
+  ビット単位まで同じ値を返す（欠損 None/Zero/NaN・1e-35 以下のゼロ扱い・木の順の逐次加算・sigmoid）
+- CompiledModel: 元モデル（Booster / LGBMClassifier / _LGBBoosterSklearnWrapper）と同じ入力 dtype・列順で
+  predict_proba を返し、キャリブレータも同じ呼び出しの中で適用する
+- 対応外（多クラス・カテゴリ分割・線形木など）は compile_model が None を返す（呼び出し側は従来経路）
+"""
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# LightGBM の kZeroThreshold（1e-35f）。これ以下の絶対値はゼロとして扱われる
+K_ZERO_THRESHOLD = float(np.float32(1e-35))
+
+# missing_type のコード
+_MISSING_CODES = {"None": 0, "Zero": 1, "NaN": 2}
+
+
+def _sigmoid_scalar(score: float, sigmoid: float) -> float:
+    # BinaryLogloss::ConvertOutput と同じ式（libm の exp）
+    return 1.0 / (1.0 + math.exp(-sigmoid * score))
+
+
+@dataclass
+class CompiledForest:
+    """フラット化した木の集合（葉も index >= n_internal のノードとして保持）。"""
+
+    feature: np.ndarray  # int64 [n_nodes] 葉は 0
+    threshold: np.ndarray  # float64 [n_nodes] 葉は +inf
+    children: np.ndarray  # int64 [n_nodes, 2] (右, 左)。葉は自分自身
+    value: np.ndarray  # float64 [n_nodes] 葉の出力（内部ノードは 0）
+    missing: np.ndarray  # int8 [n_nodes] 0=None / 1=Zero / 2=NaN
+    default_left: np.ndarray  # bool [n_nodes]
+    roots: np.ndarray  # int64 [n_trees]
+    n_internal: int
+    max_depth: int
+    n_features: int
+    objective: str  # "sigmoid" / "identity"
+    sigmoid: float = 1.0
+    average_output: bool = False
+    feature_names: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        self.children_flat = self.children.reshape(-1)
+        self._right = np.ascontiguousarray(self.children[:, 0])
+        self._child_diff = self.children[:, 1] - self.children[:, 0]
+        # 欠損の扱いが None だけなら、入力の NaN を先に 0 にすれば通常の比較だけで済む
+        self.simple_missing = not bool(self.missing.any())
+        self._nan_type = self.missing == 2
+        self._zero_type = self.missing == 1
+        self.has_zero_missing = bool(self._zero_type.any())
+        self._local = threading.local()
+
+    @property
+    def n_trees(self) -> int:
+        return int(self.roots.size)
+
+    # ------------------------------------------------------------------
+    # 1行
+    # ------------------------------------------------------------------
+    def _buffers(self) -> Dict[str, np.ndarray]:
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            n, t = self.feature.size, self.n_trees
+            buf = {
+                "x": np.empty(self.n_features, dtype=np.float64),
+                "xa": np.empty(self.n_features, dtype=np.float64),
+                "xm": np.empty(self.n_features, dtype=bool),
+                "fv": np.empty(n, dtype=np.float64),
+                "go": np.empty(n, dtype=bool),
+                "nan": np.empty(n, dtype=bool),
+                "tmp": np.empty(n, dtype=bool),
+                "next": np.empty(n, dtype=np.int64),
+                "node": np.empty(t, dtype=np.int64),
+                "node2": np.empty(t, dtype=np.int64),
+                "leaf": np.empty(t, dtype=np.float64),
+                "acc": np.empty(t, dtype=np.float64),
+            }
+            self._local.buf = buf
+        return buf
+
+    def raw_score_row(self, x: np.ndarray) -> float:
+        """
+        1行分の生スコア（Booster.predict(raw_score=True) と同じ値）。x は [n_features]。
+        全ノードの分岐先をまとめて1回で決めてから、各木の根から葉まで next をたどる（配列の割り当てなし）。
+        """
+        b = self._buffers()
+        xv, xa, xm = b["x"], b["xa"], b["xm"]
+        np.copyto(xv, x, casting="unsafe")
+        # 1e-35 以下はゼロ（LightGBM の dense 行の読み込みと同じ）
+        np.abs(xv, out=xa)
+        np.less_equal(xa, K_ZERO_THRESHOLD, out=xm)
+        np.copyto(xv, 0.0, where=xm)
+        np.isnan(xv, out=xm)
+        nan_in_row = bool(xm.any())
+        if self.simple_missing and nan_in_row:
+            np.copyto(xv, 0.0, where=xm)
+
+        fv, go, nxt = b["fv"], b["go"], b["next"]
+        np.take(xv, self.feature, out=fv)
+        if self.simple_missing or (not nan_in_row and not self.has_zero_missing):
+            np.less_equal(fv, self.threshold, out=go)
+        else:
+            self._decide_missing(
+                fv, self.threshold, self._nan_type, self._zero_type, self.default_left, go, b["nan"], b["tmp"]
+            )
+        # next = 右 + go * (左 - 右)
+        np.multiply(self._child_diff, go, out=nxt)
+        np.add(nxt, self._right, out=nxt)
+
+        node, node2 = b["node"], b["node2"]
+        np.copyto(node, self.roots)
+        for _ in range(self.max_depth):
+            np.take(nxt, node, out=node2)
+            node, node2 = node2, node
+        leaf, acc = b["leaf"], b["acc"]
+        np.take(self.value, node, out=leaf)
+        # 木の順に逐次加算（GBDT::PredictRaw と同じ丸め）。cumsum は逐次
+        np.cumsum(leaf, out=acc)
+        score = float(acc[-1])
+        if self.average_output:
+            score /= self.n_trees
+        return score
+
+    @staticmethod
+    def _decide_missing(
+        fv: np.ndarray,
+        threshold: np.ndarray,
+        nan_type: np.ndarray,
+        zero_type: np.ndarray,
+        default_left: np.ndarray,
+        go: np.ndarray,
+        nan: np.ndarray,
+        tmp: np.ndarray,
+    ) -> None:
+        """Tree::NumericalDecision と同じ判定で go（左へ進むか）を埋める。fv / nan / tmp は作業用に書き換える。"""
+        np.isnan(fv, out=nan)
+        # NaN は 0 として比較（missing=NaN のノードだけ下で default 側へ）
+        np.copyto(fv, 0.0, where=nan)
+        np.logical_and(nan, nan_type, out=nan)
+        # missing=Zero のゼロ → default 側
+        np.equal(fv, 0.0, out=tmp)
+        np.logical_and(tmp, zero_type, out=tmp)
+        np.logical_or(nan, tmp, out=nan)
+        np.less_equal(fv, threshold, out=go)
+        np.copyto(go, default_left, where=nan)
+
+    def predict_row(self, x: np.ndarray) -> float:
+        """1行分の出力（objective 変換後。二値分類ならクラス1の確率）。"""
+        score = self.raw_score_row(x)
+        if self.objective == "sigmoid":
+            return _sigmoid_scalar(score, self.sigmoid)
+        return score
+
+    # ------------------------------------------------------------------
+    # 複数行
+    # ------------------------------------------------------------------
+    def raw_score(self, X: np.ndarray) -> np.ndarray:
+        """[n, n_features] の生スコア。"""
+        X = np.array(X, dtype=np.float64, copy=True)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        n = X.shape[0]
+        X[np.abs(X) <= K_ZERO_THRESHOLD] = 0.0
+        if self.simple_missing:
+            X[np.isnan(X)] = 0.0
+        node = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        go = np.empty(node.shape, dtype=bool)
+        tmp = np.empty(node.shape, dtype=bool)
+        for _ in range(self.max_depth):
+            if node.min() >= self.n_internal:
+                break
+            feat = self.feature[node]
+            fv = np.take_along_axis(X, feat, axis=1)
+            thr = self.threshold[node]
+            if self.simple_missing:
+                np.less_equal(fv, thr, out=go)
+            else:
+                mt = self.missing[node]
+                self._decide_missing(
+                    fv, thr, mt == 2, mt == 1, self.default_left[node], go, np.empty_like(go), tmp
+                )
+            node = self.children_flat[node * 2 + go]
+        score = np.cumsum(self.value[node], axis=1)[:, -1]
+        if self.average_output:
+            score = score / self.n_trees
+        return score
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """[n, n_features] の出力（Booster.predict と同じ）。"""
+        score = self.raw_score(X)
+        if self.objective == "sigmoid":
+            # np.exp は実装によって libm と 1ulp ずれることがあるので1行ずつ math.exp
+            return np.fromiter((_sigmoid_scalar(s, self.sigmoid) for s in score.tolist()), np.float64, score.size)
+        return score
+
+
+# =====================================================
+# Booster → CompiledForest
+# =====================================================
+def _parse_objective(objective: str) -> Tuple[str, float]:
+    parts = str(objective or "").split()
+    name = parts[0] if parts else ""
+    if name == "binary":
+        sigmoid = 1.0
+        for p in parts[1:]:
+            if p.startswith("sigmoid:"):
+                sigmoid = float(p.split(":", 1)[1])
+        return "sigmoid", sigmoid
+    if name in ("cross_entropy", "xentropy"):
+        return "sigmoid", 1.0
+    if name in ("regression", "regression_l2", "l2", "mean_squared_error", "mse", "regression_l1", "l1",
+                "huber", "fair", "quantile", "mape"):
+        return "identity", 1.0
+    raise NotImplementedError(f"unsupported objective for compiled inference: {objective!r}")
+
+
+def compile_booster(booster: Any) -> CompiledForest:
+    """
+    lightgbm.Booster をフラット配列にする。Booster.predict と同じく best_iteration があればそこまでの木を使う。
+    対応外のモデルは NotImplementedError。
+    """
+    dump = booster.dump_model()
+    if int(dump.get("num_tree_per_iteration", 1)) != 1 or int(dump.get("num_class", 1)) != 1:
+        raise NotImplementedError("multiclass models are not supported")
+    objective, sigmoid = _parse_objective(dump.get("objective", ""))
+
+    internal: List[Tuple[int, float, int, int, int, bool]] = []  # feature, thr, mt, dl, left, right
+    leaves: List[float] = []
+    roots_ref: List[Tuple[str, int]] = []
+    max_depth = 0
+
+    def walk(n: Dict[str, Any], depth: int) -> Tuple[str, int]:
+        nonlocal max_depth
+        if "split_index" not in n:
+            max_depth = max(max_depth, depth)
+            leaves.append(float(n["leaf_value"]))
+            return ("L", len(leaves) - 1)
+        if n.get("decision_type", "<=") != "<=":
+            raise NotImplementedError(f"unsupported decision_type: {n.get('decision_type')}")
+        i = len(internal)
+        internal.append(None)  # type: ignore[arg-type]
+        left = walk(n["left_child"], depth + 1)
+        right = walk(n["right_child"], depth + 1)
+        internal[i] = (
+            int(n["split_feature"]),
+            float(n["threshold"]),
+            _MISSING_CODES[str(n.get("missing_type", "None"))],
+            bool(n.get("default_left", True)),
+            left,
+            right,
+        )
+        return ("I", i)
+
+    for t in dump["tree_info"]:
+        ts = t["tree_structure"]
+        if "leaf_coeff" in ts or t.get("is_linear"):
+            raise NotImplementedError("linear trees are not supported")
+        roots_ref.append(walk(ts, 0))
+
+    n_int = len(internal)
+    n_nodes = n_int + len(leaves)
+
+    def gidx(ref: Tuple[str, int]) -> int:
+        return ref[1] if ref[0] == "I" else n_int + ref[1]
+
+    feature = np.zeros(n_nodes, dtype=np.int64)
+    threshold = np.full(n_nodes, np.inf, dtype=np.float64)
+    children = np.empty((n_nodes, 2), dtype=np.int64)
+    value = np.zeros(n_nodes, dtype=np.float64)
+    missing = np.zeros(n_nodes, dtype=np.int8)
+    default_left = np.zeros(n_nodes, dtype=bool)
+    for i, (f, thr, mt, dl, left, right) in enumerate(internal):
+        feature[i] = f
+        threshold[i] = thr
+        missing[i] = mt
+        default_left[i] = dl
+        children[i, 0] = gidx(right)
+        children[i, 1] = gidx(left)
+    leaf_ids = np.arange(n_int, n_nodes)
+    children[leaf_ids, 0] = leaf_ids
+    children[leaf_ids, 1] = leaf_ids
+    value[n_int:] = leaves
+
+    return CompiledForest(
+        feature=feature,
+        threshold=threshold,
+        children=children,
+        value=value,
+        missing=missing,
+        default_left=default_left,
+        roots=np.array([gidx(r) for r in roots_ref], dtype=np.int64),
+        n_internal=n_int,
+        max_depth=max_depth,
+        n_features=int(dump.get("max_feature_idx", -1)) + 1,
+        objective=objective,
+        sigmoid=sigmoid,
+        average_output=bool(dump.get("average_output", False)),
+        feature_names=tuple(dump.get("feature_names") or ()),
+    )
+
+
+# =====================================================
+# キャリブレータ
+# =====================================================
+def apply_calibrator(p1: np.ndarray, calibrator: Any) -> np.ndarray:
+    """
+    クラス1の確率にキャリブレータを適用する（core.ai.calibration.Calibrator.transform と同じ値）。
+    platt はロジスティック回帰の係数で直接計算する。
+    """
+    if calibrator is None:
+        return p1
+    method = getattr(calibrator, "method", None)
+    lr = getattr(calibrator, "model", None)
+    if method == "platt" and getattr(lr, "coef_", None) is not None and np.size(lr.coef_) == 1:
+        from scipy.special import expit
+
+        x = np.clip(p1, 1e-12, 1 - 1e-12)
+        logit = np.log(x / (1 - x))
+        return np.asarray(expit(logit * float(lr.coef_.ravel()[0]) + float(lr.intercept_.ravel()[0])), dtype=float)
+    if hasattr(calibrator, "transform"):
+        return np.asarray(calibrator.transform(np.asarray(p1, dtype=float)), dtype=float)
+    if hasattr(calibrator, "predict_proba"):
+        return np.asarray(calibrator.predict_proba(np.asarray(p1, dtype=float).reshape(-1, 1))[:, 1], dtype=float)
+    return p1
+
+
+# =====================================================
+# 元モデルと同じ入出力のラッパー
+# =====================================================
+class CompiledModel:
+    """
+    元モデルの predict_proba と同じ値（[P(0), P(1)]、キャリブレータ適用済み）を返す。
+    input_dtype は元モデルが Booster に渡す dtype（_LGBBoosterSklearnWrapper は float32）。
+    """
+
+    classes_ = np.array([0, 1], dtype=np.int64)
+
+    def __init__(
+        self,
+        forest: CompiledForest,
+        *,
+        input_dtype: Any = np.float64,
+        feature_names: Optional[Sequence[str]] = None,
+        calibrator: Any = None,
+    ):
+        if forest.objective != "sigmoid":
+            raise NotImplementedError("CompiledModel supports binary classifiers only")
+        self.forest = forest
+        self.input_dtype = np.dtype(input_dtype)
+        self.feature_name_ = list(feature_names) if feature_names else list(forest.feature_names)
+        self.calibrator = calibrator
+
+    def _to_array(self, X: Any) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            if self.feature_name_ and list(X.columns) != self.feature_name_:
+                missing = [c for c in self.feature_name_ if c not in X.columns]
+                if missing:
+                    X = X.assign(**{c: 0.0 for c in missing})
+                X = X[self.feature_name_]
+            arr = X.to_numpy(dtype=self.input_dtype)
+        else:
+            arr = np.asarray(X, dtype=self.input_dtype)
+        if arr.ndim == 1:
+            arr = arr.reshape(1, -1)
+        return arr
+
+    def predict_p1(self, X: Any) -> np.ndarray:
+        """クラス1の確率（キャリブレータ適用済み）。1行は割り当てなしの経路で計算する。"""
+        arr = self._to_array(X)
+        if arr.shape[0] == 1:
+            p1 = np.array([self.forest.predict_row(arr[0])], dtype=np.float64)
+        else:
+            p1 = self.forest.predict(arr)
+        return apply_calibrator(p1, self.calibrator)
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        p1 = self.predict_p1(X)
+        return np.column_stack([1.0 - p1, p1])
+
+
+def _find_booster(model: Any) -> Tuple[Any, Any, Optional[Sequence[str]], Any]:
+    """(booster, 入力 dtype, 列名, キャリブレータ) を取り出す。見つからなければ booster=None。"""
+    calibrator = None
+    # core.ai.loader._CalibratedWrapper / ModelWrapper
+    for _ in range(3):
+        if hasattr(model, "base_model") and "base_model" in getattr(model, "__dict__", {}):
+            calibrator = calibrator or getattr(model, "calibrator", None)
+            model = model.base_model
+    try:
+        import lightgbm as lgb
+    except Exception:
+        return None, None, None, None
+    if isinstance(model, lgb.Booster):
+        return model, np.float64, None, calibrator
+    # ai_strategy._load_model_generic の Booster ラッパー
+    bst = getattr(model, "bst", None)
+    if isinstance(bst, lgb.Booster):
+        return bst, np.float64, None, calibrator
+    booster = getattr(model, "booster_", None)
+    if isinstance(booster, lgb.Booster):
+        if type(model).__name__ == "_LGBBoosterSklearnWrapper":
+            return booster, np.float32, getattr(model, "feature_name_", None), calibrator
+        if isinstance(model, lgb.LGBMClassifier):
+            return booster, np.float64, None, calibrator
+    return None, None, None, None
+
+
+def compile_model(model: Any, calibrator: Any = None) -> Optional[CompiledModel]:
+    """LightGBM の二値分類モデルなら CompiledModel、対応外なら None。"""
+    booster, dtype, names, inner_cal = _find_booster(model)
+    if booster is None:
+        return None
+    try:
+        forest = compile_booster(booster)
+        return CompiledModel(
+            forest, input_dtype=dtype, feature_names=names, calibrator=calibrator or inner_cal
+        )
+    except NotImplementedError:
+        return None
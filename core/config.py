@@ -4,6 +4,7 @@ from functools import lru_cache
 from typing import Any, Dict
 
 from app.core.config_loader import load_config
+from app.core.config_snapshot import get_config_snapshot_service
 
 
 @lru_cache(maxsize=1)
@@ -19,6 +20,7 @@ def reload() -> Dict[str, Any]:
     Reload configuration from disk and update cached reference.
     """
     global cfg
+    get_config_snapshot_service().reload()
     cfg = load_config()
     _load.cache_clear()
     return cfg
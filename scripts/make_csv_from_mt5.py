@@ -11,6 +11,7 @@ MT5 から USDJPY の M5/M15/H1 を 2020-11-01 以降で CSV 化し、
   copy_rates_from() の「現在→過去へページング」フォールバックを搭載
 - 実行環境名は --env で明示でき、未指定時は HOST_MAP とヒューリスティックで推定
 - 保存レイアウトは --layout で切替（flat | per-symbol）
+- M5 と同時に指定した M15/H1/H4/D1 は M5 から集計して作る（--fetch-derived で従来通り MT5 から取得）
 """
 
 from __future__ import annotations
@@ -610,6 +611,11 @@ def main():
     parser.add_argument(
         "--terminal", default=None, help="MT5 terminal.exe のフルパス（必要な場合のみ）"
     )
+    parser.add_argument(
+        "--fetch-derived",
+        action="store_true",
+        help="M15/H1/H4/D1 も MT5 から取得する（既定: M5 を同時に指定した場合は M5 から集計）",
+    )
 
     # 環境と保存レイアウト
     parser.add_argument(
@@ -693,9 +699,21 @@ def main():
     save_root = data_root
     log(f"save_root={save_root}")
 
-    # 取得・保存
+    # 取得・保存（上位足は M5 の後に M5 から集計する。集計できなければ MT5 から取得）
+    from app.services.ohlcv_resample import BASE_TF, DERIVED_TFS, derive_timeframe
+
+    derive = BASE_TF in tfs and not args.fetch_derived
+    if derive:
+        tfs = [BASE_TF] + [tf for tf in tfs if tf != BASE_TF]
     created: list[Path] = []
     for tf_name in tfs:
+        if derive and tf_name in DERIVED_TFS and get_ohlcv_csv_path is not None:
+            out_path = get_ohlcv_csv_path(symbol, tf_name, data_root=save_root, layout=args.layout)
+            res = derive_timeframe(created[0], out_path, tf_name)
+            log(f"{out_path.name}: derived from {BASE_TF} status={res.status} rows={res.rows} {res.message}")
+            if res.ok:
+                created.append(out_path)
+                continue
         path = ensure_csv_for_timeframe(
             symbol,
             tf_name,
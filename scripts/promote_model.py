@@ -37,11 +37,18 @@ def main() -> None:
         else:
             shutil.copy2(src, dst)
 
-    for fn in os.listdir(staging):
+    # active_model.json は最後に置き換える（稼働中プロセスの model_registry が
+    # 新しい active_model.json を見た時点でモデル本体がそろっているように）
+    names = sorted(os.listdir(staging), key=lambda fn: fn == "active_model.json")
+    for fn in names:
         src = os.path.join(staging, fn)
         dst = os.path.join(prod, fn)
         if os.path.isdir(src):
             shutil.copytree(src, dst, dirs_exist_ok=True)
+        elif fn == "active_model.json":
+            tmp = dst + ".tmp"
+            shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
         else:
             shutil.copy2(src, dst)
     print("PROMOTED. backup:", bk)
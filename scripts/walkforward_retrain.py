@@ -5,6 +5,8 @@ import json
 import os
 import sys
 import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 
 
 def _enrich_active_model_meta(meta: dict, model_obj=None) -> dict:
@@ -61,6 +63,10 @@ import traceback
 # 基本設定（フォルダなど）
 # ------------------------------------------------------------
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+from core.ai.feature_registry import get_recipe  # noqa: E402
+
 DATA_DIR = PROJECT_ROOT / "data"
 MODELS_DIR = PROJECT_ROOT / "models"
 LOGS_DIR = PROJECT_ROOT / "logs"
@@ -398,86 +404,8 @@ def build_features(df_raw: pd.DataFrame) -> pd.DataFrame:
         mini = mini.replace([np.inf, -np.inf], np.nan).dropna()
         return mini
 
-    # --- 通常のフル特徴量モード ---
-    # 基本の戻りとボラ
-    df["ret1"] = df["close"].pct_change()
-    df["ret3"] = df["close"].pct_change(3)
-    df["ret5"] = df["close"].pct_change(5)
-    df["vol20"] = df["close"].pct_change().rolling(20, min_periods=10).std()
-
-    # 移動平均・バンド（min_periodsで消滅を抑制）
-    for w in (5, 10, 20, 50):
-        df[f"sma{w}"] = df["close"].rolling(w, min_periods=max(2, w // 2)).mean()
-        df[f"ema{w}"] = df["close"].ewm(span=w, adjust=False).mean()
-    df["bb_mid"] = df["close"].rolling(20, min_periods=10).mean()
-    df["bb_std"] = df["close"].rolling(20, min_periods=10).std()
-    df["bb_p"] = (df["close"] - df["bb_mid"]) / (df["bb_std"] + 1e-12)
-
-    # RSI / ATR
-    def _rsi(series: pd.Series, period: int = 14) -> pd.Series:
-        delta = series.diff()
-        up = np.clip(delta, 0, None)
-        down = -np.clip(delta, None, 0)
-        ma_up = up.rolling(period, min_periods=period // 2).mean()
-        ma_down = down.rolling(period, min_periods=period // 2).mean()
-        rs = ma_up / (ma_down + 1e-12)
-        return 100 - (100 / (1 + rs))
-
-    def _atr(df_: pd.DataFrame, period: int = 14) -> pd.Series:
-        high, low, close = df_["high"], df_["low"], df_["close"]
-        prev_close = close.shift(1)
-        tr = pd.concat(
-            [(high - low), (high - prev_close).abs(), (low - prev_close).abs()],
-            axis=1,
-        ).max(axis=1)
-        return tr.rolling(period, min_periods=period // 2).mean()
-
-    df["rsi14"] = _rsi(df["close"], 14)
-    df["atr14"] = _atr(df, 14)
-
-    # ヒゲ比率（レンジのどこで引けたか）
-    rng = (df["high"] - df["low"]).replace(0, np.nan)
-    df["pos_in_range"] = (df["close"] - df["low"]) / rng
-
-    # 出来高代理（あれば）
-    if "tick_volume" in df.columns:
-        df["vol_sma20"] = df["tick_volume"].rolling(20, min_periods=10).mean()
-        df["vol_chg"] = df["tick_volume"].pct_change()
-
-    feature_cols = [
-        "ret1",
-        "ret3",
-        "ret5",
-        "vol20",
-        "sma5",
-        "sma10",
-        "sma20",
-        "sma50",
-        "ema5",
-        "ema10",
-        "ema20",
-        "ema50",
-        "bb_p",
-        "rsi14",
-        "atr14",
-        "pos_in_range",
-        "vol_sma20",
-        "vol_chg",
-    ]
-    feature_cols = [c for c in feature_cols if c in df.columns]
-
-    keep_cols = ["time", "open", "high", "low", "close"] + feature_cols
-    df = df[keep_cols].copy()
-
-    # 先頭のNaNを一括でトリム（最大ウィンドウ50に合わせる）
-    trim = 50
-    if len(df) > trim:
-        df = df.iloc[trim:].copy()
-
-    # それでも残るNaN/infは除去
-    df = df.replace([np.inf, -np.inf], np.nan).dropna()
-
-    return df
+    # --- 通常のフル特徴量モード（core.ai.feature_registry の recipe="walkforward_v1"） ---
+    return get_recipe("walkforward_v1").build(df)
 
 
 def make_label(df: pd.DataFrame, horizon: int = 10, pips: float = 0.0) -> pd.Series:
@@ -676,6 +604,12 @@ def main() -> int:
         default=None,
         help="comma-separated profile names (takes precedence over --profile)",
     )
+    ap.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="--profiles 時に並列で学習するプロセス数（1=逐次、0=CPU数。プロファイル数が上限。並列はメモリに余裕がある場合だけ）",
+    )
     args = ap.parse_args()
 
     # --dry を --dry-run にマップ（既存ロジックとの互換性）
@@ -749,10 +683,141 @@ def main() -> int:
     return rc
 
 
-def _run_single_profile(profile_name: str, args: argparse.Namespace) -> tuple[int, dict]:
+# ------------------------------------------------------------
+# 学習データの準備（複数プロファイルで共通）
+# ------------------------------------------------------------
+@dataclass
+class PreparedData:
+    """CSV 読み込み → 特徴量 → ラベル → 説明変数まで済ませたデータ（プロファイルに依存しない）"""
+
+    X: pd.DataFrame
+    y: pd.Series
+    # 特徴量行（欠損除去前）の time を文字列化したもの。fold の期間表示に使う
+    times: np.ndarray
+    csv_path: Path
+
+
+def prepare_dataset(args: argparse.Namespace, on_step=None) -> PreparedData | None:
+    """
+    CSV を探して読み込み、特徴量・ラベル・説明変数を作る。
+
+    Args:
+        on_step: 処理段階（"build_features" など）が進むたびに呼ばれる（結果JSONの step 用）
+    Returns:
+        PreparedData。行数不足で学習できない場合は None（呼び出し側で skipped 扱い）
+    """
+
+    def _step(name: str) -> None:
+        if on_step is not None:
+            on_step(name)
+
+    # CSV 探索 & 読み込み
+    csv_path = find_csv(args.symbol, args.timeframe, data_dir=args.data_dir)
+    print(f"[retrain] using CSV: {csv_path}", file=sys.stderr)
+    safe_log(f"[WFO] load csv: {csv_path}")
+    df_raw = pd.read_csv(csv_path)
+
+    # 最低限の列チェック
+    need_cols = {"time", "open", "high", "low", "close"}
+    missing = need_cols - set(df_raw.columns)
+    if missing:
+        raise ValueError(f"CSV に必要な列が不足しています: {missing}")
+
+    # 特徴量
+    _step("build_features")
+    feats = build_features(df_raw)
+    if feats.empty:
+        safe_log("[WFO] feature building aborted (not enough rows).")
+        return None
+
+    # ラベル
+    _step("make_label")
+    y = make_label(feats, args.horizon)
+    feats = feats.iloc[: -args.horizon, :].reset_index(drop=True)
+    y = y.iloc[: -args.horizon].reset_index(drop=True)
+
+    # 特徴量行数チェック
+    if feats.shape[0] == 0:
+        safe_log(
+            "[WFO][error] no rows after feature engineering + horizon alignment. "
+            "Likely because rows <= horizon. Provide a longer CSV or reduce --horizon."
+        )
+        return None
+
+    # 説明変数
+    _step("prepare_X")
+    drop_cols = ["time", "open", "high", "low", "close"]
+    X = feats.drop(columns=[c for c in drop_cols if c in feats.columns])
+
+    # 念のための欠損除去
+    mask = ~X.isna().any(axis=1)
+    X, y = X[mask], y[mask]
+    X = X.astype(np.float32)
+
+    times = np.array([str(t) for t in feats["time"]], dtype=str)
+    return PreparedData(X=X, y=y, times=times, csv_path=csv_path)
+
+
+def _apply_outcome(
+    args: argparse.Namespace,
+    model_path: Path,
+    meta_path: Path,
+    best_threshold: float | None,
+    expected_features: list[str] | None,
+) -> dict:
+    """
+    --dry-run / --apply に応じて active_model.json を更新し、結果JSON用の
+    {"step", "ok", "rc", "apply", "error"} を返す
+    """
+    if args.dry_run:
+        safe_log("[WFO] DRY-RUN のため active_model.json は更新しません。")
+        return {"step": "done", "ok": True, "rc": 0, "apply": {"performed": False, "reason": "dry_run"}, "error": None}
+    if not args.apply:
+        safe_log("[WFO] --apply が指定されていないため active_model.json は更新しません。")
+        return {
+            "step": "done",
+            "ok": True,
+            "rc": 0,
+            "apply": {"performed": False, "reason": "not_specified"},
+            "error": None,
+        }
+
+    # ✅ apply安全装置
+    apply_result = _safe_apply_active_model(model_path, meta_path, best_threshold, expected_features)
+    if apply_result["ok"]:
+        return {"step": "done", "ok": True, "rc": 0, "apply": {"performed": True, "reason": "updated"}, "error": None}
+    apply_info = {"performed": False, "reason": apply_result["reason"]}
+    if apply_result["reason"] == "same_model":
+        return {"step": "apply_skipped", "ok": True, "rc": 13, "apply": apply_info, "error": None}
+    return {
+        "step": "apply",
+        "ok": False,
+        "rc": 30,
+        "apply": apply_info,
+        "error": {
+            "code": apply_result.get("code", "APPLY_FAILED"),
+            "message": apply_result.get("message", "apply failed"),
+            "where": "apply",
+            "trace": apply_result.get("trace", ""),
+        },
+    }
+
+
+def _run_single_profile(
+    profile_name: str,
+    args: argparse.Namespace,
+    prepared: PreparedData | None = None,
+    *,
+    defer_apply: bool = False,
+) -> tuple[int, dict]:
     """
     単一プロファイルのWFO実行
 
+    Args:
+        prepared: 準備済みの学習データ（複数プロファイルで共有する場合）。None なら CSV から作る
+        defer_apply: True なら active_model.json の更新判定をせず、必要な情報を
+            result["_pending_apply"] に残す（並列実行時に親プロセスがプロファイル順に適用する）
+
     Returns:
         (exit_code, result_dict)
     """
@@ -769,71 +834,68 @@ def _run_single_profile(profile_name: str, args: argparse.Namespace) -> tuple[in
     meta_path = None
     best_threshold = None
     expected_features = None
+    pending_apply = None
 
-    # logs/retrain ディレクトリ準備
-    retrain_log_dir = LOGS_DIR / "retrain"
-    retrain_log_dir.mkdir(parents=True, exist_ok=True)
-    last_json_path = retrain_log_dir / "weekly_retrain_last.json"
-    jsonl_path = retrain_log_dir / "weekly_retrain.jsonl"
+    def _set_step(name: str) -> None:
+        nonlocal step
+        step = name
 
+    def _result() -> dict:
+        ended_at = jst_now_str()
+        elapsed_sec = (
+            datetime.fromisoformat(ended_at.replace("Z", "+00:00"))
+            - datetime.fromisoformat(started_at.replace("Z", "+00:00"))
+        ).total_seconds()
+        result = {
+            "type": "weekly_retrain",
+            "ok": ok,
+            "profile": profile,
+            "step": step,
+            "started_at": started_at,
+            "ended_at": ended_at,
+            "elapsed_sec": round(elapsed_sec, 1),
+            "apply": apply_info,
+            "outputs": outputs,
+            "error": error_info,
+        }
+        if pending_apply is not None:
+            result["_pending_apply"] = pending_apply
+        return result
+
+    def _finish_apply() -> None:
+        nonlocal step, ok, rc, apply_info, error_info, pending_apply
+        if defer_apply:
+            pending_apply = {
+                "model_path": str(model_path),
+                "meta_path": str(meta_path),
+                "best_threshold": best_threshold,
+                "expected_features": expected_features,
+            }
+            ok = True
+            rc = 0
+            return
+        out = _apply_outcome(args, model_path, meta_path, best_threshold, expected_features)
+        step, ok, rc, apply_info, error_info = out["step"], out["ok"], out["rc"], out["apply"], out["error"]
+
+    # args.model_name を profile_name に一時的に上書き（既存ロジックとの互換性）
+    original_model_name = args.model_name
     try:
         safe_log(
             f"[WFO] start walkforward retrain | profile={profile} symbol={args.symbol} tf={args.timeframe}"
         )
         step = "load_data"
-
-        # args.model_name を profile_name に一時的に上書き（既存ロジックとの互換性）
-        original_model_name = args.model_name
         args.model_name = profile_name
 
-        # CSV 探索 & 読み込み
-        csv_path = find_csv(args.symbol, args.timeframe, data_dir=args.data_dir)
-        print(f"[retrain] using CSV: {csv_path}", file=sys.stderr)
-        safe_log(f"[WFO] load csv: {csv_path}")
-        df_raw = pd.read_csv(csv_path)
-
-        # 最低限の列チェック
-        need_cols = {"time", "open", "high", "low", "close"}
-        missing = need_cols - set(df_raw.columns)
-        if missing:
-            raise ValueError(f"CSV に必要な列が不足しています: {missing}")
-
-        # 特徴量
-        step = "build_features"
-        feats = build_features(df_raw)
-        if feats.empty:
-            safe_log("[WFO] feature building aborted (not enough rows).")
-            step = "skipped"
-            ok = True
-            rc = 11
-            return rc
-
-        # ラベル
-        step = "make_label"
-        y = make_label(feats, args.horizon)
-        feats = feats.iloc[: -args.horizon, :].reset_index(drop=True)
-        y = y.iloc[: -args.horizon].reset_index(drop=True)
-
-        # 特徴量行数チェック
-        if feats.shape[0] == 0:
-            safe_log(
-                "[WFO][error] no rows after feature engineering + horizon alignment. "
-                "Likely because rows <= horizon. Provide a longer CSV or reduce --horizon."
-            )
-            step = "skipped"
-            ok = True
-            rc = 11
-            return rc
+        if prepared is None:
+            prepared = prepare_dataset(args, on_step=_set_step)
+            if prepared is None:
+                step = "skipped"
+                ok = True
+                rc = 11
+                return rc, _result()
 
-        # 説明変数
         step = "prepare_X"
-        drop_cols = ["time", "open", "high", "low", "close"]
-        X = feats.drop(columns=[c for c in drop_cols if c in feats.columns])
-
-        # 念のための欠損除去
-        mask = ~X.isna().any(axis=1)
-        X, y = X[mask], y[mask]
-        X = X.astype(np.float32)
+        X, y, times, csv_path = prepared.X, prepared.y, prepared.times, prepared.csv_path
 
         n_total = len(X)
         expected_features = list(X.columns)
@@ -884,48 +946,8 @@ def _run_single_profile(profile_name: str, args: argparse.Namespace) -> tuple[in
             # アクティブモデル更新（--apply のときだけ）
             step = "apply"
             safe_log(f"[WFO] wrote: {model_path.name}, {meta_path.name}")
-            if args.dry_run:
-                safe_log(
-                    "[WFO] DRY-RUN のため active_model.json は更新しません。"
-                )
-                apply_info = {"performed": False, "reason": "dry_run"}
-                step = "done"
-                ok = True
-                rc = 0
-            elif not args.apply:
-                safe_log(
-                    "[WFO] --apply が指定されていないため active_model.json は更新しません。"
-                )
-                apply_info = {"performed": False, "reason": "not_specified"}
-                step = "done"
-                ok = True
-                rc = 0
-            else:
-                # ✅ apply安全装置
-                apply_result = _safe_apply_active_model(
-                    model_path, meta_path, best_threshold, expected_features
-                )
-                if apply_result["ok"]:
-                    apply_info = {"performed": True, "reason": "updated"}
-                    step = "done"
-                    ok = True
-                    rc = 0
-                else:
-                    apply_info = {"performed": False, "reason": apply_result["reason"]}
-                    if apply_result["reason"] == "same_model":
-                        step = "apply_skipped"
-                        ok = True
-                        rc = 13
-                    else:
-                        step = "apply"
-                        error_info = {
-                            "code": apply_result.get("code", "APPLY_FAILED"),
-                            "message": apply_result.get("message", "apply failed"),
-                            "where": "apply",
-                            "trace": apply_result.get("trace", ""),
-                        }
-                        rc = 30
-            return rc
+            _finish_apply()
+            return rc, _result()
 
         # --- WFO ---
         step = "wfo"
@@ -964,12 +986,12 @@ def _run_single_profile(profile_name: str, args: argparse.Namespace) -> tuple[in
             thr_list.append(thr)
 
             # 期間情報
-            t_idx = feats.iloc[s_tr, :]["time"]
-            tr_start = str(t_idx.iloc[0]) if len(t_idx) else ""
-            tr_end = str(t_idx.iloc[-1]) if len(t_idx) else ""
-            t_idx2 = feats.iloc[s_te, :]["time"]
-            te_start = str(t_idx2.iloc[0]) if len(t_idx2) else ""
-            te_end = str(t_idx2.iloc[-1]) if len(t_idx2) else ""
+            t_idx = times[s_tr]
+            tr_start = str(t_idx[0]) if len(t_idx) else ""
+            tr_end = str(t_idx[-1]) if len(t_idx) else ""
+            t_idx2 = times[s_te]
+            te_start = str(t_idx2[0]) if len(t_idx2) else ""
+            te_end = str(t_idx2[-1]) if len(t_idx2) else ""
 
             m = WFOMetrics(
                 fold=fold,
@@ -997,7 +1019,7 @@ def _run_single_profile(profile_name: str, args: argparse.Namespace) -> tuple[in
             step = "skipped"
             ok = True
             rc = 11
-            return rc
+            return rc, _result()
 
         y_oof = y.values[valid_idx]
         p_oof = prob_oof[valid_idx]
@@ -1058,106 +1080,177 @@ def _run_single_profile(profile_name: str, args: argparse.Namespace) -> tuple[in
 
         # active_model.json 更新（GUI/実運用が読むファイル）: --apply のときだけ
         step = "apply"
-        if args.dry_run:
-            safe_log(
-                "[WFO] DRY-RUN のため active_model.json は更新しません。"
-            )
-            apply_info = {"performed": False, "reason": "dry_run"}
-            step = "done"
-            ok = True
-            rc = 0
-        elif not args.apply:
-            safe_log(
-                "[WFO] --apply が指定されていないため active_model.json は更新しません。"
-            )
-            apply_info = {"performed": False, "reason": "not_specified"}
-            step = "done"
-            ok = True
-            rc = 0
-        else:
-            # ✅ apply安全装置
-            apply_result = _safe_apply_active_model(
-                model_path, meta_path, best_threshold, expected_features
-            )
-            if apply_result["ok"]:
-                apply_info = {"performed": True, "reason": "updated"}
-                step = "done"
-                ok = True
-                rc = 0
-            else:
-                apply_info = {"performed": False, "reason": apply_result["reason"]}
-                if apply_result["reason"] == "same_model":
-                    step = "apply_skipped"
-                    ok = True
-                    rc = 13
-                else:
-                    step = "apply"
-                    error_info = {
-                        "code": apply_result.get("code", "APPLY_FAILED"),
-                        "message": apply_result.get("message", "apply failed"),
-                        "where": "apply",
-                        "trace": apply_result.get("trace", ""),
-                    }
-                    rc = 30
+        _finish_apply()
         safe_log("[WFO] done.")
-
-        # args.model_name を元に戻す
-        args.model_name = original_model_name
-
-        ended_at = jst_now_str()
-        elapsed_sec = (
-            datetime.fromisoformat(ended_at.replace("Z", "+00:00"))
-            - datetime.fromisoformat(started_at.replace("Z", "+00:00"))
-        ).total_seconds()
-        result = {
-            "type": "weekly_retrain",
-            "ok": ok,
-            "profile": profile,
-            "step": step,
-            "started_at": started_at,
-            "ended_at": ended_at,
-            "elapsed_sec": round(elapsed_sec, 1),
-            "apply": apply_info,
-            "outputs": outputs,
-            "error": error_info,
-        }
-        return rc, result
+        return rc, _result()
 
     except Exception as e:
         # 例外発生時
         step = step or "error"
         ok = False
         rc = 30
+        pending_apply = None
         error_info = {
             "code": "UNEXPECTED_ERROR",
             "message": str(e),
             "where": step,
             "trace": traceback.format_exc(),
         }
-        ended_at = jst_now_str()
-        elapsed_sec = (
-            datetime.fromisoformat(ended_at.replace("Z", "+00:00"))
-            - datetime.fromisoformat(started_at.replace("Z", "+00:00"))
-        ).total_seconds()
-        result = {
-            "type": "weekly_retrain",
-            "ok": ok,
-            "profile": profile,
-            "step": step,
-            "started_at": started_at,
-            "ended_at": ended_at,
-            "elapsed_sec": round(elapsed_sec, 1),
-            "apply": apply_info,
-            "outputs": outputs,
-            "error": error_info,
-        }
-        return rc, result
+        return rc, _result()
+
+    finally:
+        # args.model_name を元に戻す
+        args.model_name = original_model_name
+
+
+# ------------------------------------------------------------
+# 複数プロファイルの並列実行（学習データは共有メモリで1回だけ作る）
+# ------------------------------------------------------------
+def _resolve_jobs(args: argparse.Namespace, n_profiles: int) -> int:
+    """並列プロセス数（--jobs。未指定は 1 = 逐次、0 以下は CPU 数）。プロファイル数を上限にする"""
+    jobs = getattr(args, "jobs", None)
+    jobs = 1 if jobs is None else int(jobs)
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    return max(1, min(jobs, int(n_profiles)))
+
+
+def _publish_shared(prepared: PreparedData) -> tuple[dict, list[shared_memory.SharedMemory]]:
+    """
+    X / y / times を共有メモリに置き、ワーカーが attach するための spec を返す。
+    返した SharedMemory は呼び出し側で close + unlink すること
+    """
+    arrays = {
+        "X": np.ascontiguousarray(prepared.X.to_numpy(dtype=np.float32)),
+        "y": np.ascontiguousarray(prepared.y.to_numpy()),
+        "times": np.ascontiguousarray(prepared.times),
+    }
+    spec: dict = {"columns": list(prepared.X.columns), "csv_path": str(prepared.csv_path), "arrays": {}}
+    blocks: list[shared_memory.SharedMemory] = []
+    try:
+        for key, arr in arrays.items():
+            shm = shared_memory.SharedMemory(create=True, size=max(1, arr.nbytes))
+            blocks.append(shm)
+            np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+            spec["arrays"][key] = {"name": shm.name, "shape": arr.shape, "dtype": arr.dtype.str}
+    except Exception:
+        _release_shared(blocks, unlink=True)
+        raise
+    return spec, blocks
+
+
+def _attach_shared(spec: dict) -> tuple[PreparedData, list[shared_memory.SharedMemory]]:
+    """_publish_shared の spec から PreparedData を組み立てる（配列はコピーせず共有メモリを参照）"""
+    blocks: list[shared_memory.SharedMemory] = []
+    arrs: dict[str, np.ndarray] = {}
+    for key, a in spec["arrays"].items():
+        shm = shared_memory.SharedMemory(name=a["name"])
+        blocks.append(shm)
+        arrs[key] = np.ndarray(tuple(a["shape"]), dtype=np.dtype(a["dtype"]), buffer=shm.buf)
+    X = pd.DataFrame(arrs["X"], columns=spec["columns"], copy=False)
+    y = pd.Series(arrs["y"], copy=False)
+    return PreparedData(X=X, y=y, times=arrs["times"], csv_path=Path(spec["csv_path"])), blocks
+
+
+def _release_shared(blocks: list[shared_memory.SharedMemory], *, unlink: bool) -> None:
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            # 参照が残っている場合はプロセス終了時に解放される
+            pass
+        except Exception:
+            pass
+        if unlink:
+            try:
+                shm.unlink()
+            except Exception:
+                pass
+
+
+def _profile_worker(profile_name: str, args: argparse.Namespace, spec: dict) -> tuple[int, dict]:
+    """プロセスプールのワーカー: 共有データを attach して1プロファイルを学習する（apply は親で行う）"""
+    prepared, blocks = _attach_shared(spec)
+    try:
+        return _run_single_profile(profile_name, args, prepared, defer_apply=True)
+    finally:
+        del prepared
+        _release_shared(blocks, unlink=False)
+
+
+def _profile_exception_result(profile_name: str, e: BaseException) -> dict:
+    return {
+        "type": "weekly_retrain",
+        "ok": False,
+        "profile": profile_name,
+        "step": "exception",
+        "started_at": jst_now_str(),
+        "ended_at": jst_now_str(),
+        "elapsed_sec": 0.0,
+        "apply": {"performed": False, "reason": "exception"},
+        "outputs": {},
+        "error": {
+            "code": "PROFILE_EXCEPTION",
+            "message": str(e),
+            "where": profile_name,
+            "trace": "".join(traceback.format_exception(type(e), e, e.__traceback__)),
+        },
+    }
+
+
+def _run_profiles_parallel(
+    profile_list: list[str], args: argparse.Namespace, prepared: PreparedData, jobs: int
+) -> dict[str, tuple[int, dict]]:
+    """
+    プロファイルをプロセスプールで並列に学習する。
+    active_model.json の更新はワーカーでは行わず、全員の学習後に親がプロファイル順に適用する
+    （逐次実行と同じく、最後に適用したプロファイルが残る）
+    """
+    outcomes: dict[str, tuple[int, dict]] = {}
+    spec, blocks = _publish_shared(prepared)
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            futures = {}
+            for profile_name in profile_list:
+                safe_log(f"[WFO] processing profile: {profile_name}")
+                futures[ex.submit(_profile_worker, profile_name, args, spec)] = profile_name
+            for fut in as_completed(futures):
+                profile_name = futures[fut]
+                try:
+                    outcomes[profile_name] = fut.result()
+                except Exception as e:
+                    outcomes[profile_name] = (30, _profile_exception_result(profile_name, e))
+    finally:
+        _release_shared(blocks, unlink=True)
+
+    for profile_name in profile_list:
+        rc, result = outcomes[profile_name]
+        pending = result.pop("_pending_apply", None)
+        if pending is None:
+            continue
+        try:
+            out = _apply_outcome(
+                args,
+                Path(pending["model_path"]),
+                Path(pending["meta_path"]),
+                pending["best_threshold"],
+                pending["expected_features"],
+            )
+            result.update({"ok": out["ok"], "step": out["step"], "apply": out["apply"], "error": out["error"]})
+            outcomes[profile_name] = (out["rc"], result)
+        except Exception as e:
+            outcomes[profile_name] = (30, _profile_exception_result(profile_name, e))
+    return outcomes
 
 
 def _run_multiple_profiles(profile_list: list[str], args: argparse.Namespace) -> int:
     """
     複数プロファイルのWFO実行
 
+    学習データ（CSV 読み込み・特徴量・ラベル）はプロファイルに依存しないので1回だけ作り、
+    --jobs に応じてプロセスプールで並列に学習する（1 なら従来どおり逐次）。
+    共通データが作れなかった場合は、各プロファイルが個別に読み込む（エラーはプロファイルごとに記録）。
+
     Returns:
         exit_code (最悪コードを採用: 30 > 13 > 11 > 0)
     """
@@ -1165,34 +1258,31 @@ def _run_multiple_profiles(profile_list: list[str], args: argparse.Namespace) ->
     per_profile: dict[str, dict] = {}
     all_rcs: list[int] = []
 
-    # 各プロファイルを実行
+    jobs = _resolve_jobs(args, len(profile_list))
+    safe_log(f"[WFO] multi-profile: profiles={len(profile_list)} jobs={jobs}")
+    try:
+        prepared = prepare_dataset(args)
+    except Exception as e:
+        safe_log(f"[WFO][warn] shared data load failed, falling back to per-profile load: {e}")
+        prepared = None
+
+    if jobs > 1 and prepared is not None:
+        outcomes = _run_profiles_parallel(profile_list, args, prepared, jobs)
+    else:
+        # 各プロファイルを逐次実行
+        outcomes = {}
+        for profile_name in profile_list:
+            safe_log(f"[WFO] processing profile: {profile_name}")
+            try:
+                outcomes[profile_name] = _run_single_profile(profile_name, args, prepared)
+            except Exception as e:
+                # プロファイル実行中の例外
+                outcomes[profile_name] = (30, _profile_exception_result(profile_name, e))
+
     for profile_name in profile_list:
-        safe_log(f"[WFO] processing profile: {profile_name}")
-        try:
-            rc, result = _run_single_profile(profile_name, args)
-            per_profile[profile_name] = result
-            all_rcs.append(rc)
-        except Exception as e:
-            # プロファイル実行中の例外
-            error_result = {
-                "type": "weekly_retrain",
-                "ok": False,
-                "profile": profile_name,
-                "step": "exception",
-                "started_at": jst_now_str(),
-                "ended_at": jst_now_str(),
-                "elapsed_sec": 0.0,
-                "apply": {"performed": False, "reason": "exception"},
-                "outputs": {},
-                "error": {
-                    "code": "PROFILE_EXCEPTION",
-                    "message": str(e),
-                    "where": profile_name,
-                    "trace": traceback.format_exc(),
-                },
-            }
-            per_profile[profile_name] = error_result
-            all_rcs.append(30)
+        rc, result = outcomes[profile_name]
+        per_profile[profile_name] = result
+        all_rcs.append(rc)
 
     # 最悪コードを決定（優先順位: 30 > 13 > 11 > 0）
     final_rc = 0
@@ -68,10 +68,13 @@ def _enrich_active_model_meta(meta: dict, model_obj=None) -> dict:
     meta["feature_hash"] = hashlib.sha256("\n".join(meta["expected_features"]).encode("utf-8")).hexdigest()
     return meta
 
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 import lightgbm as lgb
 import numpy as np
@@ -82,6 +85,8 @@ from joblib import dump
 from loguru import logger
 from sklearn.metrics import roc_auc_score
 
+from core.ai.feature_registry import get_recipe
+
 # ---- 定数 (Ruff の magic number 対策も兼ねる) -----------------------------
 
 MIN_WFO_SPLITS: int = 2
@@ -110,7 +115,8 @@ class RetrainConfig:
     label_horizon: int = 10  # 何バー先をラベルにするか
     min_pips: float = 1.0  # クラス分けに使う最小pips
     n_splits: int = 4  # Walk-Forward の分割数
-    threshold_grid: list[float] | None = None  # None を許容
+    threshold_grid: list[float] | None = None  # None を許容（YAML では {start, stop, step} の細かいグリッドも可）
+    wfo_n_jobs: int = 0  # fold を並列学習するプロセス数（0=自動: min(fold数, CPUコア数)）
 
     def __post_init__(self) -> None:
         if self.threshold_grid is None:
@@ -154,10 +160,18 @@ def load_config(config_path: Path) -> WeeklyRetrainConfig:
     label_horizon = int(retrain_raw.get("label_horizon_bars", 10))
     min_pips = float(retrain_raw.get("min_pips", 1.0))
     n_splits = int(retrain_raw.get("wfo_n_splits", 4))
+    wfo_n_jobs = int(retrain_raw.get("wfo_n_jobs", 0) or 0)
 
     thr_raw = retrain_raw.get("threshold_grid")
     if thr_raw is None:
         threshold_grid: list[float] | None = None
+    elif isinstance(thr_raw, dict):
+        # 細かいグリッド: {start: 0.40, stop: 0.70, step: 0.001}
+        threshold_grid = dense_threshold_grid(
+            float(thr_raw.get("start", 0.40)),
+            float(thr_raw.get("stop", 0.70)),
+            float(thr_raw.get("step", 0.005)),
+        )
     else:
         threshold_grid = [float(x) for x in thr_raw]
 
@@ -174,6 +188,7 @@ def load_config(config_path: Path) -> WeeklyRetrainConfig:
             min_pips=min_pips,
             n_splits=n_splits,
             threshold_grid=threshold_grid,
+            wfo_n_jobs=wfo_n_jobs,
         ),
     )
     return cfg
@@ -216,55 +231,11 @@ def load_price_data(csv_path: Path) -> pd.DataFrame:
     )
 
 
-def compute_rsi(close: pd.Series, period: int = 14) -> pd.Series:
-    diff = close.diff()
-    gain = diff.clip(lower=0)
-    loss = -diff.clip(upper=0)
-    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
-    rs = avg_gain / (avg_loss + 1e-9)
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
-
-
-def compute_atr(
-    high: pd.Series,
-    low: pd.Series,
-    close: pd.Series,
-    period: int = 14,
-) -> pd.Series:
-    prev_close = close.shift(1)
-    tr1 = high - low
-    tr2 = (high - prev_close).abs()
-    tr3 = (low - prev_close).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.ewm(alpha=1 / period, adjust=False).mean()
-    return atr
-
-
 def build_features(df: pd.DataFrame) -> pd.DataFrame:
     """
-    非常にシンプルな特徴量セット。
-    後で core/feature_pipeline.py に差し替えてもOK。
+    非常にシンプルな特徴量セット（core.ai.feature_registry の recipe="weekly_retrain_v1"）。
     """
-
-    out = pd.DataFrame(index=df.index)
-
-    out["ret_1"] = df["close"].pct_change()
-    out["ret_5"] = df["close"].pct_change(5)
-    out["ema_5"] = df["close"].ewm(span=5, adjust=False).mean()
-    out["ema_20"] = df["close"].ewm(span=20, adjust=False).mean()
-    out["ema_ratio"] = out["ema_5"] / (out["ema_20"] + 1e-9)
-
-    out["rsi_14"] = compute_rsi(df["close"], period=14)
-    out["atr_14"] = compute_atr(df["high"], df["low"], df["close"], period=14)
-
-    out["range"] = (df["high"] - df["low"]) / (df["close"].shift(1) + 1e-9)
-    out["vol_chg"] = df["volume"].pct_change().fillna(0.0)
-
-    out = out.replace([np.inf, -np.inf], np.nan)
-    out = out.dropna()
-    return out
+    return get_recipe("weekly_retrain_v1").build(df)
 
 
 def build_labels(
@@ -364,12 +335,219 @@ def iter_walkforward_indices(
     return splits
 
 
+def _wfo_fingerprint(
+    X: pd.DataFrame,
+    y: pd.Series,
+    params: dict[str, object],
+    splits: list[tuple[np.ndarray, np.ndarray]],
+    num_boost_round: int,
+    early_stopping_rounds: int,
+) -> str:
+    """
+    チェックポイントの再利用可否を決める指紋。
+    データ（X, y の中身と列名）・パラメータ・分割・LightGBM のバージョンが同じときだけ一致する。
+    """
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    h.update(np.asarray(y, dtype=np.int64).tobytes())
+    h.update(
+        json.dumps(
+            {
+                "columns": [str(c) for c in X.columns],
+                "params": {k: params[k] for k in sorted(params) if k != "num_threads"},
+                "splits": [[int(tr[-1]) + 1, int(va[0]), int(va[-1]) + 1] for tr, va in splits],
+                "num_boost_round": num_boost_round,
+                "early_stopping_rounds": early_stopping_rounds,
+                "lightgbm": lgb.__version__,
+            },
+            sort_keys=True,
+            default=str,
+        ).encode("utf-8")
+    )
+    return h.hexdigest()[:16]
+
+
+def _fold_ckpt_paths(ckpt_dir: Path, fold_idx: int) -> tuple[Path, Path, Path]:
+    """(booster, OOF 予測, 完了マーカー) のパス。マーカーは最後に書くので、あれば fold 完了。"""
+    return (
+        ckpt_dir / f"fold{fold_idx}.model.txt",
+        ckpt_dir / f"fold{fold_idx}.oof.npy",
+        ckpt_dir / f"fold{fold_idx}.done.json",
+    )
+
+
+def _train_wfo_fold(task: dict[str, Any]) -> int:
+    """
+    1 fold を学習し、booster と OOF 予測をチェックポイントに保存する（プロセスプールのワーカーでも実行）。
+
+    学習データは全体を1回だけビン化して保存した LightGBM バイナリから subset で作る
+    （fold ごとに X.iloc[...] から Dataset を作り直さない）。
+    予測は memmap した特徴量行列の検証行に対して行う。
+    """
+    ckpt_dir = Path(task["ckpt_dir"])
+    fold_idx = int(task["fold_idx"])
+    tr_idx = np.asarray(task["tr_idx"])
+    va_idx = np.asarray(task["va_idx"])
+    model_path, oof_path, done_path = _fold_ckpt_paths(ckpt_dir, fold_idx)
+
+    full = lgb.Dataset(str(ckpt_dir / "dataset.bin"), params={"verbosity": -1}).construct()
+    train_data = full.subset(tr_idx)
+    valid_data = full.subset(va_idx)
+
+    booster = lgb.train(
+        task["params"],
+        train_data,
+        num_boost_round=int(task["num_boost_round"]),
+        valid_sets=[valid_data],
+        valid_names=["valid"],
+        callbacks=[
+            lgb.early_stopping(stopping_rounds=int(task["early_stopping_rounds"]), verbose=False),
+        ],
+    )
+
+    X_all = np.load(ckpt_dir / "X.npy", mmap_mode="r")
+    y_proba = booster.predict(np.asarray(X_all[va_idx]), num_iteration=booster.best_iteration)
+
+    best_score: dict[str, dict[str, float]] = {}
+    for name, metrics in (getattr(booster, "best_score", None) or {}).items():
+        best_score[name] = {k: float(v) for k, v in metrics.items()}
+
+    booster.save_model(str(model_path), num_iteration=-1)
+    np.save(oof_path, np.asarray(y_proba, dtype=np.float64))
+    tmp = done_path.with_suffix(".tmp")
+    tmp.write_text(
+        json.dumps(
+            {
+                "fold": fold_idx,
+                "best_iteration": booster.best_iteration,
+                "best_score": best_score,
+                "n_train": int(len(tr_idx)),
+                "n_val": int(len(va_idx)),
+            }
+        ),
+        encoding="utf-8",
+    )
+    os.replace(tmp, done_path)
+    return fold_idx
+
+
+def _load_fold_ckpt(ckpt_dir: Path, fold_idx: int) -> Optional[tuple[lgb.Booster, npt.NDArray[np.float64]]]:
+    """完了済み fold の (booster, OOF 予測)。未完了・壊れている場合は None。"""
+    model_path, oof_path, done_path = _fold_ckpt_paths(ckpt_dir, fold_idx)
+    if not done_path.exists():
+        return None
+    try:
+        info = json.loads(done_path.read_text(encoding="utf-8"))
+        booster = lgb.Booster(model_file=str(model_path))
+        booster.best_iteration = int(info.get("best_iteration") or 0)
+        booster.best_score = info.get("best_score") or {}
+        y_proba = np.load(oof_path)
+    except Exception as e:
+        logger.warning("[WFO] checkpoint fold={} unreadable ({}); retraining", fold_idx, e)
+        return None
+    return booster, y_proba
+
+
+def _resolve_wfo_workers(n_jobs: int, n_folds: int) -> tuple[int, int]:
+    """(プロセス数, fold あたりのスレッド数)。CPU コアをプロセス間で分け合う。"""
+    cpu = os.cpu_count() or 1
+    workers = n_jobs if n_jobs and n_jobs > 0 else min(n_folds, cpu)
+    workers = max(1, min(workers, n_folds))
+    return workers, max(1, cpu // workers)
+
+
+def _run_wfo_folds(
+    X: pd.DataFrame,
+    y: pd.Series,
+    params: dict[str, object],
+    splits: list[tuple[np.ndarray, np.ndarray]],
+    num_boost_round: int,
+    early_stopping_rounds: int,
+    checkpoint_dir: Path,
+    n_jobs: int = 0,
+) -> list[tuple[lgb.Booster, npt.NDArray[np.float64]]]:
+    """
+    全 fold を学習（完了済みはチェックポイントから読み込み）し、fold 順に (booster, OOF 予測) を返す。
+    """
+    fingerprint = _wfo_fingerprint(X, y, params, splits, num_boost_round, early_stopping_rounds)
+    ckpt_dir = checkpoint_dir / fingerprint
+    ckpt_dir.mkdir(parents=True, exist_ok=True)
+    # 別データ・別設定の古いチェックポイントは不要なので消す
+    for old in checkpoint_dir.iterdir():
+        if old.is_dir() and old.name != fingerprint:
+            shutil.rmtree(old, ignore_errors=True)
+
+    outputs: dict[int, tuple[lgb.Booster, npt.NDArray[np.float64]]] = {}
+    for fold_idx in range(len(splits)):
+        loaded = _load_fold_ckpt(ckpt_dir, fold_idx)
+        if loaded is not None:
+            outputs[fold_idx] = loaded
+    pending = [k for k in range(len(splits)) if k not in outputs]
+    if outputs:
+        logger.info("[WFO] resume from checkpoint {}: done={} pending={}", ckpt_dir, sorted(outputs), pending)
+
+    if pending:
+        workers, threads = _resolve_wfo_workers(n_jobs, len(pending))
+        # 全体を1回だけビン化して保存（各 fold は subset で使う）。予測用に特徴量行列も保存
+        if not (ckpt_dir / "dataset.bin").exists():
+            full = lgb.Dataset(X, label=y, params={"verbosity": -1, "force_col_wise": True}, free_raw_data=False)
+            full.construct()
+            tmp_bin = ckpt_dir / "dataset.bin.tmp"
+            full.save_binary(str(tmp_bin))
+            os.replace(tmp_bin, ckpt_dir / "dataset.bin")
+        if not (ckpt_dir / "X.npy").exists():
+            np.save(ckpt_dir / "X.tmp.npy", X.to_numpy(dtype=np.float64))
+            os.replace(ckpt_dir / "X.tmp.npy", ckpt_dir / "X.npy")
+
+        fold_params = dict(params)
+        fold_params["num_threads"] = threads
+        tasks = [
+            {
+                "ckpt_dir": str(ckpt_dir),
+                "fold_idx": k,
+                "tr_idx": splits[k][0],
+                "va_idx": splits[k][1],
+                "params": fold_params,
+                "num_boost_round": num_boost_round,
+                "early_stopping_rounds": early_stopping_rounds,
+            }
+            for k in pending
+        ]
+        logger.info("[WFO] training folds={} workers={} num_threads/fold={}", pending, workers, threads)
+        if workers == 1:
+            for task in tasks:
+                _train_wfo_fold(task)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # 大きい（後ろの）fold から投げると全体の待ち時間が短い
+                for _ in pool.map(_train_wfo_fold, sorted(tasks, key=lambda t: -len(t["tr_idx"]))):
+                    pass
+
+        for k in pending:
+            loaded = _load_fold_ckpt(ckpt_dir, k)
+            if loaded is None:
+                raise RuntimeError(f"[WFO] fold={k} finished without a checkpoint: {ckpt_dir}")
+            outputs[k] = loaded
+
+    return [outputs[k] for k in range(len(splits))]
+
+
 def train_lightgbm_wfo(
     X: pd.DataFrame,
     y: pd.Series,
     cfg: RetrainConfig,
     obs_output_dir: Optional[Path] = None,
+    checkpoint_dir: Optional[Path] = None,
 ) -> Tuple[WFOResult, List[lgb.Booster], npt.NDArray[np.float64], int]:
+    """
+    Walk-Forward で fold ごとに LightGBM を学習する。
+
+    - fold は cfg.wfo_n_jobs 個のプロセスで並列に学習（CPU コアを fold 間で分け、num_threads に反映）
+    - 全データを1回だけビン化した Dataset を保存し、各 fold はその subset で学習
+    - 完了した fold の booster / OOF 予測は checkpoint_dir/<指紋>/ に保存し、
+      同じデータ・設定で再実行したときは完了済み fold を読み込んで続きから学習する
+      （checkpoint_dir=None なら一時ディレクトリを使い、終了時に消す）
+    """
     params: dict[str, object] = {
         "objective": "binary",
         "metric": ["binary_logloss"],
@@ -399,29 +577,27 @@ def train_lightgbm_wfo(
     fold_results: list[FoldResult] = []
     fold_obs: list[dict] = []
 
-    for fold_idx, (tr_idx, va_idx) in enumerate(splits):
-        X_tr, y_tr = X.iloc[tr_idx], y.iloc[tr_idx]
-        X_va, y_va = X.iloc[va_idx], y.iloc[va_idx]
+    tmp_ckpt: Optional[tempfile.TemporaryDirectory] = None
+    if checkpoint_dir is None:
+        tmp_ckpt = tempfile.TemporaryDirectory(prefix="wfo_ckpt_")
+        checkpoint_dir = Path(tmp_ckpt.name)
+    try:
+        fold_outputs = _run_wfo_folds(
+            X, y, params, splits, NUM_BOOST_ROUND, EARLY_STOPPING_ROUNDS, Path(checkpoint_dir), cfg.wfo_n_jobs
+        )
+    finally:
+        if tmp_ckpt is not None:
+            tmp_ckpt.cleanup()
 
-        train_data = lgb.Dataset(X_tr, label=y_tr)
-        valid_data = lgb.Dataset(X_va, label=y_va)
+    for fold_idx, (tr_idx, va_idx) in enumerate(splits):
+        y_va = y.iloc[va_idx]
+        booster, y_proba = fold_outputs[fold_idx]
 
         logger.info(
-            f"[WFO] fold={fold_idx} train={len(X_tr)} val={len(X_va)} "
+            f"[WFO] fold={fold_idx} train={len(tr_idx)} val={len(va_idx)} "
             f"from={tr_idx[0]} to={va_idx[-1]}"
         )
 
-        booster = lgb.train(
-            params,
-            train_data,
-            num_boost_round=NUM_BOOST_ROUND,
-            valid_sets=[valid_data],
-            valid_names=["valid"],
-            callbacks=[
-                lgb.early_stopping(stopping_rounds=EARLY_STOPPING_ROUNDS, verbose=False),
-            ],
-        )
-
         boosters.append(booster)
 
         # 【観測】fold 完了時の booster 状態（best_iteration が小さい理由の確定用）
@@ -454,10 +630,6 @@ def train_lightgbm_wfo(
         except Exception:
             pass
 
-        y_proba: npt.NDArray[np.float_] = booster.predict(
-            X_va,
-            num_iteration=booster.best_iteration,
-        )
         oof_pred[va_idx] = y_proba.astype("float32")
         p1: npt.NDArray[np.float_] = np.asarray(y_proba, dtype=np.float64).reshape(-1)
 
@@ -515,8 +687,8 @@ def train_lightgbm_wfo(
             "num_trees": num_trees_val,
             "current_iteration": current_iter_val,
             "best_score": best_score_val,
-            "train_size": len(X_tr),
-            "valid_size": len(X_va),
+            "train_size": len(tr_idx),
+            "valid_size": len(va_idx),
             "pos_rate": pos_rate,
         })
         logger.info(
@@ -530,8 +702,8 @@ def train_lightgbm_wfo(
             num_trees_val,
             current_iter_val,
             best_score_val,
-            len(X_tr),
-            len(X_va),
+            len(tr_idx),
+            len(va_idx),
             pos_rate,
         )
 
@@ -561,8 +733,8 @@ def train_lightgbm_wfo(
                 val_end=str(va_idx[-1]),
                 logloss=logloss,
                 accuracy=acc,
-                n_train=int(len(X_tr)),
-                n_val=int(len(X_va)),
+                n_train=int(len(tr_idx)),
+                n_val=int(len(va_idx)),
             )
         )
 
@@ -618,6 +790,59 @@ def train_lightgbm_wfo(
 # ------------------------
 
 
+def evaluate_threshold_grid(
+    y_true: pd.Series | npt.NDArray[np.int_],
+    proba: npt.NDArray[np.float_],
+    grid: list[float] | npt.NDArray[np.float64],
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+    """
+    しきい値グリッド全体を1回で評価する（proba >= thr でロング、proba <= 1-thr でショート）。
+
+    proba を1回ソートし、y==1 / y==0 の累積和から各 thr の
+    勝ち数・意思決定数を searchsorted で引く（thr ごとにマスクを作らない）。
+    両方の条件を満たす行はロング扱い（従来の eval_one と同じ）。
+
+    Returns
+    -------
+    (total, win_rate, n_trades)
+        grid と同じ長さの配列。n_trades==0 の thr は total=NaN, win_rate=0.0
+    """
+    y_arr = np.asarray(y_true).astype(int)
+    p = np.asarray(proba)
+    ok = ~np.isnan(p)
+    p, y_arr = p[ok], y_arr[ok]
+
+    order = np.argsort(p, kind="stable")
+    p_sorted = p[order]
+    y_sorted = y_arr[order]
+    cum_pos = np.concatenate([[0], np.cumsum(y_sorted == 1)])
+    cum_neg = np.concatenate([[0], np.cumsum(y_sorted == 0)])
+
+    # 比較は proba の dtype で行う（float32 の OOF と python float の比較と同じ丸め）
+    thr64 = np.asarray(grid, dtype=np.float64)
+    thr = thr64.astype(p.dtype, copy=False)
+    thr_short = (1.0 - thr64).astype(p.dtype, copy=False)
+
+    n = p_sorted.size
+    i_long = np.searchsorted(p_sorted, thr, side="left")  # p >= thr は [i_long, n)
+    # ショートのみ: p <= 1-thr かつ p < thr（ロングと重なる行はロング側）
+    i_short = np.minimum(np.searchsorted(p_sorted, thr_short, side="right"), i_long)
+
+    n_trades = (n - i_long) + i_short
+    wins = (cum_pos[n] - cum_pos[i_long]) + cum_neg[i_short]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        total = np.where(n_trades > 0, 2.0 * wins - n_trades, np.nan).astype(np.float64)
+        win_rate = np.where(n_trades > 0, wins / np.maximum(n_trades, 1), 0.0).astype(np.float64)
+    return total, win_rate, n_trades.astype(np.int64)
+
+
+def dense_threshold_grid(start: float, stop: float, step: float) -> list[float]:
+    """start〜stop（両端含む）を step 刻みにした細かいしきい値グリッド。"""
+    n = int(np.floor((stop - start) / step + 1e-9)) + 1
+    return [round(start + i * step, 6) for i in range(max(n, 0))]
+
+
 def optimize_threshold(
     y: pd.Series,
     oof_pred: npt.NDArray[np.float_],
@@ -646,25 +871,6 @@ def optimize_threshold(
     thr_rows: list[dict] = []  # fold×thr の詳細をCSVに保存する
     prefix = f"[THR][run_id={run_id}]" if run_id is not None else "[THR]"
 
-    def eval_one(y_true: pd.Series, proba: npt.NDArray[np.float_], thr: float) -> tuple[float, float, int]:
-        # long: proba >= thr, short: proba <= 1-thr
-        go_long = proba >= thr
-        go_short = proba <= (1.0 - thr)
-        take = go_long | go_short
-        n_trades = int(take.sum())
-        if n_trades == 0:
-            return float("nan"), 0.0, 0
-
-        y_true_arr = y_true.values.astype(int)
-        y_pred = np.where(go_long, 1, 0).astype(int)
-        y_pred = y_pred[take]
-        y_t = y_true_arr[take]
-
-        wins = int((y_pred == y_t).sum())
-        total = float(wins - (n_trades - wins))  # +1 for win, -1 for loss
-        win_rate = float(wins / n_trades) if n_trades > 0 else 0.0
-        return float(total), float(win_rate), int(n_trades)
-
     def log_grid_results(tag: str, results: list[tuple[float, float, float, int]]) -> None:
         # results: [(thr, total, win, n_trades), ...]
         parts = []
@@ -695,8 +901,8 @@ def optimize_threshold(
             p_val = oof_pred[val_start:val_end]
 
             results_all: list[tuple[float, float, float, int, bool]] = []  # +eligible
-            for thr in grid:
-                total, win, n_trades = eval_one(y_val, p_val, thr)
+            totals, wins_, ns = evaluate_threshold_grid(y_val, p_val, grid)
+            for thr, total, win, n_trades in zip(grid, totals.tolist(), wins_.tolist(), ns.tolist()):
                 eligible = (n_trades >= min_trades)
                 # n_trades==0 の時は total を NaN にしてログを綺麗にする（順位付けは eligible で制御）
                 if n_trades == 0:
@@ -756,8 +962,8 @@ def optimize_threshold(
     # 全体評価（OOF全体）
     # -------------------------
     results_all2: list[tuple[float, float, float, int, bool]] = []
-    for thr in grid:
-        total, win, n_trades = eval_one(y_valid, p_valid, thr)
+    totals2, wins2, ns2 = evaluate_threshold_grid(y_valid, p_valid, grid)
+    for thr, total, win, n_trades in zip(grid, totals2.tolist(), wins2.tolist(), ns2.tolist()):
         eligible = (n_trades >= min_trades)
         if n_trades == 0:
             total = float("nan")
@@ -1110,35 +1316,15 @@ def _compare_fixed_vs_optimized(
     y_valid: pd.Series = y.iloc[valid_mask]
     p_valid: npt.NDArray[np.float_] = oof_pred[valid_mask]
 
-    # eval_one関数を再利用（optimize_threshold内と同じロジック）
-    def eval_one(y_true: pd.Series, proba: npt.NDArray[np.float_], thr: float) -> tuple[float, float, int]:
-        go_long = proba >= thr
-        go_short = proba <= (1.0 - thr)
-        take = go_long | go_short
-        n_trades = int(take.sum())
-        if n_trades == 0:
-            return float("nan"), 0.0, 0
-
-        y_true_arr = y_true.values.astype(int)
-        y_pred = np.where(go_long, 1, 0).astype(int)
-        y_pred = y_pred[take]
-        y_t = y_true_arr[take]
-
-        wins = int((y_pred == y_t).sum())
-        total = float(wins - (n_trades - wins))
-        win_rate = float(wins / n_trades) if n_trades > 0 else 0.0
-        return float(total), float(win_rate), int(n_trades)
-
     compare_rows: list[dict] = []
 
     # 現在のrun_idのbest_thrを取得
     best_thr_opt = float(thr_info.get("best_thr", FIXED_THR))
 
-    # 固定thr=0.45で評価
-    total_fixed, win_rate_fixed, n_trades_fixed = eval_one(y_valid, p_valid, FIXED_THR)
-
-    # 最適化thrで評価（既存のthr_infoから取得）
-    total_opt, win_rate_opt, n_trades_opt = eval_one(y_valid, p_valid, best_thr_opt)
+    # 固定thr=0.45 と最適化thr（既存のthr_infoから取得）を optimize_threshold と同じ評価器で一括評価
+    totals, win_rates, ns = evaluate_threshold_grid(y_valid, p_valid, [FIXED_THR, best_thr_opt])
+    total_fixed, win_rate_fixed, n_trades_fixed = float(totals[0]), float(win_rates[0]), int(ns[0])
+    total_opt, win_rate_opt, n_trades_opt = float(totals[1]), float(win_rates[1]), int(ns[1])
 
     # report JSONから実行時刻を取得
     report_file = cfg.paths.logs_dir / "retrain" / f"report_{run_id_str}.json"
@@ -1704,7 +1890,7 @@ def run_weekly_retrain(cfg: WeeklyRetrainConfig, dry_run: bool = False) -> None:
     obs_dir.mkdir(parents=True, exist_ok=True)
     logger.info("[OBS][WFO] lgbm_obs output_dir: {}", obs_dir.resolve())
     wfo_result, boosters, oof_pred, final_num_boost_round = train_lightgbm_wfo(
-        X, y, rt, obs_output_dir=obs_dir
+        X, y, rt, obs_output_dir=obs_dir, checkpoint_dir=cfg.paths.logs_dir / "retrain" / "wfo_checkpoints"
     )
     logger.info(
         f"[WFO] mean_logloss={wfo_result.mean_logloss:.5f} "
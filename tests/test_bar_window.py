@@ -0,0 +1,81 @@
+"""
+tests/test_bar_window.py
+
+共有バー窓（app.services.bar_window.BarWindow）が CSV 末尾の追記に追随し、
+CSV を直接読んだ場合と同じバー・特徴量を返すことを検証する。
+"""
+import numpy as np
+import pandas as pd
+
+from app.services import bar_window as bw
+from app.strategies.ai_strategy import build_features
+
+
+def _make_ohlcv(n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0.0, 0.03, n))
+    open_ = close + rng.normal(0.0, 0.01, n)
+    return pd.DataFrame(
+        {
+            "time": pd.date_range("2025-01-06", periods=n, freq="5min"),
+            "open": open_,
+            "high": np.maximum(open_, close) + 0.01,
+            "low": np.minimum(open_, close) - 0.01,
+            "close": close,
+            "tick_volume": rng.integers(50, 500, n),
+            "spread": np.full(n, 2),
+            "real_volume": np.zeros(n, dtype=int),
+        }
+    )
+
+
+def _append(path, df: pd.DataFrame) -> None:
+    df.to_csv(path, mode="a", header=False, index=False, date_format="%Y-%m-%d %H:%M:%S")
+
+
+def test_ring_follows_csv_appends(tmp_path, monkeypatch) -> None:
+    """
+    追記・取りこぼし・最新バーの書き直しのどれでも、窓の中身が CSV 末尾 capacity 本と一致すること
+    """
+    monkeypatch.setattr(bw, "FEATURE_WARMUP_BARS", 200)
+    full = _make_ohlcv(700)
+    path = tmp_path / "USDJPY_M5.csv"
+    full.iloc[:200].to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+
+    win = bw.BarWindow(path, capacity=300)
+    assert win.sync() and not win.sync()
+    assert len(win) == 200 and win.feature_ready_time() == full["time"].iloc[0]
+
+    def expect(n_rows: int) -> pd.DataFrame:
+        return pd.read_csv(path, parse_dates=["time"]).tail(n_rows).reset_index(drop=True)
+
+    # リングを一周させる追記（末尾窓 64 行以内を数回）
+    for a, b in [(200, 250), (250, 310), (310, 350)]:
+        _append(path, full.iloc[a:b])
+        assert win.sync()
+    pd.testing.assert_frame_equal(win.frame(), expect(300))
+    assert win.last_time() == full["time"].iloc[349]
+    assert win.feature_ready_time() == win.frame()["time"].iloc[200]
+
+    # 特徴量: 最新行が全履歴から計算した値と一致し、窓が変わるまで再計算しない
+    feat = win.features()
+    cols = ["time", "open", "high", "low", "close", "tick_volume", "real_volume"]
+    ref = build_features(full.iloc[:350][cols], {"feature_recipe": "ohlcv_tech_v1"})
+    got_last = feat.iloc[-1].drop("time").astype(float)
+    ref_last = ref.iloc[-1].drop("time").astype(float)
+    np.testing.assert_allclose(got_last.to_numpy(), ref_last[got_last.index].to_numpy(), rtol=1e-9)
+    assert win.features() is feat
+
+    # 取りこぼし（末尾窓より多い追記）→ 読み直し
+    _append(path, full.iloc[350:500])
+    assert win.sync()
+    pd.testing.assert_frame_equal(win.frame(), expect(300))
+
+    # 最新バーの書き直し（形成中バー）+ 1本追記
+    df_all = pd.read_csv(path, parse_dates=["time"])
+    df_all.loc[df_all.index[-1], "close"] += 0.5
+    df_all.to_csv(path, index=False, date_format="%Y-%m-%d %H:%M:%S")
+    _append(path, full.iloc[500:501])
+    assert win.sync()
+    pd.testing.assert_frame_equal(win.frame(), expect(300))
+    assert win.features() is not feat
@@ -0,0 +1,90 @@
+"""
+tests/test_condition_mining_bitset.py
+
+Condition Mining のビットセット評価器（app.services.condition_mining_bitset）が、行ごとの従来評価
+（condition_mining_candidates._eval_condition）と同じ support / filter_pass_rate を返し、
+候補探索が3条件以上の AND まで support 下限を守って広がることを検証する。
+"""
+import random
+from datetime import datetime, timedelta
+
+from app.services import condition_mining_candidates as cmc
+from app.services.condition_mining_dsl import and2, and_n
+
+REASONS = ["spread_wide", "atr_low", "session_off", "vol_spike", "news_block"]
+
+
+def _rows(n: int, seed: int) -> list[dict]:
+    rnd = random.Random(seed)
+    t0 = datetime(2025, 1, 6)
+    out = []
+    for i in range(n):
+        ts = t0 + timedelta(minutes=5 * i)
+        pb = rnd.random()
+        rec = {
+            "timestamp": ts.isoformat() if i % 5 else ts,
+            "filter_pass": rnd.choice([True, False, None]),
+        }
+        k = i % 4
+        if k == 0:
+            rec["reason"] = rnd.choice(REASONS)
+        elif k == 1:
+            rec["reasons"] = rnd.sample(REASONS, 2)
+        elif k == 2:
+            rec["meta"] = {"reason_codes": [rnd.choice(REASONS)], "prob_buy": pb, "prob_sell": 1 - pb}
+        if k != 2 and i % 7:
+            rec["prob_buy"], rec["prob_sell"] = pb, 1 - pb
+        if i % 13 == 0:
+            rec["timestamp"] = None
+        out.append(rec)
+    return out
+
+
+def test_bitset_matches_rowwise_evaluation() -> None:
+    """
+    原子条件・2条件／3条件の AND・未知の type で、ビットセット評価が行ごとの評価と一致すること
+    """
+    rows = _rows(700, seed=0)
+    ev, _, _, _ = cmc._encode(rows)
+    atoms = [
+        {"type": "reason_in", "params": {"keys": ["atr_low", "vol_spike"]}, "id": "r"},
+        {"type": "reason_in", "params": {"keys": ["missing"]}, "id": "r0"},
+        {"type": "hour_in", "params": {"hours": [0, 1, 2, 3]}, "id": "h"},
+        {"type": "prob_margin_ge", "params": {"min": 0.2}, "id": "pm"},
+        {"type": "prob_margin_ge", "params": {"min": None}, "id": "pm0"},
+        {"type": "unknown", "params": {}, "id": "x"},
+    ]
+    conds = atoms + [and2(atoms[0], atoms[2]), and_n([atoms[0], atoms[2], atoms[3]]), and_n([atoms[3]])]
+    for c in conds:
+        assert ev.evaluate(c) == cmc._eval_condition(c, rows), c["id"]
+
+
+def test_candidates_search_deeper_conjunctions(monkeypatch) -> None:
+    """
+    候補に3条件以上の AND が含まれ、各候補の support が行ごとの評価と一致し下限を満たすこと
+    """
+    made = {}
+
+    def _and_n(conds):
+        c = and_n(conds)
+        made[c["id"]] = c
+        for sub in conds:
+            made[sub["id"]] = sub
+        return c
+
+    monkeypatch.setattr(cmc, "and_n", _and_n)
+    recent, past = _rows(1500, seed=1), _rows(1500, seed=2)
+    summary = {"recent": {"n": len(recent), "decisions": recent}, "past": {"n": len(past), "decisions": past}}
+    out = cmc.get_condition_candidates_core("USDJPY-", top_k=500, min_support=20, summary=summary, max_and=4)
+    cands = out["candidates"]
+    assert any(len(c["id"].split("&")) >= 3 for c in cands)
+    checked = 0
+    for c in cands:
+        assert c["support"]["recent"] + c["support"]["past"] >= 20
+        cond = made.get(c["id"])
+        if cond is None:
+            continue
+        assert c["evidence"]["recent"] == cmc._eval_condition(cond, recent)
+        assert c["evidence"]["past"] == cmc._eval_condition(cond, past)
+        checked += 1
+    assert checked >= 50
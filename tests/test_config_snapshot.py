@@ -0,0 +1,99 @@
+"""
+tests/test_config_snapshot.py
+
+設定スナップショット（app.core.config_snapshot.ConfigSnapshotService）が設定を1回だけ解析し、
+ファイルの変更（size / mtime）でだけ読み直して購読者に通知すること、
+壊れた更新では前のスナップショットを保つことを検証する。
+"""
+import json
+import os
+import time
+
+import pytest
+
+from app.core import config_snapshot as cs
+
+
+def _write(path, text: str, mtime_ns: int) -> None:
+    path.write_text(text, encoding="utf-8")
+    # 同じ秒内の書き換えでも変更として見えるように mtime をずらす
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_parse_once_reload_on_change_and_notify(tmp_path, monkeypatch) -> None:
+    """
+    変更が無ければ読み直さず、config / active_model.json の変更は差分の種別つきで通知され、
+    壊れた更新では前のまま
+    """
+    base, local, active = tmp_path / "config.yaml", tmp_path / "config.local.yaml", tmp_path / "active_model.json"
+    _write(base, "runtime:\n  symbol: USDJPY-\n  ohlc_confirm_delay_sec: 30\nentry:\n  prob_threshold: 0.6\n", 1_000_000_000)
+    _write(local, "runtime:\n  ohlc_confirm_delay_sec: 5\n", 1_000_000_000)
+    _write(active, json.dumps({"model_name": "clf", "best_threshold": 0.55}), 1_000_000_000)
+
+    calls = {"n": 0}
+    real_read = cs._read_config
+
+    def _counting_read(*a):
+        calls["n"] += 1
+        return real_read(*a)
+
+    monkeypatch.setattr(cs, "_read_config", _counting_read)
+    svc = cs.ConfigSnapshotService(base, local, active)
+    events = []
+    unsubscribe = svc.subscribe(lambda snap, changed: events.append((snap.version, set(changed))))
+
+    s1 = svc.get()
+    assert s1.runtime["ohlc_confirm_delay_sec"] == 5 and s1.symbol == "USDJPY-"
+    assert s1.entry["prob_threshold"] == 0.6 and s1.best_threshold == 0.55
+    assert svc.get() is s1 and calls["n"] == 1
+
+    # 読み取り専用（isinstance は dict のまま）。可変コピーは thaw で作る
+    assert isinstance(s1.runtime, dict)
+    with pytest.raises(TypeError):
+        s1.runtime["symbol"] = "EURUSD-"
+    copy = cs.thaw(s1.config)
+    copy["runtime"]["symbol"] = "EURUSD-"
+    assert svc.get().symbol == "USDJPY-"
+
+    # local の変更 → config だけ読み直して通知
+    _write(local, "runtime:\n  ohlc_confirm_delay_sec: 7\n", 2_000_000_000)
+    s2 = svc.get()
+    assert s2.version == 2 and s2.runtime["ohlc_confirm_delay_sec"] == 7 and calls["n"] == 2
+    assert events == [(2, {"config"})]
+
+    # モデル昇格 → active_model だけ
+    _write(active, json.dumps({"model_name": "clf2", "best_threshold": 0.6}), 3_000_000_000)
+    s3 = svc.get()
+    assert s3.active_model["model_name"] == "clf2" and calls["n"] == 2
+    assert events[-1] == (3, {"active_model"})
+
+    # 壊れた更新は前のまま（通知もしない）
+    _write(base, "runtime: [unterminated\n", 4_000_000_000)
+    assert svc.get() is s3 and len(events) == 2
+
+    # 購読解除後は通知されない。reload は stat に関係なく読み直す
+    unsubscribe()
+    _write(base, "runtime:\n  symbol: EURUSD-\n", 5_000_000_000)
+    assert svc.reload().symbol == "EURUSD-" and len(events) == 2
+
+
+def test_no_stat_read_starts_watcher(tmp_path, monkeypatch) -> None:
+    """
+    get_config_snapshot(refresh=False) は stat しないが、初回に監視スレッドを起動し、変更は監視スレッドが取り込む
+    """
+    base, local, active = tmp_path / "config.yaml", tmp_path / "config.local.yaml", tmp_path / "active_model.json"
+    _write(base, "runtime:\n  symbol: USDJPY-\n", 1_000_000_000)
+    svc = cs.ConfigSnapshotService(base, local, active)
+    monkeypatch.setattr(cs, "_service", svc)
+    try:
+        assert not svc.watching
+        assert cs.get_config_snapshot(refresh=False).symbol == "USDJPY-"
+        assert svc.watching
+
+        _write(base, "runtime:\n  symbol: EURUSD-\n", 2_000_000_000)
+        deadline = time.monotonic() + 3 * cs.WATCH_INTERVAL_SEC
+        while cs.get_config_snapshot(refresh=False).symbol != "EURUSD-" and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert cs.get_config_snapshot(refresh=False).symbol == "EURUSD-"
+    finally:
+        svc.stop_watcher()
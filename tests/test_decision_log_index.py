@@ -0,0 +1,82 @@
+"""
+tests/test_decision_log_index.py
+
+decisions*.jsonl のサイドカー索引（app.services.decision_log_index）が
+全行スキャンと同じ行を返し、ファイルの追記・書き直しに追随することを検証する。
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.services import decision_log_index as dli
+
+T0 = datetime(2025, 1, 6, 0, 0, tzinfo=timezone.utc)
+
+
+def _rec(i: int, symbol: str = "USDJPY-") -> dict:
+    jst = (T0 + timedelta(minutes=i)).astimezone(timezone(timedelta(hours=9)))
+    return {"ts_jst": jst.isoformat(), "symbol": symbol, "i": i}
+
+
+def _write(path, recs, mode="w") -> None:
+    with open(path, mode, encoding="utf-8") as f:
+        for r in recs:
+            f.write(json.dumps(r) + "\n")
+
+
+def _ids(path, **kw) -> list:
+    return [j["i"] for j, _ in dli.iter_decisions(path, **kw)]
+
+
+def test_query_matches_full_scan(tmp_path) -> None:
+    """
+    symbol / 時間窓の絞り込みが全行スキャン（フォールバック）と一致し、範囲外ファイルは読まないこと
+    """
+    p = tmp_path / "decisions_2025-01-06.jsonl"
+    recs = [_rec(i, "USDJPY-" if i % 3 else "EURUSD-") for i in range(300)]
+    _write(p, recs)
+    with open(p, "a", encoding="utf-8") as f:
+        f.write("broken line\n\n[1, 2]\n")
+
+    start, end = T0 + timedelta(minutes=50), T0 + timedelta(minutes=120)
+    expected = [j["i"] for j, _ in dli._iter_decisions_scan(p, "USDJPY-", start, end)]
+    assert _ids(p, symbol="USDJPY-", start=start, end=end) == expected
+    assert expected[0] == 50 and expected[-1] == 119
+    assert dli.index_path_for(p).exists()
+
+    assert _ids(p, symbol="GBPUSD-") == []
+    assert _ids(p, symbol="USDJPY-", start=T0 + timedelta(days=1)) == []
+
+
+def test_incremental_append_and_partial_line(tmp_path) -> None:
+    """
+    追記分だけ索引に足され、改行前の書きかけ行は完成後に拾われること
+    """
+    p = tmp_path / "d.jsonl"
+    _write(p, [_rec(i) for i in range(10)])
+    idx = dli.get_index(p)
+    assert idx.n_rows == 10
+
+    _write(p, [_rec(i) for i in range(10, 15)], mode="a")
+    with open(p, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_rec(15))[:-5])
+    assert _ids(p, symbol="USDJPY-") == list(range(15))
+
+    with open(p, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_rec(15))[-5:] + "\n")
+    assert _ids(p, symbol="USDJPY-") == list(range(16))
+
+    # 別プロセス相当：保存済みサイドカーから読み直しても同じ
+    dli._cache.clear()
+    assert dli.get_index(p).n_rows == 16
+
+
+def test_rewritten_file_rebuilds_index(tmp_path) -> None:
+    """
+    同じパスが書き直された（backtest の decisions.jsonl 等）ら索引を作り直すこと
+    """
+    p = tmp_path / "decisions.jsonl"
+    _write(p, [_rec(i) for i in range(100)])
+    assert len(_ids(p, symbol="USDJPY-")) == 100
+
+    _write(p, [_rec(i + 1000) for i in range(120)])
+    assert _ids(p, symbol="USDJPY-") == [i + 1000 for i in range(120)]
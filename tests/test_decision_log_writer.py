@@ -0,0 +1,72 @@
+"""
+tests/test_decision_log_writer.py
+
+DecisionLogWriter（バックグラウンドでバッチ追記する decisions.jsonl ライター）の検証。
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from app.services.decision_log_writer import DecisionLogWriter, encode_record
+
+
+def test_encode_matches_json_dumps() -> None:
+    """
+    通常の dict は json.dumps(ensure_ascii=False) と同じ文字列、numpy/Timestamp も書けること
+    """
+    rec = {"symbol": "USDJPY-", "reason": "時間外", "prob_buy": 0.51, "filter_reasons": ["atr"], "x": None}
+    assert encode_record(rec) == json.dumps(rec, ensure_ascii=False) + "\n"
+
+    ext = {"p": np.float64(0.25), "n": np.int32(3), "a": np.array([1, 2]), "t": pd.Timestamp("2025-01-06 09:00")}
+    assert json.loads(encode_record(ext)) == {"p": 0.25, "n": 3, "a": [1, 2], "t": "2025-01-06T09:00:00"}
+
+
+def test_flush_writes_all_lines_in_order(tmp_path) -> None:
+    """
+    複数パスへ積んだ行が flush() 後に順序通り揃っていること（小さい flush_bytes で複数バッチ）
+    """
+    w = DecisionLogWriter(flush_bytes=256, flush_interval_sec=60.0, fsync="none")
+    a, b = tmp_path / "a.jsonl", tmp_path / "sub" / "b.jsonl"
+    for i in range(500):
+        w.write(a if i % 2 == 0 else b, {"i": i})
+    assert w.flush(timeout=10.0)
+
+    got_a = [json.loads(ln)["i"] for ln in a.read_text(encoding="utf-8").splitlines()]
+    got_b = [json.loads(ln)["i"] for ln in b.read_text(encoding="utf-8").splitlines()]
+    assert got_a == list(range(0, 500, 2))
+    assert got_b == list(range(1, 500, 2))
+    assert w.batches_written > 2
+    w.close()
+
+
+def test_interval_flush_and_close(tmp_path) -> None:
+    """
+    flush を呼ばなくても flush_interval_sec で書かれ、close 後の write は同期で書かれること
+    """
+    import time
+
+    p = tmp_path / "d.jsonl"
+    w = DecisionLogWriter(flush_interval_sec=0.05, fsync="batch")
+    w.write(p, {"i": 0})
+    deadline = time.monotonic() + 5.0
+    while time.monotonic() < deadline and not (p.exists() and p.read_text(encoding="utf-8")):
+        time.sleep(0.01)
+    assert p.read_text(encoding="utf-8") == '{"i": 0}\n'
+
+    w.close()
+    w.write(p, {"i": 1})
+    assert p.read_text(encoding="utf-8").splitlines() == ['{"i": 0}', '{"i": 1}']
+
+
+def test_record_mutation_after_write_does_not_leak(tmp_path) -> None:
+    """
+    write() 時点の内容で書かれること（キュー投入後の書き換えは反映されない）
+    """
+    p = tmp_path / "d.jsonl"
+    w = DecisionLogWriter(flush_interval_sec=60.0, fsync="none")
+    rec = {"action": "HOLD"}
+    w.write(p, rec)
+    rec["action"] = "ENTRY"
+    w.close()
+    assert json.loads(p.read_text(encoding="utf-8")) == {"action": "HOLD"}
@@ -0,0 +1,108 @@
+"""
+tests/test_decision_store.py
+
+decisions*.jsonl の型付きフラットスキーマと共通リーダー（app.services.decision_store）の検証。
+Parquet のテストは pyarrow / fastparquet がある環境でだけ走る。
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import decision_store as ds
+
+T0 = datetime(2025, 1, 6, 0, 0, tzinfo=timezone.utc)
+JST = timezone(timedelta(hours=9))
+
+
+def _rec(i: int) -> dict:
+    rec = {
+        "ts_jst": (T0 + timedelta(minutes=i)).astimezone(JST).isoformat(),
+        "type": "decision" if i % 4 else "heartbeat",
+        "symbol": "USDJPY-" if i % 2 else "EURUSD-",
+        "prob_buy": 0.5 + i / 1000,
+        "filter_pass": None if i % 3 == 0 else bool(i % 3 == 1),
+        "filter_reasons": ["atr"] if i % 5 == 0 else [],
+        "decision": {"action": "ENTRY" if i % 7 == 0 else "HOLD"},
+        "decision_detail": {"action": "ENTRY", "signal": {"side": "BUY", "confidence": 0.7}},
+        "runtime": {"mode": "live", "schema_version": 2},
+        "i": i,
+    }
+    if i % 10 == 0:
+        rec["exit_plan"] = {"mode": "tp", "pl_jpy": i * 10}
+    return rec
+
+
+def _write(path, recs) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for r in recs:
+            f.write(json.dumps(r, ensure_ascii=False) + "\n")
+        f.write("broken\n\n")
+
+
+def test_flatten_types_and_filters(tmp_path) -> None:
+    """
+    列名・型が固定で、symbol / type / 時間窓の絞り込みと raw からの復元が元の dict と一致すること
+    """
+    p = tmp_path / "decisions_2025-01-06.jsonl"
+    recs = [_rec(i) for i in range(40)]
+    _write(p, recs)
+
+    df = ds.read_decisions(p)
+    assert list(df.columns) == ds.decision_columns()
+    assert len(df) == 40
+    assert str(df["prob_buy"].dtype) == "float64"
+    assert str(df["filter_pass"].dtype) == "boolean"
+    assert df["filter_pass"].isna().sum() == 14
+    assert df.loc[0, "decision"] == "ENTRY" and df.loc[1, "decision"] == "HOLD"
+    assert df.loc[3, "decision_detail.signal.side"] == "BUY"
+    assert df.loc[3, "runtime.schema_version"] == "2"
+    assert json.loads(df.loc[5, "filter_reasons"]) == ["atr"]
+    assert df.loc[10, "pnl"] == 100.0 and df["pnl"].notna().sum() == 4
+
+    start, end = T0 + timedelta(minutes=10), T0 + timedelta(minutes=30)
+    got = list(ds.iter_decision_records(p, symbol="USDJPY-", start=start, end=end, types=["decision"]))
+    expected = [r for r in recs if r["symbol"] == "USDJPY-" and r["type"] == "decision" and 10 <= r["i"] < 30]
+    assert got == expected
+    assert list(ds.iter_decision_records(p, types=["decision"], limit=3)) == [r for r in recs if r["type"] == "decision"][:3]
+
+    sub = ds.read_decisions([p, tmp_path / "missing.jsonl"], columns=["ts_jst", "pnl"])
+    assert list(sub.columns) == ["ts_jst", "pnl"] and len(sub) == 40
+    with pytest.raises(KeyError):
+        ds.read_decisions(p, columns=["no_such_column"])
+
+
+def test_compaction_roundtrip(tmp_path, monkeypatch) -> None:
+    """
+    閉じた日だけ Parquet になり、リーダーの結果が JSONL 直読みと同じ・元ファイル更新で JSONL に戻ること
+    """
+    if ds.parquet_engine() is None:
+        pytest.skip("parquet engine not installed")
+
+    closed = tmp_path / "decisions_2025-01-06.jsonl"
+    today = tmp_path / "decisions_2025-01-07.jsonl"
+    _write(closed, [_rec(i) for i in range(40)])
+    _write(today, [_rec(i) for i in range(5)])
+
+    written = ds.compact_decision_logs(tmp_path, today="2025-01-07")
+    assert written == [ds.compact_path_for(closed)]
+    assert ds.is_compacted(closed) and not ds.is_compacted(today)
+    assert ds.compact_decision_logs(tmp_path, today="2025-01-07") == []
+
+    from_parquet = ds.read_decisions(closed)
+    from_jsonl = ds.read_jsonl_frame(closed)
+    assert from_parquet.equals(from_jsonl)
+
+    # レコード単位の読み出しも Parquet（列を絞ってバッチ読み）から JSONL と同じ行を同じ順で返す
+    monkeypatch.setattr(ds, "_iter_jsonl_lines", lambda *_: pytest.fail("compacted day must not read JSONL"))
+    start, end = T0 + timedelta(minutes=10), T0 + timedelta(minutes=30)
+    got = list(ds.iter_decision_records(closed, symbol="USDJPY-", start=start, end=end, types=["decision"]))
+    assert got == [r for r in (_rec(i) for i in range(40))
+                   if r["symbol"] == "USDJPY-" and r["type"] == "decision" and 10 <= r["i"] < 30]
+    assert [r["i"] for r in ds.iter_decision_records(closed, limit=3)] == [0, 1, 2]
+    monkeypatch.undo()
+
+    with open(closed, "a", encoding="utf-8") as f:
+        f.write(json.dumps(_rec(99)) + "\n")
+    assert not ds.is_compacted(closed)
+    assert len(ds.read_decisions(closed)) == 41
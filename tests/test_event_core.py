@@ -0,0 +1,99 @@
+"""
+tests/test_event_core.py
+
+BacktestEngine(event_core=True)（app.core.backtest.event_core）が、バーループの run と
+同じ trades.csv / equity_curve.csv / next_action_timeline.csv を出力することと、
+run が例外で終わっても decisions.jsonl の書き込みスレッドを閉じることを検証する。
+"""
+import contextlib
+import io
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.backtest.backtest_circuit_breaker import BacktestCircuitBreaker
+from app.core.backtest.backtest_engine import BacktestEngine
+
+
+def _inputs(n: int = 400):
+    rng = np.random.default_rng(5)
+    feats = pd.DataFrame(
+        {
+            "time": pd.date_range("2025-01-06 00:00", periods=n, freq="5min"),
+            "close": 150.0 + np.cumsum(rng.normal(0.0, 0.05, n)),
+            "atr": rng.choice([0.01, 0.5, np.nan], n, p=[0.1, 0.8, 0.1]),
+        }
+    )
+    p_buy = rng.uniform(0.2, 0.8, n)
+    probs = np.column_stack([p_buy, 1.0 - p_buy])
+    return feats, probs
+
+
+def _run(tmp_path, tag: str, event_core: bool, **kw):
+    feats, probs = _inputs()
+    out = tmp_path / f"{tag}_{int(event_core)}"
+    out.mkdir()
+    engine = BacktestEngine(threshold_override=0.6, proba_cache=False, event_core=event_core, **kw)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = engine.run(None, out, features=feats, probs=probs)
+    return out, result
+
+
+def test_event_core_matches_bar_loop(tmp_path) -> None:
+    """
+    決済ポリシー・フィルタレベル・サーキットブレーカーの組み合わせで、出力 CSV がバイト単位で一致すること
+    """
+    variants = {
+        "default": {},
+        "hold": {"exit_policy": {"min_holding_bars": 3}, "filter_level": 2},
+        "reverse": {"exit_policy": {"exit_on_reverse_signal_only": True}},
+        "breaker": {
+            "breaker": lambda: BacktestCircuitBreaker(
+                max_drawdown=0.0001, max_consecutive_losses=2, cooldown_bars=5
+            )
+        },
+    }
+    for tag, kw in variants.items():
+        outs = []
+        for event_core in (False, True):
+            args = {k: (v() if callable(v) else v) for k, v in kw.items()}
+            outs.append(_run(tmp_path, tag, event_core, **args))
+        (legacy, r_legacy), (event, r_event) = outs
+        assert r_legacy["debug_counters"]["n_trades"] > 0
+        assert r_event["debug_counters"]["core"] == "event"
+        for name in ("trades.csv", "equity_curve.csv", "next_action_timeline.csv"):
+            assert (legacy / name).read_bytes() == (event / name).read_bytes(), (tag, name)
+
+
+def test_aggregate_decisions_copy_can_be_skipped(tmp_path) -> None:
+    """
+    バーループの run は既定で親ディレクトリの集約 decisions.jsonl を更新し、
+    update_aggregate_decisions=False（並列スイープ）なら書かないこと
+    """
+    a, b = tmp_path / "a", tmp_path / "b"
+    a.mkdir()
+    b.mkdir()
+    out, _ = _run(a, "trial", False)
+    assert (a / "decisions.jsonl").read_bytes() == (out / "decisions.jsonl").read_bytes()
+    out, _ = _run(b, "trial", False, update_aggregate_decisions=False)
+    assert (out / "decisions.jsonl").exists() and not (b / "decisions.jsonl").exists()
+
+
+def test_decision_writer_closed_on_error(tmp_path) -> None:
+    """
+    出力生成の前に例外で終わっても、溜まっていた decisions.jsonl を書き出して書き込みスレッドを止めること
+    """
+    feats, probs = _inputs()
+    engine = BacktestEngine(threshold_override=0.6, proba_cache=False)
+
+    def _fail(*_a, **_kw):
+        raise RuntimeError("boom")
+
+    engine._generate_outputs = _fail
+    with contextlib.redirect_stdout(io.StringIO()), pytest.raises(RuntimeError):
+        engine.run(None, tmp_path, features=feats, probs=probs)
+    assert engine._decision_writer is None
+    assert not any(t.name == "backtest-decision-log" for t in threading.enumerate())
+    assert (tmp_path / "decisions.jsonl").stat().st_size > 0
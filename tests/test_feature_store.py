@@ -0,0 +1,79 @@
+"""
+tests/test_feature_store.py
+
+特徴量レジストリ（core.ai.feature_registry）のレシピハッシュと、
+特徴量ストア（app.services.feature_store.FeatureStore）が全履歴から build した場合と
+同じ特徴量を返し、追記分だけ計算することを検証する。
+"""
+import dataclasses
+
+import numpy as np
+import pandas as pd
+
+from app.services.feature_store import FeatureStore
+from app.services.ohlcv_store import get_store
+from core.ai import feature_registry as fr
+
+
+def _make_ohlcv(n: int, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0.0, 0.03, n))
+    open_ = close + rng.normal(0.0, 0.01, n)
+    return pd.DataFrame(
+        {
+            "time": pd.date_range("2025-01-06", periods=n, freq="5min"),
+            "open": open_,
+            "high": np.maximum(open_, close) + 0.01,
+            "low": np.minimum(open_, close) - 0.01,
+            "close": close,
+            "tick_volume": rng.integers(50, 500, n),
+        }
+    )
+
+
+def test_recipe_hash_tracks_spec() -> None:
+    """
+    レシピハッシュは同じ定義なら不変、特徴量のパラメータが変わると変わること
+    """
+    r = fr.get_recipe("ohlcv_tech_v1")
+    assert r.hash == fr.recipe_hash("ohlcv_tech_v1") == fr.get_recipe("ohlcv_tech_v1").hash
+    assert len({fr.recipe_hash(name) for name in fr.FEATURE_RECIPES}) == len(fr.FEATURE_RECIPES)
+
+    first = r.features[0]
+    changed = dataclasses.replace(first, spec=first.spec + " ")
+    r2 = dataclasses.replace(r, features=(changed, *r.features[1:]))
+    assert r2.hash != r.hash
+
+
+def test_store_matches_full_build_and_appends(tmp_path) -> None:
+    """
+    ストアの特徴量 → finish() が全履歴の build() と一致し、2回目の sync は新しいバーだけ追記すること
+    """
+    full = _make_ohlcv(700)
+    recipe = fr.get_recipe("ohlcv_tech_v1")
+    source = get_store(tmp_path / "ohlcv")
+    source.append(full.iloc[:600])
+
+    fs = FeatureStore("USDJPY-", "M5", recipe, root=tmp_path / "features")
+    assert fs.sync(source) == 600
+    assert fs.sync(source) == 0
+
+    source.append(full.iloc[600:])
+    assert fs.sync(source) == 100
+    assert len(fs) == 700
+
+    bars = full.iloc[450:].reset_index(drop=True)
+    feats = fs.features_for(bars)
+    assert feats is not None
+    got = recipe.finish(bars, feats)
+    ref = recipe.build(full)
+    ref = ref[ref["time"] >= bars["time"].iloc[0]].reset_index(drop=True)
+    assert list(got.columns) == list(ref.columns) and len(got) == len(ref)
+    num = [c for c in ref.columns if c != "time"]
+    np.testing.assert_allclose(
+        got[num].to_numpy(dtype=float), ref[num].to_numpy(dtype=float), rtol=1e-9, atol=1e-12
+    )
+
+    # ストアに無い時刻を含む bars は None（呼び出し側で従来計算にフォールバック）
+    extra = _make_ohlcv(5).assign(time=pd.date_range("2030-01-01", periods=5, freq="5min"))
+    assert fs.features_for(pd.concat([bars, extra], ignore_index=True)) is None
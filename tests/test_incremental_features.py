@@ -0,0 +1,93 @@
+"""
+tests/test_incremental_features.py
+
+IncrementalFeatureEngine（確定バーごとの O(1) 更新）が
+バッチ版の build_features と同じ値を返すことを検証する。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.strategies.ai_strategy import build_features_recipe
+from core.ai.features import build_features as build_features_core
+from core.ai.incremental_features import IncrementalFeatureEngine, build_features_incremental
+
+
+def _make_ohlcv(n: int = 1500, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0.0, 0.03, n))
+    open_ = close + rng.normal(0.0, 0.01, n)
+    high = np.maximum(open_, close) + np.abs(rng.normal(0.0, 0.02, n))
+    low = np.minimum(open_, close) - np.abs(rng.normal(0.0, 0.02, n))
+    return pd.DataFrame(
+        {
+            "time": pd.date_range("2025-01-06", periods=n, freq="5min"),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "tick_volume": rng.integers(50, 500, n).astype(float),
+        }
+    )
+
+
+def test_parity_ohlcv_tech_v1() -> None:
+    """
+    ohlcv_tech_v1: dropna 後の行・列がバッチ版と一致すること
+    """
+    df = _make_ohlcv()
+    batch = build_features_recipe(df, "ohlcv_tech_v1")
+    inc = build_features_incremental(df, "ohlcv_tech_v1").dropna().reset_index(drop=True)
+
+    assert len(inc) == len(batch)
+    for col in batch.columns:
+        if col == "time":
+            continue
+        np.testing.assert_allclose(inc[col].to_numpy(), batch[col].to_numpy(), rtol=1e-9, atol=1e-9, err_msg=col)
+
+
+def test_parity_core_v1() -> None:
+    """
+    core_v1: core.ai.features.build_features と NaN 位置・値が一致すること
+    """
+    df = _make_ohlcv().rename(columns={"tick_volume": "volume"})
+    batch = build_features_core(df)
+    inc = build_features_incremental(df, "core_v1")
+
+    for col in inc.columns:
+        if col == "time":
+            continue
+        expected = batch[col].to_numpy(dtype=float)
+        got = inc[col].to_numpy(dtype=float)
+        np.testing.assert_array_equal(np.isnan(got), np.isnan(expected), err_msg=col)
+        mask = ~np.isnan(expected)
+        np.testing.assert_allclose(got[mask], expected[mask], rtol=1e-7, atol=1e-8, err_msg=col)
+
+
+def test_seed_then_update_matches_batch_last_row() -> None:
+    """
+    末尾だけで seed → 確定バーを1本ずつ update した最終値がバッチ版の最終行と一致すること
+    """
+    df = _make_ohlcv(n=3000)
+    eng = IncrementalFeatureEngine("ohlcv_tech_v1")
+    eng.seed(df.iloc[:-10], seed_bars=2000)
+    for bar in df.iloc[-10:].to_dict("records"):
+        feats = eng.update(bar)
+
+    assert eng.is_ready
+    last = build_features_recipe(df, "ohlcv_tech_v1").iloc[-1]
+    for col in ("ret_1", "ret_5", "ema_5", "ema_20", "ema_ratio", "rsi_14", "atr_14", "range", "vol_chg"):
+        assert feats[col] == pytest.approx(float(last[col]), rel=1e-9, abs=1e-12), col
+
+
+def test_update_ignores_old_bars() -> None:
+    """
+    last_time 以下のバーは無視されること（同じ CSV を再同期しても二重計上しない）
+    """
+    df = _make_ohlcv(n=100)
+    eng = IncrementalFeatureEngine("ohlcv_tech_v1")
+    eng.seed(df)
+    before = eng.features()
+    eng.update(df.iloc[-1].to_dict())
+    assert eng.n_bars == len(df)
+    assert eng.features() == before
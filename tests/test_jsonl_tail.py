@@ -0,0 +1,91 @@
+"""
+tests/test_jsonl_tail.py
+
+JSONL の末尾読み（app.services.jsonl_tail）が、全行を読んで逆順にした結果と一致し、
+追記・書き込み途中の行・切り詰めに対してキャッシュが正しく追従することを検証する。
+"""
+import json
+
+import pytest
+
+from app.services import jsonl_tail
+from app.services.jsonl_tail import iter_jsonl_reverse, read_jsonl_tail
+
+
+def _reference(path) -> list[dict]:
+    out = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line.startswith("{"):
+            continue
+        try:
+            rec = json.loads(line)
+        except Exception:
+            continue
+        if isinstance(rec, dict):
+            out.append(rec)
+    return out[::-1]
+
+
+def _lines(start: int, n: int) -> str:
+    return "".join(
+        json.dumps({"i": i, "symbol": "USDJPY-" if i % 3 else "EURUSD-", "pad": "x" * (i % 97)}) + "\n"
+        for i in range(start, start + n)
+    )
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache():
+    jsonl_tail.clear_jsonl_tail_cache()
+    yield
+    jsonl_tail.clear_jsonl_tail_cache()
+
+
+def test_reverse_reader_matches_full_read(tmp_path) -> None:
+    """
+    ブロック境界をまたぐファイル（空行・プレーンログ・壊れた行を含む）で、新しい順の結果が全行読みと一致すること
+    """
+    p = tmp_path / "ops_result_x.jsonl"
+    p.write_text(_lines(0, 1500) + "\nplain log line\n{broken\n" + _lines(1500, 1500), encoding="utf-8")
+    ref = _reference(p)
+    assert list(iter_jsonl_reverse(p)) == ref
+    assert read_jsonl_tail(p, 10) == ref[:10]
+    # predicate で絞ると、キャッシュより古い側へ読み進める
+    eur = [r for r in ref if r["symbol"] == "EURUSD-"]
+    assert read_jsonl_tail(p, 700, predicate=lambda r: r["symbol"] == "EURUSD-") == eur[:700]
+    assert read_jsonl_tail(p, 100000) == ref
+
+
+def test_cache_follows_appends_partial_lines_and_truncation(tmp_path, monkeypatch) -> None:
+    """
+    追記分だけを読み足し、書き込み途中の行は次回に回し、切り詰め・書き換えでは読み直すこと
+    """
+    monkeypatch.setattr(jsonl_tail, "CACHE_MAX_RECORDS", 50)
+    p = tmp_path / "ops_result_y.jsonl"
+    p.write_text(_lines(0, 200), encoding="utf-8")
+    assert read_jsonl_tail(p, 5) == _reference(p)[:5]
+
+    parsed = []
+    orig = jsonl_tail._parse_line
+    monkeypatch.setattr(jsonl_tail, "_parse_line", lambda raw, path: parsed.append(raw) or orig(raw, path))
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write(_lines(200, 3) + '{"i": 203, "sym')  # 最終行は書き込み途中
+    got = read_jsonl_tail(p, 5)
+    assert [r["i"] for r in got] == [202, 201, 200, 199, 198]
+    assert len(parsed) == 3  # 追記された完全な行だけを解析
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write('bol": "USDJPY-"}\n')
+    assert read_jsonl_tail(p, 2) == [{"i": 203, "symbol": "USDJPY-"}, _reference(p)[1]]
+
+    # キャッシュ上限を超える要求でも結果は全行読みと一致
+    assert read_jsonl_tail(p, 120) == _reference(p)[:120]
+
+    # 返り値を書き換えてもキャッシュは汚れない
+    read_jsonl_tail(p, 1)[0]["record_id"] = "x"
+    assert "record_id" not in read_jsonl_tail(p, 1)[0]
+
+    # 切り詰め（ローテーション相当）→ 読み直し
+    p.write_text(_lines(1000, 4), encoding="utf-8")
+    assert [r["i"] for r in read_jsonl_tail(p, 10)] == [1003, 1002, 1001, 1000]
@@ -0,0 +1,104 @@
+"""
+tests/test_model_registry.py
+
+モデルレジストリ（app.services.model_registry.ModelRegistry）が同じ中身のモデルを1回だけロードし、
+active_model.json の更新でモデルを差し替える（壊れた更新では前のモデルを保つ）こと、
+start_watcher 中は設定スナップショットの変更通知で差し替わることを検証する。
+"""
+import json
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from app.core.config_snapshot import ConfigSnapshotService
+from app.services import model_registry as mr
+
+
+def _fit(seed: int) -> LogisticRegression:
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(200, 3)), columns=["a", "b", "c"])
+    y = (X["a"] + rng.normal(0.0, 0.5, 200) > 0).astype(int)
+    return LogisticRegression().fit(X, y)
+
+
+def _write_active(models_dir, file_name: str, mtime_ns: int) -> None:
+    path = models_dir / "active_model.json"
+    meta = {"model_name": "clf", "file": file_name, "best_threshold": 0.55, "feature_order": ["c", "a", "b"]}
+    path.write_text(json.dumps(meta), encoding="utf-8")
+    # 同じ秒内の書き換えでも変更として見えるように mtime をずらす
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_load_once_and_hot_swap(tmp_path) -> None:
+    """
+    同じファイルは再ロードせず、active_model.json の更新で差し替わり、壊れた更新では前のまま
+    """
+    joblib.dump(_fit(1), tmp_path / "m1.pkl")
+    joblib.dump(_fit(2), tmp_path / "m2.pkl")
+    reg = mr.ModelRegistry(tmp_path)
+
+    calls = []
+
+    def loader(path: str):
+        calls.append(path)
+        return joblib.load(path)
+
+    e1 = reg.load(tmp_path / "m1.pkl", loader=loader)
+    assert reg.load(tmp_path / "m1.pkl", loader=loader) is e1 and len(calls) == 1
+    assert e1.class_index_map["buy_index"] == 1 and e1.class_index_map["sell_index"] == 0
+
+    _write_active(tmp_path, "m1.pkl", 1_000_000_000)
+    a1 = reg.active()
+    assert a1.model is e1.model and a1.feature_order == ("c", "a", "b") and a1.threshold == 0.55
+    assert reg.active() is a1
+
+    X = pd.DataFrame({"a": [1.0], "b": [2.0], "c": [3.0], "extra": [0.0]})
+    assert list(a1.project(X).columns) == ["c", "a", "b"]
+
+    # 昇格: 別モデルへ差し替え
+    _write_active(tmp_path, "m2.pkl", 2_000_000_000)
+    a2 = reg.active()
+    assert a2.model_hash != a1.model_hash and a2.model_path.name == "m2.pkl"
+
+    # 壊れた active_model.json（未配置のモデル）→ 前のモデルのまま、直れば読み直す
+    _write_active(tmp_path, "missing.pkl", 3_000_000_000)
+    assert reg.active() is a2
+    joblib.dump(_fit(3), tmp_path / "missing.pkl")
+    a3 = reg.active()
+    assert a3.model_path.name == "missing.pkl"
+
+
+def test_watcher_follows_snapshot_notification(tmp_path) -> None:
+    """
+    start_watcher 後は設定スナップショットが active_model.json の変更を通知した時点で差し替わり、
+    stop_watcher 後は通知で差し替わらない
+    """
+    joblib.dump(_fit(1), tmp_path / "m1.pkl")
+    joblib.dump(_fit(2), tmp_path / "m2.pkl")
+    (tmp_path / "config.yaml").write_text("runtime:\n  symbol: USDJPY-\n", encoding="utf-8")
+    _write_active(tmp_path, "m1.pkl", 1_000_000_000)
+    svc = ConfigSnapshotService(tmp_path / "config.yaml", tmp_path / "config.local.yaml", tmp_path / "active_model.json")
+    svc.get()
+    reg = mr.ModelRegistry(tmp_path)
+    a1 = reg.active()
+    try:
+        reg.start_watcher(svc)
+        assert svc.watching
+        # 以降は get() の呼び出し元で通知させる（監視スレッドとの競合を避ける）
+        svc.stop_watcher()
+
+        _write_active(tmp_path, "m2.pkl", 2_000_000_000)
+        svc.get()
+        a2 = reg.active(refresh=False)
+        assert a2 is not a1 and a2.model_path.name == "m2.pkl"
+
+        reg.stop_watcher()
+        _write_active(tmp_path, "m1.pkl", 3_000_000_000)
+        svc.get()
+        assert reg.active(refresh=False) is a2
+    finally:
+        reg.stop_watcher()
+        svc.stop_watcher()
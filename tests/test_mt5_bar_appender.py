@@ -0,0 +1,148 @@
+"""
+tests/test_mt5_bar_appender.py
+
+プロセス内の MT5 追記（app.services.mt5_bar_appender.Mt5BarAppender）が、合成レートを返す偽の
+MetaTrader5 モジュールに対して、CSV 末尾より新しい確定バーだけを既存バイトを書き換えずに追記し、
+末尾バーの修正・遡れない欠損・data_guard.ensure_data からの利用を正しく扱うことを検証する。
+"""
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services import data_guard
+from app.services import mt5_bar_appender as mba
+
+RATE_DTYPE = [
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+]
+
+
+class FakeMT5:
+    """MetaTrader5 互換の最小限（M5 の合成レート。最後の1本は形成中）"""
+
+    TIMEFRAME_M5 = 5
+
+    def __init__(self, n_bars: int = 201, max_bars: int = 100_000) -> None:
+        now = int(time.time())
+        self.now = now
+        t_last = (now // 300) * 300  # 形成中のバー
+        t = t_last - 300 * np.arange(n_bars - 1, -1, -1, dtype=np.int64)
+        self.rates = np.zeros(n_bars, dtype=RATE_DTYPE)
+        self.rates["time"] = t
+        self.rates["open"] = 150.0 + np.arange(n_bars) * 0.001
+        self.rates["high"] = self.rates["open"] + 0.01
+        self.rates["low"] = self.rates["open"] - 0.01
+        self.rates["close"] = self.rates["open"] + 0.002
+        self.rates["tick_volume"] = 100 + np.arange(n_bars)
+        self.rates["spread"] = 3
+        self.max_bars = max_bars
+        self.calls = {"initialize": 0, "copy": 0}
+
+    def initialize(self, *a, **k):
+        self.calls["initialize"] += 1
+        return True
+
+    def shutdown(self):
+        pass
+
+    def last_error(self):
+        return (0, "ok")
+
+    def symbol_select(self, sym, flag):
+        return True
+
+    def symbol_info_tick(self, sym):
+        return type("Tick", (), {"time": self.now})()
+
+    def copy_rates_from_pos(self, sym, tf, pos, count):
+        self.calls["copy"] += 1
+        served = self.rates[-self.max_bars:]
+        return served[-int(count):].copy()
+
+
+def _csv_frame(rates: np.ndarray) -> pd.DataFrame:
+    """make_csv_from_mt5 と同じ列・型の DataFrame（time は JST naive）"""
+    df = pd.DataFrame(rates)
+    df["time"] = pd.to_datetime(df["time"], unit="s", utc=True).dt.tz_convert("Asia/Tokyo").dt.tz_localize(None)
+    for c in ["open", "high", "low", "close"]:
+        df[c] = df[c].astype("float32")
+    for c in ["tick_volume", "spread", "real_volume"]:
+        df[c] = df[c].astype("int32")
+    return df[mba.CSV_COLS]
+
+
+def test_append_only_closed_bars_without_rewriting(tmp_path, monkeypatch) -> None:
+    """
+    末尾以降の確定バーだけが追記され（形成中は含まない）、既存バイトはそのまま。
+    2回目は up_to_date、末尾バーの修正は最終行だけ差し替え（ストアも追従）、遡れない欠損は gap でファイルを触らない
+    """
+    monkeypatch.setattr(data_guard, "DATA_DIR", tmp_path)
+    fake = FakeMT5()
+    csv = data_guard.csv_path("USDJPY", "M5")
+    csv.parent.mkdir(parents=True)
+    _csv_frame(fake.rates[:100]).to_csv(csv, index=False)
+    before = csv.read_bytes()
+
+    appender = mba.Mt5BarAppender(fake)
+    res = appender.append_new_bars("USDJPY-", "M5")
+    assert res.status == "appended" and res.rows == 100 and not res.replaced_tail
+    after = csv.read_bytes()
+    assert after.startswith(before)
+    expected = _csv_frame(fake.rates[:-1])
+    pd.testing.assert_frame_equal(pd.read_csv(csv, parse_dates=["time"]), pd.read_csv(
+        io.StringIO(expected.to_csv(index=False)), parse_dates=["time"]))
+    assert res.tail_after == expected["time"].iloc[-1]
+    assert appender.latest_bar_time("USDJPY-", "M5") == expected["time"].iloc[-1]
+
+    # 変化なし → 何も書かない（セッションは使い回す）
+    assert appender.append_new_bars("USDJPY-", "M5").status == "up_to_date"
+    assert csv.read_bytes() == after and fake.calls["initialize"] == 1
+    data_guard.ohlcv_store("USDJPY", "M5")  # 差し替え前の最終行を列指向ストアへ
+
+    # 次のバーが確定し、直前のバーの値がブローカー側で修正されていた → 最終行の差し替え + 1行追記
+    fake.rates["close"][-2] += 0.005
+    fake.now += 300
+    res = appender.append_new_bars("USDJPY-", "M5")
+    assert res.status == "appended" and res.rows == 1 and res.replaced_tail
+    head = after[: after.rstrip(b"\n").rfind(b"\n") + 1]
+    assert csv.read_bytes().startswith(head)
+    df = pd.read_csv(csv, parse_dates=["time"])
+    assert len(df) == 201 and df["time"].is_monotonic_increasing
+    assert np.float32(df["close"].iloc[-2]) == np.float32(fake.rates["close"][-2])
+    # 列指向ストアも差し替えた最終行を取り込む
+    store = data_guard.ohlcv_store("USDJPY", "M5")
+    pd.testing.assert_frame_equal(store.tail(len(store)), df, check_dtype=False)
+
+    # ブローカー側の保持本数より CSV が古い → gap（フォールバック対象。ファイルは触らない）
+    _csv_frame(fake.rates[:10]).to_csv(csv, index=False)
+    stale = csv.read_bytes()
+    fake.max_bars = 50
+    res = mba.Mt5BarAppender(fake).append_new_bars("USDJPY-", "M5")
+    assert res.status == "gap" and not res.ok and csv.read_bytes() == stale
+
+
+def test_ensure_data_uses_in_process_append(tmp_path, monkeypatch) -> None:
+    """ensure_data は末尾だけ足りない CSV をサブプロセスを起動せずに追記する"""
+    monkeypatch.setattr(data_guard, "DATA_DIR", tmp_path)
+    fake = FakeMT5()
+    mba.reset_bar_appender(fake)
+    try:
+        csv = data_guard.csv_path("USDJPY", "M5")
+        csv.parent.mkdir(parents=True)
+        frame = _csv_frame(fake.rates[:150])
+        frame.to_csv(csv, index=False)
+
+        def _no_subprocess(*a, **k):
+            raise AssertionError("make_csv_from_mt5 must not be spawned")
+
+        monkeypatch.setattr(data_guard.subprocess, "run", _no_subprocess)
+        start = str(frame["time"].iloc[0])
+        end = (pd.Timestamp(frame["time"].iloc[-1]) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        assert data_guard.ensure_data("USDJPY-", "M5", start, end) == csv
+        bounds = data_guard.ohlcv_time_bounds("USDJPY", "M5")
+        assert bounds is not None and bounds[1] == _csv_frame(fake.rates[:-1])["time"].iloc[-1]
+    finally:
+        mba.reset_bar_appender()
@@ -0,0 +1,136 @@
+"""
+tests/test_ohlcv_resample.py
+
+M5 からの上位足導出（app.services.ohlcv_resample）が、サーバ時刻基準で足を区切り、
+増分更新では最終行の足だけを集計し直して全体集計と同じ結果になること、
+ブローカーの足との整合チェックで差分を検出できることを検証する。
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services import data_guard
+from app.services import ohlcv_resample as rs
+from app.services.mt5_bar_appender import Mt5BarAppender
+
+
+def _m5(start, periods: int, *, weekdays_only: bool = True) -> pd.DataFrame:
+    """JST naive の合成 M5（既定で土日は除く）"""
+    t = pd.date_range(start, periods=periods, freq="5min")
+    if weekdays_only:
+        t = t[t.dayofweek < 5]
+    n = len(t)
+    rng = np.random.default_rng(0)
+    o = 150.0 + np.cumsum(rng.normal(0, 0.01, n))
+    return pd.DataFrame(
+        {
+            "time": t,
+            "open": o.astype("float32"),
+            "high": (o + 0.02).astype("float32"),
+            "low": (o - 0.02).astype("float32"),
+            "close": (o + 0.005).astype("float32"),
+            "tick_volume": np.arange(n, dtype="int32") % 50 + 1,
+            "spread": (np.arange(n) % 3 + 2).astype("int32"),
+            "real_volume": np.zeros(n, dtype="int32"),
+        }
+    )
+
+
+def test_bucket_start_follows_server_day_with_dst() -> None:
+    """ny_close の D1/H4 はサーバ 0 時（冬 JST 07:00 / 夏 JST 06:00）で区切られ、H1 は正時"""
+    t = pd.Series(pd.to_datetime(["2024-01-16 06:55", "2024-01-16 07:00", "2024-07-16 05:55", "2024-07-16 06:00"]))
+    d1 = rs.bucket_start(t, "D1", "ny_close")
+    assert list(d1.astype(str)) == [
+        "2024-01-15 07:00:00", "2024-01-16 07:00:00", "2024-07-15 06:00:00", "2024-07-16 06:00:00",
+    ]
+    assert str(rs.bucket_start(pd.Series([pd.Timestamp("2024-01-16 10:55")]), "H4", "ny_close")[0]) == "2024-01-16 07:00:00"
+    assert str(rs.bucket_start(pd.Series([pd.Timestamp("2024-01-16 10:55")]), "H1", "ny_close")[0]) == "2024-01-16 10:00:00"
+
+
+def test_incremental_derive_matches_full_resample(tmp_path, monkeypatch) -> None:
+    """
+    途中まで作った上位足 CSV を増分更新すると、最終行以外のバイトはそのままで、
+    M5 全体を集計した結果と一致する（ストアも差し替えた最終行を取り込む）
+    """
+    monkeypatch.setattr(data_guard, "DATA_DIR", tmp_path)
+    m5 = _m5("2024-03-07 00:00", 12 * 24 * 6)  # 週末をまたぐ
+    base = data_guard.csv_path("USDJPY", "M5")
+    base.parent.mkdir(parents=True)
+    m5.iloc[:700].to_csv(base, index=False)
+
+    for tf in rs.DERIVED_TFS:
+        res = rs.derive_timeframe(base, data_guard.csv_path("USDJPY", tf), tf, server_tz="ny_close")
+        assert res.status == "created"
+    h1 = data_guard.csv_path("USDJPY", "H1")
+    before = h1.read_bytes()
+    data_guard.ohlcv_store("USDJPY", "H1")  # 途中の（未確定の）最終行をストアへ
+
+    m5.to_csv(base, index=False)
+    results = rs.derive_from_m5("USDJPY-", server_tz="ny_close")
+    assert all(r.status == "appended" for r in results.values())
+    assert results["H1"].replaced_tail and results["H1"].rows > 0
+    assert h1.read_bytes().startswith(before[: before.rstrip(b"\n").rfind(b"\n") + 1])
+
+    for tf in rs.DERIVED_TFS:
+        got = pd.read_csv(data_guard.csv_path("USDJPY", tf), parse_dates=["time"])
+        want = rs.resample_bars(m5, tf, "ny_close").astype(got.dtypes.to_dict())
+        pd.testing.assert_frame_equal(got, want, check_dtype=False)
+    # M5 の無い土日には足を作らない
+    got_h1 = pd.read_csv(h1, parse_dates=["time"])
+    assert (got_h1["time"].dt.dayofweek < 5).all()
+
+    store = data_guard.ohlcv_store("USDJPY", "H1")
+    pd.testing.assert_frame_equal(
+        store.tail(len(store)), pd.read_csv(h1, parse_dates=["time"]), check_dtype=False
+    )
+    assert rs.derive_timeframe(base, h1, "H1", server_tz="ny_close").status == "up_to_date"
+
+
+class _FakeBroker:
+    """M5 と同じ値から作った H1（サーバ時刻 = UTC）を返す偽の MetaTrader5"""
+
+    TIMEFRAME_H1 = 16385
+
+    def __init__(self, h1: pd.DataFrame) -> None:
+        epoch = (h1["time"] - pd.Timedelta(hours=9)).astype("datetime64[s]").astype("int64")
+        self.rates = h1.assign(time=epoch.to_numpy()).to_records(index=False)
+        self.now = int(time.time())
+
+    def initialize(self, *a, **k):
+        return True
+
+    def last_error(self):
+        return (0, "ok")
+
+    def symbol_select(self, sym, flag):
+        return True
+
+    def symbol_info_tick(self, sym):
+        return type("Tick", (), {"time": self.now})()
+
+    def copy_rates_from_pos(self, sym, tf, pos, count):
+        return self.rates[-int(count):].copy()
+
+
+def test_verify_against_broker_detects_mismatch(tmp_path, monkeypatch) -> None:
+    """導出した H1 がブローカーの H1 と一致すれば ok、値が違う足は price_mismatch に出る"""
+    monkeypatch.setattr(data_guard, "DATA_DIR", tmp_path)
+    # 直近の時刻で作る（tick と PC 時刻の差からサーバ時刻オフセットを推定させないため）
+    start = pd.Timestamp.now(tz="Asia/Tokyo").tz_localize(None).floor("h") - pd.Timedelta(hours=40)
+    m5 = _m5(start, 12 * 30, weekdays_only=False)
+    base = data_guard.csv_path("USDJPY", "M5")
+    base.parent.mkdir(parents=True)
+    m5.to_csv(base, index=False)
+    h1 = data_guard.csv_path("USDJPY", "H1")
+    assert rs.derive_timeframe(base, h1, "H1", server_tz="UTC").ok
+
+    appender = Mt5BarAppender(_FakeBroker(rs.resample_bars(m5, "H1", "UTC")))
+    report = rs.verify_against_broker("USDJPY-", "H1", appender=appender)
+    assert report["ok"] and report["checked"] == 30 and report["volume_mismatch"] == 0
+
+    df = pd.read_csv(h1, parse_dates=["time"])
+    df.loc[5, "high"] += 0.5
+    df.to_csv(h1, index=False)
+    report = rs.verify_against_broker("USDJPY-", "H1", appender=appender)
+    assert not report["ok"] and report["price_mismatch"] == [str(df["time"].iloc[5])]
@@ -0,0 +1,110 @@
+"""
+tests/test_ohlcv_store.py
+
+列指向 OHLCV ストア（app.services.ohlcv_store）と data_guard の窓口が
+CSV を pd.read_csv した結果と同じ値を返すことを検証する。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import data_guard
+from app.services.ohlcv_store import OhlcvStore
+
+
+def _make_csv_rows(start: str, n: int, seed: int = 3) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 150.0 + np.cumsum(rng.normal(0.0, 0.03, n))
+    return pd.DataFrame(
+        {
+            "time": pd.date_range(start, periods=n, freq="5min"),
+            "open": close.round(3),
+            "high": (close + 0.02).round(3),
+            "low": (close - 0.02).round(3),
+            "close": close.round(3),
+            "tick_volume": rng.integers(50, 500, n),
+            "spread": rng.integers(0, 5, n),
+            "real_volume": np.zeros(n, dtype=int),
+        }
+    )
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_guard, "DATA_DIR", tmp_path)
+    return tmp_path
+
+
+def _write_csv(df: pd.DataFrame) -> None:
+    p = data_guard.csv_path("USDJPY", "M5")
+    p.parent.mkdir(parents=True, exist_ok=True)
+    df.to_csv(p, index=False)
+
+
+def test_bounds_range_and_tail_match_csv(data_dir) -> None:
+    """
+    月をまたぐ CSV: bounds / 範囲 / 末尾 / pad_before が read_csv と一致すること
+    """
+    df = _make_csv_rows("2025-01-30", 3000)
+    _write_csv(df)
+    expected = pd.read_csv(data_guard.csv_path("USDJPY", "M5"), parse_dates=["time"])
+
+    assert data_guard.ohlcv_time_bounds("USDJPY-", "M5") == (expected["time"].min(), expected["time"].max())
+    assert data_guard.store_dir("USDJPY", "M5").joinpath("manifest.json").exists()
+
+    start, end = pd.Timestamp("2025-02-01 00:02"), pd.Timestamp("2025-02-05 12:00")
+    got = data_guard.read_ohlcv("USDJPY", "M5", start=start, end=end, pad_before=10)
+    i0 = int(expected["time"].searchsorted(start)) - 10
+    i1 = int(expected["time"].searchsorted(end, side="right"))
+    pd.testing.assert_frame_equal(got, expected.iloc[i0:i1].reset_index(drop=True))
+
+    pd.testing.assert_frame_equal(
+        data_guard.read_ohlcv("USDJPY", "M5", tail=7), expected.tail(7).reset_index(drop=True)
+    )
+
+
+def test_sync_appends_only_new_rows(data_dir) -> None:
+    """
+    CSV に行が追記されたら末尾だけ取り込み、CSV 全体と一致すること（再構築しない）
+    """
+    df = _make_csv_rows("2025-03-01", 2000)
+    _write_csv(df.iloc[:1500])
+    store = data_guard.ohlcv_store("USDJPY", "M5")
+    assert len(store) == 1500
+
+    _write_csv(df)
+    assert store.sync_from_csv(data_guard.csv_path("USDJPY", "M5")) == 500
+    expected = pd.read_csv(data_guard.csv_path("USDJPY", "M5"), parse_dates=["time"])
+    pd.testing.assert_frame_equal(store.read_range(), expected)
+
+    # CSV が変わっていなければ何も読まない
+    assert store.sync_from_csv(data_guard.csv_path("USDJPY", "M5")) == 0
+
+
+def test_rebuild_when_csv_head_changes(data_dir) -> None:
+    """
+    過去側に行が足された（先頭 time が変わった）CSV はストアを作り直すこと
+    """
+    df = _make_csv_rows("2025-03-01", 600)
+    _write_csv(df.iloc[100:])
+    data_guard.ohlcv_store("USDJPY", "M5")
+
+    _write_csv(df)
+    assert data_guard.ohlcv_time_bounds("USDJPY", "M5")[0] == df["time"].iloc[0]
+    assert len(data_guard.ohlcv_store("USDJPY", "M5")) == 600
+
+
+def test_append_ignores_rows_not_after_tail(tmp_path) -> None:
+    """
+    tail_time 以下の行は捨てる（追記専用）。manifest を読み直した別インスタンスからも同じに見えること
+    """
+    df = _make_csv_rows("2025-04-01", 50)
+    store = OhlcvStore(tmp_path / "store_M5")
+    assert store.append(df.iloc[:30]) == 30
+    assert store.append(df.iloc[20:]) == 20
+    assert store.append(df.iloc[:10]) == 0
+
+    other = OhlcvStore(tmp_path / "store_M5")
+    assert len(other) == 50
+    assert other.tail_time() == df["time"].iloc[-1]
+    pd.testing.assert_frame_equal(other.read_range(), df)
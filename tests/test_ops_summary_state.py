@@ -0,0 +1,84 @@
+"""
+tests/test_ops_summary_state.py
+
+summarize_ops_history の集計状態（app.services.ops_summary_state）が、追記分だけの畳み込みでも
+全履歴からの作り直しと同じ集計になり、ファイルの書き換えにも追従することを検証する。
+"""
+import json
+import os
+import random
+from datetime import datetime, timedelta
+
+from app.services.ops_history_service import OpsHistoryService
+from app.services.ops_summary_state import OpsSummaryState
+
+KEYS = (
+    "week_total", "week_ok", "month_total", "month_ok", "consecutive_failures",
+    "week_model_updates", "month_model_updates", "last", "last_model_update",
+)
+
+
+def _write(path, n: int, seed: int, mode: str = "w") -> None:
+    rnd = random.Random(seed)
+    now = datetime.now()
+    with path.open(mode, encoding="utf-8") as f:
+        for i in range(n):
+            rec = {
+                "symbol": rnd.choice(["USDJPY-", "EURUSD-"]),
+                "ok": rnd.random() < 0.6,
+                "profiles": ["michibiki_std"],
+                "step": rnd.choice(["done", "applied", "failed"]),
+                "apply_performed": rnd.random() < 0.2,
+                "started_at": (now - timedelta(hours=rnd.randint(0, 24 * 45))).isoformat(timespec="seconds"),
+            }
+            if i % 17 == 0:
+                rec["started_at"] = "garbage"
+            f.write(json.dumps(rec) + "\n")
+
+
+def _service(root) -> OpsHistoryService:
+    svc = OpsHistoryService()
+    svc.project_root = root
+    return svc
+
+
+def _summary(svc: OpsHistoryService, symbol=None) -> dict:
+    out = svc.summarize_ops_history(symbol=symbol, cache_sec=0, include_condition_mining=False)
+    return {k: out[k] for k in KEYS}
+
+
+def _fresh(root, symbol=None) -> dict:
+    (root / "logs" / "ops" / "ops_summary_state.json").unlink(missing_ok=True)
+    return _summary(_service(root), symbol)
+
+
+def test_incremental_state_matches_rebuild(tmp_path, monkeypatch) -> None:
+    """
+    追記は追記行だけを畳み込み、作り直しと同じ集計になること（切り詰め後も）
+    """
+    ops = tmp_path / "logs" / "ops"
+    ops.mkdir(parents=True)
+    old, new = ops / "ops_start_20250101.jsonl", ops / "ops_result_a.jsonl"
+    _write(old, 120, seed=1)
+    _write(new, 80, seed=2)
+    os.utime(old, (1_000_000_000, 1_000_000_000))
+
+    svc = _service(tmp_path)
+    first = _summary(svc)
+    assert first["month_total"] > 0 and first == _fresh(tmp_path)
+
+    folded = []
+    orig = OpsSummaryState._fold
+    monkeypatch.setattr(OpsSummaryState, "_fold", lambda self, ent, rec: folded.append(rec) or orig(self, ent, rec))
+    _write(new, 5, seed=3, mode="a")
+    with new.open("a", encoding="utf-8") as f:
+        f.write(json.dumps({"symbol": "USDJPY-", "ok": False, "started_at": datetime.now().isoformat()}) + "\n")
+    got = {sym: _summary(svc, sym) for sym in (None, "USDJPY-", "EURUSD-")}
+    assert len(folded) == 6  # 追記された6行だけを畳み込む
+    for sym, g in got.items():
+        assert g == _fresh(tmp_path, sym)
+    assert _summary(svc)["consecutive_failures"] >= 1
+
+    # 書き換え（縮小）→ そのファイルだけ数え直す
+    _write(new, 10, seed=4)
+    assert _summary(svc) == _fresh(tmp_path)
@@ -0,0 +1,71 @@
+"""
+tests/test_proba_cache.py
+
+推論確率キャッシュ（app.services.proba_cache）が
+時刻 + 特徴量ハッシュで一致した行だけを返し、追記・上書きできることを検証する。
+"""
+import numpy as np
+import pandas as pd
+
+from app.services import proba_cache as pc
+
+
+def _features(n: int, start: str = "2025-01-06 00:00") -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    return pd.DataFrame(
+        {
+            "time": pd.date_range(start, periods=n, freq="5min"),
+            "f1": rng.normal(size=n),
+            "f2": rng.normal(size=n),
+        }
+    )
+
+
+def test_lookup_store_and_feature_change(tmp_path) -> None:
+    """
+    保存した行はヒットし、未保存の時刻・特徴量が変わった行だけ missing になること
+    """
+    cache = pc.get_proba_cache("USDJPY-", "k" * 64, root=tmp_path)
+    df = _features(100)
+    fh = pc.feature_row_hashes(df[["f1", "f2"]])
+    probs = np.column_stack([np.linspace(0, 1, 100), np.linspace(1, 0, 100)])
+
+    got, missing = cache.lookup(df["time"], fh)
+    assert missing.tolist() == list(range(100))
+
+    cache.store(df["time"].iloc[10:60], fh[10:60], probs[10:60])
+    got, missing = cache.lookup(df["time"], fh)
+    assert missing.tolist() == list(range(10)) + list(range(60, 100))
+    np.testing.assert_array_equal(got[10:60], probs[10:60])
+    assert np.isnan(got[:10]).all()
+
+    # 同じ時刻でも特徴量が違えば再推論対象
+    df2 = df.copy()
+    df2.loc[20, "f1"] += 1e-9
+    _, missing2 = cache.lookup(df2["time"], pc.feature_row_hashes(df2[["f1", "f2"]]))
+    assert 20 in missing2.tolist() and 21 not in missing2.tolist()
+
+    # 前後の範囲を足す・同じ時刻は新しい値で上書き（別インスタンスからも読める）
+    cache.store(df["time"], fh, probs * 0.5)
+    other = pc.ProbaCache(cache.path)
+    got, missing = other.lookup(df["time"], fh)
+    assert missing.size == 0 and len(other) == 100
+    np.testing.assert_array_equal(got, probs * 0.5)
+
+
+def test_cache_key_tracks_file_contents(tmp_path) -> None:
+    """
+    モデル・スケーラーの中身や feature_order が変わるとキーが変わること
+    """
+    model = tmp_path / "m.pkl"
+    scaler = tmp_path / "s.pkl"
+    model.write_bytes(b"model-v1")
+    scaler.write_bytes(b"scaler-v1")
+
+    k1 = pc.cache_key(model, ["f1", "f2"], scaler)
+    assert k1 == pc.cache_key(model, ["f1", "f2"], scaler)
+    assert k1 != pc.cache_key(model, ["f2", "f1"], scaler)
+    assert k1 != pc.cache_key(model, ["f1", "f2"], None)
+
+    model.write_bytes(b"model-v2-longer")
+    assert k1 != pc.cache_key(model, ["f1", "f2"], scaler)
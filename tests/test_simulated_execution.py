@@ -0,0 +1,71 @@
+"""
+tests/test_simulated_execution.py
+
+SimulatedExecution の列ストレージ・配列版エクイティ曲線が、トレードを1件ずつ積む従来の計算と
+一致し、含み損益（mark_to_market）とバー内ドローダウンが定義どおりになることを検証する。
+"""
+import numpy as np
+import pandas as pd
+
+from app.core.backtest.simulated_execution import SimulatedExecution
+
+
+def _scenario(n: int = 300, seed: int = 0, tz=None):
+    rng = np.random.default_rng(seed)
+    ts = pd.Series(pd.date_range("2025-01-06 00:00", periods=n, freq="5min", tz=tz))
+    close = pd.Series(150.0 + np.cumsum(rng.normal(0.0, 0.05, n)))
+    ex = SimulatedExecution(initial_capital=100000.0)
+    i = 0
+    while i < n - 10:
+        j = i + int(rng.integers(1, 6))
+        ex.open_position("BUY" if rng.random() < 0.5 else "SELL", float(close[i]), ts[i], atr=0.1 if i % 3 else None)
+        ex.close_position(float(close[j]), ts[j])
+        i = j + int(rng.integers(0, 4))
+    return ex, ts, close
+
+
+def test_equity_curve_matches_sequential_reference() -> None:
+    """
+    確定エクイティが、決済時刻順に pnl を逐次加算する従来ループとビット単位で一致すること（tz あり・なし）
+    """
+    for tz in (None, "Asia/Tokyo"):
+        ex, ts, close = _scenario(tz=tz)
+        trades = sorted(ex.trades, key=lambda t: t.exit_time)
+        expected, cum, k = [], ex.initial_capital, 0
+        for t in ts:
+            while k < len(trades) and trades[k].exit_time <= t:
+                cum += trades[k].pnl
+                k += 1
+            expected.append(cum)
+        got = ex.get_equity_curve(ts, close)
+        np.testing.assert_array_equal(got.to_numpy(), np.asarray(expected))
+        assert got.iloc[-1] == ex.equity
+
+        df = ex.get_trades_df()
+        assert len(df) == ex.n_trades and df["entry_time"].iloc[0] == ts.iloc[0]
+        assert df["atr"].isna().sum() == sum(t.atr is None for t in ex.trades)
+
+
+def test_mark_to_market_and_intrabar_drawdown() -> None:
+    """
+    含み損益は保有中のバーだけに乗り、バー内ドローダウンは終値評価より浅くならないこと
+    """
+    ts = pd.Series(pd.date_range("2025-01-06 00:00", periods=6, freq="5min"))
+    close = pd.Series([100.0, 101.0, 99.0, 102.0, 102.0, 103.0])
+    high = close + 0.5
+    low = close - 2.0
+    ex = SimulatedExecution(initial_capital=1000.0, contract_size=10)
+    ex.open_position("BUY", 100.0, ts[0], lot=1.0)
+    ex.close_position(102.0, ts[3])
+    ex.open_position("SELL", 102.0, ts[4], lot=1.0)  # 最終バーまで保有中
+
+    mtm = ex.get_equity_curve(ts, close, mark_to_market=True)
+    assert mtm.tolist() == [1000.0, 1010.0, 990.0, 1020.0, 1020.0, 1010.0]
+    assert ex.get_equity_curve(ts, close).tolist() == [1000.0, 1000.0, 1000.0, 1020.0, 1020.0, 1020.0]
+
+    dd = ex.get_intrabar_drawdown(ts, close, high, low)
+    # バー2: BUY を low=97 で評価 → 970 / peak 1010 - 1
+    assert dd.iloc[2] == 970.0 / 1010.0 - 1.0
+    # バー5: SELL を high=103.5 で評価 → 1020 - 15 = 1005 / peak 1020 - 1
+    assert dd.iloc[5] == 1005.0 / 1020.0 - 1.0
+    assert dd.iloc[0] == 0.0 and (dd <= (mtm / mtm.cummax() - 1.0) + 1e-12).all()
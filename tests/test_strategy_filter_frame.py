@@ -0,0 +1,54 @@
+"""
+tests/test_strategy_filter_frame.py
+
+StrategyFilterEngine.evaluate_frame（全バーの配列評価）+ evaluate_at（連敗回避）が、
+バーごとの evaluate と同じ (ok, reasons) を返すことを検証する。
+"""
+import numpy as np
+import pandas as pd
+
+from app.core.filter import FilterConfig, StrategyFilterEngine
+
+
+def test_evaluate_frame_matches_evaluate() -> None:
+    """
+    filter_level 0〜3・帯設定の有無・NaN/0/範囲外の値・時刻欠損で、evaluate と完全一致すること
+    """
+    rng = np.random.default_rng(0)
+    n = 120
+    df = pd.DataFrame(
+        {
+            "time": pd.date_range("2024-01-01", periods=n, freq="37min"),
+            "atr": rng.choice([np.nan, 0.0, -1.0, 0.01, 0.5, 6.0], n),
+            "volatility": rng.choice([np.nan, 0.0, 0.1, 0.5, 2.0], n),
+            "trend_strength": rng.choice([np.nan, -1.0, -0.5, 0.5, 0.9], n),
+        }
+    )
+    df.loc[3, "time"] = pd.NaT
+    losses = rng.integers(0, 4, n)
+    engine = StrategyFilterEngine(FilterConfig(losing_streak_limit=2))
+
+    bands = {
+        "time_window": {"start": 8, "end": 17},
+        "atr_band": {"min": 0.1, "max": 1.0},
+        "vol_band": {"min": 0.2, "max": 1.0},
+        "trend_band": {"min": -0.6, "max": 0.6},
+    }
+    for kw in ({}, bands):
+        for level in range(4):
+            frame = engine.evaluate_frame(df, level, **kw)
+            recorded = engine.apply_losing_streak(frame, losses.tolist())
+            for i in range(n):
+                ts = df["time"].iloc[i]
+                ctx = {
+                    "timestamp": None if pd.isna(ts) else ts,
+                    "atr": float(df["atr"].iloc[i]),
+                    "volatility": float(df["volatility"].iloc[i]),
+                    "trend_strength": float(df["trend_strength"].iloc[i]),
+                    "consecutive_losses": int(losses[i]),
+                    "filter_level": level,
+                    **kw,
+                }
+                expected = engine.evaluate(ctx, level)
+                assert engine.evaluate_at(frame, i, consecutive_losses=int(losses[i])) == expected
+                assert (bool(recorded.passed[i]), recorded.reasons_at(i)) == expected
@@ -0,0 +1,66 @@
+"""
+tests/test_tree_inference.py
+
+フラット配列化した LightGBM 推論（core.ai.tree_inference）が Booster.predict とビット単位で一致し、
+キャリブレータ適用後も従来の Calibrator.transform と同じ値になることを検証する。
+"""
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from core.ai.calibration import fit_platt
+from core.ai.loader import _LGBBoosterSklearnWrapper
+from core.ai.tree_inference import compile_booster, compile_model
+
+
+def _data(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5))
+    X[:, 3] = np.where(rng.random(n) < 0.3, 0.0, X[:, 3])  # ゼロの多い列
+    y = (X[:, 0] + 0.5 * X[:, 1] - X[:, 3] + rng.normal(0.0, 0.5, n) > 0).astype(int)
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+def _train(X, y, **params) -> lgb.Booster:
+    base = {"objective": "binary", "num_leaves": 15, "min_data_in_leaf": 5, "verbose": -1, "seed": 1}
+    base.update(params)
+    return lgb.train(base, lgb.Dataset(X, y), num_boost_round=40)
+
+
+def test_matches_booster_predict_bit_for_bit() -> None:
+    """
+    欠損の扱い（NaN / Zero / None）ごとに、1行・複数行とも Booster.predict と完全一致すること
+    """
+    X, y = _data(600)
+    Xt, _ = _data(300, seed=1)
+    Xt[:5] = 0.0  # 全ゼロ行
+    Xt[5:10] = np.nan  # 全欠損行
+    for params in ({}, {"zero_as_missing": True}, {"use_missing": False}):
+        bst = _train(X, y, **params)
+        forest = compile_booster(bst)
+        ref = bst.predict(Xt)
+        np.testing.assert_array_equal(forest.predict(Xt), ref)
+        np.testing.assert_array_equal(forest.raw_score(Xt), bst.predict(Xt, raw_score=True))
+        assert all(forest.predict_row(Xt[i]) == ref[i] for i in range(len(Xt)))
+
+
+def test_compiled_model_wraps_sklearn_wrapper_and_calibrator() -> None:
+    """
+    _LGBBoosterSklearnWrapper と同じ float32 入力・列順で predict_proba が一致し、platt 適用後も一致すること
+    """
+    X, y = _data(600)
+    cols = ["a", "b", "c", "d", "e"]
+    model = _LGBBoosterSklearnWrapper(_train(X, y), cols)
+    Xt = pd.DataFrame(_data(200, seed=2)[0], columns=cols)
+
+    cm = compile_model(model)
+    assert cm is not None
+    shuffled = Xt[["e", "c", "a", "d", "b"]]
+    np.testing.assert_array_equal(cm.predict_proba(shuffled), model.predict_proba(Xt))
+    np.testing.assert_array_equal(cm.predict_proba(Xt.iloc[[7]]), model.predict_proba(Xt.iloc[[7]]))
+
+    p1 = model.predict_proba(Xt)[:, 1]
+    calib = fit_platt(np.asarray(y[:200]), p1)
+    cmc = compile_model(model, calibrator=calib)
+    np.testing.assert_array_equal(cmc.predict_proba(Xt)[:, 1], calib.transform(p1))
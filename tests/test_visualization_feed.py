@@ -0,0 +1,134 @@
+"""
+tests/test_visualization_feed.py
+
+可視化タブ用のデータ供給（app.services.visualization_feed.VizFeed）が、2回目以降は
+末尾の新しいバー・推論値だけを差分で返して表示範囲を N 本に保ち、タブ側（VizCache）に
+差分を積んだ結果が全体の取り直しと一致することを検証する。
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import data_guard
+from app.services import visualization_feed as vf
+
+
+def _ohlc(start: str, n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = (150.0 + np.cumsum(rng.normal(0.0, 0.03, n))).round(3)
+    return pd.DataFrame(
+        {
+            "time": pd.date_range(start, periods=n, freq="5min"),
+            "open": close,
+            "high": close + 0.02,
+            "low": close - 0.02,
+            "close": close,
+            "tick_volume": rng.integers(50, 500, n),
+        }
+    )
+
+
+def _proba(times: pd.Series, seed: int = 1) -> pd.DataFrame:
+    p = np.random.default_rng(seed).uniform(0.2, 0.8, len(times)).round(4)
+    return pd.DataFrame({"time": times, "prob_buy": p, "prob_sell": (1.0 - p).round(4)})
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_guard, "DATA_DIR", tmp_path)
+    # 推論（active model）は使わず、proba CSV をテスト側で用意する
+    monkeypatch.setattr(vf, "ensure_lgbm_proba_uptodate", lambda **_: None)
+    return tmp_path
+
+
+def _write(df_ohlc: pd.DataFrame, df_proba: pd.DataFrame) -> None:
+    p = data_guard.csv_path("USDJPY", "M5")
+    p.parent.mkdir(parents=True, exist_ok=True)
+    df_ohlc.to_csv(p, index=False)
+    q = p.parent.parent / "lgbm" / "USDJPY_M5_proba.csv"
+    q.parent.mkdir(parents=True, exist_ok=True)
+    df_proba.to_csv(q, index=False)
+
+
+def test_poll_returns_tail_deltas(data_dir) -> None:
+    """
+    新しいバーの追記・推論の遅れ・変化なしの各ケースで、差分の開始位置・先頭から落とす行数が正しく、
+    表示範囲は N 本のまま、タブ側（VizCache）に積んだ結果が全体の取り直しと一致すること
+    """
+    df = _ohlc("2025-01-06", 300)
+    _write(df, _proba(df["time"].iloc[:-1]))  # 最終バーはまだ未推論
+    feed = vf.VizFeed()
+    cache = vf.VizCache()
+
+    first = feed.poll("USDJPY-", "M5", 120, reload=True)
+    assert first.reset and first.ohlc["rows"] == 120 and first.lgbm["rows"] == 119
+    assert cache.apply(first) == "full"
+
+    # 2本追記 + 推論が追いつく → 先頭の2本を落として 120 本を保つ
+    df2 = pd.concat([df, _ohlc("2025-01-07 01:00", 2, seed=5)], ignore_index=True)
+    _write(df2, _proba(df2["time"]))
+    d = feed.poll("USDJPY-", "M5", 120)
+    assert not d.reset and d.changed and d.base_seq == first.seq
+    assert d.ohlc_drop == 2 and d.ohlc_start == 118 and d.ohlc["rows"] == 2
+    # 最後に埋まっていた行から読み直し、変化は新しい行から
+    assert d.lgbm_drop == 2 and d.lgbm_start == 117 and d.lgbm["rows"] == 3
+    assert cache.apply(d) == "tail"
+
+    # OHLC だけ先に1本進み、推論は次の poll で追いつく
+    df3 = pd.concat([df2, _ohlc("2025-01-07 01:10", 1, seed=7)], ignore_index=True)
+    _write(df3, _proba(df2["time"]))
+    d = feed.poll("USDJPY-", "M5", 120)
+    assert d.ohlc_drop == 1 and d.ohlc_start == 119 and d.ohlc["rows"] == 1
+    assert d.lgbm_drop == 1 and d.lgbm_start == 119 and d.lgbm["rows"] == 0
+    assert cache.apply(d) == "tail"
+    _write(df3, _proba(df3["time"]))
+    d = feed.poll("USDJPY-", "M5", 120)
+    assert d.ohlc_drop == 0 and d.ohlc_start == 120 and d.ohlc["rows"] == 0
+    assert d.lgbm_drop == 0 and d.lgbm_start == 119 and d.lgbm["rows"] == 1
+    assert cache.apply(d) == "tail"
+
+    # 変化なし
+    assert cache.apply(feed.poll("USDJPY-", "M5", 120)) is None
+
+    ohlc, lgbm = cache.ohlc, cache.lgbm
+    snap_ohlc, snap_lgbm = feed.snapshot()
+    assert ohlc["time"] == snap_ohlc["time"] and ohlc["close"] == snap_ohlc["close"]
+    assert lgbm["time"] == snap_lgbm["time"] and lgbm["series"] == snap_lgbm["series"]
+    assert len(ohlc["time"]) == 120 and ohlc["rows"] == 120
+    assert ohlc["close"][-1] == pytest.approx(float(df3["close"].iloc[-1]))
+
+    full = vf.VizFeed().poll("USDJPY-", "M5", 120, reload=True)
+    assert ohlc["time"] == full.ohlc["time"] and ohlc["close"] == full.ohlc["close"]
+    assert lgbm["time"] == full.lgbm["time"] and lgbm["series"] == full.lgbm["series"]
+
+
+def test_cache_keeps_prepended_window_and_resyncs_on_gap(data_dir) -> None:
+    """
+    左パンで prepend した後はその本数を保って先頭を落とし、差分を取りこぼしたら積まずに resync を立てること
+    """
+    df = _ohlc("2025-01-06", 300)
+    _write(df, _proba(df["time"]))
+    feed = vf.VizFeed()
+    cache = vf.VizCache()
+    cache.apply(feed.poll("USDJPY-", "M5", 100, reload=True))
+
+    d = feed.prepend("USDJPY-", "M5", 30)
+    assert d is not None and d.reset and d.ohlc["rows"] == 130
+    assert cache.apply(d) == "full"
+
+    df2 = pd.concat([df, _ohlc("2025-01-07 01:00", 1, seed=5)], ignore_index=True)
+    _write(df2, _proba(df2["time"]))
+    d = feed.poll("USDJPY-", "M5", 100)
+    assert d.ohlc_drop == 1 and d.lgbm_drop == 1
+    assert cache.apply(d) == "tail"
+    assert cache.ohlc["rows"] == 130 and cache.ohlc["time"] == feed.snapshot()[0]["time"]
+    assert cache.lgbm["time"][0] == cache.ohlc["time"][0]
+
+    # 差分を1つ取りこぼす → 次の差分は積まない
+    df3 = pd.concat([df2, _ohlc("2025-01-07 01:05", 2, seed=7)], ignore_index=True)
+    _write(df3.iloc[:-1], _proba(df3["time"].iloc[:-1]))
+    feed.poll("USDJPY-", "M5", 100)
+    _write(df3, _proba(df3["time"]))
+    before = cache.ohlc
+    assert cache.apply(feed.poll("USDJPY-", "M5", 100)) is None
+    assert cache.resync and cache.ohlc is before
@@ -0,0 +1,83 @@
+"""
+tests/test_walkforward_retrain.py
+
+複数プロファイルの再学習（scripts.walkforward_retrain._run_multiple_profiles）が、--jobs 1（逐次）と
+--jobs 2（プロセスプール）で同じプロファイル別の結果と最悪 exit code を返すことを検証する。
+"""
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+
+from scripts import walkforward_retrain as wfr
+
+
+def _write_csv(path, n: int = 600) -> None:
+    rng = np.random.default_rng(0)
+    close = 150.0 + np.cumsum(rng.normal(0.0, 0.03, n))
+    pd.DataFrame(
+        {
+            "time": pd.date_range("2025-01-06", periods=n, freq="5min"),
+            "open": close,
+            "high": close + 0.02,
+            "low": close - 0.02,
+            "close": close,
+            "tick_volume": rng.integers(50, 500, n),
+        }
+    ).to_csv(path, index=False)
+
+
+def _args(data_dir, jobs: int) -> argparse.Namespace:
+    return argparse.Namespace(
+        symbol="USDJPY-",
+        timeframe="M5",
+        horizon=10,
+        train_bars=90_000,  # 小さい CSV なので 80/20 の単純スプリットになる
+        test_bars=7_000,
+        step_bars=7_000,
+        model_name="LightGBM_clf",
+        data_dir=str(data_dir),
+        apply=False,
+        dry_run=True,
+        emit_json=0,
+        out_json=None,
+        jobs=jobs,
+    )
+
+
+def test_jobs_1_and_2_give_same_results(tmp_path, monkeypatch) -> None:
+    """
+    逐次と並列で、プロファイルごとの ok / step / error と model_name、最悪 exit code（30）が一致すること
+    （"missing/p_b" は保存先ディレクトリが無いので失敗する）
+    """
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    _write_csv(data_dir / "USDJPY_M5.csv")
+    profiles = ["p_a", "missing/p_b"]
+
+    summaries = {}
+    for jobs in (1, 2):
+        out = tmp_path / f"jobs{jobs}"
+        (out / "models").mkdir(parents=True)
+        monkeypatch.setattr(wfr, "MODELS_DIR", out / "models")
+        monkeypatch.setattr(wfr, "LOGS_DIR", out / "logs")
+        args = _args(data_dir, jobs)
+        args.out_json = str(out / "result.json")
+        assert wfr._resolve_jobs(args, len(profiles)) == jobs
+
+        rc = wfr._run_multiple_profiles(profiles, args)
+        result = json.loads((out / "result.json").read_text(encoding="utf-8"))
+        per = {
+            name: (r["ok"], r["step"], (r["error"] or {}).get("code"), r["outputs"].get("model_name"))
+            for name, r in result["per_profile"].items()
+        }
+        summaries[jobs] = (rc, result["ok"], per)
+        assert "_pending_apply" not in result["per_profile"]["p_a"]
+        assert len(list((out / "models").glob("p_a_*.pkl"))) == 1
+
+    assert summaries[1] == summaries[2]
+    rc, ok, per = summaries[1]
+    assert rc == 30 and not ok
+    assert per["p_a"] == (True, "done", None, "p_a")
+    assert per["missing/p_b"][:2] == (False, "train_final")
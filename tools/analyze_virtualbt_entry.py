@@ -21,6 +21,8 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
+from app.services.decision_store import iter_decision_records
+
 
 def find_latest_decisions_jsonl(root: Path) -> Optional[Path]:
     """
@@ -53,27 +55,14 @@ def load_decisions_jsonl(path: Path, limit: Optional[int] = None) -> List[Dict[s
     path : Path
         decisions.jsonl のパス
     limit : int, optional
-        読み込む最大行数（デバッグ用）
+        読み込む最大レコード数（デバッグ用）
 
     Returns
     -------
     list[dict]
         決定レコードのリスト
     """
-    decisions = []
-    with open(path, "r", encoding="utf-8") as f:
-        for i, line in enumerate(f):
-            if limit and i >= limit:
-                break
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                rec = json.loads(line)
-                decisions.append(rec)
-            except json.JSONDecodeError:
-                continue
-    return decisions
+    return list(iter_decision_records([path], limit=limit))
 
 
 def extract_decision_fields(rec: Dict[str, Any]) -> Dict[str, Any]:
@@ -321,25 +310,64 @@ def sweep_threshold(
     return pd.DataFrame(rows)
 
 
-def sweep_filter_level(
-    decisions: List[Dict[str, Any]], filter_levels: List[int]
-) -> pd.DataFrame:
+def _filter_frame_from_decisions(decisions: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
     """
-    filter_level スイープ分析
-
-    Parameters
-    ----------
-    decisions : list[dict]
-        決定レコードのリスト
-    filter_levels : list[int]
-        試行する filter_level のリスト
+    決定レコードの filters（EntryContext）からフィルタ再評価用の DataFrame を作る
 
     Returns
     -------
-    pd.DataFrame
-        スイープ結果（filter_level, n_candidate, n_filter_pass, n_entry）
+    pd.DataFrame or None
+        time / atr / volatility / trend_strength / consecutive_losses / signal_side の列。
+        どのレコードの filters にも timestamp / atr / volatility / trend_strength が無ければ None（再評価できない）
     """
     rows = []
+    has_ctx = False
+    for rec in decisions:
+        filters_ctx = rec.get("filters") or {}
+        if not isinstance(filters_ctx, dict):
+            filters_ctx = {}
+        detail = rec.get("decision_detail") or {}
+        signal = detail.get("signal") or {}
+        row = {
+            "time": filters_ctx.get("timestamp") or rec.get("ts_jst"),
+            "atr": filters_ctx.get("atr"),
+            "volatility": filters_ctx.get("volatility"),
+            "trend_strength": filters_ctx.get("trend_strength"),
+            "consecutive_losses": filters_ctx.get("consecutive_losses"),
+            "signal_side": signal.get("side"),
+        }
+        has_ctx = has_ctx or "timestamp" in filters_ctx or any(
+            row[k] is not None for k in ("atr", "volatility", "trend_strength")
+        )
+        rows.append(row)
+    if not has_ctx:
+        return None
+    df = pd.DataFrame(rows)
+    df["time"] = _wall_clock(df["time"])
+    return df
+
+
+def _wall_clock(values: pd.Series) -> pd.Series:
+    """時刻文字列 → tz なしの現地時刻（時間帯フィルタは記録された時刻の hour で判定する）"""
+    try:
+        ts = pd.to_datetime(values, errors="coerce", format="ISO8601")
+        if getattr(ts.dt, "tz", None) is not None:
+            ts = ts.dt.tz_localize(None)
+        return ts
+    except (TypeError, ValueError):
+        # オフセットが混在する場合は1件ずつ
+        def one(v: Any) -> pd.Timestamp:
+            t = pd.to_datetime(v, errors="coerce")
+            return t.tz_localize(None) if t is not pd.NaT and t.tzinfo is not None else t
+
+        return pd.to_datetime(pd.Series([one(v) for v in values], index=values.index), errors="coerce")
+
+
+def _sweep_filter_level_legacy(
+    decisions: List[Dict[str, Any]], filter_levels: List[int]
+) -> pd.DataFrame:
+    """フィルタ文脈の無い決定レコード用：filter_pass は記録値のまま filter_level だけ差し替えて集計"""
+    rows = []
     for fl in filter_levels:
         # 一時的に filter_level を上書きして集計
         # 注意: filter_pass は実際のフィルタエンジンの結果なので、
@@ -372,6 +400,56 @@ def sweep_filter_level(
     return pd.DataFrame(rows)
 
 
+def sweep_filter_level(
+    decisions: List[Dict[str, Any]], filter_levels: List[int]
+) -> pd.DataFrame:
+    """
+    filter_level スイープ分析
+
+    決定レコードに EntryContext（timestamp / atr / volatility / trend_strength / consecutive_losses）が
+    残っていれば、StrategyFilterEngine.evaluate_frame で各 filter_level を配列演算で再評価する
+    （連敗回避は記録された連敗数で判定）。残っていなければ記録済みの filter_pass で集計する。
+
+    Parameters
+    ----------
+    decisions : list[dict]
+        決定レコードのリスト
+    filter_levels : list[int]
+        試行する filter_level のリスト
+
+    Returns
+    -------
+    pd.DataFrame
+        スイープ結果（filter_level, n_candidate, n_filter_pass, n_entry）
+    """
+    frame_df = _filter_frame_from_decisions(decisions)
+    if frame_df is None:
+        return _sweep_filter_level_legacy(decisions, filter_levels)
+
+    from app.core.filter import StrategyFilterEngine
+
+    engine = StrategyFilterEngine()
+    # threshold 到達候補数は filter_level に依存しない
+    n_candidate = aggregate_decisions(decisions)["n_candidate"]
+    has_signal = frame_df["signal_side"].notna().to_numpy()
+
+    rows = []
+    for fl in filter_levels:
+        frame = engine.evaluate_frame(frame_df, fl)
+        frame = engine.apply_losing_streak(frame, frame_df["consecutive_losses"].tolist())
+        rows.append(
+            {
+                "filter_level": fl,
+                "n_candidate": n_candidate,
+                "n_filter_pass": int(frame.passed.sum()),
+                # 実ENTRY数（シグナルあり かつ フィルタ通過）
+                "n_entry": int((frame.passed & has_signal).sum()),
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
 def print_summary(agg: Dict[str, Any]) -> None:
     """
     集計結果を表示
@@ -739,6 +739,9 @@ def run_backtest(
     exit_policy: dict | None = None,
     bt_circuit_breaker: "object | None" = None,
     threshold_override: float | None = None,
+    batch_inference: bool = True,
+    feature_store: bool = False,
+    event_core: bool = False,
 ) -> Path:
     """
     v5.1 準拠のバックテストを実行する
@@ -759,6 +762,14 @@ def run_backtest(
         プロファイル名
     symbol : str
         シンボル名
+    batch_inference : bool
+        True の場合、BacktestEngine はバーループ前に全バーを一括推論する
+    feature_store : bool
+        True の場合、特徴量を特徴量ストア（data/<SYM>/features）の計算済み行列から作る。
+        data_csv が data/<SYM>/ohlcv/<SYM>_<TF>.csv でない・行がそろわない場合は従来どおり計算する
+    event_core : bool
+        True の場合、BacktestEngine のイベント駆動コアでシミュレーションする
+        （trades.csv / equity_curve.csv は同じ。decisions.jsonl はエントリー・決済のバーのみ）
 
     Returns
     -------
@@ -820,6 +831,7 @@ def run_backtest(
     # v5.1 準拠の BacktestEngine を使用
     try:
         from app.core.backtest.backtest_engine import BacktestEngine
+        from app.services.backtest_deps import backtest_engine_deps
         from app.services.edition_guard import EditionGuard
 
         # EditionGuard から filter_level を取得
@@ -828,7 +840,11 @@ def run_backtest(
 
         # Fail-fast: feature_order must match active_model feature_order
         # active_model.json の feature_order のみを使用（推測・補完なし）
-        feat_df = build_features(df, params={})
+        if feature_store:
+            from app.services.feature_store import build_features_cached
+            feat_df = build_features_cached(df, symbol)
+        else:
+            feat_df = build_features(df, params={})
         meta = get_active_model_meta() or {}
         feature_order = meta.get("feature_order") or meta.get("features")
         if not feature_order:
@@ -860,6 +876,10 @@ def run_backtest(
             breaker=bt_circuit_breaker,
             threshold_override=threshold_override,
             threshold_source="cli" if threshold_override is not None else None,
+            batch_inference=batch_inference,
+            feature_store=feature_store,
+            event_core=event_core,
+            **backtest_engine_deps(),
         )
         used_th = getattr(engine, "best_threshold", None)
         src = getattr(engine, "_threshold_source", "default")
@@ -1275,6 +1295,9 @@ def main() -> None:
     ap.add_argument("--bt-max-loss-streak", type=int, default=None, help="BT-CB: 連敗数閾値。指定時のみBT-CB有効")
     ap.add_argument("--bt-cooldown-bars", type=int, default=0, help="BT-CB: トリップ後何バーで再許可するか（デフォルト: 0）")
     ap.add_argument("--threshold", type=float, default=None, help="閾値上書き（例: 0.55）。未指定時は active_model.json の best_threshold を使用")
+    ap.add_argument("--per-bar-inference", action="store_true", help="一括推論を無効化し、バーごとに推論する（検証用）")
+    ap.add_argument("--feature-store", action="store_true", help="特徴量ストア（data/<SYM>/features）の計算済み特徴量を使う（--csv が data/<SYM>/ohlcv の CSV の場合）")
+    ap.add_argument("--event-core", action="store_true", help="イベント駆動コアで実行する（trades/equity は同じ。decisions.jsonl はエントリー・決済のバーのみ）")
     args = ap.parse_args()
 
     csv = Path(args.csv).resolve()
@@ -1330,6 +1353,9 @@ def main() -> None:
             exit_policy=exit_policy,
             bt_circuit_breaker=bt_cb,
             threshold_override=getattr(args, "threshold", None),
+            batch_inference=not args.per_bar_inference,
+            feature_store=args.feature_store,
+            event_core=args.event_core,
         )
     else:
         p = run_wfo(
@@ -0,0 +1,93 @@
+# tools/bench_tree_inference.py
+"""
+Live 推論バックエンドのマイクロベンチマーク
+
+active_model.json のモデル（または --model）で、1行推論と一括推論の時間を
+元モデルの predict_proba と core.ai.tree_inference（木のフラット配列化）で比べ、
+出力がビット単位で一致するかも確認する。
+
+例:
+  python tools/bench_tree_inference.py --csv data/USDJPY/ohlcv/USDJPY_M5.csv --rows 2000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+# プロジェクトルートを sys.path に追加
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.model_registry import get_model_registry  # noqa: E402
+from app.strategies.ai_strategy import build_features  # noqa: E402
+
+
+def _time_per_call(fn: Callable[[], object], repeat: int) -> float:
+    fn()  # warm-up（バッファ確保・初回の import を除く）
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="compiled tree inference micro-benchmark")
+    ap.add_argument("--csv", required=True, help="OHLCV CSV（time, open, high, low, close, tick_volume ...）")
+    ap.add_argument("--model", default=None, help="モデルファイル（省略時は active_model.json のモデル）")
+    ap.add_argument("--rows", type=int, default=2000, help="使う末尾行数")
+    ap.add_argument("--repeat", type=int, default=500, help="1行推論の繰り返し回数")
+    args = ap.parse_args()
+
+    reg = get_model_registry()
+    entry = reg.load(args.model) if args.model else reg.active()
+    if entry is None:
+        print("[bench] model not found (builtin or missing active_model.json)")
+        return 1
+    compiled = entry.compiled()
+    if compiled is None:
+        print(f"[bench] model type {type(entry.model).__name__} is not supported by compiled inference")
+        return 1
+
+    df = pd.read_csv(args.csv, parse_dates=["time"])
+    feats = build_features(df, params={})
+    cols = list(entry.feature_order) or list(compiled.feature_name_)
+    X = feats[cols].tail(int(args.rows)).reset_index(drop=True)
+    row = X.iloc[[len(X) - 1]]
+    row_arr = row.to_numpy(dtype=compiled.input_dtype)[0]
+    forest = compiled.forest
+    print(
+        f"[bench] model={entry.model_path.name} trees={forest.n_trees} nodes={forest.feature.size} "
+        f"max_depth={forest.max_depth} rows={len(X)}"
+    )
+
+    ref = np.asarray(entry.model.predict_proba(X))
+    got = compiled.predict_proba(X)
+    same_batch = bool(np.array_equal(ref[:, -1], got[:, -1]))
+    same_row = all(
+        np.array_equal(entry.model.predict_proba(X.iloc[[i]]), compiled.predict_proba(X.iloc[[i]]))
+        for i in range(0, len(X), max(1, len(X) // 200))
+    )
+    print(f"[bench] bit-identical: batch={same_batch} single_row={same_row}")
+
+    rep = int(args.repeat)
+    results = [
+        ("single row: model.predict_proba(DataFrame)", _time_per_call(lambda: entry.model.predict_proba(row), rep)),
+        ("single row: compiled.predict_proba(DataFrame)", _time_per_call(lambda: compiled.predict_proba(row), rep)),
+        ("single row: forest.predict_row(ndarray)", _time_per_call(lambda: forest.predict_row(row_arr), rep)),
+        ("batch: model.predict_proba", _time_per_call(lambda: entry.model.predict_proba(X), 5)),
+        ("batch: compiled.predict_proba", _time_per_call(lambda: compiled.predict_proba(X), 5)),
+    ]
+    for name, sec in results:
+        print(f"  {name:<48} {sec * 1e6:12.1f} us/call")
+    return 0 if (same_batch and same_row) else 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
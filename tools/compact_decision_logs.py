@@ -0,0 +1,46 @@
+# tools/compact_decision_logs.py
+"""
+閉じた日次 logs/decisions_YYYY-MM-DD.jsonl を Parquet（logs/decisions_parquet/）に変換する。
+
+元の JSONL は消さない。変換済み・未変更のファイルはスキップする。
+pyarrow / fastparquet のどちらも無い環境では何もしない（リーダーは JSONL を読む）。
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+# プロジェクトルートを sys.path に追加
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.decision_store import compact_decision_logs, parquet_engine
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Compact closed daily decision logs into Parquet.")
+    ap.add_argument("--log-dir", type=str, default="", help="decisions_*.jsonl directory (default: <project>/logs).")
+    ap.add_argument("--include-today", action="store_true", help="also compact today's (UTC) file.")
+    ap.add_argument("--force", action="store_true", help="rewrite even if already compacted.")
+    args = ap.parse_args(argv)
+
+    if parquet_engine() is None:
+        print("[NG] pyarrow / fastparquet not installed")
+        return 2
+
+    written = compact_decision_logs(
+        args.log_dir or None,
+        include_today=args.include_today,
+        force=args.force,
+    )
+    for p in written:
+        print(f"[OK] {p}")
+    print(f"compacted={len(written)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
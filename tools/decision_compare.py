@@ -32,6 +32,8 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from app.services.decision_store import iter_decision_records
+
 
 def load_decision_logs(glob_pattern: str) -> List[Dict[str, Any]]:
     """
@@ -49,29 +51,19 @@ def load_decision_logs(glob_pattern: str) -> List[Dict[str, Any]]:
     """
     records: List[Dict[str, Any]] = []
     files = glob(glob_pattern, recursive=True)
-    
+
     for file_path in files:
         path = Path(file_path)
         if not path.exists():
             continue
-        
+
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        record = json.loads(line)
-                        # type=="decision" のみ対象
-                        if record.get("type") == "decision":
-                            records.append(record)
-                    except json.JSONDecodeError:
-                        continue
+            # type=="decision" のみ対象（コンパクション済みの日は Parquet の型付き列で絞ってから復元）
+            records.extend(iter_decision_records([path], types=["decision"]))
         except Exception as e:
             print(f"[warn] Failed to read {path}: {e}", file=sys.stderr)
             continue
-    
+
     return records
 
 
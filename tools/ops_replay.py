@@ -23,6 +23,7 @@ import json
 import subprocess
 from typing import Optional, Any
 
+from app.services.jsonl_tail import read_jsonl_tail
 from app.services.wfo_stability_service import evaluate_wfo_stability, load_saved_stability
 
 
@@ -117,20 +118,11 @@ def load_record_from_jsonl(log_path: Path, index: int = 1) -> Optional[dict]:
     """
     if not log_path.exists():
         return None
+    index = max(1, int(index))
 
-    records = []
     try:
-        with log_path.open("r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    rec = json.loads(line)
-                    records.append(rec)
-                except json.JSONDecodeError:
-                    # 壊れ行はスキップ
-                    continue
+        # 末尾から index 件だけ読む（新しい順）
+        records = read_jsonl_tail(log_path, index, use_cache=False)
     except Exception as e:
         print(f"Error reading {log_path}: {e}", file=sys.stderr)
         return None
@@ -139,8 +131,8 @@ def load_record_from_jsonl(log_path: Path, index: int = 1) -> Optional[dict]:
         print(f"Not enough records in {log_path} (found {len(records)}, requested index {index})", file=sys.stderr)
         return None
 
-    # 末尾から index 番目（records は時系列順と仮定）
-    target_rec = records[-index]
+    # 末尾から index 番目（records は新しい順）
+    target_rec = records[index - 1]
 
     # dictの中に last があればそれを採用（なければ行自体）
     if isinstance(target_rec, dict) and "last" in target_rec:
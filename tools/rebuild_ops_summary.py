@@ -0,0 +1,39 @@
+# tools/rebuild_ops_summary.py
+"""
+Ops履歴の集計状態 logs/ops/ops_summary_state.json を全履歴から作り直す。
+
+通常は summarize_ops_history / append_ops_result が追記分だけを畳み込むので不要。
+状態ファイルの破損・ログの手動編集の後などの復旧用。
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Optional
+
+# プロジェクトルートを sys.path に追加
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from app.services.ops_history_service import get_ops_history_service
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Rebuild logs/ops/ops_summary_state.json from all ops history logs.")
+    ap.parse_args(argv)
+
+    svc = get_ops_history_service()
+    svc.rebuild_summary_state()
+    summary = svc.summarize_ops_history(cache_sec=0, include_condition_mining=False)
+    print(f"[OK] {svc.project_root / 'logs' / 'ops' / 'ops_summary_state.json'}")
+    print(
+        f"week_total={summary.get('week_total')} month_total={summary.get('month_total')} "
+        f"consecutive_failures={summary.get('consecutive_failures')}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,16 +4,23 @@ VirtualBT パラメータスイープツール
 
 threshold と filter_level の組み合わせをスイープし、
 各条件の頻度KPIと成績をCSVに出力する。
+
+特徴量構築・モデル推論は最初に1回だけ行い（列ごとの .npy を memmap で共有）、
+各組み合わせのポジションシミュレーションをプロセスプールで並列実行する。
 """
 from __future__ import annotations
 
 import argparse
 import json
+import math
+import os
 import shutil
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 # プロジェクトルートを sys.path に追加
@@ -22,6 +29,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from app.core.backtest.backtest_engine import BacktestEngine
+from app.services.backtest_deps import backtest_engine_deps
 from app.strategies.ai_strategy import (
     build_features,
     get_active_model_meta,
@@ -77,6 +85,160 @@ def parse_filter_levels(filter_levels_str: str) -> List[int]:
     return [int(x.strip()) for x in filter_levels_str.split(",")]
 
 
+def load_period(
+    data_csv: Path,
+    start: str | None,
+    end: str | None,
+) -> Tuple[pd.DataFrame, Optional[pd.Timestamp]]:
+    """
+    OHLCV CSV を読み、ウォームアップ（start の1日前）込みで期間スライスする
+
+    Returns
+    -------
+    (DataFrame, trade_start_ts)
+        trade_start_ts は flat 初期化時に取引を始める時刻（start 未指定なら None）
+    """
+    # データ読み込み
+    df = pd.read_csv(data_csv, parse_dates=["time"])
+
+    # 期間スライス
+    if start:
+        try:
+            ts = pd.Timestamp(start)
+            trade_start_ts = ts
+            warm_start = (ts - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        except Exception:
+            warm_start = start
+            trade_start_ts = None
+    else:
+        warm_start = None
+        trade_start_ts = None
+
+    if warm_start:
+        df = df[df["time"] >= pd.Timestamp(warm_start)]
+    if end:
+        df = df[df["time"] <= pd.Timestamp(end)]
+    df = df.reset_index(drop=True)
+
+    if df.empty:
+        raise RuntimeError("No data in the requested period.")
+
+    return df, trade_start_ts
+
+
+def summarize_trial(
+    results: Dict[str, Any],
+    out_dir: Path,
+    threshold: float,
+    filter_level: int,
+) -> Dict[str, Any]:
+    """
+    BacktestEngine.run() の出力から1試行分の結果行（N_intent, N_actual, execution_rate, metrics 等）を作る
+    """
+    # 結果を集計
+    decisions_path = results.get("decisions")
+    trades_path = results.get("trades")
+    equity_path = results.get("equity_curve")
+    metrics_path = out_dir / "metrics.json"
+
+    # N_intent（decisions行数。イベント駆動コアは decisions.jsonl を間引くので run() の報告値）
+    n_intent = 0
+    if results.get("n_bars_evaluated") is not None:
+        n_intent = int(results["n_bars_evaluated"])
+    elif decisions_path and Path(decisions_path).exists():
+        with open(decisions_path, "r", encoding="utf-8") as f:
+            n_intent = sum(1 for line in f if line.strip())
+
+    # N_actual（trades行数、ヘッダー除く）
+    n_actual = 0
+    if trades_path and Path(trades_path).exists():
+        trades_df = pd.read_csv(trades_path)
+        n_actual = len(trades_df)
+
+    # execution_rate
+    execution_rate = n_actual / n_intent if n_intent > 0 else 0.0
+
+    # metrics.json を生成（backtest_run.py と同じロジック）
+    metrics = {}
+    if equity_path and Path(equity_path).exists():
+        try:
+            from tools.backtest_run import metrics_from_equity, trade_metrics
+            eq_df = pd.read_csv(equity_path)
+            base = metrics_from_equity(
+                pd.Series(eq_df["equity"].values, index=pd.to_datetime(eq_df["time"]))
+            )
+
+            if trades_path and Path(trades_path).exists():
+                trades_df = pd.read_csv(trades_path)
+                if not trades_df.empty:
+                    tmet = trade_metrics(trades_df)
+                    base.update(tmet)
+
+            # metrics.json を保存
+            with open(metrics_path, "w", encoding="utf-8") as f:
+                json.dump(base, f, ensure_ascii=False, indent=2)
+
+            metrics = base
+        except Exception as e:
+            print(f"[sweep] WARN: metrics.json生成失敗: {e}", flush=True)
+
+    # metrics.json から読み込み（既に存在する場合）
+    if not metrics and metrics_path.exists():
+        try:
+            with open(metrics_path, "r", encoding="utf-8") as f:
+                metrics = json.load(f)
+        except Exception:
+            pass
+
+    # 主要指標を抽出（存在するキーのみ）
+    result = {
+        "threshold": threshold,
+        "filter_level": filter_level,
+        "n_intent": n_intent,
+        "n_actual": n_actual,
+        "execution_rate": execution_rate,
+    }
+
+    # metrics から主要指標を追加（存在するキーのみ）
+    metric_keys = [
+        "total_return",
+        "max_drawdown",
+        "trades",
+        "win_rate",
+        "avg_pnl",
+        "profit_factor",
+        "sharpe_like",
+        "start_equity",
+        "end_equity",
+        "max_consec_win",
+        "max_consec_loss",
+        "avg_holding_bars",
+        "avg_holding_days",
+    ]
+    for key in metric_keys:
+        if key in metrics:
+            # NaN/Inf を None に変換（CSV出力時に問題になるため）
+            val = metrics[key]
+            if isinstance(val, float):
+                if math.isnan(val) or math.isinf(val):
+                    result[key] = None
+                else:
+                    result[key] = val
+            else:
+                result[key] = val
+
+    # total_pnl / profit_jpy の計算（end_equity - start_equity）
+    if "start_equity" in result and "end_equity" in result:
+        if result["start_equity"] is not None and result["end_equity"] is not None:
+            result["total_pnl"] = result["end_equity"] - result["start_equity"]
+            result["profit_jpy"] = result["total_pnl"]  # 別名
+        else:
+            result["total_pnl"] = None
+            result["profit_jpy"] = None
+
+    return result
+
+
 def run_single_backtest(
     data_csv: Path,
     start: str | None,
@@ -120,30 +282,7 @@ def run_single_backtest(
     dict
         結果（N_intent, N_actual, execution_rate, metrics 等）
     """
-    # データ読み込み
-    df = pd.read_csv(data_csv, parse_dates=["time"])
-
-    # 期間スライス
-    if start:
-        try:
-            ts = pd.Timestamp(start)
-            trade_start_ts = ts
-            warm_start = (ts - pd.Timedelta(days=1)).strftime("%Y-%m-%d")
-        except Exception:
-            warm_start = start
-            trade_start_ts = None
-    else:
-        warm_start = None
-        trade_start_ts = None
-
-    if warm_start:
-        df = df[df["time"] >= pd.Timestamp(warm_start)]
-    if end:
-        df = df[df["time"] <= pd.Timestamp(end)]
-    df = df.reset_index(drop=True)
-
-    if df.empty:
-        raise RuntimeError("No data in the requested period.")
+    df, trade_start_ts = load_period(data_csv, start, end)
 
     # BacktestEngine を初期化（threshold は active_model.json から取得されるが、
     # ここでは一時的に上書きするため、BacktestEngine の __init__ 後に best_threshold を上書き）
@@ -153,6 +292,8 @@ def run_single_backtest(
         filter_level=filter_level,
         init_position=init_position,
         trade_start_ts=trade_start_ts,
+        update_aggregate_decisions=False,
+        **backtest_engine_deps(),
     )
 
     # threshold を一時的に上書き
@@ -163,113 +304,136 @@ def run_single_backtest(
         # バックテスト実行（BacktestEngine.run() は元のOHLCVデータを受け取る）
         results = engine.run(df, out_dir, symbol=symbol)
 
-        # 結果を集計
-        decisions_path = results.get("decisions")
-        trades_path = results.get("trades")
-        equity_path = results.get("equity_curve")
-        metrics_path = out_dir / "metrics.json"
-
-        # N_intent（decisions行数）
-        n_intent = 0
-        if decisions_path and Path(decisions_path).exists():
-            with open(decisions_path, "r", encoding="utf-8") as f:
-                n_intent = sum(1 for line in f if line.strip())
-
-        # N_actual（trades行数、ヘッダー除く）
-        n_actual = 0
-        if trades_path and Path(trades_path).exists():
-            trades_df = pd.read_csv(trades_path)
-            n_actual = len(trades_df)
-
-        # execution_rate
-        execution_rate = n_actual / n_intent if n_intent > 0 else 0.0
-
-        # metrics.json を生成（backtest_run.py と同じロジック）
-        metrics = {}
-        if equity_path and Path(equity_path).exists():
-            try:
-                from tools.backtest_run import metrics_from_equity, trade_metrics
-                eq_df = pd.read_csv(equity_path)
-                base = metrics_from_equity(
-                    pd.Series(eq_df["equity"].values, index=pd.to_datetime(eq_df["time"]))
-                )
-
-                if trades_path and Path(trades_path).exists():
-                    trades_df = pd.read_csv(trades_path)
-                    if not trades_df.empty:
-                        tmet = trade_metrics(trades_df)
-                        base.update(tmet)
-
-                # metrics.json を保存
-                with open(metrics_path, "w", encoding="utf-8") as f:
-                    json.dump(base, f, ensure_ascii=False, indent=2)
-
-                metrics = base
-            except Exception as e:
-                print(f"[sweep] WARN: metrics.json生成失敗: {e}", flush=True)
-
-        # metrics.json から読み込み（既に存在する場合）
-        if not metrics and metrics_path.exists():
-            try:
-                with open(metrics_path, "r", encoding="utf-8") as f:
-                    metrics = json.load(f)
-            except Exception:
-                pass
-
-        # 主要指標を抽出（存在するキーのみ）
-        result = {
-            "threshold": threshold,
-            "filter_level": filter_level,
-            "n_intent": n_intent,
-            "n_actual": n_actual,
-            "execution_rate": execution_rate,
-        }
-
-        # metrics から主要指標を追加（存在するキーのみ）
-        metric_keys = [
-            "total_return",
-            "max_drawdown",
-            "trades",
-            "win_rate",
-            "avg_pnl",
-            "profit_factor",
-            "sharpe_like",
-            "start_equity",
-            "end_equity",
-            "max_consec_win",
-            "max_consec_loss",
-            "avg_holding_bars",
-            "avg_holding_days",
-        ]
-        for key in metric_keys:
-            if key in metrics:
-                # NaN/Inf を None に変換（CSV出力時に問題になるため）
-                val = metrics[key]
-                if isinstance(val, float):
-                    import math
-                    if math.isnan(val) or math.isinf(val):
-                        result[key] = None
-                    else:
-                        result[key] = val
-                else:
-                    result[key] = val
-
-        # total_pnl / profit_jpy の計算（end_equity - start_equity）
-        if "start_equity" in result and "end_equity" in result:
-            if result["start_equity"] is not None and result["end_equity"] is not None:
-                result["total_pnl"] = result["end_equity"] - result["start_equity"]
-                result["profit_jpy"] = result["total_pnl"]  # 別名
-            else:
-                result["total_pnl"] = None
-                result["profit_jpy"] = None
-
-        return result
+        return summarize_trial(results, out_dir, threshold, filter_level)
 
     finally:
         # threshold を復元
         engine.best_threshold = original_threshold
 
 
+# ---------------------------------------------------------------------------
+# 並列スイープ：特徴量構築と推論は1回だけ、試行ごとはポジションシミュレーションのみ
+# ---------------------------------------------------------------------------
+SHARED_DIRNAME = "_shared_inputs"
+
+# ワーカープロセス内で共有入力を保持する（initializer で1回だけロード）
+_worker_inputs: Optional[Tuple[pd.DataFrame, Optional[np.ndarray]]] = None
+
+
+def prepare_shared_inputs(
+    df: pd.DataFrame,
+    shared_dir: Path,
+    profile: str = "michibiki_std",
+    init_position: str = "flat",
+    capital: float = 100000.0,
+    trade_start_ts: Optional[pd.Timestamp] = None,
+    symbol: str = "USDJPY-",
+    feature_store: bool = False,
+) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    """
+    特徴量と推論確率を1回だけ作り、shared_dir に列ごとの .npy として保存する
+
+    threshold / filter_level に依存しない部分（特徴量構築・feature_order 検証・バッチ推論）を
+    まとめて済ませる。ワーカーは load_shared_inputs() で memmap として読む（再計算しない）。
+
+    Returns
+    -------
+    (df_features, probs)
+        probs はバッチ推論できない場合 None（各試行でバー単位推論になる）
+    """
+    engine = BacktestEngine(
+        profile=profile,
+        initial_capital=capital,
+        init_position=init_position,
+        trade_start_ts=trade_start_ts,
+        feature_store=feature_store,
+        **backtest_engine_deps(),
+    )
+    df_features = engine.prepare_features(df, symbol=symbol)
+    # 推論は proba_cache 経由（同じモデル・期間の再スイープは推論ゼロ）
+    probs = engine.predict_probs(df_features, symbol=symbol)
+
+    shared_dir.mkdir(parents=True, exist_ok=True)
+    columns = [str(c) for c in df_features.columns]
+    for i, col in enumerate(columns):
+        np.save(shared_dir / f"col{i:03d}.npy", df_features[col].to_numpy())
+    if probs is not None:
+        np.save(shared_dir / "probs.npy", np.ascontiguousarray(probs, dtype=np.float64))
+    with open(shared_dir / "meta.json", "w", encoding="utf-8") as f:
+        json.dump({"columns": columns, "n_rows": len(df_features), "has_probs": probs is not None}, f)
+    return df_features, probs
+
+
+def load_shared_inputs(shared_dir: Path) -> Tuple[pd.DataFrame, Optional[np.ndarray]]:
+    """prepare_shared_inputs() の保存物を読み取り専用 memmap で開き、(df_features, probs) に戻す"""
+    with open(shared_dir / "meta.json", "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    data = {
+        col: np.load(shared_dir / f"col{i:03d}.npy", mmap_mode="r")
+        for i, col in enumerate(meta["columns"])
+    }
+    df_features = pd.DataFrame(data, columns=meta["columns"], copy=False)
+    probs = np.load(shared_dir / "probs.npy", mmap_mode="r") if meta.get("has_probs") else None
+    return df_features, probs
+
+
+def _init_worker(shared_dir: str) -> None:
+    global _worker_inputs
+    _worker_inputs = load_shared_inputs(Path(shared_dir))
+
+
+def run_trial(
+    df_features: pd.DataFrame,
+    probs: Optional[np.ndarray],
+    threshold: float,
+    filter_level: int,
+    out_dir: Path,
+    profile: str = "michibiki_std",
+    symbol: str = "USDJPY-",
+    init_position: str = "flat",
+    capital: float = 100000.0,
+    trade_start_ts: Optional[pd.Timestamp] = None,
+    event_core: bool = False,
+) -> Dict[str, Any]:
+    """
+    共有済みの特徴量・推論確率で1試行を実行する（run_single_backtest の前処理を省いた版）
+
+    event_core=True ならイベント駆動コアでシミュレーションする（trades / equity は同じ）。
+    """
+    engine = BacktestEngine(
+        profile=profile,
+        initial_capital=capital,
+        filter_level=filter_level,
+        init_position=init_position,
+        trade_start_ts=trade_start_ts,
+        event_core=event_core,
+        # 試行ディレクトリは base_out_dir を共有するため、集約 decisions.jsonl は書かない（並列時に同じファイルを取り合う）
+        update_aggregate_decisions=False,
+        **backtest_engine_deps(),
+    )
+    # threshold は run_single_backtest と同じく __init__ 後に上書き
+    engine.best_threshold = threshold
+    results = engine.run(None, out_dir, symbol=symbol, features=df_features, probs=probs)
+    return summarize_trial(results, out_dir, threshold, filter_level)
+
+
+def _run_trial_in_worker(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    df_features, probs = _worker_inputs
+    return run_trial(df_features, probs, **kwargs)
+
+
+def _error_row(threshold: float, filter_level: int, e: BaseException) -> Dict[str, Any]:
+    # エラー時も行を追加（NaN値で）
+    return {
+        "threshold": threshold,
+        "filter_level": filter_level,
+        "n_intent": 0,
+        "n_actual": 0,
+        "execution_rate": 0.0,
+        "error": str(e)[:200],
+    }
+
+
 def sweep_parameters(
     data_csv: Path,
     start: str | None,
@@ -281,10 +445,17 @@ def sweep_parameters(
     symbol: str = "USDJPY-",
     init_position: str = "flat",
     capital: float = 100000.0,
+    workers: int = 1,
+    feature_store: bool = False,
+    event_core: bool = False,
 ) -> pd.DataFrame:
     """
     パラメータをスイープして結果を集計
 
+    データ読み込み・特徴量構築・推論は最初に1回だけ行い、各組み合わせは
+    ポジションシミュレーションのみをプロセスプールで並列実行する。
+    完了した試行から base_out_dir/sweep_results.jsonl に1行ずつ追記する。
+
     Parameters
     ----------
     data_csv : Path
@@ -307,58 +478,104 @@ def sweep_parameters(
         初期ポジション
     capital : float
         初期資本
+    workers : int
+        並列プロセス数（1 以下ならこのプロセスで順に実行）
+    feature_store : bool
+        True なら特徴量を app.services.feature_store の計算済み行列から作る
+        （data_csv が symbol の data/<SYM>/ohlcv の CSV の場合）
+    event_core : bool
+        True なら各試行をイベント駆動コア（app.core.backtest.event_core）で実行する
 
     Returns
     -------
     pd.DataFrame
-        スイープ結果（各組み合わせ1行）
+        スイープ結果（各組み合わせ1行、グリッド順）
     """
-    rows = []
-    total_combinations = len(thresholds) * len(filter_levels)
-    current = 0
+    grid = [(th, fl) for th in thresholds for fl in filter_levels]
+    total_combinations = len(grid)
 
-    for threshold in thresholds:
-        for filter_level in filter_levels:
-            current += 1
+    try:
+        df, trade_start_ts = load_period(data_csv, start, end)
+        shared_dir = base_out_dir / SHARED_DIRNAME
+        print(f"[sweep] 特徴量・推論を準備中（1回のみ）: {shared_dir}", flush=True)
+        df_features, probs = prepare_shared_inputs(
+            df,
+            shared_dir,
+            profile=profile,
+            init_position=init_position,
+            capital=capital,
+            trade_start_ts=trade_start_ts,
+            symbol=symbol,
+            feature_store=feature_store,
+        )
+    except Exception as e:
+        print(f"[sweep] エラー: {e}", flush=True)
+        return pd.DataFrame([_error_row(th, fl, e) for th, fl in grid])
+
+    tasks: List[Dict[str, Any]] = []
+    for threshold, filter_level in grid:
+        # 試行ごとの出力ディレクトリ
+        trial_dir = base_out_dir / f"th{threshold:.3f}_fl{filter_level}"
+        trial_dir.mkdir(parents=True, exist_ok=True)
+        tasks.append(
+            {
+                "threshold": threshold,
+                "filter_level": filter_level,
+                "out_dir": trial_dir,
+                "profile": profile,
+                "symbol": symbol,
+                "init_position": init_position,
+                "capital": capital,
+                "trade_start_ts": trade_start_ts,
+                "event_core": event_core,
+            }
+        )
+
+    stream_path = base_out_dir / "sweep_results.jsonl"
+    stream_path.write_text("", encoding="utf-8")
+    rows: Dict[int, Dict[str, Any]] = {}
+    done = 0
+
+    def _collect(i: int, result: Dict[str, Any]) -> None:
+        nonlocal done
+        done += 1
+        rows[i] = result
+        with open(stream_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+        if "error" in result:
+            print(f"[sweep] {done}/{total_combinations} エラー: threshold={result['threshold']:.3f}, filter_level={result['filter_level']}: {result['error']}", flush=True)
+        else:
             print(
-                f"[sweep] {current}/{total_combinations}: threshold={threshold:.3f}, filter_level={filter_level}",
+                f"[sweep] {done}/{total_combinations} 完了: threshold={result['threshold']:.3f}, "
+                f"filter_level={result['filter_level']}, execution_rate={result['execution_rate']:.4f}, n_actual={result['n_actual']}",
                 flush=True,
             )
 
-            # 試行ごとの出力ディレクトリ
-            trial_dir = base_out_dir / f"th{threshold:.3f}_fl{filter_level}"
-            trial_dir.mkdir(parents=True, exist_ok=True)
-
+    workers = max(1, min(int(workers or 1), total_combinations))
+    if workers == 1:
+        for i, task in enumerate(tasks):
             try:
-                result = run_single_backtest(
-                    data_csv=data_csv,
-                    start=start,
-                    end=end,
-                    threshold=threshold,
-                    filter_level=filter_level,
-                    out_dir=trial_dir,
-                    profile=profile,
-                    symbol=symbol,
-                    init_position=init_position,
-                    capital=capital,
-                )
-                rows.append(result)
-                print(f"[sweep] 完了: execution_rate={result['execution_rate']:.4f}, n_actual={result['n_actual']}", flush=True)
+                result = run_trial(df_features, probs, **task)
             except Exception as e:
-                print(f"[sweep] エラー: {e}", flush=True)
-                # エラー時も行を追加（NaN値で）
-                rows.append(
-                    {
-                        "threshold": threshold,
-                        "filter_level": filter_level,
-                        "n_intent": 0,
-                        "n_actual": 0,
-                        "execution_rate": 0.0,
-                        "error": str(e)[:200],
-                    }
-                )
-
-    return pd.DataFrame(rows)
+                result = _error_row(task["threshold"], task["filter_level"], e)
+            _collect(i, result)
+    else:
+        print(f"[sweep] {total_combinations} 試行を {workers} プロセスで実行", flush=True)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(str(shared_dir),),
+        ) as pool:
+            futures = {pool.submit(_run_trial_in_worker, task): i for i, task in enumerate(tasks)}
+            for fut in as_completed(futures):
+                i = futures[fut]
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    result = _error_row(tasks[i]["threshold"], tasks[i]["filter_level"], e)
+                _collect(i, result)
+
+    return pd.DataFrame([rows[i] for i in range(total_combinations)])
 
 
 def main() -> None:
@@ -416,6 +633,22 @@ def main() -> None:
         default=100000.0,
         help="初期資本（デフォルト: 100000.0）",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="並列プロセス数（デフォルト: 0=CPUコア数、1=直列）",
+    )
+    parser.add_argument(
+        "--feature-store",
+        action="store_true",
+        help="特徴量ストア（data/<SYM>/features）の計算済み特徴量を使う（--csv が data/<SYM>/ohlcv の CSV の場合）",
+    )
+    parser.add_argument(
+        "--event-core",
+        action="store_true",
+        help="イベント駆動コアで試行する（trades/equity は同じ。decisions.jsonl はエントリー・決済のバーのみ）",
+    )
     parser.add_argument(
         "--output",
         type=Path,
@@ -463,6 +696,9 @@ def main() -> None:
         symbol=args.symbol,
         init_position=args.init_position,
         capital=args.capital,
+        workers=args.workers or (os.cpu_count() or 1),
+        feature_store=args.feature_store,
+        event_core=args.event_core,
     )
 
     # CSV出力